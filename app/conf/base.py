@@ -1,4 +1,5 @@
 from pathlib import Path
+import tempfile
 import dj_database_url
 
 from .utils import env, env_bool, env_int, env_list, env_path
@@ -41,6 +42,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "aptos.middleware.PerformanceMonitoringMiddleware",
     "aptos.middleware.CacheInvalidationMiddleware",
+    "aptos.middleware.ReplicaStickinessMiddleware",
 ]
 
 ROOT_URLCONF = "app.urls"
@@ -101,6 +103,24 @@ def _default_database():
 
 DATABASES = {"default": _default_database()}
 
+# Réplica de leitura para relatórios, dashboards, exportações e tarefas
+# analíticas. Só o código dentro de aptos.db_router.leitura_replica() lê
+# dela; depois de uma escrita o cliente volta ao primário por
+# REPLICA_STICKY_SECONDS (cookie), para ver o que acabou de gravar.
+# DJANGO_REPLICA_READS=0 desliga o roteamento sem remover a URL. Nos
+# testes a réplica espelha o banco padrão (TEST MIRROR).
+REPLICA_DATABASE_URL = env("REPLICA_DATABASE_URL")
+if REPLICA_DATABASE_URL:
+    DATABASES["replica"] = dj_database_url.config(
+        default=REPLICA_DATABASE_URL,
+        conn_max_age=DEFAULT_CONN_AGE,
+        ssl_require=env_bool("DATABASE_SSL_REQUIRE", True),
+    )
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+REPLICA_LEITURAS = env_bool("DJANGO_REPLICA_READS", True)
+REPLICA_STICKY_SECONDS = env_int("DJANGO_REPLICA_STICKY_SECONDS", 15)
+DATABASE_ROUTERS = ["aptos.db_router.ReplicaRouter"]
+
 # Cache ------------------------------------------------------------------
 REDIS_URL = env("REDIS_URL", "redis://localhost:6379/1")
 
@@ -169,11 +189,89 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = env_int(
 DATA_UPLOAD_MAX_MEMORY_SIZE = env_int(
     "DJANGO_DATA_UPLOAD_MAX_MEMORY_SIZE", 200 * 1024 * 1024  # 200MB para suportar vídeos
 )
+# Quando definido (ex.: "/protected-media/"), serve_media apenas emite
+# X-Accel-Redirect e o nginx envia o arquivo via sendfile (ver nginx/conf.d).
+MEDIA_ACCEL_REDIRECT_PREFIX = env("DJANGO_MEDIA_ACCEL_REDIRECT_PREFIX")
+# Limite de intervalos por requisição Range (multipart/byteranges)
+MEDIA_MAX_RANGES = env_int("DJANGO_MEDIA_MAX_RANGES", 16)
+
 FILE_UPLOAD_PERMISSIONS = 0o644
 FILE_UPLOAD_TEMP_DIR = env_path(
     "DJANGO_FILE_UPLOAD_TEMP_DIR", BASE_DIR / "tmp" / "uploads"
 )
 
+# Uploads resumíveis (em partes): arquivos parciais e tamanho máximo por arquivo
+RESUMABLE_UPLOAD_DIR = env_path(
+    "DJANGO_RESUMABLE_UPLOAD_DIR", FILE_UPLOAD_TEMP_DIR / "resumable"
+)
+RESUMABLE_UPLOAD_MAX_SIZE = env_int(
+    "DJANGO_RESUMABLE_UPLOAD_MAX_SIZE", 2 * 1024 * 1024 * 1024  # 2GB
+)
+
+# Retenção de histórico: registros mais antigos que HISTORICO_RETENCAO_DIAS
+# são movidos em lotes para arquivos NDJSON compactados
+HISTORICO_RETENCAO_DIAS = env_int("DJANGO_HISTORICO_RETENCAO_DIAS", 730)
+HISTORICO_ARQUIVO_DIR = env_path(
+    "DJANGO_HISTORICO_ARQUIVO_DIR", BASE_DIR / "backups" / "historico"
+)
+HISTORICO_ARQUIVAMENTO_LOTE = env_int("DJANGO_HISTORICO_ARQUIVAMENTO_LOTE", 5000)
+# Pausa entre lotes para não disputar I/O e locks com o tráfego normal
+HISTORICO_ARQUIVAMENTO_PAUSA_MS = env_int("DJANGO_HISTORICO_ARQUIVAMENTO_PAUSA_MS", 200)
+
+# Histórico particionado por mês (PostgreSQL, opcional: manage.py
+# particionar_historico): partições criadas à frente e remoção das
+# desanexadas pela retenção (False mantém a tabela para exportação)
+HISTORICO_PARTICOES_FUTURAS = env_int("DJANGO_HISTORICO_PARTICOES_FUTURAS", 3)
+HISTORICO_PARTICOES_REMOVER = env_bool("DJANGO_HISTORICO_PARTICOES_REMOVER", False)
+
+# Índice de CPF/CNPJ no Redis usado pela validação em tempo real
+# (ignorado quando o cache padrão não é Redis)
+INDICE_DOCUMENTOS_ATIVO = env_bool("DJANGO_INDICE_DOCUMENTOS_ATIVO", True)
+
+# Relatórios SQL (RelatorioTemplate.query_sql): tempo limite por execução,
+# linhas por ida ao banco no cursor do servidor e cache dos resultados
+# com até RELATORIO_SQL_CACHE_MAX_LINHAS linhas
+RELATORIO_SQL_TIMEOUT_MS = env_int("DJANGO_RELATORIO_SQL_TIMEOUT_MS", 30000)
+RELATORIO_SQL_ITERSIZE = env_int("DJANGO_RELATORIO_SQL_ITERSIZE", 2000)
+RELATORIO_SQL_CACHE_TIMEOUT = env_int("DJANGO_RELATORIO_SQL_CACHE_TIMEOUT", 300)
+RELATORIO_SQL_CACHE_MAX_LINHAS = env_int("DJANGO_RELATORIO_SQL_CACHE_MAX_LINHAS", 10000)
+
+# Exportação PDF: tabelas com mais de RELATORIO_PDF_LINHAS_POR_PARTE linhas
+# são renderizadas em partes por um pool de RELATORIO_PDF_PROCESSOS
+# processos (por worker). RELATORIO_PDF_MAX_CONCORRENTES limita as
+# renderizações simultâneas no nó inteiro (vagas com flock em
+# RELATORIO_PDF_VAGAS_DIR); quem espera mais que
+# RELATORIO_PDF_ESPERA_SEGUNDOS recebe 503
+RELATORIO_PDF_LINHAS_POR_PARTE = env_int("DJANGO_RELATORIO_PDF_LINHAS_POR_PARTE", 2000)
+RELATORIO_PDF_PROCESSOS = env_int("DJANGO_RELATORIO_PDF_PROCESSOS", 2)
+RELATORIO_PDF_MAX_CONCORRENTES = env_int("DJANGO_RELATORIO_PDF_MAX_CONCORRENTES", 4)
+RELATORIO_PDF_ESPERA_SEGUNDOS = env_int("DJANGO_RELATORIO_PDF_ESPERA_SEGUNDOS", 60)
+RELATORIO_PDF_VAGAS_DIR = env_path(
+    "DJANGO_RELATORIO_PDF_VAGAS_DIR", Path(tempfile.gettempdir()) / "aptos-pdf-vagas"
+)
+
+# Dados dos relatórios (gerar_relatorio_*) em cache por alguns segundos:
+# o pacote ZIP (formato=bundle) e os downloads avulsos seguintes usam o
+# mesmo cálculo. Relatórios com mais linhas que o limite não vão ao cache
+RELATORIO_DADOS_CACHE_TIMEOUT = env_int("DJANGO_RELATORIO_DADOS_CACHE_TIMEOUT", 60)
+RELATORIO_DADOS_CACHE_MAX_LINHAS = env_int("DJANGO_RELATORIO_DADOS_CACHE_MAX_LINHAS", 20000)
+
+# Assinaturas de relatório (AssinaturaRelatorio): o despachante agendado no
+# Celery beat só envia as assinaturas vencidas para a fila
+# RELATORIO_ASSINATURAS_FILA entre as horas RELATORIO_ASSINATURAS_INICIO e
+# RELATORIO_ASSINATURAS_FIM (horário local, fim exclusivo). Pedidos
+# interativos iguais a um relatório pré-gerado há menos de
+# RELATORIO_ASSINATURAS_VALIDADE_HORAS recebem o arquivo gravado
+RELATORIO_ASSINATURAS_FILA = env("DJANGO_RELATORIO_ASSINATURAS_FILA", "relatorios")
+RELATORIO_ASSINATURAS_INICIO = env_int("DJANGO_RELATORIO_ASSINATURAS_INICIO", 0)
+RELATORIO_ASSINATURAS_FIM = env_int("DJANGO_RELATORIO_ASSINATURAS_FIM", 7)
+RELATORIO_ASSINATURAS_VALIDADE_HORAS = env_int("DJANGO_RELATORIO_ASSINATURAS_VALIDADE_HORAS", 24)
+
+# Importação de inquilinos: arquivos acima deste tamanho vão para segundo plano
+INQUILINOS_IMPORTACAO_LIMITE_SINCRONO = env_int(
+    "DJANGO_INQUILINOS_IMPORTACAO_LIMITE_SINCRONO", 2 * 1024 * 1024  # 2MB
+)
+
 # Django REST Framework --------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
@@ -182,6 +280,15 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "aptos.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "aptos.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
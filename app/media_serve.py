@@ -1,51 +1,239 @@
 import mimetypes
 import os
-from wsgiref.util import FileWrapper
+import uuid
+from urllib.parse import quote
+
 from django.conf import settings
-from django.http import FileResponse, Http404, HttpResponse
-from django.utils.http import http_date
-from django.utils.timezone import now
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
 
+# Block size used when the WSGI server cannot sendfile() and Django has to
+# stream the file itself. Large enough to keep syscall overhead low on videos.
+STREAM_BLOCK_SIZE = 64 * 1024
 
-def serve_media(request, path: str):
-    base = settings.MEDIA_ROOT
+
+class RangeFile:
+    """Read-only view over ``[start, start + length)`` of an open file.
+
+    Exposes ``fileno()``/``tell()`` so servers that implement
+    ``wsgi.file_wrapper`` with sendfile (gunicorn) send the slice straight from
+    the page cache, while ``read()`` never returns bytes past the range for
+    the plain streaming fallback.
+    """
+
+    def __init__(self, fileobj, start: int, length: int):
+        self._file = fileobj
+        self._remaining = length
+        self._file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def tell(self):
+        return self._file.tell()
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        self._file.close()
+
+
+def _resolve_path(path: str) -> str:
+    base = os.path.abspath(settings.MEDIA_ROOT)
     full_path = os.path.normpath(os.path.join(base, path))
-    if not full_path.startswith(os.path.abspath(base)):
+    if not full_path.startswith(base + os.sep):
         raise Http404
-    if not os.path.exists(full_path):
+    if not os.path.isfile(full_path):
         raise Http404
+    return full_path
+
+
+def make_etag(stat_result) -> str:
+    """Strong validator derived from mtime (ns) and size, like nginx does."""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def parse_range_header(header: str, file_size: int):
+    """Parse a ``Range`` header into a list of inclusive ``(start, end)`` pairs.
+
+    Returns ``None`` when the header is malformed or uses a unit other than
+    bytes (the header must then be ignored) and an empty list when no range
+    is satisfiable (416).
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start_str, sep, end_str = part.partition('-')
+        if not sep:
+            return None
+        start_str, end_str = start_str.strip(), end_str.strip()
+        try:
+            if not start_str:
+                # Suffix range: last N bytes
+                suffix = int(end_str)
+                if suffix <= 0:
+                    continue
+                start = max(0, file_size - suffix)
+                end = file_size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else file_size - 1
+        except ValueError:
+            return None
+        if start < 0 or (end_str and start_str and end < start):
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, min(end, file_size - 1)))
+
+    return ranges
+
+
+def _coalesce(ranges):
+    """Merge overlapping/adjacent ranges so each byte is sent only once."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_matches(request, etag: str, mtime: float) -> bool:
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        # Weak validators never match for If-Range (RFC 9110 13.1.5)
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _multipart_stream(full_path, ranges, boundary, content_type, file_size):
+    with open(full_path, 'rb') as f:
+        for start, end in ranges:
+            yield (
+                f'\r\n--{boundary}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n'
+            ).encode('ascii')
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(STREAM_BLOCK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        yield f'\r\n--{boundary}--\r\n'.encode('ascii')
+
+
+def _multipart_length(ranges, boundary, content_type, file_size):
+    total = 0
+    for start, end in ranges:
+        total += len(
+            f'\r\n--{boundary}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n'
+        )
+        total += end - start + 1
+    return total + len(f'\r\n--{boundary}--\r\n')
+
+
+def _set_validators(response, etag, mtime):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_media(request, path: str):
+    full_path = _resolve_path(path)
+    stat_result = os.stat(full_path)
+    file_size = stat_result.st_size
+    mtime = stat_result.st_mtime
+    etag = make_etag(stat_result)
 
     content_type, _ = mimetypes.guess_type(full_path)
     content_type = content_type or 'application/octet-stream'
 
-    file_size = os.path.getsize(full_path)
+    # Behind nginx: hand the file to the proxy so the kernel sends it
+    # (sendfile) and nginx takes care of Range/If-Range/ETag by itself.
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(path)
+        return response
+
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(mtime)
+    )
+    if conditional is not None:
+        return _set_validators(conditional, etag, mtime)
+
     range_header = request.headers.get('Range')
-    if range_header:
-        # Support bytes range requests: Range: bytes=start-end
-        try:
-            range_value = range_header.strip().split('=')[1]
-            start_str, end_str = (range_value.split('-') + [None])[:2]
-            start = int(start_str) if start_str else 0
-            end = int(end_str) if end_str else file_size - 1
-            start = max(0, start)
-            end = min(file_size - 1, end)
+    ranges = None
+    if range_header and request.method in ('GET', 'HEAD') and _if_range_matches(request, etag, mtime):
+        ranges = parse_range_header(range_header, file_size)
+
+    if ranges is not None:
+        ranges = _coalesce(ranges)
+        # Too many ranges is a known DoS vector; RFC 9110 allows ignoring them.
+        if len(ranges) > getattr(settings, 'MEDIA_MAX_RANGES', 16):
+            ranges = None
+
+    if ranges is not None:
+        if not ranges:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{file_size}'
+            return _set_validators(response, etag, mtime)
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
             length = end - start + 1
-            with open(full_path, 'rb') as f:
-                f.seek(start)
-                data = f.read(length)
-            resp = HttpResponse(data, status=206, content_type=content_type)
-            resp['Content-Range'] = f'bytes {start}-{end}/{file_size}'
-            resp['Accept-Ranges'] = 'bytes'
-            resp['Content-Length'] = str(length)
-            resp['Last-Modified'] = http_date(os.path.getmtime(full_path))
-            return resp
-        except Exception:
-            pass  # Fallback to full response
+            response = FileResponse(
+                RangeFile(open(full_path, 'rb'), start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response.block_size = STREAM_BLOCK_SIZE
+            response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+            response['Content-Length'] = str(length)
+            return _set_validators(response, etag, mtime)
+
+        boundary = uuid.uuid4().hex
+        response = StreamingHttpResponse(
+            _multipart_stream(full_path, ranges, boundary, content_type, file_size),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = str(
+            _multipart_length(ranges, boundary, content_type, file_size)
+        )
+        return _set_validators(response, etag, mtime)
 
     # Full file response
     response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    response.block_size = STREAM_BLOCK_SIZE
     response['Content-Length'] = str(file_size)
-    response['Accept-Ranges'] = 'bytes'
-    response['Last-Modified'] = http_date(os.path.getmtime(full_path))
-    return response
-
+    return _set_validators(response, etag, mtime)
@@ -4,6 +4,7 @@ from django.core.exceptions import FieldError
 from django.http import HttpResponseRedirect, QueryDict
 from django.contrib.admin.views.main import ChangeList
 
+from .db_router import leitura_replica
 from .models import (
     Aptos, BuilderFoto, Builders, Foto,
     Inquilino, InquilinoApartamento, HistoricoStatus, DocumentoInquilino, HistoricoAssociacao,
@@ -54,13 +55,19 @@ class BuildersAdmin(admin.ModelAdmin):
     
     # Otimização de queries para PostgreSQL
     def get_queryset(self, request):
-        from django.db.models import Count, Prefetch
+        from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+        from django.db.models.functions import Coalesce
+
+        # Contagem de fotos via subquery: evita o produto cartesiano de dois
+        # JOINs agregados com COUNT(DISTINCT)
+        fotos = BuilderFoto.objects.filter(builder=OuterRef('pk')).order_by().values(
+            'builder'
+        ).annotate(total=Count('pk')).values('total')
         return super().get_queryset(request).prefetch_related(
-            Prefetch('builder_fotos', queryset=BuilderFoto.objects.only('id', 'photos')),
-            'aptos_building_name'
+            Prefetch('builder_fotos', queryset=BuilderFoto.objects.only('id', 'builder', 'photos')),
         ).annotate(
-            apartment_count=Count('aptos_building_name', distinct=True),
-            photo_count=Count('builder_fotos', distinct=True)
+            apartment_count=Count('aptos_building_name'),
+            photo_count=Coalesce(Subquery(fotos, output_field=IntegerField()), 0)
         )
     
     def apartment_count(self, obj):
@@ -136,10 +143,11 @@ class BuildersAdmin(admin.ModelAdmin):
         extra_context = extra_context or {}
         if request.user.has_perm('aptos.view_builders'):
             qs = self.get_queryset(request)
-            extra_context.update({
-                'total_builders': qs.count(),
-                'builders_with_aptos': qs.filter(apartment_count__gt=0).count(),
-            })
+            with leitura_replica():
+                extra_context.update({
+                    'total_builders': qs.count(),
+                    'builders_with_aptos': qs.filter(apartment_count__gt=0).count(),
+                })
         return super().changelist_view(request, extra_context)
     
     fieldsets = (
@@ -296,11 +304,12 @@ class AptosAdmin(admin.ModelAdmin):
         extra_context = extra_context or {}
         if request.user.has_perm('aptos.view_aptos'):
             qs = self.get_queryset(request)
-            extra_context.update({
-                'total_aptos': qs.count(),
-                'available_aptos': qs.filter(is_available=True).count(),
-                'occupied_aptos': qs.filter(is_available=False).count(),
-            })
+            with leitura_replica():
+                extra_context.update({
+                    'total_aptos': qs.count(),
+                    'available_aptos': qs.filter(is_available=True).count(),
+                    'occupied_aptos': qs.filter(is_available=False).count(),
+                })
         return super().changelist_view(request, extra_context)
     
     fieldsets = (
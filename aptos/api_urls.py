@@ -8,6 +8,7 @@ from .views import (
     download_documento,
     listar_documentos_inquilino,
     validar_documento,
+    validar_documentos_lote,
     api_login,
     api_logout,
     api_logout_get,
@@ -24,7 +25,9 @@ router.register(r'inquilinos', views.InquilinoViewSet, basename='inquilinos')
 router.register(r'status', views.StatusViewSet, basename='status')
 router.register(r'associacoes', views.AssociacaoViewSet, basename='associacoes')
 router.register(r'relatorios', views.RelatorioViewSet, basename='relatorios')
+router.register(r'assinaturas-relatorio', views.AssinaturaRelatorioViewSet, basename='assinaturas-relatorio')
 router.register(r'locadores', views.LocadorViewSet, basename='locadores')
+router.register(r'uploads', views.UploadResumivelViewSet, basename='uploads')
 
 urlpatterns = [
     # API endpoints via router
@@ -32,6 +35,7 @@ urlpatterns = [
     path('health/', health, name='health'),
     # Validação de documentos (para validação em tempo real no frontend)
     path('validar-documento/', validar_documento, name='validar_documento'),
+    path('validar-documentos-lote/', validar_documentos_lote, name='validar_documentos_lote'),
     path('auth/login/', api_login, name='api_login'),
     path('auth/logout/', api_logout, name='api_logout'),
     path('auth/logout-alt/', api_logout_get, name='api_logout_get'),
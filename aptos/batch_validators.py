@@ -0,0 +1,158 @@
+"""
+Validação em lote de CPF e CNPJ com NumPy.
+
+Os documentos são convertidos em uma matriz uint8 (N, 11) ou (N, 14) e
+os dois dígitos verificadores de todas as linhas são calculados com
+somas ponderadas vetorizadas, em vez de um laço Python por dígito.
+Resultados e mensagens são os mesmos de validators.validar_cpf e
+validators.validar_cnpj.
+"""
+import re
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from .validators import CNPJS_INVALIDOS
+
+_RE_NAO_DIGITO = re.compile(r'[^0-9]')
+# Caracteres de formatação comuns removidos sem regex
+_TABELA_FORMATACAO = str.maketrans('', '', '.-/ ')
+
+PESOS_CPF_DV1 = np.arange(10, 1, -1)
+PESOS_CPF_DV2 = np.arange(11, 1, -1)
+PESOS_CNPJ_DV1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CNPJ_DV2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+class ResultadoLote(NamedTuple):
+    """Resultado alinhado à lista de entrada"""
+    validos: np.ndarray
+    documentos: List[str]
+    erros: List[Optional[str]]
+
+
+def limpar_documentos(documentos):
+    """Remove a formatação de cada documento, mantendo apenas dígitos"""
+    limpos = []
+    for documento in documentos:
+        if not documento:
+            limpos.append('')
+            continue
+        texto = str(documento).translate(_TABELA_FORMATACAO)
+        if not (texto.isascii() and texto.isdigit()):
+            texto = _RE_NAO_DIGITO.sub('', texto)
+        limpos.append(texto)
+    return limpos
+
+
+def _matriz_digitos(documentos, tamanho):
+    """Empilha documentos de mesmo tamanho em uma matriz (N, tamanho) uint8"""
+    if not documentos:
+        return np.empty((0, tamanho), dtype=np.uint8)
+    dados = ''.join(documentos).encode('ascii')
+    return np.frombuffer(dados, dtype=np.uint8).reshape(-1, tamanho) - ord('0')
+
+
+def _digito_verificador(digitos, pesos):
+    resto = (digitos @ pesos) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+def cpfs_validos_matriz(matriz):
+    """Máscara booleana de CPFs válidos para uma matriz (N, 11)"""
+    matriz = matriz.astype(np.int32, copy=False)
+    dv1 = _digito_verificador(matriz[:, :9], PESOS_CPF_DV1)
+    dv2 = _digito_verificador(matriz[:, :10], PESOS_CPF_DV2)
+    repetidos = (matriz == matriz[:, :1]).all(axis=1)
+    return (matriz[:, 9] == dv1) & (matriz[:, 10] == dv2) & ~repetidos
+
+
+def cnpjs_validos_matriz(matriz):
+    """Máscara booleana de CNPJs válidos para uma matriz (N, 14)"""
+    matriz = matriz.astype(np.int32, copy=False)
+    dv1 = _digito_verificador(matriz[:, :12], PESOS_CNPJ_DV1)
+    dv2 = _digito_verificador(matriz[:, :13], PESOS_CNPJ_DV2)
+    repetidos = (matriz == matriz[:, :1]).all(axis=1)
+    return (matriz[:, 12] == dv1) & (matriz[:, 13] == dv2) & ~repetidos
+
+
+def _validar(documentos, tamanho, kernel, nome, invalidos_conhecidos=()):
+    limpos = limpar_documentos(documentos)
+    validos = np.zeros(len(limpos), dtype=bool)
+    erros = [None] * len(limpos)
+
+    indices = []
+    for i, (original, documento) in enumerate(zip(documentos, limpos)):
+        if not original:
+            erros[i] = f'{nome} é obrigatório.'
+        elif len(documento) != tamanho:
+            erros[i] = f'{nome} deve ter {tamanho} dígitos.'
+        else:
+            indices.append(i)
+
+    if indices:
+        matriz = _matriz_digitos([limpos[i] for i in indices], tamanho)
+        indices = np.asarray(indices)
+        validos[indices] = kernel(matriz)
+
+    if invalidos_conhecidos:
+        for i in np.flatnonzero(validos):
+            if limpos[i] in invalidos_conhecidos:
+                validos[i] = False
+
+    for i in indices:
+        if not validos[i]:
+            erros[i] = f'{nome} inválido.'
+
+    return ResultadoLote(validos, limpos, erros)
+
+
+def validar_cpfs(documentos):
+    """Valida uma sequência de CPFs (com ou sem formatação)"""
+    documentos = list(documentos)
+    return _validar(documentos, 11, cpfs_validos_matriz, 'CPF')
+
+
+def validar_cnpjs(documentos):
+    """Valida uma sequência de CNPJs (com ou sem formatação)"""
+    documentos = list(documentos)
+    return _validar(documentos, 14, cnpjs_validos_matriz, 'CNPJ', frozenset(CNPJS_INVALIDOS))
+
+
+def validar_documentos(documentos, tipo=None):
+    """Valida CPFs e CNPJs misturados.
+
+    Sem tipo, o tipo de cada documento é inferido pela quantidade de
+    dígitos (11 para CPF, 14 para CNPJ). Retorna, além do ResultadoLote,
+    a lista de tipos ('CPF'/'CNPJ'/None) alinhada à entrada.
+    """
+    documentos = list(documentos)
+    if tipo == 'CPF':
+        return validar_cpfs(documentos), ['CPF'] * len(documentos)
+    if tipo == 'CNPJ':
+        return validar_cnpjs(documentos), ['CNPJ'] * len(documentos)
+
+    limpos = limpar_documentos(documentos)
+    tipos = [
+        'CPF' if len(d) == 11 else 'CNPJ' if len(d) == 14 else None
+        for d in limpos
+    ]
+    validos = np.zeros(len(limpos), dtype=bool)
+    erros = [None] * len(limpos)
+
+    for nome, funcao in (('CPF', validar_cpfs), ('CNPJ', validar_cnpjs)):
+        indices = [i for i, t in enumerate(tipos) if t == nome]
+        if not indices:
+            continue
+        parcial = funcao([limpos[i] for i in indices])
+        validos[indices] = parcial.validos
+        for i, erro in zip(indices, parcial.erros):
+            erros[i] = erro
+
+    for i, t in enumerate(tipos):
+        if t is None:
+            erros[i] = 'Documento é obrigatório.' if not documentos[i] else (
+                'Documento deve ter 11 (CPF) ou 14 (CNPJ) dígitos.'
+            )
+
+    return ResultadoLote(validos, limpos, erros), tipos
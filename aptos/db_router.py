@@ -0,0 +1,87 @@
+"""
+Roteamento de leituras analíticas para a réplica de leitura
+
+Relatórios, dashboards, exportações e tarefas analíticas fazem consultas
+pesadas que não precisam disputar o primário com as escritas. Esse código
+entra explicitamente em `leitura_replica()` (gerenciador de contexto ou
+decorador); fora dele todas as leituras continuam no primário, então
+nenhum caminho de escrita passa a ler dados atrasados por acaso.
+
+A réplica só é usada quando o alias `replica` existe em DATABASES
+(REPLICA_DATABASE_URL) e REPLICA_LEITURAS está ligado. Depois de uma
+escrita o cliente recebe um cookie (ReplicaStickinessMiddleware) e, por
+REPLICA_STICKY_SECONDS, todas as suas leituras voltam ao primário: quem
+acabou de gravar vê o próprio dado mesmo com atraso de replicação.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ALIAS_REPLICA = 'replica'
+
+_usar_replica = ContextVar('aptos_usar_replica', default=False)
+_forcar_primario = ContextVar('aptos_forcar_primario', default=False)
+
+
+def replica_disponivel():
+    return ALIAS_REPLICA in settings.DATABASES and getattr(settings, 'REPLICA_LEITURAS', True)
+
+
+def alias_leitura():
+    """Alias para as leituras do contexto atual"""
+    if _usar_replica.get() and not _forcar_primario.get() and replica_disponivel():
+        return ALIAS_REPLICA
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def leitura_replica():
+    """Leituras dentro do bloco vão para a réplica (escritas seguem no primário)"""
+    token = _usar_replica.set(True)
+    try:
+        yield
+    finally:
+        _usar_replica.reset(token)
+
+
+def na_replica(funcao):
+    """Decorador equivalente a executar `funcao` dentro de leitura_replica()"""
+    @wraps(funcao)
+    def envolvida(*args, **kwargs):
+        with leitura_replica():
+            return funcao(*args, **kwargs)
+    return envolvida
+
+
+@contextmanager
+def leitura_primaria():
+    """Força o primário no bloco, mesmo dentro de leitura_replica()"""
+    token = _forcar_primario.set(True)
+    try:
+        yield
+    finally:
+        _forcar_primario.reset(token)
+
+
+class ReplicaRouter:
+    """Leituras na réplica só dentro de leitura_replica(); escritas e migrações no primário"""
+
+    def db_for_read(self, model, **hints):
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            # Relacionados de um objeto vêm do mesmo banco que ele
+            return instancia._state.db
+        return alias_leitura()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplica têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != ALIAS_REPLICA
@@ -0,0 +1,89 @@
+"""
+Expressões SQL reutilizáveis pelos managers e serializers
+"""
+from django.db import models
+from django.db.models import Aggregate, Case, F, Value, When
+from django.db.models.functions import Coalesce, Concat, Length, NullIf, Substr
+from django.db.models.lookups import Exact
+
+# Separador improvável em dados reais (ASCII "unit separator")
+SEPARADOR_LISTA = '\x1f'
+
+
+class ListaTextoField(models.TextField):
+    """Campo de saída para listas de texto agregadas.
+
+    PostgreSQL devolve um array (lista Python); SQLite devolve uma string
+    concatenada. Ambos viram uma lista ordenada.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = value.split(SEPARADOR_LISTA) if value else []
+        return sorted(value)
+
+
+class ListaAgregada(Aggregate):
+    """ARRAY_AGG no PostgreSQL, GROUP_CONCAT como fallback no SQLite"""
+
+    function = 'ARRAY_AGG'
+    name = 'ListaAgregada'
+    output_field = ListaTextoField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            function='GROUP_CONCAT',
+            template=f"%(function)s(%(expressions)s, '{SEPARADOR_LISTA}')",
+            **extra_context,
+        )
+
+
+def _formatar_documento(campo, tamanho, partes):
+    """Formata um documento só com dígitos; mantém o original se o tamanho diferir"""
+    pedacos = []
+    for inicio, fim, separador in partes:
+        pedacos.append(Substr(campo, inicio, fim - inicio + 1))
+        if separador:
+            pedacos.append(Value(separador))
+    return Case(
+        When(Exact(Length(campo), tamanho), then=Concat(*pedacos)),
+        default=Coalesce(F(campo), Value('')),
+        output_field=models.CharField(),
+    )
+
+
+def cpf_formatado():
+    """Equivalente SQL de utils.formatar_cpf para a coluna cpf"""
+    return _formatar_documento(
+        'cpf', 11, [(1, 3, '.'), (4, 6, '.'), (7, 9, '-'), (10, 11, '')]
+    )
+
+
+def cnpj_formatado():
+    """Equivalente SQL de utils.formatar_cnpj para a coluna cnpj"""
+    return _formatar_documento(
+        'cnpj', 14,
+        [(1, 2, '.'), (3, 5, '.'), (6, 8, '/'), (9, 12, '-'), (13, 14, '')],
+    )
+
+
+def nome_exibicao():
+    """Nome completo para PF; razão social (ou nome fantasia) para PJ"""
+    return Case(
+        When(tipo='PF', then=F('nome_completo')),
+        default=Coalesce(NullIf(F('razao_social'), Value('')), F('nome_fantasia')),
+        output_field=models.CharField(),
+    )
+
+
+def documento_formatado():
+    """CPF formatado para PF, CNPJ formatado para PJ"""
+    return Case(
+        When(tipo='PF', then=cpf_formatado()),
+        default=cnpj_formatado(),
+        output_field=models.CharField(),
+    )
@@ -0,0 +1,62 @@
+"""
+Management command para arquivar histórico antigo em lotes
+"""
+from django.core.management.base import BaseCommand
+
+from aptos.services.arquivamento_service import MODELOS, ArquivamentoHistoricoService
+
+
+class Command(BaseCommand):
+    help = (
+        'Move histórico de status e de associações mais antigo que a retenção para '
+        'arquivos NDJSON compactados e remove do banco em lotes (retomável)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo',
+            choices=list(MODELOS),
+            help='Arquiva apenas um dos históricos (padrão: todos)'
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            help='Retenção em dias (padrão: HISTORICO_RETENCAO_DIAS)'
+        )
+        parser.add_argument(
+            '--tamanho-lote',
+            type=int,
+            help='Faixa de ids arquivada e removida por transação'
+        )
+        parser.add_argument(
+            '--pausa-ms',
+            type=int,
+            help='Pausa entre lotes em milissegundos'
+        )
+        parser.add_argument(
+            '--max-lotes',
+            type=int,
+            help='Interrompe após N lotes; a próxima execução continua do checkpoint'
+        )
+
+    def handle(self, *args, **options):
+        service = ArquivamentoHistoricoService(
+            tamanho_lote=options['tamanho_lote'],
+            pausa_ms=options['pausa_ms'],
+        )
+        modelos = [options['modelo']] if options['modelo'] else list(MODELOS)
+
+        for modelo in modelos:
+            checkpoint = service.arquivar(
+                modelo, dias=options['dias'], max_lotes=options['max_lotes']
+            )
+            if checkpoint is None:
+                self.stdout.write(f"{modelo}: nada a arquivar")
+                continue
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{modelo}: {checkpoint.arquivados} registros em {checkpoint.arquivos} "
+                    f"arquivos ({checkpoint.get_status_display()}, último id {checkpoint.ultimo_id})"
+                )
+            )
@@ -0,0 +1,55 @@
+"""
+Management command para finalizar associações cuja data fim já passou
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from aptos.models import InquilinoApartamento
+
+
+class Command(BaseCommand):
+    help = 'Finaliza em lote as associações vencidas e recalcula a disponibilidade dos apartamentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data',
+            help='Data de referência AAAA-MM-DD (padrão: hoje)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas lista o que seria alterado'
+        )
+        parser.add_argument(
+            '--sincronizar-todos',
+            action='store_true',
+            help='Recalcula também a disponibilidade de todos os apartamentos'
+        )
+
+    def handle(self, *args, **options):
+        hoje = None
+        if options['data']:
+            hoje = parse_date(options['data'])
+            if hoje is None:
+                raise CommandError('Data deve estar no formato AAAA-MM-DD')
+
+        resultado = InquilinoApartamento.objects.expirar_encerradas(
+            hoje=hoje, simular=options['dry_run']
+        )
+
+        prefixo = '[DRY-RUN] ' if options['dry_run'] else ''
+        self.stdout.write(
+            f"{prefixo}{resultado['expiradas']} associações expiradas "
+            f"em {len(resultado['apartamentos'])} apartamentos"
+        )
+        if resultado['associacoes']:
+            self.stdout.write(f"Associações: {', '.join(map(str, resultado['associacoes']))}")
+
+        if options['dry_run']:
+            return
+
+        liberados = resultado['apartamentos_liberados']
+        if options['sincronizar_todos']:
+            liberados += InquilinoApartamento.objects.sincronizar_disponibilidade()
+
+        self.stdout.write(self.style.SUCCESS(f"{liberados} apartamentos com disponibilidade corrigida"))
@@ -0,0 +1,53 @@
+"""
+Management command para gerar relatórios de assinaturas sem o Celery
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from aptos.models import AssinaturaRelatorio
+from aptos.services.assinatura_relatorio_service import assinatura_relatorio_service
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera no próprio processo as assinaturas de relatório vencidas (o que o '
+        'despachante do Celery beat enviaria para a fila) ou uma assinatura específica'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--assinatura',
+            type=int,
+            help='Gera agora a assinatura informada, sem alterar a agenda'
+        )
+        parser.add_argument(
+            '--fora-do-horario',
+            action='store_true',
+            help='Gera as vencidas mesmo fora da janela RELATORIO_ASSINATURAS_INICIO..FIM'
+        )
+
+    def handle(self, *args, **options):
+        if options['assinatura']:
+            if not AssinaturaRelatorio.objects.filter(pk=options['assinatura']).exists():
+                raise CommandError(f"Assinatura {options['assinatura']} não encontrada")
+            ids = [options['assinatura']]
+        else:
+            ids = assinatura_relatorio_service.reservar_vencidas(
+                ignorar_horario=options['fora_do_horario']
+            )
+
+        falhas = 0
+        for assinatura_id in ids:
+            try:
+                execucao = assinatura_relatorio_service.gerar(assinatura_id)
+            except Exception as e:
+                falhas += 1
+                self.stderr.write(f"Assinatura {assinatura_id}: {e}")
+                continue
+            self.stdout.write(
+                f"Assinatura {assinatura_id}: {execucao.arquivo_gerado.name} "
+                f"({execucao.total_registros} registros)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"{len(ids) - falhas} relatórios gerados"))
+        if falhas:
+            raise CommandError(f"{falhas} assinaturas falharam")
@@ -0,0 +1,65 @@
+"""
+Management command para importação em lote de inquilinos (CSV/XLSX)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from aptos.models import ImportacaoInquilinos
+from aptos.services.importacao_service import (
+    ImportacaoError,
+    ImportacaoInquilinosService,
+    TAMANHO_LOTE,
+)
+
+
+class Command(BaseCommand):
+    help = 'Importa inquilinos de uma planilha ou processa importações pendentes da API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'arquivo',
+            nargs='?',
+            help='Planilha CSV ou XLSX a importar'
+        )
+        parser.add_argument(
+            '--pendentes',
+            action='store_true',
+            help='Processa as importações enviadas pela API que aguardam processamento'
+        )
+        parser.add_argument(
+            '--tamanho-lote',
+            type=int,
+            default=TAMANHO_LOTE,
+            help='Linhas validadas e inseridas por lote'
+        )
+
+    def handle(self, *args, **options):
+        service = ImportacaoInquilinosService(tamanho_lote=options['tamanho_lote'])
+
+        if options['pendentes']:
+            pendentes = ImportacaoInquilinos.objects.filter(status='PENDENTE')
+            for importacao_id in pendentes.values_list('id', flat=True):
+                importacao = service.processar(importacao_id)
+                self.stdout.write(
+                    f"{importacao.nome_arquivo}: {importacao.status} "
+                    f"({importacao.criados} criados, {importacao.com_erro} com erro)"
+                )
+            return
+
+        if not options['arquivo']:
+            raise CommandError('Informe o arquivo ou use --pendentes')
+
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = service.importar(arquivo, options['arquivo'])
+        except (OSError, ImportacaoError) as e:
+            raise CommandError(str(e))
+
+        for erro in resultado['erros']:
+            self.stdout.write(self.style.WARNING(f"Linha {erro['linha']}: {erro['erros']}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['criados']} inquilinos criados de {resultado['total_linhas']} "
+                f"linhas ({resultado['com_erro']} com erro)"
+            )
+        )
@@ -0,0 +1,67 @@
+"""
+Management command para particionar o histórico por mês (PostgreSQL)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from aptos.services.particionamento_service import (
+    MODELOS,
+    ParticionamentoError,
+    particionamento_service,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Converte as tabelas de histórico de status e de associações em partições '
+        'mensais por timestamp (bloqueia as tabelas durante a cópia) ou executa a '
+        'manutenção das partições'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo',
+            choices=list(MODELOS),
+            help='Converte apenas um dos históricos (padrão: todos)'
+        )
+        parser.add_argument(
+            '--meses-futuros',
+            type=int,
+            help='Partições criadas à frente do mês atual'
+        )
+        parser.add_argument(
+            '--manutencao',
+            action='store_true',
+            help='Apenas cria partições futuras e desanexa as expiradas'
+        )
+        parser.add_argument(
+            '--remover',
+            action='store_true',
+            help='Na manutenção, remove (DROP) as partições desanexadas'
+        )
+
+    def handle(self, *args, **options):
+        if not particionamento_service.disponivel():
+            raise CommandError('Particionamento disponível apenas no PostgreSQL')
+
+        if options['manutencao']:
+            resultado = particionamento_service.manter(remover=options['remover'] or None)
+            for modelo, alteracoes in resultado.items():
+                self.stdout.write(
+                    f"{modelo}: criadas {alteracoes['criadas'] or '-'}; "
+                    f"desanexadas {alteracoes['desanexadas'] or '-'}"
+                )
+            return
+
+        modelos = [options['modelo']] if options['modelo'] else list(MODELOS)
+        for modelo in modelos:
+            try:
+                convertida = particionamento_service.converter(
+                    modelo, meses_futuros=options['meses_futuros']
+                )
+            except ParticionamentoError as e:
+                raise CommandError(str(e))
+
+            if convertida:
+                self.stdout.write(self.style.SUCCESS(f"{modelo}: tabela convertida para partições mensais"))
+            else:
+                self.stdout.write(f"{modelo}: já particionada")
@@ -0,0 +1,27 @@
+"""
+Management command para reconstruir o índice de CPF/CNPJ no Redis
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from aptos.services.indice_documentos_service import TAMANHO_LOTE, indice_documentos
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a partir do banco o índice de documentos usado na validação em tempo real'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanho-lote',
+            type=int,
+            default=TAMANHO_LOTE,
+            help='Documentos enviados ao Redis por comando'
+        )
+
+    def handle(self, *args, **options):
+        if indice_documentos.cliente is None:
+            raise CommandError(
+                'Índice desativado: requer cache Redis e DJANGO_INDICE_DOCUMENTOS_ATIVO habilitado'
+            )
+
+        total = indice_documentos.reconstruir(tamanho_lote=options['tamanho_lote'])
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruído com {total} documentos'))
@@ -0,0 +1,61 @@
+"""
+Management command para gravar snapshots da distribuição de status
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from aptos.services.status_snapshot_service import PERIODICIDADES, SEMANAL, status_snapshot_service
+
+
+class Command(BaseCommand):
+    help = (
+        'Grava o snapshot diário e/ou semanal de status dos inquilinos; com --periodos '
+        'recompõe também os períodos anteriores ainda cobertos pelo histórico'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodicidade',
+            choices=PERIODICIDADES,
+            help='Grava apenas uma das periodicidades (padrão: ambas)'
+        )
+        parser.add_argument(
+            '--data',
+            help='Data dentro do último período a gravar AAAA-MM-DD (padrão: último encerrado)'
+        )
+        parser.add_argument(
+            '--periodos',
+            type=int,
+            default=1,
+            help='Quantidade de períodos gravados, do mais recente para trás'
+        )
+
+    def handle(self, *args, **options):
+        data = None
+        if options['data']:
+            data = parse_date(options['data'])
+            if data is None:
+                raise CommandError('Data deve estar no formato AAAA-MM-DD')
+        if options['periodos'] < 1:
+            raise CommandError('--periodos deve ser pelo menos 1')
+
+        periodicidades = [options['periodicidade']] if options['periodicidade'] else PERIODICIDADES
+        for periodicidade in periodicidades:
+            referencia = data or status_snapshot_service.ultimo_periodo(periodicidade)
+            passo = 7 if periodicidade == SEMANAL else 1
+            for n in range(options['periodos']):
+                try:
+                    snapshots = status_snapshot_service.capturar(
+                        periodicidade, referencia - timedelta(days=passo * n)
+                    )
+                except ValueError as e:
+                    raise CommandError(str(e))
+
+                self.stdout.write(
+                    f"{periodicidade} {snapshots[0].data_referencia}: "
+                    + ', '.join(f"{s.status} {s.total}" for s in snapshots)
+                )
+
+        self.stdout.write(self.style.SUCCESS('Snapshots gravados'))
@@ -1,32 +1,51 @@
 """Custom managers para otimização de queries."""
 from django.db import models
 from django.core.cache import cache
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Q, Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from datetime import date
 
 
 class InquilinoOptimizedManager(models.Manager):
     """Manager otimizado para consultas de inquilinos."""
 
-    def get_list_optimized(self, **filters):
-        """Lista otimizada com select_related e prefetch_related."""
+    def anotacoes_lista(self, *aliases):
+        """Campos derivados da listagem como expressões SQL.
+
+        Contagem e unidades ativas vêm de subqueries correlacionadas, e não
+        de JOINs, para não serem multiplicadas por filtros em relações
+        multivaloradas aplicados depois (ex.: busca por apartamento).
+        Sem aliases, retorna todas.
+        """
+        from .expressions import ListaAgregada, ListaTextoField, documento_formatado, nome_exibicao
         from .models import InquilinoApartamento
 
-        # Prefetch das associações ativas
-        active_associations = Prefetch(
-            'associacoes_apartamento',
-            queryset=InquilinoApartamento.objects.filter(ativo=True).select_related(
-                'apartamento'
+        ativas = InquilinoApartamento.objects.filter(
+            inquilino=OuterRef('pk'), ativo=True
+        ).order_by().values('inquilino')
+
+        anotacoes = {
+            'nome_exibicao_db': nome_exibicao(),
+            'documento_db': documento_formatado(),
+            'total_apartamentos': Coalesce(
+                Subquery(ativas.annotate(total=Count('pk')).values('total')),
+                0,
+                output_field=IntegerField(),
             ),
-            to_attr='associacoes_ativas'
-        )
+            'unidades_ativas_db': Subquery(
+                ativas.annotate(
+                    unidades=ListaAgregada('apartamento__unit_number')
+                ).values('unidades'),
+                output_field=ListaTextoField(),
+            ),
+        }
+        if aliases:
+            return {alias: anotacoes[alias] for alias in aliases}
+        return anotacoes
 
-        return self.filter(**filters).prefetch_related(
-            active_associations,
-            'associacoes_apartamento__apartamento',
-        ).annotate(
-            total_apartamentos=Count('associacoes_apartamento', filter=Q(associacoes_apartamento__ativo=True))
-        )
+    def get_list_optimized(self, **filters):
+        """Lista com todos os campos derivados calculados em uma única query."""
+        return self.filter(**filters).annotate(**self.anotacoes_lista())
 
     def get_dashboard_metrics(self, use_cache=True):
         """Métricas para dashboard com cache."""
@@ -123,6 +142,122 @@ class InquilinoApartamentoOptimizedManager(models.Manager):
             data_inicio__lte=date.today()
         ).select_related('inquilino', 'apartamento')
 
+    def ocupando_periodo(self, inicio, fim):
+        """Associações cujo período de ocupação intercepta [inicio, fim].
+
+        Ocupação: associação ativa (sem data fim = por tempo indeterminado)
+        ou finalizada com data fim. Inativas sem data fim não ocupam.
+        """
+        return self.filter(
+            Q(data_fim__gte=inicio) | Q(data_fim__isnull=True, ativo=True),
+            data_inicio__lte=fim,
+        )
+
+    def calendario_apartamento(self, apartamento_id, inicio, fim):
+        """Períodos ocupados (mesclados) e livres de um apartamento em [inicio, fim].
+
+        Uma query ordenada por data_inicio sobre o índice
+        (apartamento, data_inicio, data_fim) e uma passada linear para
+        mesclar os intervalos.
+        """
+        from datetime import timedelta
+
+        intervalos = (
+            self.ocupando_periodo(inicio, fim)
+            .filter(apartamento_id=apartamento_id)
+            .order_by('data_inicio')
+            .values_list('data_inicio', 'data_fim')
+        )
+
+        ocupados = []
+        for data_inicio, data_fim in intervalos:
+            data_inicio = max(data_inicio, inicio)
+            data_fim = min(data_fim or fim, fim)
+            if ocupados and data_inicio <= ocupados[-1][1] + timedelta(days=1):
+                ocupados[-1][1] = max(ocupados[-1][1], data_fim)
+            else:
+                ocupados.append([data_inicio, data_fim])
+
+        livres = []
+        cursor = inicio
+        for data_inicio, data_fim in ocupados:
+            if data_inicio > cursor:
+                livres.append((cursor, data_inicio - timedelta(days=1)))
+            cursor = data_fim + timedelta(days=1)
+        if cursor <= fim:
+            livres.append((cursor, fim))
+
+        return [tuple(i) for i in ocupados], livres
+
+    def sincronizar_disponibilidade(self, apartamentos=None):
+        """Recalcula Aptos.is_available com um único UPDATE.
+
+        `apartamentos` pode ser uma lista de ids ou um queryset de ids
+        (vira `WHERE id IN (subquery)`); sem ele, todos os apartamentos.
+        Só as linhas cujo valor muda são gravadas. Retorna quantas mudaram.
+        """
+        from django.db.models import Exists
+        from django.utils import timezone
+
+        from .models import Aptos
+
+        ocupado = Exists(self.filter(apartamento_id=OuterRef('pk'), ativo=True))
+        queryset = Aptos.objects.all()
+        if apartamentos is not None:
+            queryset = queryset.filter(pk__in=apartamentos)
+        return queryset.filter(is_available=ocupado).update(
+            is_available=~ocupado, updated_at=timezone.now()
+        )
+
+    def expirar_encerradas(self, hoje=None, usuario=None, simular=False):
+        """Finaliza em lote as associações ativas cuja data fim já passou.
+
+        Um UPDATE para as associações, um bulk_create do histórico
+        FINALIZADA e um UPDATE set-based da disponibilidade dos
+        apartamentos afetados, na mesma transação. Com `simular`, apenas
+        retorna o que seria alterado.
+        """
+        from django.db import transaction
+        from django.utils import timezone
+
+        from .models import HistoricoAssociacao
+
+        hoje = hoje or date.today()
+        with transaction.atomic():
+            encerradas = list(
+                self.select_for_update()
+                .filter(ativo=True, data_fim__lt=hoje)
+                .order_by('pk')
+                .values('pk', 'apartamento_id', 'inquilino_id', 'data_fim')
+            )
+            resultado = {
+                'expiradas': len(encerradas),
+                'associacoes': [a['pk'] for a in encerradas],
+                'apartamentos': sorted({a['apartamento_id'] for a in encerradas}),
+                'apartamentos_liberados': 0,
+            }
+            if simular or not encerradas:
+                return resultado
+
+            self.filter(pk__in=resultado['associacoes']).update(
+                ativo=False, updated_by=usuario, updated_at=timezone.now()
+            )
+            HistoricoAssociacao.objects.bulk_create([
+                HistoricoAssociacao(
+                    associacao_id=a['pk'],
+                    acao='FINALIZADA',
+                    detalhes={'data_fim': str(a['data_fim']), 'automatica': True},
+                    observacoes='Finalizada automaticamente após a data fim',
+                    usuario=usuario,
+                )
+                for a in encerradas
+            ])
+            resultado['apartamentos_liberados'] = self.sincronizar_disponibilidade(
+                self.filter(pk__in=resultado['associacoes']).values('apartamento_id')
+            )
+
+        return resultado
+
     def get_by_apartamento_optimized(self, apartamento_id, use_cache=True):
         """Histórico de ocupação de apartamento com cache."""
         cache_key = f'apartamento_history:{apartamento_id}'
@@ -1,9 +1,12 @@
 """Middlewares customizados para performance e monitoramento."""
 import time
 import logging
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 from django.core.cache import cache
 
+from aptos.db_router import leitura_primaria
+
 logger = logging.getLogger('performance')
 
 
@@ -123,9 +126,19 @@ class CacheInvalidationMiddleware(MiddlewareMixin):
 
         # Invalidar caches relacionados
         self._invalidate_related_caches(request)
+        if '/relatorios' not in request.path:
+            self._invalidate_report_results()
 
         return response
 
+    def _invalidate_report_results(self):
+        """Nova versão dos dados para os resultados de relatórios SQL em cache."""
+        try:
+            from aptos.services.relatorio_sql_service import nova_versao_dados
+            nova_versao_dados()
+        except Exception as e:
+            logger.debug(f"Failed to bump report data version: {e}")
+
     def _invalidate_related_caches(self, request):
         """Invalida caches relacionados ao recurso modificado."""
         try:
@@ -154,3 +167,35 @@ class CacheInvalidationMiddleware(MiddlewareMixin):
 
         except Exception as e:
             logger.debug(f"Failed to invalidate cache: {e}")
+
+
+class ReplicaStickinessMiddleware:
+    """Leitura das próprias escritas: depois de gravar, o cliente lê do primário.
+
+    Uma escrita bem-sucedida grava um cookie válido por
+    REPLICA_STICKY_SECONDS; enquanto ele existir, as leituras da
+    requisição ignoram leitura_replica() e vão ao primário.
+    """
+
+    COOKIE = 'aptos_leitura_primaria'
+    WRITE_METHODS = CacheInvalidationMiddleware.WRITE_METHODS
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.COOKIES.get(self.COOKIE):
+            with leitura_primaria():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+
+        if request.method in self.WRITE_METHODS and 200 <= response.status_code < 400:
+            response.set_cookie(
+                self.COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
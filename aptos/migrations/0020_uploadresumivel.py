@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-19 12:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0019_locador'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadResumivel',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('destino', models.CharField(choices=[('APTO_VIDEO', 'Vídeo do Apartamento'), ('BUILDER_VIDEO', 'Vídeo do Empreendimento'), ('DOCUMENTO_INQUILINO', 'Documento do Inquilino')], max_length=30)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('tipo_documento', models.CharField(blank=True, choices=[('RG', 'RG'), ('CNH', 'CNH'), ('COMPROVANTE_RENDA', 'Comprovante de Renda'), ('COMPROVANTE_RESIDENCIA', 'Comprovante de Residência'), ('OUTROS', 'Outros')], max_length=30, null=True)),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('tamanho_total', models.BigIntegerField()),
+                ('offset', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('EM_ANDAMENTO', 'Em andamento'), ('CONCLUIDO', 'Concluído'), ('CANCELADO', 'Cancelado')], default='EM_ANDAMENTO', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload Resumível',
+                'verbose_name_plural': 'Uploads Resumíveis',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='aptos_uploa_status_ae748b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 12:25
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0020_uploadresumivel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoInquilinos',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('arquivo', models.FileField(blank=True, null=True, upload_to='importacoes/inquilinos/')),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Processando'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro')], default='PENDENTE', max_length=20)),
+                ('total_linhas', models.IntegerField(default=0)),
+                ('criados', models.IntegerField(default=0)),
+                ('com_erro', models.IntegerField(default=0)),
+                ('erros', models.JSONField(blank=True, default=list)),
+                ('erro_detalhes', models.TextField(blank=True, null=True)),
+                ('iniciado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Importação de Inquilinos',
+                'verbose_name_plural': 'Importações de Inquilinos',
+                'ordering': ['-iniciado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-19 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0021_importacaoinquilinos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArquivamentoHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('STATUS', 'Histórico de Status'), ('ASSOCIACAO', 'Histórico de Associações')], max_length=20)),
+                ('status', models.CharField(choices=[('EM_ANDAMENTO', 'Em andamento'), ('CONCLUIDO', 'Concluído')], default='EM_ANDAMENTO', max_length=20)),
+                ('data_limite', models.DateTimeField()),
+                ('id_maximo', models.BigIntegerField(default=0)),
+                ('ultimo_id', models.BigIntegerField(default=0)),
+                ('arquivados', models.IntegerField(default=0)),
+                ('arquivos', models.IntegerField(default=0)),
+                ('iniciado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Arquivamento de Histórico',
+                'verbose_name_plural': 'Arquivamentos de Histórico',
+                'ordering': ['-iniciado_em'],
+                'indexes': [models.Index(fields=['modelo', 'status'], name='aptos_arqui_modelo_77006c_idx')],
+            },
+        ),
+    ]
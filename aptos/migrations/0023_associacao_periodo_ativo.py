@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-19 12:39
+
+from django.conf import settings
+from django.db import migrations
+
+CONSTRAINT = 'excl_associacao_periodo_ativo'
+
+
+def criar_exclusion_constraint(apps, schema_editor):
+    """Impede no PostgreSQL períodos ativos sobrepostos no mesmo apartamento"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        f"ALTER TABLE aptos_inquilinoapartamento ADD CONSTRAINT {CONSTRAINT} "
+        f"EXCLUDE USING gist (apartamento_id WITH =, "
+        f"daterange(data_inicio, data_fim, '[]') WITH &&) WHERE (ativo)"
+    )
+
+
+def remover_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"ALTER TABLE aptos_inquilinoapartamento DROP CONSTRAINT IF EXISTS {CONSTRAINT}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0022_arquivamentohistorico'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_exclusion_constraint, remover_exclusion_constraint),
+    ]
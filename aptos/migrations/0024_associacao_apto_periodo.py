@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0023_associacao_periodo_ativo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inquilinoapartamento',
+            index=models.Index(fields=['apartamento', 'data_inicio', 'data_fim'], name='idx_assoc_apto_periodo'),
+        ),
+    ]
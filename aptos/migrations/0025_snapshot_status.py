@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0024_associacao_apto_periodo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodicidade', models.CharField(choices=[('DIARIO', 'Diário'), ('SEMANAL', 'Semanal')], max_length=10)),
+                ('data_referencia', models.DateField()),
+                ('status', models.CharField(choices=[('ATIVO', 'Ativo'), ('INATIVO', 'Inativo'), ('INADIMPLENTE', 'Inadimplente'), ('BLOQUEADO', 'Bloqueado')], max_length=15)),
+                ('total', models.IntegerField()),
+                ('entradas', models.IntegerField(default=0)),
+                ('motivos', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Status',
+                'verbose_name_plural': 'Snapshots de Status',
+                'ordering': ['-data_referencia', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('periodicidade', 'data_referencia', 'status'), name='unique_snapshot_status_periodo')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0025_snapshot_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relatorioexecucao',
+            name='chave',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='AssinaturaRelatorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('formato', models.CharField(choices=[('PDF', 'PDF'), ('EXCEL', 'Excel'), ('JSON', 'JSON')], default='PDF', max_length=10)),
+                ('agenda', models.CharField(max_length=100)),
+                ('ativa', models.BooleanField(default=True)),
+                ('proxima_execucao', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assinaturas', to='aptos.relatoriotemplate')),
+                ('ultima_execucao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='aptos.relatorioexecucao')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assinaturas_relatorio', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Assinatura de Relatório',
+                'verbose_name_plural': 'Assinaturas de Relatórios',
+                'ordering': ['proxima_execucao'],
+            },
+        ),
+        migrations.AddField(
+            model_name='relatorioexecucao',
+            name='assinatura',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='execucoes', to='aptos.assinaturarelatorio'),
+        ),
+        migrations.AddIndex(
+            model_name='relatorioexecucao',
+            index=models.Index(fields=['chave', 'concluido_em'], name='idx_execucao_chave'),
+        ),
+        migrations.AddIndex(
+            model_name='assinaturarelatorio',
+            index=models.Index(fields=['ativa', 'proxima_execucao'], name='idx_assinatura_proxima'),
+        ),
+    ]
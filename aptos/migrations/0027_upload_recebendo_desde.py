@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0026_assinatura_relatorio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadresumivel',
+            name='recebendo_desde',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
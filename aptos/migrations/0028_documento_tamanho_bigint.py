@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aptos', '0027_upload_recebendo_desde'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentoinquilino',
+            name='tamanho',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -205,6 +205,14 @@ class Inquilino(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
+        from aptos.services.indice_documentos_service import indice_documentos
+        indice_documentos.adicionar([self])
+
+    def delete(self, *args, **kwargs):
+        from aptos.services.indice_documentos_service import indice_documentos
+        indice_documentos.remover(self)
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         if self.tipo == 'PF':
             return f"{self.nome_completo} (CPF: {self.cpf})"
@@ -245,6 +253,10 @@ class Inquilino(models.Model):
         return InquilinoApartamento.objects.filter(inquilino=self).order_by('-data_inicio')
 
 
+# Exclusion constraint criada pela migração 0023 (somente PostgreSQL)
+CONSTRAINT_SOBREPOSICAO = 'excl_associacao_periodo_ativo'
+
+
 class InquilinoApartamento(models.Model):
     inquilino = models.ForeignKey(
         Inquilino,
@@ -297,6 +309,13 @@ class InquilinoApartamento(models.Model):
                 name='unique_apartamento_associacao_ativa'
             )
         ]
+        indexes = [
+            # Sobreposição de períodos ativos e disponibilidade por período (inclui histórico)
+            models.Index(
+                fields=['apartamento', 'data_inicio', 'data_fim'],
+                name='idx_assoc_apto_periodo'
+            ),
+        ]
 
     def clean(self):
         """Validações customizadas"""
@@ -318,28 +337,39 @@ class InquilinoApartamento(models.Model):
         self._validar_status_inquilino()
 
     def _validar_sobreposicao(self):
-        """Valida se não há sobreposição de períodos ativos"""
-        conflitos = InquilinoApartamento.objects.filter(
-            apartamento=self.apartamento,
-            ativo=True
-        ).exclude(pk=self.pk)
-
-        for conflito in conflitos:
-            # Se conflito não tem data_fim, está ativo indefinidamente
-            if not conflito.data_fim:
-                if not self.data_fim or self.data_inicio <= conflito.data_inicio:
-                    raise ValidationError(
-                        f'Conflito com associação ativa de {conflito.inquilino} '
-                        f'iniciada em {conflito.data_inicio}'
-                    )
-            else:
-                # Verificar sobreposição de períodos
-                if (self.data_inicio <= conflito.data_fim and
-                    (not self.data_fim or self.data_fim >= conflito.data_inicio)):
-                    raise ValidationError(
-                        f'Período conflita com associação de {conflito.inquilino} '
-                        f'({conflito.data_inicio} a {conflito.data_fim})'
-                    )
+        """Valida se não há sobreposição com períodos ativos (uma query indexada)"""
+        conflito = self.conflitos().select_related('inquilino').first()
+        if conflito:
+            raise ValidationError(self._mensagem_conflito(conflito))
+
+    def conflitos(self):
+        """Associações ativas do apartamento cujo período intercepta o desta"""
+        if not self.apartamento_id or not self.data_inicio:
+            return InquilinoApartamento.objects.none()
+
+        queryset = InquilinoApartamento.objects.filter(
+            models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=self.data_inicio),
+            apartamento_id=self.apartamento_id,
+            ativo=True,
+        )
+        if self.data_fim:
+            queryset = queryset.filter(data_inicio__lte=self.data_fim)
+        if self.pk:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    @staticmethod
+    def _mensagem_conflito(conflito):
+        # Se conflito não tem data_fim, está ativo indefinidamente
+        if not conflito.data_fim:
+            return (
+                f'Conflito com associação ativa de {conflito.inquilino} '
+                f'iniciada em {conflito.data_inicio}'
+            )
+        return (
+            f'Período conflita com associação de {conflito.inquilino} '
+            f'({conflito.data_inicio} a {conflito.data_fim})'
+        )
 
     def _validar_status_inquilino(self):
         """Valida se inquilino pode ser associado baseado no status"""
@@ -371,28 +401,67 @@ class InquilinoApartamento(models.Model):
         return True
 
     def save(self, *args, **kwargs):
-        self.full_clean(exclude=['created_by', 'updated_by'])
-        super().save(*args, **kwargs)
-        self._sync_apartamento_disponibilidade()
+        # FKs, associação ativa única e (no PostgreSQL) sobreposição são
+        # garantidas pelo banco; as violações viram ValidationError abaixo
+        self.full_clean(
+            exclude=['created_by', 'updated_by', 'inquilino', 'apartamento'],
+            validate_constraints=False,
+        )
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            self._traduzir_violacao(e)
+            raise
+        # Associação ativa recém-salva: o apartamento está ocupado
+        self._sync_apartamento_disponibilidade(ocupado=True if self.ativo else None)
 
     def delete(self, *args, **kwargs):
-        apartamento = self.apartamento
-        super().delete(*args, **kwargs)
-        self._sync_apartamento_disponibilidade(apartamento)
+        apartamento_id = self.apartamento_id
+        apartamento = self._state.fields_cache.get('apartamento')
+        resultado = super().delete(*args, **kwargs)
+        self._sync_apartamento_disponibilidade(apartamento, apartamento_id=apartamento_id)
+        return resultado
+
+    def _traduzir_violacao(self, erro):
+        """Converte violações de sobreposição/unicidade nas mensagens de clean()"""
+        mensagem = str(erro)
+        violacao_periodo = any(nome in mensagem for nome in (
+            CONSTRAINT_SOBREPOSICAO,
+            'unique_apartamento_associacao_ativa',
+            # SQLite não informa o nome do índice único parcial
+            'UNIQUE constraint failed: aptos_inquilinoapartamento.apartamento_id',
+        ))
+        if not violacao_periodo:
+            return
 
-    def _sync_apartamento_disponibilidade(self, apartamento=None):
-        apartamento = apartamento or self.apartamento
-        if apartamento is None:
+        conflito = self.conflitos().select_related('inquilino').first()
+        if conflito is None:
+            # A associação conflitante pode estar em outra transação ainda
+            # não confirmada
+            raise ValidationError('Apartamento já possui associação ativa no período.') from erro
+        raise ValidationError(self._mensagem_conflito(conflito)) from erro
+
+    def _sync_apartamento_disponibilidade(self, apartamento=None, apartamento_id=None, ocupado=None):
+        """Ajusta is_available do apartamento com um UPDATE condicional"""
+        if apartamento is None and apartamento_id is None:
+            apartamento_id = self.apartamento_id
+            apartamento = self._state.fields_cache.get('apartamento')
+        apartamento_id = apartamento_id or apartamento.pk
+        if apartamento_id is None:
             return
 
-        has_active = apartamento.associacoes_inquilino.filter(
-            ativo=True
-        ).exists()
+        if ocupado is None:
+            ocupado = InquilinoApartamento.objects.filter(
+                apartamento_id=apartamento_id, ativo=True
+            ).exists()
 
-        should_be_available = not has_active
-        if apartamento.is_available != should_be_available:
-            apartamento.is_available = should_be_available
-            apartamento.save(update_fields=['is_available', 'updated_at'])
+        # Só grava quando o valor muda
+        Aptos.objects.filter(pk=apartamento_id, is_available=ocupado).update(
+            is_available=not ocupado, updated_at=timezone.now()
+        )
+        if apartamento is not None:
+            apartamento.is_available = not ocupado
 
     def finalizar_associacao(self, data_fim=None, user=None):
         """Finaliza a associação"""
@@ -444,7 +513,8 @@ class HistoricoAssociacao(models.Model):
 class StatusManager(models.Manager):
     """Manager customizado para operações de status"""
 
-    def transition_to(self, inquilino, novo_status, motivo, usuario=None):
+    def transition_to(self, inquilino, novo_status, motivo, usuario=None,
+                      categoria_motivo='MANUAL', ip_address=None, user_agent=None):
         """Executa transição de status com validações"""
         if not self.can_transition(inquilino.status, novo_status):
             raise ValueError(f"Transição inválida: {inquilino.status} -> {novo_status}")
@@ -455,7 +525,10 @@ class StatusManager(models.Manager):
             status_anterior=inquilino.status,
             status_novo=novo_status,
             motivo=motivo,
-            usuario=usuario
+            categoria_motivo=categoria_motivo,
+            usuario=usuario,
+            ip_address=ip_address,
+            user_agent=user_agent,
         )
 
         # Executar ações específicas da transição
@@ -467,6 +540,78 @@ class StatusManager(models.Manager):
 
         return inquilino
 
+    def transition_many(self, transicoes, motivo, usuario=None,
+                        categoria_motivo='MANUAL', ip_address=None, user_agent=None):
+        """Executa várias transições em uma única transação.
+
+        `transicoes` mapeia id do inquilino -> novo status. As linhas são
+        travadas com um único SELECT ... FOR UPDATE, as transições são
+        validadas em memória, o histórico é gravado com um bulk_create e
+        os status com um único UPDATE ... CASE. Transições inválidas e
+        inquilinos inexistentes são devolvidos em `rejeitados` sem
+        impedir as demais.
+        """
+        from django.db import transaction
+        from django.db.models import Case, CharField, Value, When
+
+        alterados = []
+        rejeitados = []
+
+        with transaction.atomic():
+            atuais = dict(
+                self.get_queryset()
+                .select_for_update()
+                .filter(pk__in=list(transicoes))
+                .values_list('pk', 'status')
+            )
+
+            for inquilino_id, novo_status in transicoes.items():
+                status_atual = atuais.get(inquilino_id)
+                if status_atual is None:
+                    rejeitados.append({'inquilino_id': inquilino_id, 'erro': 'Inquilino não encontrado'})
+                elif not self.can_transition(status_atual, novo_status):
+                    rejeitados.append({
+                        'inquilino_id': inquilino_id,
+                        'erro': f"Transição inválida: {status_atual} -> {novo_status}",
+                    })
+                else:
+                    alterados.append({
+                        'inquilino_id': inquilino_id,
+                        'status_anterior': status_atual,
+                        'status_novo': novo_status,
+                    })
+
+            if not alterados:
+                return {'alterados': alterados, 'rejeitados': rejeitados}
+
+            HistoricoStatus.objects.bulk_create([
+                HistoricoStatus(
+                    inquilino_id=item['inquilino_id'],
+                    status_anterior=item['status_anterior'],
+                    status_novo=item['status_novo'],
+                    motivo=motivo,
+                    categoria_motivo=categoria_motivo,
+                    usuario=usuario,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                )
+                for item in alterados
+            ])
+
+            self._execute_bulk_transition_actions(alterados)
+
+            self.get_queryset().filter(
+                pk__in=[item['inquilino_id'] for item in alterados]
+            ).update(
+                status=Case(
+                    *[When(pk=item['inquilino_id'], then=Value(item['status_novo'])) for item in alterados],
+                    output_field=CharField(),
+                ),
+                updated_at=timezone.now(),
+            )
+
+        return {'alterados': alterados, 'rejeitados': rejeitados}
+
     def can_transition(self, status_atual, novo_status):
         """Verifica se a transição é válida"""
         transicoes_validas = {
@@ -500,6 +645,32 @@ class StatusManager(models.Manager):
             # Log de reativação
             logger.info(f"Inquilino {inquilino.id} reativado: {status_anterior} -> {novo_status}")
 
+    def _execute_bulk_transition_actions(self, alterados):
+        """Equivalente em lote de _execute_transition_actions"""
+        import logging
+
+        logger = logging.getLogger(__name__)
+
+        bloqueados = [item['inquilino_id'] for item in alterados if item['status_novo'] == 'BLOQUEADO']
+        if bloqueados:
+            # Finalizar associações ativas com um único UPDATE
+            InquilinoApartamento.objects.filter(inquilino_id__in=bloqueados, ativo=True).update(
+                ativo=False,
+                data_fim=timezone.now().date()
+            )
+
+        inadimplentes = [item['inquilino_id'] for item in alterados if item['status_novo'] == 'INADIMPLENTE']
+        if inadimplentes:
+            for inquilino in self.get_queryset().filter(pk__in=inadimplentes):
+                self._notify_inadimplencia(inquilino)
+
+        for item in alterados:
+            if item['status_anterior'] in ['BLOQUEADO', 'INADIMPLENTE'] and item['status_novo'] == 'ATIVO':
+                logger.info(
+                    f"Inquilino {item['inquilino_id']} reativado: "
+                    f"{item['status_anterior']} -> {item['status_novo']}"
+                )
+
     def _notify_inadimplencia(self, inquilino):
         """Notifica sobre inadimplência"""
         # Implementar sistema de notificações
@@ -679,7 +850,7 @@ class DocumentoInquilino(models.Model):
     )
     nome_original = models.CharField(max_length=255, blank=True, null=True)
     versao = models.PositiveIntegerField(default=1)
-    tamanho = models.PositiveIntegerField(blank=True, null=True)  # em bytes
+    tamanho = models.PositiveBigIntegerField(blank=True, null=True)  # em bytes
     mime_type = models.CharField(max_length=100, blank=True, null=True)
     uploaded_by = models.ForeignKey(
         'auth.User',
@@ -728,6 +899,143 @@ class DocumentoInquilino(models.Model):
             return f"{self.tamanho / (1024 * 1024):.1f} MB"
 
 
+class UploadResumivel(models.Model):
+    """Sessão de upload em partes (estilo tus) para vídeos e documentos grandes.
+
+    As partes são anexadas a um arquivo temporário em FILE_UPLOAD_TEMP_DIR;
+    ao finalizar, o arquivo montado é movido para o FileField de destino.
+    """
+    DESTINO_CHOICES = [
+        ('APTO_VIDEO', 'Vídeo do Apartamento'),
+        ('BUILDER_VIDEO', 'Vídeo do Empreendimento'),
+        ('DOCUMENTO_INQUILINO', 'Documento do Inquilino'),
+    ]
+
+    STATUS_CHOICES = [
+        ('EM_ANDAMENTO', 'Em andamento'),
+        ('CONCLUIDO', 'Concluído'),
+        ('CANCELADO', 'Cancelado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    destino = models.CharField(max_length=30, choices=DESTINO_CHOICES)
+    objeto_id = models.PositiveIntegerField()
+    tipo_documento = models.CharField(
+        max_length=30,
+        choices=DocumentoInquilino.TipoDocumento.choices,
+        blank=True,
+        null=True
+    )
+    nome_arquivo = models.CharField(max_length=255)
+    tamanho_total = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='EM_ANDAMENTO')
+    # Marca a parte em recebimento: um PATCH concorrente recebe 409 sem esperar
+    recebendo_desde = models.DateTimeField(null=True, blank=True)
+    usuario = models.ForeignKey(
+        'auth.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Upload Resumível'
+        verbose_name_plural = 'Uploads Resumíveis'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.nome_arquivo} ({self.offset}/{self.tamanho_total})"
+
+    @property
+    def completo(self):
+        return self.offset >= self.tamanho_total
+
+
+class ImportacaoInquilinos(models.Model):
+    """Importação em lote de inquilinos a partir de planilha (CSV/XLSX)"""
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('PROCESSANDO', 'Processando'),
+        ('CONCLUIDO', 'Concluído'),
+        ('ERRO', 'Erro'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    arquivo = models.FileField(upload_to='importacoes/inquilinos/', null=True, blank=True)
+    nome_arquivo = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+
+    # Resultados
+    total_linhas = models.IntegerField(default=0)
+    criados = models.IntegerField(default=0)
+    com_erro = models.IntegerField(default=0)
+    erros = models.JSONField(default=list, blank=True)
+    erro_detalhes = models.TextField(null=True, blank=True)
+
+    usuario = models.ForeignKey(
+        'auth.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    iniciado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Importação de Inquilinos'
+        verbose_name_plural = 'Importações de Inquilinos'
+        ordering = ['-iniciado_em']
+
+    def __str__(self):
+        return f"{self.nome_arquivo} - {self.status}"
+
+
+class ArquivamentoHistorico(models.Model):
+    """Checkpoint de uma execução de arquivamento de histórico.
+
+    Guarda até qual id o histórico expirado já foi arquivado e removido,
+    para que uma execução interrompida continue de onde parou.
+    """
+    MODELO_CHOICES = [
+        ('STATUS', 'Histórico de Status'),
+        ('ASSOCIACAO', 'Histórico de Associações'),
+    ]
+    STATUS_CHOICES = [
+        ('EM_ANDAMENTO', 'Em andamento'),
+        ('CONCLUIDO', 'Concluído'),
+    ]
+
+    modelo = models.CharField(max_length=20, choices=MODELO_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='EM_ANDAMENTO')
+    data_limite = models.DateTimeField()
+    id_maximo = models.BigIntegerField(default=0)
+    ultimo_id = models.BigIntegerField(default=0)
+    arquivados = models.IntegerField(default=0)
+    arquivos = models.IntegerField(default=0)
+
+    iniciado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Arquivamento de Histórico'
+        verbose_name_plural = 'Arquivamentos de Histórico'
+        ordering = ['-iniciado_em']
+        indexes = [
+            models.Index(fields=['modelo', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_modelo_display()} até {self.data_limite:%d/%m/%Y} - {self.status}"
+
+
 # ========================================
 # Modelos de Relatórios e Analytics
 # ========================================
@@ -792,10 +1100,24 @@ class RelatorioExecucao(models.Model):
     # Erro
     erro_detalhes = models.TextField(null=True, blank=True)
 
+    # Pré-geração por assinatura: `chave` identifica relatório, parâmetros e
+    # formato para servir pedidos interativos iguais com o arquivo gravado
+    assinatura = models.ForeignKey(
+        'AssinaturaRelatorio',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='execucoes'
+    )
+    chave = models.CharField(max_length=64, blank=True, default='')
+
     class Meta:
         verbose_name = 'Execução de Relatório'
         verbose_name_plural = 'Execuções de Relatórios'
         ordering = ['-iniciado_em']
+        indexes = [
+            models.Index(fields=['chave', 'concluido_em'], name='idx_execucao_chave'),
+        ]
 
     def duracao_segundos(self):
         if self.concluido_em:
@@ -806,6 +1128,51 @@ class RelatorioExecucao(models.Model):
         return f"{self.template.nome} - {self.status}"
 
 
+class AssinaturaRelatorio(models.Model):
+    """Relatório gerado periodicamente, fora do horário de pico, conforme agenda cron"""
+    FORMATO_CHOICES = [
+        ('PDF', 'PDF'),
+        ('EXCEL', 'Excel'),
+        ('JSON', 'JSON'),
+    ]
+
+    template = models.ForeignKey(
+        RelatorioTemplate,
+        on_delete=models.CASCADE,
+        related_name='assinaturas'
+    )
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assinaturas_relatorio')
+    parametros = models.JSONField(default=dict, blank=True)
+    formato = models.CharField(max_length=10, choices=FORMATO_CHOICES, default='PDF')
+    # Expressão cron de 5 campos (minuto hora dia mês dia-da-semana), horário local
+    agenda = models.CharField(max_length=100)
+    ativa = models.BooleanField(default=True)
+
+    proxima_execucao = models.DateTimeField(null=True, blank=True)
+    ultima_execucao = models.ForeignKey(
+        RelatorioExecucao,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Assinatura de Relatório'
+        verbose_name_plural = 'Assinaturas de Relatórios'
+        ordering = ['proxima_execucao']
+        indexes = [
+            # Assinaturas vencidas para o despachante
+            models.Index(fields=['ativa', 'proxima_execucao'], name='idx_assinatura_proxima'),
+        ]
+
+    def __str__(self):
+        return f"{self.template.nome} ({self.formato}) - {self.agenda}"
+
+
 class MetricaOcupacao(models.Model):
     """Métricas de ocupação calculadas periodicamente"""
     data_referencia = models.DateField(unique=True)
@@ -835,3 +1202,41 @@ class MetricaOcupacao(models.Model):
 
     def __str__(self):
         return f"{self.data_referencia} - {self.taxa_ocupacao}%"
+
+
+class SnapshotStatus(models.Model):
+    """Distribuição de status dos inquilinos ao fim de um dia ou semana
+
+    Uma linha por período e status: `total` é a quantidade de inquilinos no
+    status quando o período terminou e `entradas` as mudanças para o status
+    dentro do período, com `motivos` por categoria.
+    """
+    PERIODICIDADE_CHOICES = [
+        ('DIARIO', 'Diário'),
+        ('SEMANAL', 'Semanal'),
+    ]
+
+    periodicidade = models.CharField(max_length=10, choices=PERIODICIDADE_CHOICES)
+    # Primeiro dia do período (a segunda-feira, no semanal)
+    data_referencia = models.DateField()
+    status = models.CharField(max_length=15, choices=Inquilino.STATUS_CHOICES)
+    total = models.IntegerField()
+    entradas = models.IntegerField(default=0)
+    motivos = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Snapshot de Status'
+        verbose_name_plural = 'Snapshots de Status'
+        ordering = ['-data_referencia', 'status']
+        constraints = [
+            # Também atende a leitura da série por período (tendência)
+            models.UniqueConstraint(
+                fields=['periodicidade', 'data_referencia', 'status'],
+                name='unique_snapshot_status_periodo'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_periodicidade_display()} {self.data_referencia} - {self.status}: {self.total}"
@@ -0,0 +1,30 @@
+"""
+Classes de paginação da API
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PaginacaoPadrao(PageNumberPagination):
+    """Paginação por número de página com tamanho ajustável pelo cliente"""
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class PaginacaoCursorApartamentos(CursorPagination):
+    """Paginação por cursor para listas grandes de apartamentos.
+
+    Estável sob inserções concorrentes e sem o COUNT(*) da paginação
+    por página; a ordenação inclui o id para desempatar unidades.
+    """
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('unit_number', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        # Ignora o OrderingFilter da view, que ordena construtoras e não
+        # apartamentos
+        return self.ordering
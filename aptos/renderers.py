@@ -0,0 +1,75 @@
+"""
+Renderers da API baseados em orjson
+"""
+import datetime
+import decimal
+
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+if orjson is not None:
+    # Z para UTC (como o encoder do DRF), chaves não-str (ex.: dicts com int)
+    # e arrays NumPy vindos dos relatórios
+    OPCOES_ORJSON = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(obj):
+    """Tipos que o orjson não serializa nativamente, com a mesma saída do DRF.
+
+    datetime, date, time e UUID já são tratados pelo orjson em C.
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, QuerySet):
+        return tuple(obj)
+    if hasattr(obj, 'tolist'):
+        # Escalares NumPy/pandas
+        return obj.tolist()
+    if hasattr(obj, '__getitem__'):
+        cls = list if isinstance(obj, (list, tuple)) else dict
+        try:
+            return cls(obj)
+        except Exception:
+            pass
+    if hasattr(obj, '__iter__'):
+        return tuple(item for item in obj)
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer que serializa com orjson.
+
+    Mantém media type, formato e indentação do JSONRenderer (a API
+    navegável continua indentada, com 2 espaços). Sem orjson instalado,
+    recai no encoder padrão do DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        opcoes = OPCOES_ORJSON
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            opcoes |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(data, default=orjson_default, option=opcoes)
+
+        # Como o DRF, escapa U+2028/U+2029 para o JSON ser JavaScript válido
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
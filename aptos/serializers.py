@@ -1,5 +1,131 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Prefetch, Q
 from rest_framework import serializers
-from .models import Builders, Aptos, Foto, BuilderFoto, Inquilino, InquilinoApartamento, HistoricoStatus, HistoricoAssociacao, Locador
+from rest_framework.permissions import SAFE_METHODS
+from .models import Builders, Aptos, Foto, BuilderFoto, Inquilino, InquilinoApartamento, HistoricoStatus, HistoricoAssociacao, ImportacaoInquilinos, Locador, UploadResumivel, AssinaturaRelatorio
+
+
+def _parametro_lista(request, nome):
+    """Lê um parâmetro de query separado por vírgulas como conjunto"""
+    params = getattr(request, 'query_params', None)
+    if params is None:
+        params = getattr(request, 'GET', {})
+    valor = params.get(nome)
+    if valor is None:
+        return None
+    return {item.strip() for item in valor.split(',') if item.strip()}
+
+
+class CamposDinamicosMixin:
+    """
+    Campos esparsos (?fields=a,b) e expansão de relações (?expand=x).
+
+    Campos não pedidos são removidos antes da serialização, então
+    SerializerMethodFields ignorados não executam. O mesmo recorte é
+    aplicado ao queryset por `otimizar_queryset`, via Meta opcionais:
+
+    - select_campos: {campo: [lookups]} para select_related
+    - prefetch_campos: {campo: [lookups ou Prefetch]} para prefetch_related
+    - anotacoes_campos: {campo: {alias: expressão}} para annotate
+    - dependencias_campos: {campo: [colunas]} para campos calculados no only()
+    - campos_expansiveis: {campo: {'serializer': cls, 'select': [...],
+      'prefetch': [...]}} troca a PK pelo objeto aninhado
+
+    Só vale para métodos seguros (GET/HEAD/OPTIONS) e para o serializer
+    raiz; escrita e serializers aninhados mantêm todos os campos.
+    """
+
+    @classmethod
+    def campos_pedidos(cls, request):
+        """Retorna (campos, expandir); campos None significa todos"""
+        if request is None or request.method not in SAFE_METHODS:
+            return None, set()
+
+        expansiveis = getattr(cls.Meta, 'campos_expansiveis', {})
+        expandir = (_parametro_lista(request, 'expand') or set()) & set(expansiveis)
+
+        campos = _parametro_lista(request, 'fields')
+        if campos is not None:
+            # Expandir um campo implica incluí-lo
+            campos = (campos | expandir) & set(cls.Meta.fields)
+        return campos, expandir
+
+    def _eh_raiz(self):
+        pai = self.parent
+        if isinstance(pai, serializers.ListSerializer):
+            pai = pai.parent
+        return pai is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._eh_raiz():
+            return fields
+
+        campos, expandir = self.campos_pedidos(self.context.get('request'))
+        if campos is not None:
+            for nome in set(fields) - campos:
+                fields.pop(nome)
+
+        expansiveis = getattr(self.Meta, 'campos_expansiveis', {})
+        for nome in expandir:
+            fields[nome] = expansiveis[nome]['serializer'](read_only=True)
+        return fields
+
+    @classmethod
+    def otimizar_queryset(cls, queryset, request):
+        """Aplica select/prefetch/annotate/only apenas para os campos pedidos"""
+        meta = cls.Meta
+        campos, expandir = cls.campos_pedidos(request)
+        efetivos = set(meta.fields) if campos is None else campos
+
+        select, prefetch, anotacoes = [], [], {}
+        for nome in meta.fields:
+            if nome not in efetivos:
+                continue
+            select += getattr(meta, 'select_campos', {}).get(nome, [])
+            prefetch += getattr(meta, 'prefetch_campos', {}).get(nome, [])
+            anotacoes.update(getattr(meta, 'anotacoes_campos', {}).get(nome, {}))
+        for nome in expandir:
+            config = meta.campos_expansiveis[nome]
+            select += config.get('select', [])
+            prefetch += config.get('prefetch', [])
+
+        if select:
+            queryset = queryset.select_related(*dict.fromkeys(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch))
+        if anotacoes:
+            queryset = queryset.annotate(**anotacoes)
+
+        if campos is not None:
+            colunas = cls._colunas_necessarias(efetivos, select)
+            if colunas is not None:
+                queryset = queryset.only(*colunas)
+        return queryset
+
+    @classmethod
+    def _colunas_necessarias(cls, campos, select):
+        """Colunas do modelo usadas pelos campos; None se não for possível inferir"""
+        modelo = cls.Meta.model
+        dependencias = getattr(cls.Meta, 'dependencias_campos', {})
+        colunas = {modelo._meta.pk.name}
+        # Relações percorridas por select_related não podem ser adiadas
+        colunas.update(lookup.split('__')[0] for lookup in select)
+
+        for nome in campos:
+            if nome in dependencias:
+                colunas.update(dependencias[nome])
+                continue
+            declarado = cls._declared_fields.get(nome)
+            origem = (getattr(declarado, 'source', None) or nome).split('.')[0]
+            try:
+                campo = modelo._meta.get_field(origem)
+            except FieldDoesNotExist:
+                # Campo calculado sem dependências declaradas: carrega tudo
+                return None
+            if campo.concrete and not campo.many_to_many:
+                colunas.add(campo.name)
+        return colunas
 
 
 class FotoSerializer(serializers.ModelSerializer):
@@ -21,13 +147,21 @@ class BuilderFotoSerializer(serializers.ModelSerializer):
 class BuildersSerializer(serializers.ModelSerializer):
     """Serializer para Empreendimentos com fotos relacionadas"""
     builder_fotos = BuilderFotoSerializer(many=True, read_only=True)
+
+    # Agregados anotados pelo BuildersViewSet (omitidos quando ausentes)
+    apartment_count = serializers.IntegerField(read_only=True)
+    available_count = serializers.IntegerField(read_only=True)
+    min_rental_price = serializers.FloatField(read_only=True)
+    max_rental_price = serializers.FloatField(read_only=True)
+    avg_rental_price = serializers.FloatField(read_only=True)
     
     class Meta:
         model = Builders
         fields = [
             'id', 'name', 'street', 'neighborhood', 'city', 'state', 
             'zip_code', 'country', 'video', 'created_at', 'updated_at',
-            'builder_fotos'
+            'builder_fotos', 'apartment_count', 'available_count',
+            'min_rental_price', 'max_rental_price', 'avg_rental_price',
         ]
 
 
@@ -48,7 +182,7 @@ class BuildersAddressSerializer(serializers.ModelSerializer):
         ]
 
 
-class AptosSerializer(serializers.ModelSerializer):
+class AptosSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer completo para apartamentos com construtora e fotos"""
     fotos = FotoSerializer(many=True, read_only=True)
     # Para detalhes precisamos do endereço completo da construtora
@@ -69,6 +203,16 @@ class AptosSerializer(serializers.ModelSerializer):
             'video', 'created_at', 'updated_at', 'fotos', 'building_full_address',
             'photo_count', 'has_video'
         ]
+        select_campos = {
+            'building_name': ['building_name'],
+            'building_full_address': ['building_name'],
+        }
+        prefetch_campos = {'fotos': ['fotos'], 'photo_count': ['fotos']}
+        dependencias_campos = {
+            'building_full_address': ['building_name'],
+            'photo_count': [],
+            'has_video': ['video'],
+        }
     
     def get_building_full_address(self, obj):
         """Retorna endereço completo da construtora"""
@@ -85,7 +229,7 @@ class AptosSerializer(serializers.ModelSerializer):
         return bool(obj.video)
 
 
-class AptosListSerializer(serializers.ModelSerializer):
+class AptosListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer otimizado para listagem de apartamentos (sem fotos completas)"""
     building_name = BuildersListSerializer(read_only=True)
     photo_count = serializers.SerializerMethodField()
@@ -99,6 +243,13 @@ class AptosListSerializer(serializers.ModelSerializer):
             'number_of_bedrooms', 'number_of_bathrooms', 'square_footage',
             'photo_count', 'main_photo', 'video', 'has_video'
         ]
+        select_campos = {'building_name': ['building_name']}
+        prefetch_campos = {'photo_count': ['fotos'], 'main_photo': ['fotos']}
+        dependencias_campos = {
+            'photo_count': [],
+            'main_photo': [],
+            'has_video': ['video'],
+        }
     
     def get_photo_count(self, obj):
         """Retorna quantidade de fotos"""
@@ -106,7 +257,9 @@ class AptosListSerializer(serializers.ModelSerializer):
     
     def get_main_photo(self, obj):
         """Retorna primeira foto como foto principal"""
-        first_photo = obj.fotos.first()
+        # all()[:1] usa o cache do prefetch; first() faria uma query nova
+        fotos = obj.fotos.all()[:1]
+        first_photo = fotos[0] if fotos else None
         if first_photo and first_photo.photos:
             return self.context['request'].build_absolute_uri(first_photo.photos.url)
         return None
@@ -116,7 +269,7 @@ class AptosListSerializer(serializers.ModelSerializer):
         return bool(getattr(obj, 'video', None))
 
 # Serializers para Inquilinos
-class InquilinoSerializer(serializers.ModelSerializer):
+class InquilinoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer completo para inquilinos"""
     apartamentos_ativos = serializers.SerializerMethodField()
     documento_principal = serializers.SerializerMethodField()
@@ -134,13 +287,40 @@ class InquilinoSerializer(serializers.ModelSerializer):
             'tempo_como_inquilino', 'nome_exibicao', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        prefetch_campos = {
+            'apartamentos_ativos': [
+                Prefetch(
+                    'associacoes_apartamento',
+                    queryset=InquilinoApartamento.objects.filter(ativo=True).select_related(
+                        'apartamento__building_name'
+                    ),
+                    to_attr='associacoes_ativas_detalhadas',
+                )
+            ],
+            'tempo_como_inquilino': ['associacoes_apartamento'],
+        }
+        dependencias_campos = {
+            'apartamentos_ativos': [],
+            'documento_principal': ['tipo', 'cpf', 'cnpj'],
+            'tempo_como_inquilino': [],
+            'nome_exibicao': ['tipo', 'nome_completo', 'razao_social', 'nome_fantasia'],
+        }
     
     def get_apartamentos_ativos(self, obj):
         """Retorna apartamentos com locação ativa"""
-        apartamentos = obj.apartamentos.filter(
-            associacoes_inquilino__ativo=True
-        ).values('id', 'unit_number', 'building_name__name')
-        return list(apartamentos)
+        associacoes = getattr(obj, 'associacoes_ativas_detalhadas', None)
+        if associacoes is None:
+            associacoes = obj.associacoes_apartamento.filter(ativo=True).select_related(
+                'apartamento__building_name'
+            )
+        return [
+            {
+                'id': assoc.apartamento.id,
+                'unit_number': assoc.apartamento.unit_number,
+                'building_name__name': assoc.apartamento.building_name.name,
+            }
+            for assoc in associacoes
+        ]
     
     def get_documento_principal(self, obj):
         """Retorna CPF ou CNPJ formatado"""
@@ -232,33 +412,66 @@ class LocadorSerializer(serializers.ModelSerializer):
         }
 
 
-class InquilinoListSerializer(serializers.ModelSerializer):
-    """Serializer otimizado para listagem de inquilinos"""
+class InquilinoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Serializer otimizado para listagem de inquilinos.
+
+    Os campos derivados usam as anotações de
+    Inquilino.objects.anotacoes_lista() quando presentes, e são
+    calculados em Python apenas para instâncias não anotadas.
+    """
     nome_exibicao = serializers.SerializerMethodField()
     documento = serializers.SerializerMethodField()
     apartamentos_count = serializers.SerializerMethodField()
+    unidades_ativas = serializers.SerializerMethodField()
     
     class Meta:
         model = Inquilino
         fields = [
             'id', 'tipo', 'nome_exibicao', 'documento', 'email',
-            'telefone', 'status', 'apartamentos_count', 'created_at'
+            'telefone', 'status', 'apartamentos_count', 'unidades_ativas',
+            'created_at'
         ]
+        anotacoes_campos = {
+            'nome_exibicao': Inquilino.objects.anotacoes_lista('nome_exibicao_db'),
+            'documento': Inquilino.objects.anotacoes_lista('documento_db'),
+            'apartamentos_count': Inquilino.objects.anotacoes_lista('total_apartamentos'),
+            'unidades_ativas': Inquilino.objects.anotacoes_lista('unidades_ativas_db'),
+        }
+        dependencias_campos = {
+            'nome_exibicao': [],
+            'documento': [],
+            'apartamentos_count': [],
+            'unidades_ativas': [],
+        }
     
     def get_nome_exibicao(self, obj):
+        if hasattr(obj, 'nome_exibicao_db'):
+            return obj.nome_exibicao_db
         if obj.tipo == 'PF':
             return obj.nome_completo
         return obj.razao_social or obj.nome_fantasia
     
     def get_documento(self, obj):
+        if hasattr(obj, 'documento_db'):
+            return obj.documento_db
         if obj.tipo == 'PF':
             return obj.cpf_formatado
         return obj.cnpj_formatado
     
     def get_apartamentos_count(self, obj):
-        return obj.apartamentos.filter(
-            associacoes_inquilino__ativo=True
-        ).count()
+        total = getattr(obj, 'total_apartamentos', None)
+        if total is not None:
+            return total
+        return obj.associacoes_apartamento.filter(ativo=True).count()
+
+    def get_unidades_ativas(self, obj):
+        if hasattr(obj, 'unidades_ativas_db'):
+            return obj.unidades_ativas_db
+        return sorted(
+            obj.associacoes_apartamento.filter(ativo=True).values_list(
+                'apartamento__unit_number', flat=True
+            )
+        )
 
 
 class HistoricoStatusSerializer(serializers.ModelSerializer):
@@ -290,7 +503,7 @@ class HistoricoStatusSerializer(serializers.ModelSerializer):
             return f"{minutos} minutos atrás"
 
 
-class AssociacaoSerializer(serializers.ModelSerializer):
+class AssociacaoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     inquilino_nome = serializers.SerializerMethodField()
     apartamento_info = serializers.SerializerMethodField()
     duracao_meses = serializers.ReadOnlyField()
@@ -304,6 +517,27 @@ class AssociacaoSerializer(serializers.ModelSerializer):
             'apartamento_info', 'duracao_meses', 'esta_ativo',
             'created_at', 'updated_at'
         ]
+        select_campos = {
+            'inquilino_nome': ['inquilino'],
+            'apartamento_info': ['apartamento__building_name'],
+        }
+        dependencias_campos = {
+            'inquilino_nome': ['inquilino'],
+            'apartamento_info': ['apartamento'],
+            'duracao_meses': ['data_inicio', 'data_fim'],
+            'esta_ativo': ['ativo', 'data_inicio', 'data_fim'],
+        }
+        campos_expansiveis = {
+            'inquilino': {
+                'serializer': InquilinoListSerializer,
+                'select': ['inquilino'],
+            },
+            'apartamento': {
+                'serializer': AptosListSerializer,
+                'select': ['apartamento__building_name'],
+                'prefetch': ['apartamento__fotos'],
+            },
+        }
 
     def get_inquilino_nome(self, obj):
         if obj.inquilino.tipo == 'PF':
@@ -329,7 +563,7 @@ class AssociacaoSerializer(serializers.ModelSerializer):
 
         return data
 
-class AssociacaoListSerializer(serializers.ModelSerializer):
+class AssociacaoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer otimizado para listagem"""
     inquilino_nome = serializers.SerializerMethodField()
     apartamento_numero = serializers.CharField(source='apartamento.unit_number')
@@ -343,6 +577,16 @@ class AssociacaoListSerializer(serializers.ModelSerializer):
             'data_inicio', 'data_fim', 'valor_aluguel', 'ativo',
             'status_inquilino', 'esta_ativo'
         ]
+        select_campos = {
+            'inquilino_nome': ['inquilino'],
+            'apartamento_numero': ['apartamento'],
+            'edificio_nome': ['apartamento__building_name'],
+            'status_inquilino': ['inquilino'],
+        }
+        dependencias_campos = {
+            'inquilino_nome': ['inquilino'],
+            'esta_ativo': ['ativo', 'data_inicio', 'data_fim'],
+        }
 
     def get_inquilino_nome(self, obj):
         if obj.inquilino.tipo == 'PF':
@@ -361,3 +605,66 @@ class HistoricoAssociacaoSerializer(serializers.ModelSerializer):
             'id', 'acao', 'acao_display', 'detalhes', 'observacoes',
             'usuario_nome', 'timestamp'
         ]
+
+
+class UploadResumivelSerializer(serializers.ModelSerializer):
+    """Serializer para sessões de upload resumível"""
+
+    class Meta:
+        model = UploadResumivel
+        fields = [
+            'id', 'destino', 'objeto_id', 'tipo_documento', 'nome_arquivo',
+            'tamanho_total', 'offset', 'status', 'created_at', 'updated_at',
+            'concluido_em'
+        ]
+        read_only_fields = ['id', 'offset', 'status', 'created_at', 'updated_at', 'concluido_em']
+
+    def validate(self, data):
+        if data.get('destino') == 'DOCUMENTO_INQUILINO' and not data.get('tipo_documento'):
+            raise serializers.ValidationError(
+                'tipo_documento é obrigatório para documentos.'
+            )
+        return data
+
+
+class ImportacaoInquilinosSerializer(serializers.ModelSerializer):
+    """Situação e relatório de erros de uma importação de inquilinos"""
+
+    class Meta:
+        model = ImportacaoInquilinos
+        fields = [
+            'id', 'nome_arquivo', 'status', 'total_linhas', 'criados',
+            'com_erro', 'erros', 'erro_detalhes', 'iniciado_em', 'concluido_em',
+        ]
+        read_only_fields = fields
+
+
+class AssinaturaRelatorioSerializer(serializers.ModelSerializer):
+    """Assinatura de relatório pré-gerado conforme agenda cron"""
+    template_nome = serializers.CharField(source='template.nome', read_only=True)
+
+    class Meta:
+        model = AssinaturaRelatorio
+        fields = [
+            'id', 'template', 'template_nome', 'parametros', 'formato', 'agenda',
+            'ativa', 'proxima_execucao', 'ultima_execucao', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'proxima_execucao', 'ultima_execucao', 'created_at', 'updated_at'
+        ]
+
+    def validate(self, data):
+        from .services.assinatura_relatorio_service import assinatura_relatorio_service
+        from .services.relatorio_sql_service import RelatorioSQLError
+
+        atual = self.instance
+        template = data.get('template', getattr(atual, 'template', None))
+        parametros = data.get('parametros', getattr(atual, 'parametros', {}))
+        agenda = data.get('agenda', getattr(atual, 'agenda', ''))
+        if not isinstance(parametros, dict):
+            raise serializers.ValidationError({'parametros': 'Deve ser um objeto.'})
+        try:
+            assinatura_relatorio_service.validar(template, parametros, agenda)
+        except (ValueError, RelatorioSQLError) as e:
+            raise serializers.ValidationError(str(e))
+        return data
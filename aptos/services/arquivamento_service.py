@@ -0,0 +1,234 @@
+"""
+Serviço de retenção do histórico de status e de associações
+
+Registros mais antigos que a retenção são copiados em lotes por faixa de
+id para arquivos NDJSON compactados (gzip), particionados por mês, e
+depois removidos com um DELETE direto por faixa. Cada lote tem sua
+própria transação curta e o progresso fica em ArquivamentoHistorico,
+de modo que uma execução interrompida continua do último lote concluído.
+
+Layout dos arquivos:
+    <HISTORICO_ARQUIVO_DIR>/historico_status/ano=2023/mes=05/000000001001-000000002000.ndjson.gz
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from aptos.models import ArquivamentoHistorico, HistoricoAssociacao, HistoricoStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ConfiguracaoArquivamento:
+    modelo: type
+    pasta: str
+    # Caminho até o id do inquilino, gravado como primeira chave de cada
+    # linha para permitir a busca por inquilino sem decodificar o JSON
+    campo_inquilino: str
+
+    @property
+    def campos(self):
+        return [f.attname for f in self.modelo._meta.concrete_fields]
+
+
+MODELOS = {
+    'STATUS': ConfiguracaoArquivamento(HistoricoStatus, 'historico_status', 'inquilino_id'),
+    'ASSOCIACAO': ConfiguracaoArquivamento(
+        HistoricoAssociacao, 'historico_associacao', 'associacao__inquilino_id'
+    ),
+}
+
+
+class ArquivamentoHistoricoService:
+    """Arquiva e remove histórico expirado em lotes e consulta o arquivo"""
+
+    def __init__(self, diretorio=None, tamanho_lote=None, pausa_ms=None):
+        self._diretorio = diretorio
+        self._tamanho_lote = tamanho_lote
+        self._pausa_ms = pausa_ms
+
+    @property
+    def diretorio(self):
+        return Path(self._diretorio or settings.HISTORICO_ARQUIVO_DIR)
+
+    @property
+    def tamanho_lote(self):
+        return self._tamanho_lote or settings.HISTORICO_ARQUIVAMENTO_LOTE
+
+    @property
+    def pausa_ms(self):
+        if self._pausa_ms is not None:
+            return self._pausa_ms
+        return settings.HISTORICO_ARQUIVAMENTO_PAUSA_MS
+
+    def arquivar_expirados(self, dias=None, max_lotes=None):
+        """Arquiva o histórico expirado de todos os modelos; retorna o total por modelo"""
+        resultado = {}
+        for modelo in MODELOS:
+            checkpoint = self.arquivar(modelo, dias=dias, max_lotes=max_lotes)
+            resultado[modelo] = checkpoint.arquivados if checkpoint else 0
+        return resultado
+
+    def arquivar(self, modelo, dias=None, max_lotes=None):
+        """Arquiva o histórico expirado de um modelo.
+
+        Retoma a execução EM_ANDAMENTO do modelo, se houver; caso
+        contrário inicia uma nova com a data limite de agora. Com
+        `max_lotes`, para após esse número de lotes (a próxima chamada
+        continua do checkpoint). Retorna o checkpoint ou None quando não
+        há nada a arquivar.
+        """
+        from aptos.services.particionamento_service import particionamento_service
+
+        if particionamento_service.esta_particionada(modelo):
+            # Retenção feita desanexando partições (ver particionamento_service)
+            logger.info(f"Histórico {modelo} particionado; arquivamento por linhas ignorado")
+            return None
+
+        config = MODELOS[modelo]
+        checkpoint = ArquivamentoHistorico.objects.filter(
+            modelo=modelo, status='EM_ANDAMENTO'
+        ).first()
+
+        if checkpoint is None:
+            dias = settings.HISTORICO_RETENCAO_DIAS if dias is None else dias
+            data_limite = timezone.now() - timedelta(days=dias)
+            faixa = config.modelo.objects.filter(timestamp__lt=data_limite).aggregate(
+                minimo=Min('id'), maximo=Max('id')
+            )
+            if faixa['maximo'] is None:
+                return None
+            checkpoint = ArquivamentoHistorico.objects.create(
+                modelo=modelo,
+                data_limite=data_limite,
+                id_maximo=faixa['maximo'],
+                ultimo_id=faixa['minimo'] - 1,
+            )
+        else:
+            logger.info(f"Retomando arquivamento {modelo} a partir do id {checkpoint.ultimo_id}")
+
+        lotes = 0
+        while checkpoint.ultimo_id < checkpoint.id_maximo:
+            if max_lotes is not None and lotes >= max_lotes:
+                return checkpoint
+            if lotes and self.pausa_ms:
+                time.sleep(self.pausa_ms / 1000)
+
+            inicio = checkpoint.ultimo_id + 1
+            fim = min(inicio + self.tamanho_lote - 1, checkpoint.id_maximo)
+            self._arquivar_lote(config, checkpoint, inicio, fim)
+            lotes += 1
+
+        checkpoint.status = 'CONCLUIDO'
+        checkpoint.concluido_em = timezone.now()
+        checkpoint.save(update_fields=['status', 'concluido_em', 'atualizado_em'])
+        logger.info(
+            f"Arquivamento {modelo} concluído: {checkpoint.arquivados} registros "
+            f"em {checkpoint.arquivos} arquivos"
+        )
+        return checkpoint
+
+    def _arquivar_lote(self, config, checkpoint, inicio, fim):
+        limite = checkpoint.data_limite
+        linhas = list(
+            config.modelo.objects.filter(id__range=(inicio, fim), timestamp__lt=limite)
+            .order_by('id')
+            .values(config.campo_inquilino, *config.campos)
+        )
+
+        # Arquivos gravados antes do DELETE: se o processo cair entre os
+        # dois, o lote é regravado com o mesmo nome na retomada
+        arquivos = self._gravar(config, linhas, inicio, fim) if linhas else 0
+
+        with transaction.atomic():
+            if linhas:
+                q = connection.ops.quote_name
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {q(config.modelo._meta.db_table)} "
+                        f"WHERE {q('id')} BETWEEN %s AND %s AND {q('timestamp')} < %s",
+                        [inicio, fim, connection.ops.adapt_datetimefield_value(limite)],
+                    )
+                    if cursor.rowcount != len(linhas):
+                        logger.warning(
+                            f"Lote {inicio}-{fim} de {config.pasta}: {len(linhas)} arquivados, "
+                            f"{cursor.rowcount} removidos"
+                        )
+
+            checkpoint.ultimo_id = fim
+            checkpoint.arquivados += len(linhas)
+            checkpoint.arquivos += arquivos
+            checkpoint.save(update_fields=['ultimo_id', 'arquivados', 'arquivos', 'atualizado_em'])
+
+    def _gravar(self, config, linhas, inicio, fim):
+        particoes = defaultdict(list)
+        for linha in linhas:
+            inquilino_id = linha.pop(config.campo_inquilino)
+            registro = {'inquilino_id': inquilino_id, **linha}
+            particoes[(linha['timestamp'].year, linha['timestamp'].month)].append(registro)
+
+        for (ano, mes), registros in particoes.items():
+            pasta = self.diretorio / config.pasta / f'ano={ano}' / f'mes={mes:02d}'
+            pasta.mkdir(parents=True, exist_ok=True)
+            destino = pasta / f'{inicio:012d}-{fim:012d}.ndjson.gz'
+            temporario = destino.with_suffix('.tmp')
+
+            with gzip.open(temporario, 'wb') as arquivo:
+                for registro in registros:
+                    arquivo.write(_serializar(registro))
+            os.replace(temporario, destino)
+
+        return len(particoes)
+
+    def consultar(self, modelo, inquilino_id, desde=None, ate=None):
+        """Histórico arquivado de um inquilino, do mais recente ao mais antigo.
+
+        `desde`/`ate` (datas) restringem as partições lidas e os registros.
+        """
+        config = MODELOS[modelo]
+        marcador = f'{{"inquilino_id":{int(inquilino_id)},'.encode()
+        registros = []
+
+        for arquivo in sorted((self.diretorio / config.pasta).glob('ano=*/mes=*/*.ndjson.gz')):
+            ano = int(arquivo.parent.parent.name.split('=')[1])
+            mes = int(arquivo.parent.name.split('=')[1])
+            if desde and (ano, mes) < (desde.year, desde.month):
+                continue
+            if ate and (ano, mes) > (ate.year, ate.month):
+                continue
+
+            with gzip.open(arquivo, 'rb') as conteudo:
+                for linha in conteudo:
+                    if not linha.startswith(marcador):
+                        continue
+                    registro = json.loads(linha)
+                    data = parse_datetime(registro['timestamp']).date()
+                    if (desde and data < desde) or (ate and data > ate):
+                        continue
+                    registros.append(registro)
+
+        registros.sort(key=lambda r: r['timestamp'], reverse=True)
+        return registros
+
+
+def _serializar(registro):
+    texto = json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+    return texto.encode('utf-8') + b'\n'
+
+
+# Instância global do serviço
+arquivamento_service = ArquivamentoHistoricoService()
@@ -0,0 +1,330 @@
+"""
+Assinaturas de relatório: pré-geração agendada fora do horário de pico
+
+Cada AssinaturaRelatorio aponta para um RelatorioTemplate (o SQL do
+template quando ele tem query_sql, senão o relatório embutido do tipo do
+template), com parâmetros, formato e agenda cron. O despachante, agendado
+no Celery beat (ex.: a cada 5 minutos), reserva as assinaturas vencidas e
+as envia para a fila RELATORIO_ASSINATURAS_FILA, só dentro da janela
+RELATORIO_ASSINATURAS_INICIO..FIM; fora dela, as vencidas esperam a
+janela abrir. O arquivo gerado fica em uma RelatorioExecucao com `chave`
+= relatório + parâmetros + formato.
+
+Pedidos interativos com a mesma chave recebem o arquivo mais recente
+gerado há menos de RELATORIO_ASSINATURAS_VALIDADE_HORAS em vez de
+calcular e renderizar o relatório de novo.
+"""
+import hashlib
+import json
+import logging
+import time as relogio
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from aptos.db_router import leitura_replica
+from aptos.models import AssinaturaRelatorio, RelatorioExecucao
+from aptos.renderers import ORJSONRenderer
+from aptos.services.relatorio_service import relatorio_service
+from aptos.services.relatorio_sql_service import relatorio_sql_service
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES = {'PDF': 'pdf', 'EXCEL': 'xlsx', 'JSON': 'json'}
+
+# Limites de minuto, hora, dia, mês e dia da semana (0 ou 7 = domingo)
+_CAMPOS_CRON = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# Busca da próxima ocorrência limitada (ex.: 30 de fevereiro nunca ocorre)
+_DIAS_BUSCA_CRON = 366 * 5
+
+
+def _data(valor):
+    data = parse_date(str(valor))
+    if data is None:
+        raise ValueError(f"Data inválida: {valor} (use AAAA-MM-DD)")
+    return data
+
+
+_PERIODO = {'data_inicio': _data, 'data_fim': _data}
+
+# Relatórios embutidos por tipo de template: método do relatorio_service e
+# filtros aceitos nos parâmetros (com a conversão)
+RELATORIOS = {
+    'INQUILINOS_ATIVOS': ('gerar_relatorio_inquilinos_ativos', _PERIODO),
+    'OCUPACAO': ('gerar_relatorio_ocupacao', _PERIODO),
+    'INADIMPLENTES': ('gerar_relatorio_inadimplentes', {}),
+    'ROTATIVIDADE': ('gerar_relatorio_rotatividade', _PERIODO),
+    'HISTORICO_LOCACOES': (
+        'gerar_relatorio_historico_locacoes',
+        {**_PERIODO, 'apartamento_id': int, 'inquilino_id': int},
+    ),
+}
+
+
+def _valores_cron(campo, minimo, maximo):
+    valores = set()
+    for parte in campo.split(','):
+        faixa, barra, passo = parte.partition('/')
+        passo = int(passo) if barra else 1
+        if faixa == '*':
+            inicio, fim = minimo, maximo
+        elif '-' in faixa:
+            inicio, fim = (int(v) for v in faixa.split('-', 1))
+        else:
+            # "5/15" = de 5 até o fim do campo, de 15 em 15
+            inicio = int(faixa)
+            fim = maximo if barra else inicio
+        if passo < 1 or not minimo <= inicio <= fim <= maximo:
+            raise ValueError(parte)
+        valores.update(range(inicio, fim + 1, passo))
+    return valores
+
+
+class AgendaCron:
+    """Expressão cron de 5 campos: minuto hora dia mês dia-da-semana
+
+    Aceita `*`, listas (`1,15`), faixas (`1-5`) e passos (`*/15`, `8-18/2`).
+    Como no cron, quando dia e dia da semana são restritos basta um dos dois.
+    """
+
+    def __init__(self, expressao):
+        campos = (expressao or '').split()
+        if len(campos) != 5:
+            raise ValueError('A agenda deve ter 5 campos: minuto hora dia mês dia-da-semana')
+        try:
+            self.minutos, self.horas, self.dias, self.meses, dias_semana = (
+                sorted(_valores_cron(campo, *limites))
+                for campo, limites in zip(campos, _CAMPOS_CRON)
+            )
+        except ValueError:
+            raise ValueError(f'Agenda cron inválida: {expressao}')
+        self.dias_semana = {dia % 7 for dia in dias_semana}
+        self._qualquer_dia = campos[2] == '*' or campos[4] == '*'
+
+    def _dia_confere(self, data):
+        dia = data.day in self.dias
+        # weekday(): segunda = 0; cron: domingo = 0
+        dia_semana = (data.weekday() + 1) % 7 in self.dias_semana
+        return dia and dia_semana if self._qualquer_dia else dia or dia_semana
+
+    def proxima(self, depois=None):
+        """Próxima ocorrência (horário local) estritamente após `depois`"""
+        inicio = timezone.localtime(depois or timezone.now()).replace(
+            second=0, microsecond=0, tzinfo=None
+        ) + timedelta(minutes=1)
+
+        data = inicio.date()
+        for _ in range(_DIAS_BUSCA_CRON):
+            if data.month in self.meses and self._dia_confere(data):
+                for hora in self.horas:
+                    for minuto in self.minutos:
+                        candidato = datetime.combine(data, time(hora, minuto))
+                        if candidato >= inicio:
+                            return timezone.make_aware(candidato)
+            data += timedelta(days=1)
+        raise ValueError('A agenda não tem ocorrências')
+
+
+def filtros_relatorio(tipo, parametros):
+    """Filtros do relatório embutido a partir dos parâmetros da assinatura"""
+    if tipo not in RELATORIOS:
+        raise ValueError(f'Tipo de relatório sem geração embutida: {tipo}')
+    aceitos = RELATORIOS[tipo][1]
+
+    desconhecidos = sorted(set(parametros or {}) - set(aceitos))
+    if desconhecidos:
+        raise ValueError(f"Parâmetros desconhecidos: {', '.join(desconhecidos)}")
+    try:
+        return {
+            nome: aceitos[nome](valor)
+            for nome, valor in (parametros or {}).items()
+            if valor not in (None, '')
+        }
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Parâmetro inválido: {e}')
+
+
+def _digest(*partes):
+    assinatura = json.dumps(partes, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(assinatura.encode()).hexdigest()
+
+
+def chave_relatorio(tipo, filtros, formato):
+    """Chave de um relatório embutido; filtros vazios (None) não contam"""
+    filtros = {nome: valor for nome, valor in filtros.items() if valor is not None}
+    return _digest('relatorio', tipo, formato.upper(), filtros)
+
+
+def chave_template(template, valores, formato):
+    """Chave de um template SQL; muda quando o template é editado"""
+    atualizado = template.updated_at.isoformat() if template.updated_at else ''
+    return _digest('template', template.pk, atualizado, formato.upper(), valores)
+
+
+class AssinaturaRelatorioService:
+    """Agenda, despacho e geração das assinaturas de relatório"""
+
+    @property
+    def fila(self):
+        return settings.RELATORIO_ASSINATURAS_FILA
+
+    @property
+    def validade(self):
+        return timedelta(hours=settings.RELATORIO_ASSINATURAS_VALIDADE_HORAS)
+
+    def em_horario(self, agora=None):
+        """Se `agora` está na janela fora de pico (que pode virar a meia-noite)"""
+        hora = timezone.localtime(agora or timezone.now()).hour
+        inicio = settings.RELATORIO_ASSINATURAS_INICIO
+        fim = settings.RELATORIO_ASSINATURAS_FIM
+        if inicio <= fim:
+            return inicio <= hora < fim
+        return hora >= inicio or hora < fim
+
+    def validar(self, template, parametros, agenda):
+        """Confere agenda e parâmetros; levanta ValueError ou RelatorioSQLError"""
+        AgendaCron(agenda).proxima()
+        if template.query_sql:
+            relatorio_sql_service.preparar_parametros(template, parametros)
+        else:
+            filtros_relatorio(template.tipo, parametros)
+
+    def proxima_execucao(self, agenda, depois=None):
+        return AgendaCron(agenda).proxima(depois)
+
+    def reservar_vencidas(self, agora=None, ignorar_horario=False):
+        """Avança a agenda das assinaturas vencidas; retorna os ids a gerar
+
+        A reserva é um UPDATE condicionado à próxima execução lida, então
+        dois despachantes simultâneos não enviam a mesma assinatura. Uma
+        assinatura sem agenda calculada (criada fora da API) só é agendada.
+        """
+        agora = agora or timezone.now()
+        if not ignorar_horario and not self.em_horario(agora):
+            return []
+
+        vencidas = AssinaturaRelatorio.objects.filter(
+            Q(proxima_execucao__lte=agora) | Q(proxima_execucao__isnull=True), ativa=True
+        ).only('id', 'agenda', 'proxima_execucao')
+
+        reservadas = []
+        for assinatura in vencidas:
+            try:
+                proxima = self.proxima_execucao(assinatura.agenda, agora)
+            except ValueError as e:
+                logger.warning(f"Assinatura {assinatura.pk} com agenda inválida: {e}")
+                continue
+            reservada = AssinaturaRelatorio.objects.filter(
+                pk=assinatura.pk, proxima_execucao=assinatura.proxima_execucao
+            ).update(proxima_execucao=proxima)
+            if reservada and assinatura.proxima_execucao is not None:
+                reservadas.append(assinatura.pk)
+        return reservadas
+
+    def gerar(self, assinatura_id):
+        """Gera o relatório da assinatura e grava o arquivo na execução"""
+        assinatura = AssinaturaRelatorio.objects.select_related('template', 'usuario').get(
+            pk=assinatura_id
+        )
+        template = assinatura.template
+        formato = assinatura.formato
+        inicio = relogio.monotonic()
+
+        with leitura_replica():
+            if template.query_sql:
+                execucao, conteudo, chave = self._gerar_template(assinatura)
+            else:
+                execucao, conteudo, chave = self._gerar_embutido(assinatura)
+
+        execucao.assinatura = assinatura
+        execucao.chave = chave
+        nome = f"{template.tipo.lower()}_{assinatura.pk}_{timezone.localtime():%Y%m%d_%H%M}"
+        execucao.arquivo_gerado.save(f"{nome}.{EXTENSOES[formato]}", ContentFile(conteudo), save=False)
+        execucao.save(update_fields=['assinatura', 'chave', 'arquivo_gerado'])
+
+        assinatura.ultima_execucao = execucao
+        assinatura.save(update_fields=['ultima_execucao', 'updated_at'])
+
+        logger.info(
+            f"Assinatura {assinatura.pk} ({template.nome}, {formato}): "
+            f"{len(conteudo)} bytes em {relogio.monotonic() - inicio:.2f}s"
+        )
+        return execucao
+
+    def _gerar_template(self, assinatura):
+        template = assinatura.template
+        execucao, colunas, linhas = relatorio_sql_service.executar(
+            template, assinatura.usuario, assinatura.parametros, formato=assinatura.formato
+        )
+        # As linhas são consumidas na exportação; a execução é concluída ao fim delas
+        if assinatura.formato == 'PDF':
+            conteudo = relatorio_service.exportar_tabela_pdf(template.nome, colunas, linhas).getvalue()
+        elif assinatura.formato == 'EXCEL':
+            conteudo = relatorio_service.exportar_tabela_excel(template.nome, colunas, linhas).getvalue()
+        else:
+            dados = [dict(zip(colunas, linha)) for linha in linhas]
+            conteudo = ORJSONRenderer().render(
+                {'template': template.nome, 'colunas': colunas, 'dados': dados, 'total': len(dados)}
+            )
+        return execucao, conteudo, chave_template(template, execucao.parametros, assinatura.formato)
+
+    def _gerar_embutido(self, assinatura):
+        template = assinatura.template
+        metodo = RELATORIOS[template.tipo][0]
+        filtros = filtros_relatorio(template.tipo, assinatura.parametros)
+        execucao = RelatorioExecucao.objects.create(
+            template=template,
+            usuario=assinatura.usuario,
+            parametros=assinatura.parametros,
+            status='PROCESSANDO',
+            formato=assinatura.formato,
+        )
+
+        try:
+            dados = getattr(relatorio_service, metodo)(**filtros)
+            if assinatura.formato == 'PDF':
+                conteudo = relatorio_service.exportar_para_pdf(dados, template.tipo).getvalue()
+            elif assinatura.formato == 'EXCEL':
+                conteudo = relatorio_service.exportar_para_excel(dados, template.tipo).getvalue()
+            else:
+                conteudo = ORJSONRenderer().render(dados)
+        except Exception as e:
+            logger.warning(f"Assinatura {assinatura.pk} falhou: {e}")
+            execucao.status = 'ERRO'
+            execucao.erro_detalhes = str(e)
+            execucao.concluido_em = timezone.now()
+            execucao.save(update_fields=['status', 'erro_detalhes', 'concluido_em'])
+            raise
+
+        execucao.status = 'CONCLUIDO'
+        execucao.total_registros = len(dados.get('dados') or ())
+        execucao.concluido_em = timezone.now()
+        execucao.save(update_fields=['status', 'total_registros', 'concluido_em'])
+        return execucao, conteudo, chave_relatorio(template.tipo, filtros, assinatura.formato)
+
+    def abrir_pre_gerado(self, chave):
+        """(execução, arquivo aberto) do relatório pré-gerado mais recente, ou None"""
+        execucao = (
+            RelatorioExecucao.objects.filter(
+                chave=chave, status='CONCLUIDO', concluido_em__gte=timezone.now() - self.validade
+            )
+            .exclude(arquivo_gerado='')
+            .order_by('-concluido_em')
+            .first()
+        )
+        if execucao is None:
+            return None
+        try:
+            return execucao, execucao.arquivo_gerado.open('rb')
+        except OSError as e:
+            logger.warning(f"Relatório pré-gerado {execucao.pk} indisponível: {e}")
+            return None
+
+
+# Instância global do serviço
+assinatura_relatorio_service = AssinaturaRelatorioService()
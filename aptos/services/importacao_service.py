@@ -0,0 +1,369 @@
+"""
+Serviço de importação em lote de inquilinos (CSV/XLSX)
+"""
+import csv
+import io
+import logging
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from aptos.models import ImportacaoInquilinos, Inquilino
+from aptos.batch_validators import validar_cnpjs, validar_cpfs
+from aptos.services.indice_documentos_service import indice_documentos
+from aptos.validators import limpar_documento
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 500
+
+COLUNAS = [
+    'tipo', 'nome_completo', 'razao_social', 'nome_fantasia', 'cpf', 'cnpj',
+    'rg', 'email', 'telefone', 'status', 'data_nascimento', 'estado_civil',
+    'profissao', 'renda', 'inscricao_estadual', 'responsavel_legal',
+    'endereco_completo', 'observacoes',
+]
+
+CAMPOS_UNICOS = ['email', 'cpf', 'cnpj']
+
+EXTENSOES_SUPORTADAS = ('.csv', '.xlsx')
+
+
+class ImportacaoError(Exception):
+    """Erro que impede a leitura do arquivo como um todo"""
+
+
+def _normalizar_cabecalho(valor):
+    return str(valor or '').strip().lower().replace(' ', '_')
+
+
+def _ler_csv(arquivo):
+    # UploadedFile/FieldFile expõem o arquivo binário real em .file
+    texto = io.TextIOWrapper(getattr(arquivo, 'file', arquivo), encoding='utf-8-sig', newline='')
+    try:
+        amostra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+        except csv.Error:
+            dialeto = csv.excel
+
+        leitor = csv.reader(texto, dialeto)
+        cabecalho = next(leitor, None)
+        if cabecalho is None:
+            return
+        yield [_normalizar_cabecalho(c) for c in cabecalho]
+        yield from leitor
+    finally:
+        # Devolve o arquivo sem fechá-lo junto com o wrapper
+        texto.detach()
+
+
+def _ler_xlsx(arquivo):
+    from openpyxl import load_workbook
+
+    # read_only percorre a planilha sem carregá-la inteira em memória
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        yield [_normalizar_cabecalho(c) for c in cabecalho]
+        yield from linhas
+    finally:
+        planilha.close()
+
+
+def ler_linhas(arquivo, nome_arquivo):
+    """Gera (número da linha, dict) para cada linha de dados da planilha"""
+    nome = nome_arquivo.lower()
+    if nome.endswith('.csv'):
+        linhas = _ler_csv(arquivo)
+    elif nome.endswith('.xlsx'):
+        linhas = _ler_xlsx(arquivo)
+    else:
+        raise ImportacaoError('Formato não suportado. Use CSV ou XLSX.')
+
+    cabecalho = next(linhas, None)
+    if not cabecalho:
+        raise ImportacaoError('Arquivo vazio.')
+
+    desconhecidas = [c for c in cabecalho if c and c not in COLUNAS]
+    if desconhecidas:
+        raise ImportacaoError(f"Colunas desconhecidas: {', '.join(desconhecidas)}")
+    if 'tipo' not in cabecalho or 'email' not in cabecalho:
+        raise ImportacaoError('As colunas tipo e email são obrigatórias.')
+
+    # Linha 1 é o cabeçalho
+    for numero, valores in enumerate(linhas, start=2):
+        if not any(v not in (None, '') for v in valores):
+            continue
+        yield numero, dict(zip(cabecalho, valores))
+
+
+def _lotes(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+def _parse_data(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise ValidationError('Data inválida. Use AAAA-MM-DD ou DD/MM/AAAA.')
+
+
+def _parse_decimal(valor):
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor))
+    texto = valor.replace('R$', '').strip()
+    if ',' in texto:
+        # Formato brasileiro: 1.234,56
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise ValidationError('Valor numérico inválido.')
+
+
+def _mensagens(erro):
+    if hasattr(erro, 'message_dict'):
+        return erro.message_dict
+    return {'__all__': erro.messages}
+
+
+class ImportacaoInquilinosService:
+    """Lê a planilha em lotes, valida, confere unicidade e insere com bulk_create"""
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE):
+        self.tamanho_lote = tamanho_lote
+
+    def importar(self, arquivo, nome_arquivo):
+        """Importa a planilha e retorna o resumo com os erros por linha.
+
+        Cada lote é inserido em sua própria transação: um arquivo grande
+        não mantém uma transação aberta do início ao fim, e linhas
+        inválidas não impedem a importação das demais.
+        """
+        resultado = {'total_linhas': 0, 'criados': 0, 'com_erro': 0, 'erros': []}
+        vistos = {campo: set() for campo in CAMPOS_UNICOS}
+
+        for lote in _lotes(ler_linhas(arquivo, nome_arquivo), self.tamanho_lote):
+            criados, erros = self._processar_lote(lote, vistos)
+            resultado['total_linhas'] += len(lote)
+            resultado['criados'] += criados
+            resultado['com_erro'] += len(erros)
+            resultado['erros'].extend(erros)
+
+        logger.info(
+            f"Importação de {nome_arquivo}: {resultado['criados']} criados, "
+            f"{resultado['com_erro']} com erro"
+        )
+        return resultado
+
+    def processar(self, importacao_id):
+        """Executa uma ImportacaoInquilinos pendente (usado em segundo plano)"""
+        importacao = ImportacaoInquilinos.objects.get(pk=importacao_id)
+        importacao.status = 'PROCESSANDO'
+        importacao.save(update_fields=['status'])
+
+        try:
+            with importacao.arquivo.open('rb') as arquivo:
+                resultado = self.importar(arquivo, importacao.nome_arquivo)
+        except Exception as e:
+            logger.exception(f"Falha na importação {importacao_id}")
+            importacao.status = 'ERRO'
+            importacao.erro_detalhes = str(e)
+            importacao.concluido_em = timezone.now()
+            importacao.save(update_fields=['status', 'erro_detalhes', 'concluido_em'])
+            return importacao
+
+        importacao.status = 'CONCLUIDO'
+        importacao.total_linhas = resultado['total_linhas']
+        importacao.criados = resultado['criados']
+        importacao.com_erro = resultado['com_erro']
+        importacao.erros = resultado['erros']
+        importacao.concluido_em = timezone.now()
+        importacao.save()
+        return importacao
+
+    def _processar_lote(self, lote, vistos):
+        erros = {}
+        candidatos = []
+
+        for numero, dados in lote:
+            try:
+                candidatos.append((numero, self._normalizar(dados)))
+            except ValidationError as e:
+                erros[numero] = _mensagens(e)
+
+        self._validar_documentos(candidatos, erros)
+        self._validar_unicidade(candidatos, vistos, erros)
+
+        validos = []
+        for numero, dados in candidatos:
+            if numero in erros:
+                continue
+            inquilino = Inquilino(**dados)
+            try:
+                # Documentos e unicidade já verificados em lote acima
+                inquilino.full_clean(
+                    exclude=['cpf', 'cnpj'], validate_unique=False, validate_constraints=False
+                )
+            except ValidationError as e:
+                erros[numero] = _mensagens(e)
+                continue
+            validos.append((numero, inquilino))
+
+        criados = self._inserir(validos, erros)
+        relatorio = [{'linha': numero, 'erros': erros[numero]} for numero in sorted(erros)]
+        return criados, relatorio
+
+    def _normalizar(self, dados):
+        normalizado = {}
+        erros = {}
+        for campo, valor in dados.items():
+            if not campo:
+                continue
+            if isinstance(valor, str):
+                valor = valor.strip()
+            if valor in (None, ''):
+                continue
+            try:
+                if campo in ('cpf', 'cnpj'):
+                    valor = limpar_documento(valor)
+                elif campo in ('tipo', 'status'):
+                    valor = str(valor).upper()
+                elif campo == 'data_nascimento':
+                    valor = _parse_data(valor)
+                elif campo == 'renda':
+                    valor = _parse_decimal(valor)
+                else:
+                    valor = str(valor)
+            except ValidationError as e:
+                erros[campo] = e.messages
+                continue
+            normalizado[campo] = valor
+
+        if erros:
+            raise ValidationError(erros)
+        return normalizado
+
+    def _validar_documentos(self, candidatos, erros):
+        """Dígitos verificadores de CPF/CNPJ do lote inteiro de uma vez (NumPy)"""
+        for campo, validador in (('cpf', validar_cpfs), ('cnpj', validar_cnpjs)):
+            linhas = [(numero, dados[campo]) for numero, dados in candidatos if dados.get(campo)]
+            resultado = validador([doc for _, doc in linhas])
+            for (numero, _), mensagem in zip(linhas, resultado.erros):
+                if mensagem:
+                    erros.setdefault(numero, {}).setdefault(campo, []).append(mensagem)
+
+    def _validar_unicidade(self, candidatos, vistos, erros):
+        """Uma única query IN por lote para email, CPF e CNPJ"""
+        valores = {campo: set() for campo in CAMPOS_UNICOS}
+        for _, dados in candidatos:
+            for campo in CAMPOS_UNICOS:
+                if dados.get(campo):
+                    valores[campo].add(dados[campo])
+
+        filtro = Q()
+        for campo, conjunto in valores.items():
+            if conjunto:
+                filtro |= Q(**{f'{campo}__in': conjunto})
+
+        existentes = {campo: set() for campo in CAMPOS_UNICOS}
+        if filtro:
+            for linha in Inquilino.objects.filter(filtro).values_list(*CAMPOS_UNICOS):
+                for campo, valor in zip(CAMPOS_UNICOS, linha):
+                    if valor:
+                        existentes[campo].add(valor)
+
+        for numero, dados in candidatos:
+            for campo in CAMPOS_UNICOS:
+                valor = dados.get(campo)
+                if not valor:
+                    continue
+                if valor in existentes[campo]:
+                    mensagem = f'Já existe um inquilino com este {campo}.'
+                elif valor in vistos[campo]:
+                    mensagem = f'{campo} repetido em outra linha do arquivo.'
+                else:
+                    continue
+                erros.setdefault(numero, {}).setdefault(campo, []).append(mensagem)
+
+            if numero not in erros:
+                for campo in CAMPOS_UNICOS:
+                    if dados.get(campo):
+                        vistos[campo].add(dados[campo])
+
+    def _inserir(self, validos, erros):
+        if not validos:
+            return 0
+
+        try:
+            with transaction.atomic():
+                Inquilino.objects.bulk_create(
+                    [inquilino for _, inquilino in validos], batch_size=self.tamanho_lote
+                )
+            # bulk_create não passa por Inquilino.save
+            indice_documentos.adicionar([inquilino for _, inquilino in validos])
+            return len(validos)
+        except IntegrityError:
+            # Concorrência com outro cadastro: insere linha a linha para
+            # identificar as que violam unicidade
+            logger.warning('Conflito de unicidade no bulk_create; inserindo linha a linha')
+
+        criados = 0
+        for numero, inquilino in validos:
+            inquilino.pk = None
+            try:
+                with transaction.atomic():
+                    Inquilino.objects.bulk_create([inquilino])
+                indice_documentos.adicionar([inquilino])
+                criados += 1
+            except IntegrityError:
+                erros[numero] = {'__all__': ['Violação de unicidade (email, CPF ou CNPJ).']}
+        return criados
+
+
+# Instância global do serviço
+importacao_service = ImportacaoInquilinosService()
+
+
+def agendar_importacao_inquilinos(importacao_id):
+    """Envia a importação para processamento em segundo plano.
+
+    Sem Celery disponível ou com o broker fora do ar, a importação fica
+    PENDENTE e pode ser processada com `manage.py importar_inquilinos --pendentes`.
+    """
+    try:
+        from aptos.tasks import processar_importacao_inquilinos
+    except ImportError:
+        logger.warning(
+            f"Celery indisponível; importação {importacao_id} aguardando processamento"
+        )
+        return False
+
+    try:
+        processar_importacao_inquilinos.delay(str(importacao_id))
+    except Exception as e:
+        # kombu.exceptions.OperationalError e afins: o registro e o arquivo
+        # já foram salvos, então a importação segue pendente em vez de 500
+        logger.warning(
+            f"Falha ao enfileirar importação {importacao_id}: {e}; aguardando processamento"
+        )
+        return False
+    return True
@@ -0,0 +1,191 @@
+"""
+Índice de existência de CPF/CNPJ no Redis
+
+Mantém um SET com o digest de cada documento cadastrado para que a
+validação em tempo real responda "não existe" sem consultar o banco.
+Só os digests ficam no Redis, nunca o documento em si.
+
+O índice só pode errar para o lado seguro: entradas sobrando (documento
+alterado, exclusão em massa) fazem a consulta cair no banco; nunca se
+responde "não existe" para um documento cadastrado enquanto o índice
+estiver completo. Um membro sentinela marca o índice como completo; se
+o SET for removido ou despejado pelo Redis, o sentinela vai junto e
+todas as consultas voltam a usar o banco até a próxima reconstrução
+(`manage.py reconstruir_indice_documentos`).
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from aptos.models import Inquilino
+
+logger = logging.getLogger(__name__)
+
+CHAVE = 'aptos:indice_documentos'
+CHAVE_RECONSTRUCAO = f'{CHAVE}:reconstrucao'
+SENTINELA = '__completo__'
+CAMPOS = ('cpf', 'cnpj')
+TAMANHO_LOTE = 5000
+
+
+def digest_documento(campo, valor):
+    """Digest curto do documento; colisões só geram consultas extras ao banco"""
+    return hashlib.sha256(f'{campo}:{valor}'.encode()).hexdigest()[:16]
+
+
+def _digests(inquilinos):
+    for inquilino in inquilinos:
+        for campo in CAMPOS:
+            valor = getattr(inquilino, campo)
+            if valor:
+                yield digest_documento(campo, valor)
+
+
+class IndiceDocumentosService:
+    """Consulta e manutenção do índice de documentos cadastrados"""
+
+    def __init__(self, cliente=None):
+        self._cliente = cliente
+
+    @property
+    def cliente(self):
+        """Conexão Redis do cache padrão; None quando o índice está desativado"""
+        if self._cliente is None:
+            if not getattr(settings, 'INDICE_DOCUMENTOS_ATIVO', True):
+                return None
+            backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+            if not backend.startswith('django_redis'):
+                return None
+            from django_redis import get_redis_connection
+            self._cliente = get_redis_connection('default')
+        return self._cliente
+
+    def pode_existir(self, campo, valor):
+        """False apenas quando o documento certamente não está cadastrado"""
+        cliente = self.cliente
+        if cliente is None:
+            return True
+        try:
+            pipe = cliente.pipeline(transaction=False)
+            pipe.sismember(CHAVE, SENTINELA)
+            pipe.sismember(CHAVE, digest_documento(campo, valor))
+            completo, presente = pipe.execute()
+        except Exception:
+            logger.warning('Índice de documentos indisponível; consultando o banco', exc_info=True)
+            return True
+        return not completo or bool(presente)
+
+    def consultar(self, campo, valor, excluir_id=None):
+        """Resumo do inquilino com o documento, ou None.
+
+        Ausências certas respondem sem banco; possíveis presenças fazem
+        uma única query que já traz os dados exibidos no formulário.
+        """
+        if not self.pode_existir(campo, valor):
+            return None
+
+        queryset = Inquilino.objects.filter(**{campo: valor})
+        if excluir_id:
+            queryset = queryset.exclude(pk=excluir_id)
+        existente = queryset.values('id', 'tipo', 'nome_completo', 'razao_social', 'status').first()
+        if existente is None:
+            return None
+        return {
+            'id': existente['id'],
+            'nome': existente['nome_completo'] if existente['tipo'] == 'PF' else existente['razao_social'],
+            'status': existente['status'],
+        }
+
+    def adicionar(self, inquilinos):
+        """Registra os documentos dos inquilinos (inclusive durante reconstrução).
+
+        O registro é feito na hora, para o documento não ficar de fora entre
+        o commit e o callback, e repetido após o commit: uma reconstrução
+        iniciada depois do primeiro SADD, cuja leitura do banco ainda não via
+        a linha, descartaria o digest no RENAME.
+        """
+        cliente = self.cliente
+        digests = list(_digests(inquilinos))
+        if cliente is None or not digests:
+            return
+
+        self._registrar(cliente, digests)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._registrar(cliente, digests))
+
+    def _registrar(self, cliente, digests):
+        try:
+            pipe = cliente.pipeline(transaction=False)
+            pipe.sadd(CHAVE, *digests)
+            pipe.exists(CHAVE_RECONSTRUCAO)
+            _, reconstruindo = pipe.execute()
+            if reconstruindo:
+                cliente.sadd(CHAVE_RECONSTRUCAO, *digests)
+        except Exception:
+            # Sem o digest o índice daria "não existe" para um documento
+            # cadastrado: descarta o índice até a próxima reconstrução
+            logger.exception('Falha ao atualizar o índice de documentos')
+            self.invalidar()
+
+    def remover(self, inquilino):
+        """Remove os documentos do inquilino após o commit da exclusão"""
+        cliente = self.cliente
+        digests = list(_digests([inquilino]))
+        if cliente is None or not digests:
+            return
+
+        def _remover():
+            try:
+                cliente.srem(CHAVE, *digests)
+            except Exception:
+                # Entradas sobrando só custam uma consulta ao banco
+                logger.warning('Falha ao remover documentos do índice', exc_info=True)
+
+        # Removido antes do commit, um rollback deixaria o documento fora
+        # do índice
+        transaction.on_commit(_remover)
+
+    def invalidar(self):
+        cliente = self.cliente
+        if cliente is None:
+            return
+        try:
+            cliente.srem(CHAVE, SENTINELA)
+        except Exception:
+            logger.exception('Falha ao invalidar o índice de documentos')
+
+    def reconstruir(self, tamanho_lote=TAMANHO_LOTE):
+        """Recria o índice a partir do banco e o troca atomicamente (RENAME)"""
+        cliente = self.cliente
+        if cliente is None:
+            return None
+
+        cliente.delete(CHAVE_RECONSTRUCAO)
+        # Cria a chave antes da leitura para que cadastros concorrentes
+        # também entrem no novo índice (ver adicionar)
+        cliente.sadd(CHAVE_RECONSTRUCAO, SENTINELA)
+
+        total = 0
+        lote = []
+        linhas = Inquilino.objects.values_list(*CAMPOS).iterator(chunk_size=tamanho_lote)
+        for linha in linhas:
+            for campo, valor in zip(CAMPOS, linha):
+                if valor:
+                    lote.append(digest_documento(campo, valor))
+            if len(lote) >= tamanho_lote:
+                cliente.sadd(CHAVE_RECONSTRUCAO, *lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            cliente.sadd(CHAVE_RECONSTRUCAO, *lote)
+            total += len(lote)
+
+        cliente.rename(CHAVE_RECONSTRUCAO, CHAVE)
+        logger.info(f'Índice de documentos reconstruído com {total} documentos')
+        return total
+
+
+# Instância global do serviço
+indice_documentos = IndiceDocumentosService()
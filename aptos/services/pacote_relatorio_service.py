@@ -0,0 +1,150 @@
+"""
+Pacote de relatórios: o mesmo relatório em vários formatos em um ZIP
+
+O conjunto de dados de cada relatório é calculado uma vez e fica no cache
+por RELATORIO_DADOS_CACHE_TIMEOUT (chave: tipo + filtros + versão dos
+dados, a mesma dos relatórios SQL), então um download avulso logo em
+seguida (JSON, PDF ou Excel) reaproveita o cálculo.
+
+No pacote, PDF e Excel são renderizados nos processos do pool de
+relatórios (pdf_service.submeter) enquanto o JSON é serializado no
+próprio worker. O ZIP sai em streaming, entrada por entrada, na ordem em
+que os formatos ficam prontos, sem montar o arquivo inteiro em memória.
+"""
+import hashlib
+import io
+import json
+import logging
+import time
+import zipfile
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from aptos.renderers import ORJSONRenderer
+from aptos.services.pdf_service import pdf_service
+from aptos.services.relatorio_sql_service import versao_dados
+
+logger = logging.getLogger(__name__)
+
+FORMATOS_PACOTE = ('json', 'pdf', 'excel')
+EXTENSOES = {'json': 'json', 'pdf': 'pdf', 'excel': 'xlsx'}
+# PDF e XLSX já são compactados
+_COMPRESSAO = {'json': zipfile.ZIP_DEFLATED, 'pdf': zipfile.ZIP_STORED, 'excel': zipfile.ZIP_STORED}
+_TAMANHO_BLOCO = 1024 * 1024
+
+
+def renderizar_formato(dados, tipo, formato):
+    """PDF ou Excel do relatório em bytes; executada nos processos do pool"""
+    from aptos.services.relatorio_service import relatorio_service
+
+    if formato == 'pdf':
+        return relatorio_service.exportar_para_pdf(dados, tipo).getvalue()
+    return relatorio_service.exportar_para_excel(dados, tipo).getvalue()
+
+
+def _chave_dados(tipo, filtros):
+    assinatura = json.dumps(filtros, sort_keys=True, cls=DjangoJSONEncoder)
+    digest = hashlib.sha256(assinatura.encode()).hexdigest()[:24]
+    return f'relatorio_dados:{tipo}:{versao_dados()}:{digest}'
+
+
+class _SaidaZip(io.RawIOBase):
+    """Destino sem seek para o ZipFile: guarda o que foi escrito até ser drenado"""
+
+    def __init__(self):
+        self._blocos = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._blocos.append(bytes(dados))
+        return len(dados)
+
+    def drenar(self):
+        dados = b''.join(self._blocos)
+        self._blocos.clear()
+        return dados
+
+
+class PacoteRelatorioService:
+    """Dados de relatório em cache e pacote ZIP com vários formatos"""
+
+    def __init__(self, cache_timeout=None, cache_max_linhas=None):
+        self._cache_timeout = cache_timeout
+        self._cache_max_linhas = cache_max_linhas
+
+    @property
+    def cache_timeout(self):
+        if self._cache_timeout is not None:
+            return self._cache_timeout
+        return settings.RELATORIO_DADOS_CACHE_TIMEOUT
+
+    @property
+    def cache_max_linhas(self):
+        if self._cache_max_linhas is not None:
+            return self._cache_max_linhas
+        return settings.RELATORIO_DADOS_CACHE_MAX_LINHAS
+
+    def obter_dados(self, tipo, filtros, gerar):
+        """Dados do relatório vindos do cache ou calculados com `gerar(**filtros)`"""
+        chave = _chave_dados(tipo, filtros)
+        dados = cache.get(chave)
+        if dados is None:
+            dados = gerar(**filtros)
+            if self.cache_timeout and len(dados.get('dados') or ()) <= self.cache_max_linhas:
+                cache.set(chave, dados, self.cache_timeout)
+        return dados
+
+    def gerar_zip(self, dados, tipo, nome_arquivo, formatos=FORMATOS_PACOTE):
+        """Inicia a renderização dos formatos e retorna o iterador de blocos do ZIP"""
+        futuros = {
+            pdf_service.submeter(renderizar_formato, dados, tipo, formato): formato
+            for formato in formatos
+            if formato != 'json'
+        }
+        return (bloco for bloco in self._blocos_zip(dados, nome_arquivo, formatos, futuros) if bloco)
+
+    def _blocos_zip(self, dados, nome_arquivo, formatos, futuros):
+        inicio = time.monotonic()
+        saida = _SaidaZip()
+        with zipfile.ZipFile(saida, 'w') as arquivo:
+            if 'json' in formatos:
+                yield from self._escrever(
+                    arquivo, saida, f'{nome_arquivo}.json', ORJSONRenderer().render(dados), 'json'
+                )
+
+            for futuro in as_completed(futuros):
+                formato = futuros[futuro]
+                nome = f'{nome_arquivo}.{EXTENSOES[formato]}'
+                try:
+                    conteudo = futuro.result()
+                except Exception as e:
+                    # A resposta já começou: a falha vai como arquivo no pacote
+                    logger.warning(f"Pacote {nome_arquivo}: falha ao gerar {formato}: {e}")
+                    arquivo.writestr(f'{nome}.erro.txt', f'Falha ao gerar {formato}: {e}')
+                    yield saida.drenar()
+                else:
+                    yield from self._escrever(arquivo, saida, nome, conteudo, formato)
+        yield saida.drenar()
+
+        logger.info(
+            f"Pacote {nome_arquivo} ({', '.join(formatos)}) em {time.monotonic() - inicio:.2f}s"
+        )
+
+    def _escrever(self, arquivo, saida, nome, conteudo, formato):
+        info = zipfile.ZipInfo(nome, date_time=time.localtime()[:6])
+        info.compress_type = _COMPRESSAO[formato]
+        info.external_attr = 0o644 << 16
+        with arquivo.open(info, 'w') as destino:
+            for posicao in range(0, len(conteudo), _TAMANHO_BLOCO):
+                destino.write(conteudo[posicao:posicao + _TAMANHO_BLOCO])
+                yield saida.drenar()
+        yield saida.drenar()
+
+
+# Instância global do serviço
+pacote_relatorio_service = PacoteRelatorioService()
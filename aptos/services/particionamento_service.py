@@ -0,0 +1,268 @@
+"""
+Particionamento mensal do histórico de status e de associações (PostgreSQL)
+
+Opcional: `manage.py particionar_historico` converte as tabelas de
+HistoricoStatus e HistoricoAssociacao em tabelas particionadas por faixa
+mensal de `timestamp`, com índice BRIN em `timestamp`. Consultas por
+janela recente (últimos 7/30 dias) passam a ler só as partições do
+período, e a retenção vira DETACH/DROP de partições em vez de DELETE.
+
+Partições: <tabela>_pAAAAMM para cada mês e <tabela>_padrao (DEFAULT)
+para registros fora das faixas criadas. A manutenção periódica
+(`manter`) cria as partições dos próximos meses e desanexa as que
+passaram da retenção.
+"""
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from aptos.models import HistoricoAssociacao, HistoricoStatus
+
+logger = logging.getLogger(__name__)
+
+MODELOS = {
+    'STATUS': HistoricoStatus,
+    'ASSOCIACAO': HistoricoAssociacao,
+}
+
+
+class ParticionamentoError(Exception):
+    """Operação de particionamento indisponível ou inválida"""
+
+
+def _proximo_mes(dia):
+    return date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+
+
+def meses_entre(inicio, fim):
+    """Primeiro dia de cada mês de `inicio` até `fim`, inclusive"""
+    mes = date(inicio.year, inicio.month, 1)
+    while mes <= fim:
+        yield mes
+        mes = _proximo_mes(mes)
+
+
+def nome_particao(tabela, mes):
+    return f'{tabela}_p{mes:%Y%m}'
+
+
+def sql_criar_particao(tabela, mes):
+    q = connection.ops.quote_name
+    return (
+        f"CREATE TABLE IF NOT EXISTS {q(nome_particao(tabela, mes))} PARTITION OF {q(tabela)} "
+        f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{_proximo_mes(mes).isoformat()}')"
+    )
+
+
+class ParticionamentoHistoricoService:
+    """Conversão e manutenção das partições mensais do histórico"""
+
+    def disponivel(self):
+        return connection.vendor == 'postgresql'
+
+    def esta_particionada(self, modelo):
+        if not self.disponivel():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [MODELOS[modelo]._meta.db_table],
+            )
+            return cursor.fetchone() is not None
+
+    def converter(self, modelo, meses_futuros=None):
+        """Recria a tabela do modelo como particionada e copia os dados.
+
+        Executa em uma única transação com a tabela travada: leituras e
+        escritas no histórico ficam bloqueadas durante a cópia. Retorna
+        False se a tabela já estiver particionada.
+        """
+        if not self.disponivel():
+            raise ParticionamentoError('Particionamento disponível apenas no PostgreSQL')
+        if self.esta_particionada(modelo):
+            return False
+
+        model = MODELOS[modelo]
+        tabela = model._meta.db_table
+        legado = f'{tabela}_legado'
+        sequencia = f'{tabela}_pid_seq'
+        meses_futuros = settings.HISTORICO_PARTICOES_FUTURAS if meses_futuros is None else meses_futuros
+        q = connection.ops.quote_name
+
+        with connection.schema_editor() as editor:
+            editor.execute(f"LOCK TABLE {q(tabela)} IN ACCESS EXCLUSIVE MODE")
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT MIN({q('timestamp')}), MAX(id) FROM {q(tabela)}")
+                mais_antigo, id_maximo = cursor.fetchone()
+
+            editor.execute(f"ALTER TABLE {q(tabela)} RENAME TO {q(legado)}")
+            # Sem INCLUDING IDENTITY: o id passa a usar uma sequência própria
+            editor.execute(
+                f"CREATE TABLE {q(tabela)} (LIKE {q(legado)} INCLUDING DEFAULTS) "
+                f"PARTITION BY RANGE ({q('timestamp')})"
+            )
+            editor.execute(f"CREATE SEQUENCE {q(sequencia)} OWNED BY {q(tabela)}.id")
+            editor.execute(
+                f"ALTER TABLE {q(tabela)} ALTER COLUMN id SET DEFAULT nextval('{sequencia}')"
+            )
+            editor.execute("SELECT setval(%s, %s, false)", [sequencia, (id_maximo or 0) + 1])
+
+            hoje = timezone.now().date()
+            inicio = mais_antigo.date() if mais_antigo else hoje
+            fim = self._mes_futuro(hoje, meses_futuros)
+            for mes in meses_entre(inicio, fim):
+                editor.execute(sql_criar_particao(tabela, mes))
+            editor.execute(
+                f"CREATE TABLE {q(tabela + '_padrao')} PARTITION OF {q(tabela)} DEFAULT"
+            )
+
+            editor.execute(f"INSERT INTO {q(tabela)} SELECT * FROM {q(legado)}")
+            editor.execute(f"DROP TABLE {q(legado)}")
+
+            # A chave primária de uma tabela particionada precisa incluir a
+            # coluna de partição; para o Django o pk continua sendo o id
+            editor.execute(
+                f"ALTER TABLE {q(tabela)} ADD CONSTRAINT {q(tabela + '_pkey')} "
+                f"PRIMARY KEY (id, {q('timestamp')})"
+            )
+            for field in model._meta.local_concrete_fields:
+                if field.remote_field and field.db_constraint:
+                    editor.execute(
+                        editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s')
+                    )
+                for sql in editor._field_indexes_sql(model, field):
+                    editor.execute(sql)
+            for index in model._meta.indexes:
+                editor.execute(index.create_sql(model, editor))
+            editor.execute(
+                f"CREATE INDEX {q(tabela + '_timestamp_brin')} ON {q(tabela)} "
+                f"USING brin ({q('timestamp')})"
+            )
+
+        logger.info(f"Tabela {tabela} convertida para partições mensais")
+        return True
+
+    def criar_particoes(self, modelo, meses_futuros=None):
+        """Garante as partições do mês atual até `meses_futuros` à frente"""
+        tabela = MODELOS[modelo]._meta.db_table
+        meses_futuros = settings.HISTORICO_PARTICOES_FUTURAS if meses_futuros is None else meses_futuros
+        hoje = timezone.now().date()
+
+        existentes = set(self.particoes(modelo))
+        padrao = tabela + '_padrao' if tabela + '_padrao' in existentes else None
+        criadas = []
+        for mes in meses_entre(hoje, self._mes_futuro(hoje, meses_futuros)):
+            nome = nome_particao(tabela, mes)
+            if nome not in existentes:
+                self._criar_particao(tabela, mes, padrao)
+                criadas.append(nome)
+        return criadas
+
+    def _criar_particao(self, tabela, mes, padrao):
+        """Cria a partição do mês, movendo as linhas que já caíram na DEFAULT.
+
+        O PostgreSQL recusa CREATE ... PARTITION OF quando a partição DEFAULT
+        tem linhas na nova faixa; nesse caso a DEFAULT é desanexada, as
+        linhas do mês passam para a nova partição e ela é anexada de volta,
+        tudo na mesma transação.
+        """
+        q = connection.ops.quote_name
+        faixa = [mes.isoformat(), _proximo_mes(mes).isoformat()]
+        filtro = f"{q('timestamp')} >= %s AND {q('timestamp')} < %s"
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            ocupada = False
+            if padrao:
+                cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {q(padrao)} WHERE {filtro})", faixa)
+                ocupada = cursor.fetchone()[0]
+
+            if not ocupada:
+                cursor.execute(sql_criar_particao(tabela, mes))
+                return
+
+            cursor.execute(f"ALTER TABLE {q(tabela)} DETACH PARTITION {q(padrao)}")
+            cursor.execute(sql_criar_particao(tabela, mes))
+            cursor.execute(
+                f"WITH movidas AS (DELETE FROM {q(padrao)} WHERE {filtro} RETURNING *) "
+                f"INSERT INTO {q(tabela)} SELECT * FROM movidas",
+                faixa,
+            )
+            cursor.execute(f"ALTER TABLE {q(tabela)} ATTACH PARTITION {q(padrao)} DEFAULT")
+            logger.info(
+                f"Linhas de {mes:%m/%Y} movidas de {padrao} para {nome_particao(tabela, mes)}"
+            )
+
+    def desanexar_antigas(self, modelo, retencao_dias=None, remover=None):
+        """Desanexa (e opcionalmente remove) partições fora da retenção.
+
+        Sem `remover`, a partição desanexada continua como tabela avulsa
+        para ser exportada (pg_dump) antes de ser descartada.
+        """
+        tabela = MODELOS[modelo]._meta.db_table
+        retencao_dias = settings.HISTORICO_RETENCAO_DIAS if retencao_dias is None else retencao_dias
+        remover = settings.HISTORICO_PARTICOES_REMOVER if remover is None else remover
+        limite = timezone.now().date() - timedelta(days=retencao_dias)
+        q = connection.ops.quote_name
+
+        desanexadas = []
+        with connection.cursor() as cursor:
+            for nome in self.particoes(modelo):
+                mes = self._mes_da_particao(tabela, nome)
+                # Só desanexa meses inteiramente anteriores ao limite
+                if mes is None or _proximo_mes(mes) > limite:
+                    continue
+                cursor.execute(f"ALTER TABLE {q(tabela)} DETACH PARTITION {q(nome)}")
+                if remover:
+                    cursor.execute(f"DROP TABLE {q(nome)}")
+                desanexadas.append(nome)
+
+        if desanexadas:
+            acao = 'removidas' if remover else 'desanexadas'
+            logger.info(f"Partições {acao} de {tabela}: {', '.join(desanexadas)}")
+        return desanexadas
+
+    def manter(self, remover=None):
+        """Manutenção periódica de todas as tabelas particionadas"""
+        resultado = {}
+        for modelo in MODELOS:
+            if not self.esta_particionada(modelo):
+                continue
+            resultado[modelo] = {
+                'criadas': self.criar_particoes(modelo),
+                'desanexadas': self.desanexar_antigas(modelo, remover=remover),
+            }
+        return resultado
+
+    def particoes(self, modelo):
+        """Nomes das partições anexadas, em ordem"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = %s AND pg_table_is_visible(p.oid) "
+                "ORDER BY c.relname",
+                [MODELOS[modelo]._meta.db_table],
+            )
+            return [nome for (nome,) in cursor.fetchall()]
+
+    def _mes_futuro(self, dia, meses):
+        mes = date(dia.year, dia.month, 1)
+        for _ in range(meses):
+            mes = _proximo_mes(mes)
+        return mes
+
+    def _mes_da_particao(self, tabela, nome):
+        sufixo = nome[len(tabela) + 2:]
+        if not nome.startswith(f'{tabela}_p') or len(sufixo) != 6 or not sufixo.isdigit():
+            return None
+        return date(int(sufixo[:4]), int(sufixo[4:]), 1)
+
+
+# Instância global do serviço
+particionamento_service = ParticionamentoHistoricoService()
@@ -0,0 +1,391 @@
+"""
+Motor de exportação de tabelas para PDF
+
+Usado pelas exportações de relatórios (RelatorioService.exportar_para_pdf
+e exportar_tabela_pdf). A tabela é uma LongTable com o cabeçalho repetido
+em cada página; larguras de coluna e alturas de linha são calculadas uma
+única vez e passadas prontas, então o ReportLab não mede célula por célula
+a tabela inteira a cada quebra de página.
+
+Tabelas com mais de RELATORIO_PDF_LINHAS_POR_PARTE linhas são divididas
+em partes de páginas inteiras, renderizadas em paralelo em um
+ProcessPoolExecutor limitado (RELATORIO_PDF_PROCESSOS; em sequência
+quando é 1) e concatenadas na ordem com pypdf. Cada renderização (divisão,
+partes e junção) ocupa uma das RELATORIO_PDF_MAX_CONCORRENTES vagas do nó,
+tomada uma vez no worker da requisição: arquivos com flock, liberados pelo
+sistema mesmo se o processo morrer.
+
+O mesmo pool atende outras renderizações de relatório (`submeter`, ex.:
+Excel do pacote de relatórios); os processos do pool carregam o Django e
+não criam pools próprios.
+"""
+import fcntl
+import io
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from django.conf import settings
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle
+
+logger = logging.getLogger(__name__)
+
+# Padding horizontal padrão das células do ReportLab (6pt de cada lado)
+_PADDING_CELULA = 12
+# Padding do Frame do SimpleDocTemplate (6pt em cima e embaixo)
+_PADDING_FRAME = 12
+
+ESTILOS = {
+    # Relatórios do RelatorioService
+    'relatorio': {
+        'fonte_cabecalho': ('Helvetica-Bold', 12),
+        'fonte': ('Helvetica', 10),
+        'comandos': [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ],
+    },
+    # Tabelas genéricas (relatórios SQL), em paisagem
+    'compacto': {
+        'fonte_cabecalho': ('Helvetica-Bold', 8),
+        'fonte': ('Helvetica', 8),
+        'comandos': [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ],
+    },
+}
+
+
+class RelatorioPDFOcupado(Exception):
+    """Nenhuma vaga de renderização livre no nó dentro do tempo de espera"""
+
+
+@contextmanager
+def vaga_renderizacao(diretorio, vagas, espera):
+    """Ocupa uma das `vagas` do nó enquanto o bloco executa"""
+    os.makedirs(diretorio, exist_ok=True)
+    prazo = time.monotonic() + espera
+    while True:
+        for numero in range(max(1, vagas)):
+            arquivo = open(os.path.join(diretorio, f'vaga-{numero}.lock'), 'a')
+            try:
+                fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                arquivo.close()
+                continue
+            try:
+                yield
+                return
+            finally:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+                arquivo.close()
+
+        if time.monotonic() >= prazo:
+            raise RelatorioPDFOcupado(
+                f'Todas as {vagas} vagas de renderização de PDF estão ocupadas.'
+            )
+        time.sleep(0.05)
+
+
+def _texto(valor):
+    # Uma linha por célula: todas as linhas da tabela têm a mesma altura
+    if valor is None:
+        return ''
+    return str(valor).replace('\r', ' ').replace('\n', ' ')
+
+
+def _larguras(cabecalho, linhas, estilo):
+    """Largura natural de cada coluna, como o ReportLab calcularia"""
+    fonte_cabecalho, tamanho_cabecalho = ESTILOS[estilo]['fonte_cabecalho']
+    fonte, tamanho = ESTILOS[estilo]['fonte']
+    larguras = []
+    for indice, titulo in enumerate(cabecalho):
+        valores = {linha[indice] for linha in linhas}
+        maior = max((stringWidth(v, fonte, tamanho) for v in valores), default=0)
+        larguras.append(max(maior, stringWidth(titulo, fonte_cabecalho, tamanho_cabecalho)) + _PADDING_CELULA)
+    return larguras
+
+
+def _documento(buffer, paisagem):
+    return SimpleDocTemplate(buffer, pagesize=landscape(A4) if paisagem else A4)
+
+
+def _abertura(titulo, info, estilo):
+    styles = getSampleStyleSheet()
+    if estilo == 'compacto':
+        return [Paragraph(titulo, styles['Heading1']), Paragraph(info, styles['Normal']), Spacer(1, 12)]
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    return [Paragraph(titulo, title_style), Spacer(1, 20), Paragraph(info, styles['Normal']), Spacer(1, 20)]
+
+
+def _fechamento(resumo):
+    styles = getSampleStyleSheet()
+    return [Spacer(1, 20), Paragraph("Resumo:", styles['Heading3']), Paragraph(resumo, styles['Normal'])]
+
+
+def _tabela(parte, linhas=None):
+    linhas = parte['linhas'] if linhas is None else linhas
+    alturas = None
+    if parte.get('altura_linha'):
+        alturas = [parte['altura_cabecalho']] + [parte['altura_linha']] * len(linhas)
+    tabela = LongTable(
+        [parte['cabecalho'], *linhas], colWidths=parte['larguras'], rowHeights=alturas, repeatRows=1
+    )
+    tabela.setStyle(TableStyle(ESTILOS[parte['estilo']]['comandos']))
+    return tabela
+
+
+def _altura(flowables, largura, altura):
+    total = 0
+    for indice, flowable in enumerate(flowables):
+        total += flowable.wrap(largura, altura)[1] + flowable.getSpaceAfter()
+        if indice:
+            total += flowable.getSpaceBefore()
+    return total
+
+
+def _medir(modelo, amostra):
+    """Alturas do cabeçalho e de uma linha e linhas por página (primeira e demais)"""
+    doc = _documento(io.BytesIO(), modelo['paisagem'])
+    altura_util = doc.height - _PADDING_FRAME
+
+    so_cabecalho = _tabela(modelo, [])
+    altura_cabecalho = so_cabecalho.wrap(doc.width, altura_util)[1]
+    altura_linha = _tabela(modelo, amostra).wrap(doc.width, altura_util)[1] - altura_cabecalho
+
+    por_pagina = max(1, math.floor((altura_util - altura_cabecalho) / altura_linha))
+    abertura = _altura(_abertura(modelo['titulo'], modelo['info'], modelo['estilo']), doc.width, altura_util)
+    primeira = max(1, math.floor((altura_util - abertura - altura_cabecalho) / altura_linha))
+    return altura_cabecalho, altura_linha, primeira, por_pagina
+
+
+def renderizar_parte(parte):
+    """Renderiza uma parte da tabela; executada nos processos do pool.
+
+    Só a primeira parte leva título e informações e só a última leva o
+    resumo. Retorna os bytes do PDF.
+    """
+    story = []
+    if parte['titulo'] is not None:
+        story += _abertura(parte['titulo'], parte['info'], parte['estilo'])
+    story.append(_tabela(parte))
+    if parte['resumo']:
+        story += _fechamento(parte['resumo'])
+
+    buffer = io.BytesIO()
+    _documento(buffer, parte['paisagem']).build(story)
+    return buffer.getvalue()
+
+
+def _juntar(conteudos):
+    buffer = io.BytesIO()
+    if len(conteudos) == 1:
+        buffer.write(conteudos[0])
+    else:
+        escritor = PdfWriter()
+        for conteudo in conteudos:
+            escritor.append(PdfReader(io.BytesIO(conteudo)))
+        escritor.write(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+_pool_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+# Verdadeiro dentro dos processos do pool: lá tudo roda em sequência
+_em_processo_do_pool = False
+
+
+def _iniciar_processo():
+    global _em_processo_do_pool
+    _em_processo_do_pool = True
+
+    import django
+    django.setup()
+
+
+def _obter_pool(processos):
+    """Pool do processo atual (recriado depois de um fork, ex.: gunicorn --preload)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn: os filhos não herdam conexões de banco nem threads do worker
+            _pool = ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_iniciar_processo,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class PDFService:
+    """Renderiza tabelas em PDF, em paralelo quando são grandes"""
+
+    def __init__(self, linhas_por_parte=None, processos=None, max_concorrentes=None,
+                 espera_segundos=None, diretorio_vagas=None):
+        self._linhas_por_parte = linhas_por_parte
+        self._processos = processos
+        self._max_concorrentes = max_concorrentes
+        self._espera_segundos = espera_segundos
+        self._diretorio_vagas = diretorio_vagas
+
+    @property
+    def linhas_por_parte(self):
+        return self._linhas_por_parte or settings.RELATORIO_PDF_LINHAS_POR_PARTE
+
+    @property
+    def processos(self):
+        if _em_processo_do_pool:
+            return 1
+        return self._processos or settings.RELATORIO_PDF_PROCESSOS
+
+    @property
+    def max_concorrentes(self):
+        return self._max_concorrentes or settings.RELATORIO_PDF_MAX_CONCORRENTES
+
+    @property
+    def espera_segundos(self):
+        if self._espera_segundos is not None:
+            return self._espera_segundos
+        return settings.RELATORIO_PDF_ESPERA_SEGUNDOS
+
+    @property
+    def diretorio_vagas(self):
+        return str(self._diretorio_vagas or settings.RELATORIO_PDF_VAGAS_DIR)
+
+    def renderizar(self, titulo, cabecalho, linhas, info='', resumo=None, paisagem=False,
+                   estilo='relatorio'):
+        """Renderiza a tabela (cabeçalho + linhas) e retorna um BytesIO com o PDF.
+
+        `info` e `resumo` são textos com a marcação de Paragraph (<br/>)
+        exibidos antes e depois da tabela. Levanta RelatorioPDFOcupado se
+        não houver vaga de renderização dentro de RELATORIO_PDF_ESPERA_SEGUNDOS;
+        a vaga vale para a renderização inteira, então uma exportação que
+        começou nunca é interrompida por falta de vaga entre as partes.
+        """
+        with vaga_renderizacao(self.diretorio_vagas, self.max_concorrentes, self.espera_segundos):
+            return self._renderizar(titulo, cabecalho, linhas, info, resumo, paisagem, estilo)
+
+    def _renderizar(self, titulo, cabecalho, linhas, info, resumo, paisagem, estilo):
+        cabecalho = [_texto(coluna) for coluna in cabecalho]
+        linhas = [[_texto(valor) for valor in linha] for linha in linhas]
+        modelo = {
+            'titulo': titulo,
+            'info': info,
+            'resumo': None,
+            'cabecalho': cabecalho,
+            'estilo': estilo,
+            'paisagem': paisagem,
+            'larguras': _larguras(cabecalho, linhas, estilo),
+        }
+
+        partes = self._dividir(modelo, linhas, resumo)
+        if len(partes) == 1:
+            return _juntar([renderizar_parte(partes[0])])
+
+        inicio = time.monotonic()
+        if self.processos <= 1:
+            # Mesmo sem paralelismo, partes menores renderizam mais rápido
+            # que uma tabela única
+            conteudos = [renderizar_parte(parte) for parte in partes]
+        else:
+            conteudos = self._renderizar_em_paralelo(partes)
+        logger.info(
+            f"PDF '{titulo}': {len(linhas)} linhas em {len(partes)} partes "
+            f"renderizadas em {time.monotonic() - inicio:.2f}s"
+        )
+        return _juntar(conteudos)
+
+    def _dividir(self, modelo, linhas, resumo):
+        """Partes de páginas inteiras: nenhuma página fica pela metade na emenda"""
+        if linhas:
+            altura_cabecalho, altura_linha, primeira, por_pagina = _medir(modelo, linhas[:1])
+            modelo.update(altura_cabecalho=altura_cabecalho, altura_linha=altura_linha)
+            paginas = max(1, self.linhas_por_parte // por_pagina)
+            tamanho_primeira = primeira + (paginas - 1) * por_pagina
+            tamanho = paginas * por_pagina
+
+        if not linhas or len(linhas) <= tamanho_primeira:
+            return [{**modelo, 'linhas': linhas, 'resumo': resumo}]
+
+        cortes = [0] + list(range(tamanho_primeira, len(linhas), tamanho)) + [len(linhas)]
+        partes = [
+            {**modelo, 'titulo': None, 'linhas': linhas[inicio:fim]}
+            for inicio, fim in zip(cortes, cortes[1:])
+        ]
+        partes[0]['titulo'] = modelo['titulo']
+        partes[-1]['resumo'] = resumo
+        return partes
+
+    def submeter(self, funcao, *args):
+        """Executa `funcao(*args)` em um processo do pool e retorna o Future.
+
+        `funcao` precisa ser de nível de módulo (picklable). Sem
+        paralelismo (RELATORIO_PDF_PROCESSOS = 1 ou já dentro do pool)
+        executa na hora e devolve o Future resolvido.
+        """
+        if self.processos > 1:
+            try:
+                return _obter_pool(self.processos).submit(funcao, *args)
+            except BrokenProcessPool:
+                logger.warning("Pool de renderização quebrado; executando sem paralelismo")
+                _descartar_pool()
+
+        futuro = Future()
+        try:
+            futuro.set_result(funcao(*args))
+        except Exception as e:
+            futuro.set_exception(e)
+        return futuro
+
+    def _renderizar_em_paralelo(self, partes):
+        try:
+            return list(_obter_pool(self.processos).map(renderizar_parte, partes))
+        except BrokenProcessPool:
+            # Processo do pool morto (OOM, sinal): recria na próxima vez e
+            # renderiza esta no próprio worker
+            logger.warning("Pool de renderização de PDF quebrado; renderizando sem paralelismo")
+            _descartar_pool()
+            return [renderizar_parte(parte) for parte in partes]
+
+
+# Instância global do serviço
+pdf_service = PDFService()
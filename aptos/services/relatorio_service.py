@@ -1,27 +1,58 @@
 """
 Serviço para geração de relatórios e analytics
 """
-from django.db.models import Count, Avg, Q, F, Sum
+from django.db.models import (
+    Count, Avg, Q, F, Sum, Case, CharField, DurationField, ExpressionWrapper, OuterRef, Subquery,
+    Value, When, Window,
+)
+from django.db.models.functions import Concat, Lag, TruncMonth
 from django.utils import timezone
-from datetime import date, timedelta
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from statistics import median
 import pandas as pd
 import io
+import math
 
+from aptos.expressions import ListaAgregada, ListaTextoField
 from aptos.models import Inquilino, Aptos, InquilinoApartamento, HistoricoStatus
+from aptos.services.pdf_service import pdf_service
+
+
+TAMANHO_PAGINA_HISTORICO = 100
+
+# (limite superior em dias, faixa); None = acima da última faixa
+FAIXAS_ATRASO = [
+    (30, '0-30'),
+    (60, '31-60'),
+    (90, '61-90'),
+    (None, '90+'),
+]
+FAIXA_SEM_HISTORICO = 'sem_historico'
+
+
+def _dias(intervalo):
+    return intervalo.days if intervalo is not None else None
+
+
+def _mediana(valores):
+    return round(median(valores), 1) if valores else None
+
+
+def _locacoes_efetivas():
+    """Associações que ocuparam o apartamento: ativas ou finalizadas com data_fim"""
+    return InquilinoApartamento.objects.filter(Q(ativo=True) | Q(data_fim__isnull=False))
 
 
 class RelatorioService:
     """Serviço para geração de relatórios"""
 
-    def gerar_relatorio_inquilinos_ativos(self, data_inicio=None, data_fim=None,
-                                         incluir_documentos=False):
-        """Gera relatório de inquilinos ativos"""
+    def iterar_inquilinos_ativos(self, data_inicio=None, data_fim=None, chunk_size=2000):
+        """Gera as linhas do relatório de inquilinos ativos.
+
+        Uma única query com values(): os apartamentos das associações
+        ativas vêm agregados em uma subquery correlacionada (ARRAY_AGG /
+        GROUP_CONCAT), sem instanciar modelos nem consultar por inquilino.
+        """
         query = Inquilino.objects.filter(status='ATIVO')
 
         if data_inicio:
@@ -29,29 +60,40 @@ class RelatorioService:
         if data_fim:
             query = query.filter(created_at__lte=data_fim)
 
-        inquilinos = query.select_related().prefetch_related(
-            'associacoes_apartamento__apartamento__building_name'
-        )
-
-        dados = []
-        for inquilino in inquilinos:
-            associacoes_ativas = inquilino.associacoes_apartamento.filter(ativo=True)
-
-            apartamentos = ', '.join([
-                f"{assoc.apartamento.unit_number} ({assoc.apartamento.building_name.name})"
-                for assoc in associacoes_ativas
-            ])
+        apartamentos = InquilinoApartamento.objects.filter(
+            inquilino=OuterRef('pk'), ativo=True
+        ).order_by().values('inquilino').annotate(
+            lista=ListaAgregada(Concat(
+                'apartamento__unit_number', Value(' ('),
+                'apartamento__building_name__name', Value(')'),
+                output_field=CharField(),
+            ))
+        ).values('lista')
+
+        linhas = query.annotate(
+            apartamentos_ativos=Subquery(apartamentos, output_field=ListaTextoField())
+        ).values(
+            'id', 'tipo', 'nome_completo', 'razao_social', 'cpf', 'cnpj', 'email',
+            'telefone', 'apartamentos_ativos', 'created_at',
+        ).order_by('id')
+
+        tipos = dict(Inquilino.TIPO_CHOICES)
+        for linha in linhas.iterator(chunk_size=chunk_size):
+            yield {
+                'id': linha['id'],
+                'tipo': tipos.get(linha['tipo'], linha['tipo']),
+                'nome': linha['nome_completo'] or linha['razao_social'],
+                'documento': linha['cpf'] or linha['cnpj'],
+                'email': linha['email'],
+                'telefone': linha['telefone'],
+                'apartamentos': ', '.join(linha['apartamentos_ativos'] or []) or 'Nenhum',
+                'data_cadastro': linha['created_at'].strftime('%d/%m/%Y'),
+            }
 
-            dados.append({
-                'id': inquilino.id,
-                'tipo': inquilino.get_tipo_display(),
-                'nome': inquilino.nome_completo or inquilino.razao_social,
-                'documento': inquilino.cpf or inquilino.cnpj,
-                'email': inquilino.email,
-                'telefone': inquilino.telefone,
-                'apartamentos': apartamentos or 'Nenhum',
-                'data_cadastro': inquilino.created_at.strftime('%d/%m/%Y'),
-            })
+    def gerar_relatorio_inquilinos_ativos(self, data_inicio=None, data_fim=None,
+                                         incluir_documentos=False):
+        """Gera relatório de inquilinos ativos"""
+        dados = list(self.iterar_inquilinos_ativos(data_inicio=data_inicio, data_fim=data_fim))
 
         return {
             'dados': dados,
@@ -116,48 +158,80 @@ class RelatorioService:
         }
 
     def gerar_relatorio_inadimplentes(self, incluir_historico=True):
-        """Gera relatório de inquilinos inadimplentes"""
-        inadimplentes = Inquilino.objects.filter(
-            status='INADIMPLENTE'
-        ).select_related().prefetch_related(
-            'historico_status',
-            'associacoes_apartamento__apartamento__building_name'
-        )
+        """Gera relatório de inquilinos inadimplentes.
+
+        Duas queries: os inquilinos com a última entrada em INADIMPLENTE
+        (subquery em HistoricoStatus), o total dos aluguéis ativos e a
+        faixa de atraso calculados no banco; e os apartamentos ativos de
+        todos eles.
+        """
+        hoje = timezone.now().date()
+
+        def limite(dias):
+            # timestamp >= limite  <=>  (hoje - timestamp.date()).days <= dias
+            return datetime.combine(hoje - timedelta(days=dias), time.min, tzinfo=dt_timezone.utc)
+
+        ultima_inadimplencia = HistoricoStatus.objects.filter(
+            inquilino=OuterRef('pk'), status_novo='INADIMPLENTE'
+        ).order_by('-timestamp', '-id').values('timestamp')[:1]
+        total_aluguel = InquilinoApartamento.objects.filter(
+            inquilino=OuterRef('pk'), ativo=True
+        ).order_by().values('inquilino').annotate(total=Sum('valor_aluguel')).values('total')
+
+        inadimplentes = Inquilino.objects.filter(status='INADIMPLENTE').annotate(
+            data_inadimplencia=Subquery(ultima_inadimplencia),
+            valor_aluguel_total=Subquery(total_aluguel),
+        ).annotate(
+            faixa=Case(
+                When(data_inadimplencia__isnull=True, then=Value(FAIXA_SEM_HISTORICO)),
+                *[
+                    When(data_inadimplencia__gte=limite(dias), then=Value(faixa))
+                    for dias, faixa in FAIXAS_ATRASO
+                    if dias is not None
+                ],
+                default=Value(FAIXAS_ATRASO[-1][1]),
+                output_field=CharField(),
+            )
+        ).values(
+            'id', 'nome_completo', 'razao_social', 'cpf', 'cnpj', 'email', 'telefone',
+            'data_inadimplencia', 'valor_aluguel_total', 'faixa',
+        ).order_by('id')
+
+        apartamentos = {}
+        for assoc in InquilinoApartamento.objects.filter(
+            inquilino__status='INADIMPLENTE', ativo=True
+        ).values(
+            'inquilino_id', 'apartamento__unit_number', 'apartamento__building_name__name',
+            'valor_aluguel', 'data_inicio',
+        ).order_by('inquilino_id', '-data_inicio'):
+            apartamentos.setdefault(assoc['inquilino_id'], []).append({
+                'numero': assoc['apartamento__unit_number'],
+                'edificio': assoc['apartamento__building_name__name'],
+                'valor_aluguel': float(assoc['valor_aluguel']) if assoc['valor_aluguel'] else 0,
+                'inicio_locacao': assoc['data_inicio'].strftime('%d/%m/%Y')
+            })
 
         dados = []
+        faixas = {faixa: {'faixa': faixa, 'inquilinos': 0, 'valor_total': 0.0}
+                  for faixa in [f for _, f in FAIXAS_ATRASO] + [FAIXA_SEM_HISTORICO]}
         for inquilino in inadimplentes:
-            # Encontrar quando ficou inadimplente
-            historico_inadimplencia = inquilino.historico_status.filter(
-                status_novo='INADIMPLENTE'
-            ).first()
-
-            dias_inadimplente = 0
-            if historico_inadimplencia:
-                dias_inadimplente = (timezone.now().date() - historico_inadimplencia.timestamp.date()).days
-
-            # Apartamentos atuais
-            associacoes_ativas = inquilino.associacoes_apartamento.filter(ativo=True)
-            apartamentos_info = []
-
-            for assoc in associacoes_ativas:
-                apartamentos_info.append({
-                    'numero': assoc.apartamento.unit_number,
-                    'edificio': assoc.apartamento.building_name.name,
-                    'valor_aluguel': float(assoc.valor_aluguel) if assoc.valor_aluguel else 0,
-                    'inicio_locacao': assoc.data_inicio.strftime('%d/%m/%Y')
-                })
+            data_inadimplencia = inquilino['data_inadimplencia']
+            valor_total = float(inquilino['valor_aluguel_total'] or 0)
 
             dados.append({
-                'id': inquilino.id,
-                'nome': inquilino.nome_completo or inquilino.razao_social,
-                'documento': inquilino.cpf or inquilino.cnpj,
-                'email': inquilino.email,
-                'telefone': inquilino.telefone,
-                'dias_inadimplente': dias_inadimplente,
-                'data_inadimplencia': historico_inadimplencia.timestamp.strftime('%d/%m/%Y') if historico_inadimplencia else 'N/A',
-                'apartamentos': apartamentos_info,
-                'valor_total': sum(apt['valor_aluguel'] for apt in apartamentos_info)
+                'id': inquilino['id'],
+                'nome': inquilino['nome_completo'] or inquilino['razao_social'],
+                'documento': inquilino['cpf'] or inquilino['cnpj'],
+                'email': inquilino['email'],
+                'telefone': inquilino['telefone'],
+                'dias_inadimplente': (hoje - data_inadimplencia.date()).days if data_inadimplencia else 0,
+                'data_inadimplencia': data_inadimplencia.strftime('%d/%m/%Y') if data_inadimplencia else 'N/A',
+                'faixa_atraso': inquilino['faixa'],
+                'apartamentos': apartamentos.get(inquilino['id'], []),
+                'valor_total': valor_total
             })
+            faixas[inquilino['faixa']]['inquilinos'] += 1
+            faixas[inquilino['faixa']]['valor_total'] += valor_total
 
         # Resumos
         total_inadimplentes = len(dados)
@@ -165,6 +239,7 @@ class RelatorioService:
 
         return {
             'dados': dados,
+            'faixas_atraso': [faixa for faixa in faixas.values() if faixa['inquilinos']],
             'resumo': {
                 'total_inadimplentes': total_inadimplentes,
                 'valor_total_risco': valor_total_risco,
@@ -172,39 +247,211 @@ class RelatorioService:
             }
         }
 
+    def gerar_relatorio_rotatividade(self, data_inicio=None, data_fim=None):
+        """Entradas e saídas por mês e edifício, permanência e tempo de relocação.
+
+        Contagens agregadas no banco (GROUP BY mês/edifício). O intervalo
+        entre locações consecutivas do mesmo apartamento vem de LAG(data_fim)
+        particionado por apartamento, calculado sobre todo o histórico dos
+        apartamentos com entrada no período (a locação anterior pode ser
+        anterior ao período).
+        """
+        if not data_inicio:
+            data_inicio = date.today() - timedelta(days=365)
+        if not data_fim:
+            data_fim = date.today()
+        saidas_ate = min(data_fim, date.today())
+
+        locacoes = _locacoes_efetivas()
+        entradas = locacoes.filter(data_inicio__range=(data_inicio, data_fim))
+        saidas = locacoes.filter(data_fim__range=(data_inicio, saidas_ate))
+
+        linhas = {}
+        for campo, queryset, chave in (
+            ('data_inicio', entradas, 'entradas'),
+            ('data_fim', saidas, 'saidas'),
+        ):
+            agregado = queryset.annotate(
+                mes=TruncMonth(campo), edificio=F('apartamento__building_name__name')
+            ).values('mes', 'edificio').annotate(total=Count('id')).order_by()
+            for item in agregado:
+                linha = linhas.setdefault(
+                    (item['mes'], item['edificio']),
+                    {'entradas': 0, 'saidas': 0},
+                )
+                linha[chave] = item['total']
+
+        dados = [
+            {'mes': mes.strftime('%m/%Y'), 'edificio': edificio, **contagens}
+            for (mes, edificio), contagens in sorted(linhas.items())
+        ]
+
+        permanencias = {}
+        for edificio, duracao in saidas.annotate(
+            duracao=ExpressionWrapper(F('data_fim') - F('data_inicio'), output_field=DurationField())
+        ).values_list('apartamento__building_name__name', 'duracao').order_by().iterator():
+            permanencias.setdefault(edificio, []).append(duracao.days)
+
+        relocacoes = {}
+        vago = ExpressionWrapper(
+            F('data_inicio') - Window(
+                Lag('data_fim'),
+                partition_by=[F('apartamento_id')],
+                order_by=F('data_inicio').asc(),
+            ),
+            output_field=DurationField(),
+        )
+        historico = locacoes.filter(
+            apartamento_id__in=entradas.values('apartamento_id'), data_inicio__lte=data_fim
+        ).annotate(vago=vago).values_list(
+            'apartamento__building_name__name', 'data_inicio', 'vago'
+        ).order_by()
+        for edificio, inicio, intervalo in historico.iterator():
+            # Só relocações com entrada no período e locação anterior encerrada
+            if intervalo is None or inicio < data_inicio:
+                continue
+            relocacoes.setdefault(edificio, []).append(max(intervalo.days, 0))
+
+        por_edificio = []
+        for edificio in sorted({e for _, e in linhas} | set(permanencias) | set(relocacoes)):
+            por_edificio.append({
+                'edificio': edificio,
+                'entradas': sum(d['entradas'] for d in dados if d['edificio'] == edificio),
+                'saidas': sum(d['saidas'] for d in dados if d['edificio'] == edificio),
+                'mediana_permanencia_dias': _mediana(permanencias.get(edificio)),
+                'mediana_dias_para_relocar': _mediana(relocacoes.get(edificio)),
+            })
+
+        todas_permanencias = [d for valores in permanencias.values() for d in valores]
+        todas_relocacoes = [d for valores in relocacoes.values() for d in valores]
+        return {
+            'dados': dados,
+            'por_edificio': por_edificio,
+            'total': len(dados),
+            'resumo': {
+                'total_entradas': sum(d['entradas'] for d in dados),
+                'total_saidas': sum(d['saidas'] for d in dados),
+                'mediana_permanencia_dias': _mediana(todas_permanencias),
+                'mediana_dias_para_relocar': _mediana(todas_relocacoes),
+                'relocacoes': len(todas_relocacoes),
+            },
+            'periodo': {
+                'inicio': data_inicio.strftime('%d/%m/%Y'),
+                'fim': data_fim.strftime('%d/%m/%Y'),
+            },
+        }
+
+    def _consulta_historico_locacoes(self, apartamento_id=None, inquilino_id=None,
+                                     data_inicio=None, data_fim=None):
+        """Linha do tempo por apartamento (ou por inquilino, se filtrado por ele).
+
+        `dias_vago_antes` é o intervalo desde a locação anterior do mesmo
+        apartamento entre todas as locações efetivas (subquery correlacionada,
+        pelo índice apartamento/data_inicio), então não depende dos filtros.
+        """
+        queryset = _locacoes_efetivas()
+        if apartamento_id:
+            queryset = queryset.filter(apartamento_id=apartamento_id)
+        if inquilino_id:
+            queryset = queryset.filter(inquilino_id=inquilino_id)
+        if data_inicio:
+            queryset = queryset.filter(Q(data_fim__isnull=True) | Q(data_fim__gte=data_inicio))
+        if data_fim:
+            queryset = queryset.filter(data_inicio__lte=data_fim)
+
+        chave = 'inquilino_id' if inquilino_id and not apartamento_id else 'apartamento_id'
+        fim_anterior = _locacoes_efetivas().filter(
+            Q(data_inicio__lt=OuterRef('data_inicio'))
+            | Q(data_inicio=OuterRef('data_inicio'), id__lt=OuterRef('id')),
+            apartamento_id=OuterRef('apartamento_id'),
+        ).order_by('-data_inicio', '-id').values('data_fim')[:1]
+        vago = ExpressionWrapper(
+            F('data_inicio') - Subquery(fim_anterior),
+            output_field=DurationField(),
+        )
+        return queryset.annotate(
+            vago=vago,
+            edificio=F('apartamento__building_name__name'),
+            unidade=F('apartamento__unit_number'),
+            nome_inquilino=F('inquilino__nome_completo'),
+            razao_social=F('inquilino__razao_social'),
+        ).values(
+            'id', 'apartamento_id', 'unidade', 'edificio', 'inquilino_id', 'nome_inquilino',
+            'razao_social', 'data_inicio', 'data_fim', 'valor_aluguel', 'ativo', 'vago',
+        ).order_by(chave, 'data_inicio', 'id')
+
+    def _linha_historico(self, item):
+        hoje = date.today()
+        fim = item['data_fim']
+        return {
+            'id': item['id'],
+            'apartamento_id': item['apartamento_id'],
+            'apartamento': f"{item['unidade']} ({item['edificio']})",
+            'inquilino_id': item['inquilino_id'],
+            'inquilino': item['nome_inquilino'] or item['razao_social'],
+            'data_inicio': item['data_inicio'].strftime('%d/%m/%Y'),
+            'data_fim': fim.strftime('%d/%m/%Y') if fim else None,
+            'dias_locacao': ((fim or hoje) - item['data_inicio']).days,
+            'dias_vago_antes': _dias(item['vago']),
+            'valor_aluguel': float(item['valor_aluguel']) if item['valor_aluguel'] is not None else None,
+            'vigente': item['ativo'] and (fim is None or fim >= hoje),
+        }
+
+    def iterar_historico_locacoes(self, chunk_size=2000, **filtros):
+        """Gera as linhas do histórico sem carregar o resultado inteiro em memória"""
+        consulta = self._consulta_historico_locacoes(**filtros)
+        for item in consulta.iterator(chunk_size=chunk_size):
+            yield self._linha_historico(item)
+
+    def gerar_relatorio_historico_locacoes(self, apartamento_id=None, inquilino_id=None,
+                                           data_inicio=None, data_fim=None, pagina=None,
+                                           tamanho_pagina=TAMANHO_PAGINA_HISTORICO):
+        """Histórico de locações; com `pagina`, retorna só a página pedida"""
+        filtros = {
+            'apartamento_id': apartamento_id,
+            'inquilino_id': inquilino_id,
+            'data_inicio': data_inicio,
+            'data_fim': data_fim,
+        }
+        resultado = {
+            'periodo': {
+                'inicio': data_inicio.strftime('%d/%m/%Y') if data_inicio else 'Início',
+                'fim': data_fim.strftime('%d/%m/%Y') if data_fim else 'Atual',
+            },
+        }
+
+        if pagina is None:
+            resultado['dados'] = list(self.iterar_historico_locacoes(**filtros))
+            resultado['total'] = len(resultado['dados'])
+            return resultado
+
+        consulta = self._consulta_historico_locacoes(**filtros)
+        total = consulta.count()
+        inicio = (pagina - 1) * tamanho_pagina
+        resultado['dados'] = [
+            self._linha_historico(item) for item in consulta[inicio:inicio + tamanho_pagina]
+        ]
+        resultado.update({
+            'total': total,
+            'pagina': pagina,
+            'tamanho_pagina': tamanho_pagina,
+            'total_paginas': math.ceil(total / tamanho_pagina) if total else 0,
+        })
+        return resultado
+
     def exportar_para_pdf(self, dados_relatorio, tipo_relatorio, filename=None):
-        """Exporta relatório para PDF usando ReportLab"""
+        """Exporta relatório para PDF usando ReportLab (via pdf_service)"""
         if not filename:
             filename = f"relatorio_{tipo_relatorio}_{date.today().strftime('%Y%m%d')}.pdf"
 
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        story = []
-        styles = getSampleStyleSheet()
-
-        # Título
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1  # Center
-        )
-
         titulo = f"Relatório - {tipo_relatorio.replace('_', ' ').title()}"
-        story.append(Paragraph(titulo, title_style))
-        story.append(Spacer(1, 20))
 
         # Informações do relatório
-        info_style = styles['Normal']
         info_text = f"Gerado em: {date.today().strftime('%d/%m/%Y')}<br/>"
 
         if 'periodo' in dados_relatorio:
             info_text += f"Período: {dados_relatorio['periodo']['inicio']} a {dados_relatorio['periodo']['fim']}<br/>"
 
-        story.append(Paragraph(info_text, info_style))
-        story.append(Spacer(1, 20))
-
         # Tabela de dados
         if tipo_relatorio == 'INQUILINOS_ATIVOS':
             headers = ['Nome', 'Tipo', 'Documento', 'Email', 'Apartamentos']
@@ -232,7 +479,7 @@ class RelatorioService:
                 ])
 
         elif tipo_relatorio == 'INADIMPLENTES':
-            headers = ['Nome', 'Documento', 'Dias', 'Valor R$']
+            headers = ['Nome', 'Documento', 'Dias', 'Faixa', 'Valor R$']
             table_data = [headers]
 
             for item in dados_relatorio['dados']:
@@ -240,29 +487,39 @@ class RelatorioService:
                     item['nome'][:30],
                     item['documento'],
                     str(item['dias_inadimplente']),
+                    item.get('faixa_atraso', ''),
                     f"R$ {item['valor_total']:.2f}"
                 ])
 
-        # Criar tabela
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-
-        story.append(table)
+        elif tipo_relatorio == 'ROTATIVIDADE':
+            headers = ['Mês', 'Edifício', 'Entradas', 'Saídas']
+            table_data = [headers]
+
+            for item in dados_relatorio['dados']:
+                table_data.append([
+                    item['mes'],
+                    (item['edificio'] or '')[:30],
+                    str(item['entradas']),
+                    str(item['saidas'])
+                ])
+
+        elif tipo_relatorio == 'HISTORICO_LOCACOES':
+            headers = ['Apartamento', 'Inquilino', 'Início', 'Fim', 'Dias', 'Vago antes']
+            table_data = [headers]
+
+            for item in dados_relatorio['dados']:
+                table_data.append([
+                    item['apartamento'][:25],
+                    (item['inquilino'] or '')[:30],
+                    item['data_inicio'],
+                    item['data_fim'] or '-',
+                    str(item['dias_locacao']),
+                    '-' if item['dias_vago_antes'] is None else str(item['dias_vago_antes'])
+                ])
 
         # Resumo (se houver)
+        resumo_text = None
         if 'resumo' in dados_relatorio:
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("Resumo:", styles['Heading3']))
-
             resumo_text = ""
             for key, value in dados_relatorio['resumo'].items():
                 label = key.replace('_', ' ').title()
@@ -271,11 +528,9 @@ class RelatorioService:
                 else:
                     resumo_text += f"{label}: {value}<br/>"
 
-            story.append(Paragraph(resumo_text, styles['Normal']))
-
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return pdf_service.renderizar(
+            titulo, table_data[0], table_data[1:], info=info_text, resumo=resumo_text
+        )
 
     def exportar_para_excel(self, dados_relatorio, tipo_relatorio, filename=None):
         """Exporta relatório para Excel usando pandas"""
@@ -309,6 +564,7 @@ class RelatorioService:
                         'telefone': item['telefone'],
                         'dias_inadimplente': item['dias_inadimplente'],
                         'data_inadimplencia': item['data_inadimplencia'],
+                        'faixa_atraso': item.get('faixa_atraso'),
                         'valor_total': item['valor_total']
                     }
                     flat_dados.append(flat_item)
@@ -316,9 +572,66 @@ class RelatorioService:
                 df = pd.DataFrame(flat_dados)
                 df.to_excel(writer, sheet_name='Inadimplentes', index=False)
 
+                if dados_relatorio.get('faixas_atraso'):
+                    pd.DataFrame(dados_relatorio['faixas_atraso']).to_excel(
+                        writer, sheet_name='Faixas de Atraso', index=False
+                    )
+
+            elif tipo_relatorio == 'ROTATIVIDADE':
+                df = pd.DataFrame(dados_relatorio['dados'])
+                df.to_excel(writer, sheet_name='Rotatividade Mensal', index=False)
+
+                pd.DataFrame(dados_relatorio['por_edificio']).to_excel(
+                    writer, sheet_name='Por Edifício', index=False
+                )
+                resumo_df = pd.DataFrame([dados_relatorio['resumo']])
+                resumo_df.to_excel(writer, sheet_name='Resumo', index=False)
+
+            elif tipo_relatorio == 'HISTORICO_LOCACOES':
+                df = pd.DataFrame(dados_relatorio['dados'])
+                df.to_excel(writer, sheet_name='Histórico de Locações', index=False)
+
         buffer.seek(0)
         return buffer
 
+    def exportar_tabela_pdf(self, titulo, colunas, linhas):
+        """PDF genérico de colunas + linhas (relatórios SQL)"""
+        return pdf_service.renderizar(
+            titulo,
+            colunas,
+            linhas,
+            info=f"Gerado em: {date.today().strftime('%d/%m/%Y')}",
+            paisagem=True,
+            estilo='compacto',
+        )
+
+    def exportar_tabela_excel(self, titulo, colunas, linhas):
+        """Excel genérico gravado linha a linha (openpyxl write_only)"""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        planilha = workbook.create_sheet(_nome_planilha(titulo))
+        planilha.append(list(colunas))
+        for linha in linhas:
+            planilha.append([_valor_excel(v) for v in linha])
+
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+
+def _nome_planilha(titulo):
+    # Excel limita a 31 caracteres e não aceita []:*?/\
+    return ''.join(c for c in titulo if c not in '[]:*?/\\')[:31] or 'Relatório'
+
+
+def _valor_excel(valor):
+    # openpyxl não grava datetimes com fuso
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.make_naive(valor)
+    return valor
+
 
 # Instância global do serviço
 relatorio_service = RelatorioService()
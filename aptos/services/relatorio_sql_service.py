@@ -0,0 +1,275 @@
+"""
+Execução segura do SQL de RelatorioTemplate
+
+O `query_sql` de um template é um único SELECT (ou WITH ... SELECT) com
+parâmetros nomeados no formato `%(nome)s`; `%` literal deve ser escrito
+como `%%`. Os valores vêm de `parametros_padrao` sobrescritos pelos
+parâmetros da execução e são sempre passados ao driver, nunca
+interpolados no texto.
+
+Garantias na execução:
+- transação somente leitura (PostgreSQL: SET TRANSACTION READ ONLY;
+  SQLite: PRAGMA query_only), então o SQL não consegue alterar dados.
+  Dentro de uma transação externa a consulta roda em um savepoint que é
+  sempre desfeito, o que também desfaz o READ ONLY e o tempo limite;
+- tempo limite por execução (statement_timeout no PostgreSQL, progress
+  handler no SQLite);
+- leitura por cursor no servidor (`itersize` linhas por ida ao banco),
+  sem carregar o resultado inteiro em memória;
+- dentro de leitura_replica() a consulta roda na réplica; o registro da
+  execução continua no primário.
+
+Resultados pequenos ficam em cache pela chave template + versão do
+template + parâmetros + versão dos dados. A versão dos dados é um
+contador no cache incrementado a cada escrita bem-sucedida na API
+(CacheInvalidationMiddleware); o TTL limita o quanto um resultado pode
+ficar desatualizado por escritas fora da API (tarefas, comandos).
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from aptos.db_router import alias_leitura
+from aptos.models import RelatorioExecucao
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO_DADOS = 'relatorios:versao_dados'
+
+_COMENTARIOS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_LITERAIS = re.compile(r"'(?:[^']|'')*'")
+_PARAMETRO = re.compile(r'%\((\w+)\)s')
+_TIPOS_PARAMETRO = (str, int, float, bool, type(None))
+
+
+class RelatorioSQLError(Exception):
+    """SQL de template inválido, parâmetros incorretos ou falha na execução"""
+
+
+def versao_dados():
+    versao = cache.get(CHAVE_VERSAO_DADOS)
+    if versao is None:
+        versao = 1
+        cache.add(CHAVE_VERSAO_DADOS, versao, None)
+    return versao
+
+
+def nova_versao_dados():
+    """Invalida os resultados em cache de todos os relatórios SQL"""
+    try:
+        cache.incr(CHAVE_VERSAO_DADOS)
+    except ValueError:
+        cache.set(CHAVE_VERSAO_DADOS, 2, None)
+
+
+def validar_sql(sql):
+    """Confere que o SQL é uma única consulta; retorna os nomes dos parâmetros"""
+    if not sql or not sql.strip():
+        raise RelatorioSQLError('Template sem query_sql.')
+
+    # Comentários e literais não contam na análise (um ';' ou SELECT
+    # dentro de uma string não é uma instrução)
+    texto = _LITERAIS.sub("''", _COMENTARIOS.sub(' ', sql)).strip()
+    if texto.endswith(';'):
+        texto = texto[:-1].rstrip()
+    if ';' in texto:
+        raise RelatorioSQLError('query_sql deve conter uma única instrução.')
+
+    primeira = texto.split(None, 1)[0].upper() if texto else ''
+    if primeira not in ('SELECT', 'WITH'):
+        raise RelatorioSQLError('query_sql deve ser uma consulta SELECT.')
+
+    return set(_PARAMETRO.findall(texto))
+
+
+def _chave_cache(template, parametros):
+    assinatura = json.dumps(parametros, sort_keys=True, cls=DjangoJSONEncoder)
+    digest = hashlib.sha256(assinatura.encode()).hexdigest()[:24]
+    atualizado = template.updated_at.timestamp() if template.updated_at else 0
+    return f'relatorio_sql:{template.pk}:{atualizado}:{versao_dados()}:{digest}'
+
+
+class RelatorioSQLService:
+    """Executa templates SQL em modo somente leitura, com tempo limite e streaming"""
+
+    def __init__(self, timeout_ms=None, itersize=None, cache_timeout=None, cache_max_linhas=None):
+        self._timeout_ms = timeout_ms
+        self._itersize = itersize
+        self._cache_timeout = cache_timeout
+        self._cache_max_linhas = cache_max_linhas
+
+    @property
+    def timeout_ms(self):
+        return self._timeout_ms or settings.RELATORIO_SQL_TIMEOUT_MS
+
+    @property
+    def itersize(self):
+        return self._itersize or settings.RELATORIO_SQL_ITERSIZE
+
+    @property
+    def cache_timeout(self):
+        if self._cache_timeout is not None:
+            return self._cache_timeout
+        return settings.RELATORIO_SQL_CACHE_TIMEOUT
+
+    @property
+    def cache_max_linhas(self):
+        if self._cache_max_linhas is not None:
+            return self._cache_max_linhas
+        return settings.RELATORIO_SQL_CACHE_MAX_LINHAS
+
+    def preparar_parametros(self, template, parametros=None):
+        """Parâmetros padrão + informados, conferidos contra os usados no SQL"""
+        nomes = validar_sql(template.query_sql)
+        valores = {**(template.parametros_padrao or {}), **(parametros or {})}
+
+        faltando = sorted(nomes - set(valores))
+        if faltando:
+            raise RelatorioSQLError(f"Parâmetros obrigatórios ausentes: {', '.join(faltando)}")
+        desconhecidos = sorted(set(parametros or {}) - nomes)
+        if desconhecidos:
+            raise RelatorioSQLError(f"Parâmetros desconhecidos: {', '.join(desconhecidos)}")
+        invalidos = sorted(n for n in nomes if not isinstance(valores[n], _TIPOS_PARAMETRO))
+        if invalidos:
+            raise RelatorioSQLError(f"Parâmetros devem ser valores simples: {', '.join(invalidos)}")
+
+        return {nome: valores[nome] for nome in nomes}
+
+    def executar(self, template, usuario, parametros=None, formato='JSON'):
+        """Executa o template e retorna (execucao, colunas, linhas).
+
+        `linhas` é um iterador de tuplas; a execução é registrada como
+        CONCLUIDO (com total de registros e duração) quando o iterador
+        termina. Erros de validação levantam RelatorioSQLError antes de
+        qualquer registro.
+        """
+        valores = self.preparar_parametros(template, parametros)
+        chave = _chave_cache(template, valores)
+
+        execucao = RelatorioExecucao.objects.create(
+            template=template,
+            usuario=usuario,
+            parametros=valores,
+            status='PROCESSANDO',
+            formato=formato.upper(),
+        )
+
+        em_cache = cache.get(chave)
+        if em_cache is not None:
+            return execucao, em_cache['colunas'], self._concluir(execucao, iter(em_cache['linhas']))
+
+        consulta = self._consultar(template.query_sql, valores)
+        try:
+            colunas = next(consulta)
+        except Exception as e:
+            self._falhar(execucao, e)
+            raise RelatorioSQLError(f'Falha ao executar o relatório: {e}') from e
+
+        return execucao, colunas, self._concluir(execucao, consulta, chave, colunas)
+
+    def _consultar(self, sql, valores):
+        """Gera os nomes das colunas e depois as linhas, dentro da transação"""
+        conexao = connections[alias_leitura()]
+        restaurar = None
+        try:
+            with transaction.atomic(using=conexao.alias):
+                restaurar = self._somente_leitura(conexao)
+                with conexao.chunked_cursor() as cursor:
+                    if hasattr(cursor.cursor, 'itersize'):
+                        cursor.cursor.itersize = self.itersize
+                    cursor.execute(sql, valores)
+                    # Em cursores nomeados (PostgreSQL) a descrição só
+                    # existe depois da primeira leitura
+                    lote = cursor.fetchmany(self.itersize)
+                    yield [coluna[0] for coluna in cursor.description or []]
+                    while lote:
+                        yield from lote
+                        lote = cursor.fetchmany(self.itersize)
+                # Nada a confirmar: desfazer o savepoint (ou a transação)
+                # restaura READ ONLY e statement_timeout da transação externa
+                transaction.set_rollback(True, using=conexao.alias)
+        finally:
+            if restaurar:
+                restaurar()
+
+    def _somente_leitura(self, conexao):
+        """Prepara a transação atual; retorna a função que desfaz o ajuste"""
+        if conexao.vendor == 'postgresql':
+            # Passar a READ ONLY é permitido também dentro de um savepoint;
+            # os dois ajustes valem até o rollback feito em _consultar
+            with conexao.cursor() as cursor:
+                cursor.execute('SET TRANSACTION READ ONLY')
+                cursor.execute(f'SET LOCAL statement_timeout = {int(self.timeout_ms)}')
+            return lambda: None
+
+        if conexao.vendor == 'sqlite':
+            prazo = time.monotonic() + self.timeout_ms / 1000
+            bruta = conexao.connection
+            with conexao.cursor() as cursor:
+                cursor.execute('PRAGMA query_only = ON')
+            # Retorno diferente de zero interrompe a consulta em andamento
+            bruta.set_progress_handler(lambda: int(time.monotonic() > prazo), 10000)
+
+            def restaurar():
+                bruta.set_progress_handler(None, 0)
+                with conexao.cursor() as cursor:
+                    cursor.execute('PRAGMA query_only = OFF')
+
+            return restaurar
+
+        raise RelatorioSQLError(f'Relatórios SQL não suportados em {conexao.vendor}.')
+
+    def _concluir(self, execucao, linhas, chave=None, colunas=None):
+        inicio = time.monotonic()
+        total = 0
+        guardadas = [] if chave and self.cache_timeout else None
+        try:
+            for linha in linhas:
+                total += 1
+                if guardadas is not None:
+                    if total > self.cache_max_linhas:
+                        guardadas = None
+                    else:
+                        guardadas.append(tuple(linha))
+                yield linha
+        except DatabaseError as e:
+            self._falhar(execucao, e)
+            raise RelatorioSQLError(f'Falha ao executar o relatório: {e}') from e
+        except Exception as e:
+            self._falhar(execucao, e)
+            raise
+        finally:
+            # Consumo interrompido: encerra o cursor e a transação já
+            if hasattr(linhas, 'close'):
+                linhas.close()
+
+        if guardadas is not None:
+            cache.set(chave, {'colunas': colunas, 'linhas': guardadas}, self.cache_timeout)
+
+        execucao.status = 'CONCLUIDO'
+        execucao.total_registros = total
+        execucao.concluido_em = timezone.now()
+        execucao.save(update_fields=['status', 'total_registros', 'concluido_em'])
+        logger.info(
+            f"Relatório {execucao.template_id} ({execucao.pk}): {total} linhas "
+            f"em {time.monotonic() - inicio:.2f}s"
+        )
+
+    def _falhar(self, execucao, erro):
+        logger.warning(f"Relatório {execucao.template_id} ({execucao.pk}) falhou: {erro}")
+        execucao.status = 'ERRO'
+        execucao.erro_detalhes = str(erro)
+        execucao.concluido_em = timezone.now()
+        execucao.save(update_fields=['status', 'erro_detalhes', 'concluido_em'])
+
+
+# Instância global do serviço
+relatorio_sql_service = RelatorioSQLService()
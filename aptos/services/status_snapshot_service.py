@@ -0,0 +1,241 @@
+"""
+Snapshots da distribuição de status dos inquilinos
+
+Ao fim de cada dia e de cada semana a contagem de inquilinos por status e
+as mudanças do período ficam em SnapshotStatus (uma linha por status). O
+relatório de status parte do último snapshot diário e consulta no
+histórico só as mudanças posteriores a ele; a tendência semanal é uma
+leitura da tabela de snapshots pelo índice (periodicidade, data, status).
+
+A contagem ao fim de um período já encerrado é a contagem atual menos as
+mudanças registradas depois dele (inquilinos criados depois entram pelo
+status atual). Por isso o snapshot pode ser gravado com atraso e períodos
+passados podem ser recompostos enquanto o histórico estiver na retenção.
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import BooleanField, Case, Count, Q, When
+from django.utils import timezone
+
+from aptos.models import HistoricoStatus, Inquilino, SnapshotStatus
+
+logger = logging.getLogger(__name__)
+
+DIARIO = 'DIARIO'
+SEMANAL = 'SEMANAL'
+PERIODICIDADES = (DIARIO, SEMANAL)
+_DURACAO = {DIARIO: timedelta(days=1), SEMANAL: timedelta(weeks=1)}
+
+
+def _inicio_do_dia(data):
+    return timezone.make_aware(datetime.combine(data, time.min))
+
+
+def inicio_periodo(periodicidade, data):
+    """Primeiro dia do período que contém `data`"""
+    if periodicidade == SEMANAL:
+        return data - timedelta(days=data.weekday())
+    return data
+
+
+def _contagem_atual(**filtros):
+    return dict(
+        Inquilino.objects.filter(**filtros).values_list('status').annotate(Count('id')).order_by()
+    )
+
+
+def _mudancas(filtro, corte):
+    """Mudanças de status agrupadas por transição e motivo
+
+    `posterior` marca as registradas a partir de `corte` e `inquilino_novo`
+    as de inquilinos criados depois dele, que já entram pelo status atual.
+    """
+    return list(
+        HistoricoStatus.objects.filter(filtro)
+        .values(
+            'status_anterior',
+            'status_novo',
+            'categoria_motivo',
+            posterior=Case(
+                When(timestamp__gte=corte, then=True), default=False, output_field=BooleanField()
+            ),
+            inquilino_novo=Case(
+                When(inquilino__created_at__gte=corte, then=True),
+                default=False,
+                output_field=BooleanField(),
+            ),
+        )
+        .annotate(quantidade=Count('id'))
+        .order_by()
+    )
+
+
+def _variacao(grupos, corte):
+    """Variação da contagem por status entre `corte` e agora"""
+    variacao = Counter(_contagem_atual(created_at__gte=corte))
+    for grupo in grupos:
+        if grupo['posterior'] and not grupo['inquilino_novo']:
+            variacao[grupo['status_novo']] += grupo['quantidade']
+            variacao[grupo['status_anterior']] -= grupo['quantidade']
+    return variacao
+
+
+def _entradas(grupos):
+    """Mudanças para cada status e, por status, por categoria de motivo"""
+    entradas = Counter()
+    motivos = defaultdict(Counter)
+    for grupo in grupos:
+        entradas[grupo['status_novo']] += grupo['quantidade']
+        motivos[grupo['status_novo']][grupo['categoria_motivo']] += grupo['quantidade']
+    return entradas, motivos
+
+
+def _relatorio(distribuicao, entradas, motivos, **extras):
+    return {
+        'distribuicao_atual': [
+            {'status': s, 'count': n} for s, n in sorted(distribuicao.items()) if n
+        ],
+        'mudancas_ultimo_mes': [
+            {'status_novo': s, 'count': n} for s, n in sorted(entradas.items()) if n
+        ],
+        'top_motivos': [
+            {'categoria_motivo': m, 'count': n} for m, n in motivos.most_common(5)
+        ],
+        'total_inquilinos': sum(distribuicao.values()),
+        'ativos': distribuicao.get('ATIVO', 0),
+        'inadimplentes': distribuicao.get('INADIMPLENTE', 0),
+        **extras,
+    }
+
+
+class StatusSnapshotService:
+    """Gravação e leitura dos snapshots de status"""
+
+    def ultimo_periodo(self, periodicidade, hoje=None):
+        """Primeiro dia do último período já encerrado"""
+        hoje = hoje or timezone.localdate()
+        return inicio_periodo(periodicidade, hoje) - _DURACAO[periodicidade]
+
+    def capturar(self, periodicidade=DIARIO, data_referencia=None):
+        """Grava (ou regrava) o snapshot do período que contém `data_referencia`
+
+        Sem data, usa o último período encerrado. Retorna os snapshots, um
+        por status.
+        """
+        if data_referencia is None:
+            data_referencia = self.ultimo_periodo(periodicidade)
+        data_referencia = inicio_periodo(periodicidade, data_referencia)
+        inicio = _inicio_do_dia(data_referencia)
+        fim = _inicio_do_dia(data_referencia + _DURACAO[periodicidade])
+        if fim > timezone.now():
+            raise ValueError(f"Período {periodicidade} de {data_referencia} ainda não terminou")
+
+        atual = _contagem_atual()
+        grupos = _mudancas(Q(timestamp__gte=inicio), fim)
+        variacao = _variacao(grupos, fim)
+        entradas, motivos = _entradas(g for g in grupos if not g['posterior'])
+
+        snapshots = [
+            SnapshotStatus(
+                periodicidade=periodicidade,
+                data_referencia=data_referencia,
+                status=codigo,
+                total=atual.get(codigo, 0) - variacao[codigo],
+                entradas=entradas[codigo],
+                motivos=dict(motivos[codigo]),
+            )
+            for codigo, _ in Inquilino.STATUS_CHOICES
+        ]
+        SnapshotStatus.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['periodicidade', 'data_referencia', 'status'],
+            update_fields=['total', 'entradas', 'motivos'],
+        )
+
+        logger.info(
+            f"Snapshot {periodicidade} de {data_referencia}: "
+            f"{sum(s.total for s in snapshots)} inquilinos, {sum(entradas.values())} mudanças"
+        )
+        return snapshots
+
+    def relatorio_status(self, dias=30):
+        """Distribuição atual e mudanças dos últimos `dias` dias
+
+        Parte do último snapshot diário da janela e soma as mudanças
+        registradas depois dele; dias da janela sem snapshot vêm do
+        histórico. Sem snapshot na janela, tudo é calculado do histórico.
+        """
+        inicio_janela = timezone.localdate() - timedelta(days=dias)
+        por_dia = defaultdict(list)
+        for snapshot in SnapshotStatus.objects.filter(
+            periodicidade=DIARIO, data_referencia__gte=inicio_janela
+        ).values('data_referencia', 'status', 'total', 'entradas', 'motivos'):
+            por_dia[snapshot['data_referencia']].append(snapshot)
+
+        if not por_dia:
+            return self._relatorio_do_historico(inicio_janela)
+
+        # Dias consecutivos até o último snapshot; o resto da janela vem do histórico
+        ultimo = primeiro = max(por_dia)
+        while primeiro - timedelta(days=1) in por_dia:
+            primeiro -= timedelta(days=1)
+        corte = _inicio_do_dia(ultimo + timedelta(days=1))
+
+        grupos = _mudancas(
+            Q(timestamp__gte=_inicio_do_dia(inicio_janela), timestamp__lt=_inicio_do_dia(primeiro))
+            | Q(timestamp__gte=corte),
+            corte,
+        )
+        variacao = _variacao(grupos, corte)
+        entradas, motivos_por_status = _entradas(grupos)
+        motivos = sum(motivos_por_status.values(), Counter())
+
+        dia = primeiro
+        while dia <= ultimo:
+            for snapshot in por_dia[dia]:
+                entradas[snapshot['status']] += snapshot['entradas']
+                motivos.update(snapshot['motivos'])
+            dia += timedelta(days=1)
+
+        distribuicao = Counter({s['status']: s['total'] for s in por_dia[ultimo]})
+        for codigo, valor in variacao.items():
+            distribuicao[codigo] += valor
+
+        return _relatorio(distribuicao, entradas, motivos, snapshot=ultimo)
+
+    def _relatorio_do_historico(self, inicio_janela):
+        grupos = _mudancas(Q(timestamp__gte=_inicio_do_dia(inicio_janela)), timezone.now())
+        entradas, motivos_por_status = _entradas(grupos)
+        return _relatorio(
+            Counter(_contagem_atual()),
+            entradas,
+            sum(motivos_por_status.values(), Counter()),
+            snapshot=None,
+        )
+
+    def tendencia(self, semanas=12):
+        """Distribuição de status nas últimas `semanas` semanas encerradas"""
+        desde = self.ultimo_periodo(SEMANAL) - timedelta(weeks=semanas - 1)
+        linhas = (
+            SnapshotStatus.objects.filter(periodicidade=SEMANAL, data_referencia__gte=desde)
+            .order_by('data_referencia', 'status')
+            .values_list('data_referencia', 'status', 'total', 'entradas')
+        )
+
+        por_semana = {}
+        for data, codigo, total, entradas in linhas:
+            semana = por_semana.setdefault(
+                data,
+                {'semana': data, 'total_inquilinos': 0, 'distribuicao': {}, 'entradas': {}},
+            )
+            semana['total_inquilinos'] += total
+            semana['distribuicao'][codigo] = total
+            semana['entradas'][codigo] = entradas
+        return list(por_semana.values())
+
+
+# Instância global do serviço
+status_snapshot_service = StatusSnapshotService()
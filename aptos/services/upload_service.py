@@ -0,0 +1,282 @@
+"""
+Serviço de upload resumível (estilo tus) para vídeos e documentos grandes
+"""
+import base64
+import binascii
+import hashlib
+import mimetypes
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from aptos.models import Aptos, Builders, DocumentoInquilino, Inquilino, UploadResumivel
+
+BLOCO_LEITURA = 64 * 1024
+
+# Reserva de uma parte abandonada (processo morto no meio da cópia) expira
+RESERVA_EXPIRA = timedelta(minutes=30)
+
+ALGORITMOS_CHECKSUM = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+}
+
+MODELOS_DESTINO = {
+    'APTO_VIDEO': Aptos,
+    'BUILDER_VIDEO': Builders,
+    'DOCUMENTO_INQUILINO': Inquilino,
+}
+
+
+class UploadError(Exception):
+    """Erro de upload com o status HTTP correspondente"""
+    status_code = 400
+
+
+class UploadNaoEncontrado(UploadError):
+    status_code = 404
+
+
+class OffsetConflito(UploadError):
+    status_code = 409
+
+
+class TamanhoExcedido(UploadError):
+    status_code = 413
+
+
+class ChecksumInvalido(UploadError):
+    # Código definido pela extensão "checksum" do protocolo tus
+    status_code = 460
+
+
+class _ArquivoMontado(File):
+    """Arquivo já em disco: FileSystemStorage o move em vez de copiar."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def parse_checksum(header):
+    """Converte 'sha256 <base64>' em (algoritmo, digest bytes)."""
+    if not header:
+        return None
+    try:
+        algoritmo, valor = header.strip().split(' ', 1)
+        digest = base64.b64decode(valor.strip(), validate=True)
+    except (ValueError, binascii.Error):
+        raise UploadError('Cabeçalho Upload-Checksum inválido')
+
+    algoritmo = algoritmo.lower()
+    if algoritmo not in ALGORITMOS_CHECKSUM:
+        raise UploadError(f'Algoritmo de checksum não suportado: {algoritmo}')
+    return algoritmo, digest
+
+
+class UploadResumivelService:
+    """Cria sessões, anexa partes com verificação de offset/checksum e finaliza"""
+
+    def diretorio(self):
+        diretorio = getattr(
+            settings,
+            'RESUMABLE_UPLOAD_DIR',
+            os.path.join(str(settings.FILE_UPLOAD_TEMP_DIR), 'resumable'),
+        )
+        os.makedirs(diretorio, exist_ok=True)
+        return str(diretorio)
+
+    def caminho_temporario(self, upload):
+        return os.path.join(self.diretorio(), f"{upload.pk}.part")
+
+    def criar(self, destino, objeto_id, nome_arquivo, tamanho_total,
+              usuario=None, tipo_documento=None):
+        """Abre uma sessão de upload para o objeto de destino"""
+        modelo = MODELOS_DESTINO.get(destino)
+        if modelo is None:
+            raise UploadError('Destino inválido')
+        if not modelo.objects.filter(pk=objeto_id).exists():
+            raise UploadNaoEncontrado('Objeto de destino não encontrado')
+        if destino == 'DOCUMENTO_INQUILINO' and not tipo_documento:
+            raise UploadError('tipo_documento é obrigatório para documentos')
+
+        limite = getattr(settings, 'RESUMABLE_UPLOAD_MAX_SIZE', None)
+        if tamanho_total <= 0:
+            raise UploadError('tamanho_total deve ser positivo')
+        if limite and tamanho_total > limite:
+            raise TamanhoExcedido(f'Arquivo excede o limite de {limite} bytes')
+
+        upload = UploadResumivel.objects.create(
+            destino=destino,
+            objeto_id=objeto_id,
+            tipo_documento=tipo_documento or None,
+            nome_arquivo=os.path.basename(nome_arquivo),
+            tamanho_total=tamanho_total,
+            usuario=usuario,
+        )
+        open(self.caminho_temporario(upload), 'wb').close()
+        return upload
+
+    def obter(self, upload_id):
+        try:
+            return UploadResumivel.objects.get(pk=upload_id)
+        except (UploadResumivel.DoesNotExist, ValueError):
+            raise UploadNaoEncontrado('Upload não encontrado')
+
+    def anexar_parte(self, upload_id, offset, stream, tamanho, checksum=None):
+        """Anexa uma parte lida do stream diretamente ao arquivo em disco.
+
+        O corpo é copiado em blocos de BLOCO_LEITURA, sem ser carregado
+        inteiro em memória. Com checksum, uma parte divergente é descartada
+        e o offset permanece inalterado; sem checksum, uma parte interrompida
+        é mantida até onde chegou para que o cliente retome dali.
+
+        Nenhuma transação fica aberta durante a cópia: a parte é reservada
+        por um UPDATE condicional (offset e recebendo_desde) e o novo offset
+        é gravado por outro UPDATE curto ao final. Um PATCH concorrente
+        recebe 409 imediatamente em vez de esperar o cliente lento.
+        """
+        verificacao = parse_checksum(checksum)
+        upload = self.obter(upload_id)
+
+        if upload.status != 'EM_ANDAMENTO':
+            raise UploadError('Upload não está em andamento')
+        if offset + tamanho > upload.tamanho_total:
+            raise TamanhoExcedido('Parte ultrapassa o tamanho total declarado')
+
+        agora = timezone.now()
+        reservado = UploadResumivel.objects.filter(
+            Q(recebendo_desde__isnull=True) | Q(recebendo_desde__lt=agora - RESERVA_EXPIRA),
+            pk=upload.pk,
+            status='EM_ANDAMENTO',
+            offset=offset,
+        ).update(recebendo_desde=agora)
+
+        if not reservado:
+            upload.refresh_from_db()
+            if upload.status != 'EM_ANDAMENTO':
+                raise UploadError('Upload não está em andamento')
+            if offset != upload.offset:
+                raise OffsetConflito(
+                    f'Offset {offset} não confere com o servidor ({upload.offset})'
+                )
+            raise OffsetConflito('Outra parte deste upload está sendo recebida')
+
+        recebido = 0
+        try:
+            recebido = self._gravar_parte(upload, offset, stream, tamanho, verificacao)
+        finally:
+            # Libera a reserva mesmo em erro, quando o offset não avança
+            campos = {'recebendo_desde': None, 'updated_at': timezone.now()}
+            if recebido:
+                campos['offset'] = offset + recebido
+            UploadResumivel.objects.filter(
+                pk=upload.pk, recebendo_desde=agora
+            ).update(**campos)
+
+        upload.refresh_from_db()
+        return upload
+
+    def _gravar_parte(self, upload, offset, stream, tamanho, verificacao):
+        """Copia a parte para o arquivo temporário e retorna os bytes gravados"""
+        hasher = ALGORITMOS_CHECKSUM[verificacao[0]]() if verificacao else None
+        restante = tamanho
+
+        with open(self.caminho_temporario(upload), 'r+b') as destino:
+            # Descarta qualquer resto de uma escrita anterior não confirmada
+            destino.seek(offset)
+            destino.truncate()
+
+            while restante > 0:
+                bloco = stream.read(min(BLOCO_LEITURA, restante))
+                if not bloco:
+                    break
+                if hasher:
+                    hasher.update(bloco)
+                destino.write(bloco)
+                restante -= len(bloco)
+
+            if hasher and (restante or hasher.digest() != verificacao[1]):
+                destino.truncate(offset)
+                raise ChecksumInvalido('Checksum da parte não confere')
+
+        return tamanho - restante
+
+    def finalizar(self, upload_id, usuario=None):
+        """Anexa o arquivo montado ao FileField de destino"""
+        with transaction.atomic():
+            try:
+                upload = UploadResumivel.objects.select_for_update().get(pk=upload_id)
+            except (UploadResumivel.DoesNotExist, ValueError):
+                raise UploadNaoEncontrado('Upload não encontrado')
+
+            if upload.status != 'EM_ANDAMENTO':
+                raise UploadError('Upload não está em andamento')
+            if not upload.completo:
+                raise UploadError(
+                    f'Upload incompleto: {upload.offset} de {upload.tamanho_total} bytes'
+                )
+
+            caminho = self.caminho_temporario(upload)
+            with open(caminho, 'rb') as f:
+                arquivo = _ArquivoMontado(f, name=upload.nome_arquivo)
+                resultado = self._anexar(upload, arquivo, usuario or upload.usuario)
+
+            upload.status = 'CONCLUIDO'
+            upload.concluido_em = timezone.now()
+            upload.save(update_fields=['status', 'concluido_em', 'updated_at'])
+
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        return upload, resultado
+
+    def _anexar(self, upload, arquivo, usuario):
+        if upload.destino == 'DOCUMENTO_INQUILINO':
+            inquilino = Inquilino.objects.get(pk=upload.objeto_id)
+            documento = DocumentoInquilino(
+                inquilino=inquilino,
+                tipo_documento=upload.tipo_documento,
+                nome_original=upload.nome_arquivo,
+                tamanho=upload.tamanho_total,
+                mime_type=mimetypes.guess_type(upload.nome_arquivo)[0],
+                uploaded_by=usuario,
+            )
+            documento.arquivo.save(upload.nome_arquivo, arquivo, save=True)
+            return documento
+
+        modelo = MODELOS_DESTINO[upload.destino]
+        objeto = modelo.objects.get(pk=upload.objeto_id)
+        objeto.video.save(upload.nome_arquivo, arquivo, save=False)
+        objeto.save(update_fields=['video', 'updated_at'])
+        return objeto
+
+    def cancelar(self, upload_id):
+        upload = self.obter(upload_id)
+        if upload.status == 'EM_ANDAMENTO':
+            upload.status = 'CANCELADO'
+            upload.save(update_fields=['status', 'updated_at'])
+        caminho = self.caminho_temporario(upload)
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        return upload
+
+    def limpar_abandonados(self, horas=48):
+        """Cancela sessões sem atividade e remove seus arquivos parciais"""
+        limite = timezone.now() - timedelta(hours=horas)
+        abandonados = UploadResumivel.objects.filter(
+            status='EM_ANDAMENTO', updated_at__lt=limite
+        )
+        total = 0
+        for upload in abandonados:
+            self.cancelar(upload.pk)
+            total += 1
+        return total
+
+
+# Instância global do serviço
+upload_service = UploadResumivelService()
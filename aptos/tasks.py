@@ -2,6 +2,7 @@
 Tasks periódicas para gestão de status de inquilinos
 """
 from celery import shared_task
+from .db_router import na_replica
 from .models import RegraStatus, Inquilino, HistoricoStatus
 from django.utils import timezone
 from datetime import timedelta
@@ -39,6 +40,7 @@ def aplicar_regras_status_automaticas():
 
 
 @shared_task
+@na_replica
 def notificar_mudancas_status_criticas():
     """Notifica sobre mudanças de status críticas"""
     # Buscar mudanças para INADIMPLENTE ou BLOQUEADO nas últimas 24h
@@ -55,30 +57,33 @@ def notificar_mudancas_status_criticas():
     return mudancas_criticas.count()
 
 
+@shared_task
+def gerar_snapshot_status_diario():
+    """Grava o snapshot de status do dia anterior"""
+    from .services.status_snapshot_service import DIARIO, status_snapshot_service
+
+    snapshots = status_snapshot_service.capturar(DIARIO)
+    return {s.status: s.total for s in snapshots}
+
+
 @shared_task
 def gerar_relatorio_status_semanal():
-    """Gera relatório semanal de status dos inquilinos"""
-    from django.db.models import Count
-
-    # Distribuição atual de status
-    distribuicao = Inquilino.objects.values('status').annotate(
-        count=Count('id')
-    ).order_by('status')
-
-    # Mudanças na última semana
-    ultima_semana = timezone.now() - timedelta(days=7)
-    mudancas_semana = HistoricoStatus.objects.filter(
-        timestamp__gte=ultima_semana
-    ).values('status_novo').annotate(
-        count=Count('id')
-    ).order_by('status_novo')
+    """Grava o snapshot da semana encerrada e gera o relatório semanal de status"""
+    from .services.status_snapshot_service import SEMANAL, status_snapshot_service
+
+    snapshots = status_snapshot_service.capturar(SEMANAL)
+    inicio = snapshots[0].data_referencia
 
     relatorio = {
-        'periodo': f"{ultima_semana.date()} a {timezone.now().date()}",
-        'distribuicao_atual': list(distribuicao),
-        'mudancas_semana': list(mudancas_semana),
-        'total_inquilinos': Inquilino.objects.count(),
-        'total_mudancas': HistoricoStatus.objects.filter(timestamp__gte=ultima_semana).count()
+        'periodo': f"{inicio} a {inicio + timedelta(days=6)}",
+        'distribuicao_atual': [
+            {'status': s.status, 'count': s.total} for s in snapshots if s.total
+        ],
+        'mudancas_semana': [
+            {'status_novo': s.status, 'count': s.entradas} for s in snapshots if s.entradas
+        ],
+        'total_inquilinos': sum(s.total for s in snapshots),
+        'total_mudancas': sum(s.entradas for s in snapshots),
     }
 
     logger.info(f"Relatório semanal gerado: {relatorio}")
@@ -87,15 +92,98 @@ def gerar_relatorio_status_semanal():
 
 @shared_task
 def limpar_historico_antigo():
-    """Remove histórico de status muito antigo conforme política de retenção"""
-    # Manter apenas os últimos 2 anos de histórico
-    data_limite = timezone.now() - timedelta(days=730)
+    """Arquiva e remove histórico antigo conforme política de retenção.
+
+    Histórico de status e de associações mais antigo que
+    HISTORICO_RETENCAO_DIAS vai para arquivos NDJSON compactados em lotes;
+    uma execução interrompida continua do último lote na próxima vez.
+    """
+    from .services.arquivamento_service import arquivamento_service
 
-    historicos_antigos = HistoricoStatus.objects.filter(timestamp__lt=data_limite)
-    count = historicos_antigos.count()
+    resultado = arquivamento_service.arquivar_expirados()
+    count = sum(resultado.values())
 
     if count > 0:
-        historicos_antigos.delete()
-        logger.info(f"Removidos {count} registros de histórico antigos")
+        logger.info(f"Arquivados {count} registros de histórico antigos: {resultado}")
+
+    return count
+
+@shared_task
+def expirar_associacoes_encerradas():
+    """Finaliza associações vencidas e atualiza a disponibilidade dos apartamentos"""
+    from .models import InquilinoApartamento
+
+    resultado = InquilinoApartamento.objects.expirar_encerradas()
+    if resultado['expiradas']:
+        logger.info(
+            f"{resultado['expiradas']} associações expiradas; "
+            f"{resultado['apartamentos_liberados']} apartamentos liberados"
+        )
+    return resultado
+
+
+@shared_task
+def manter_particoes_historico():
+    """Cria as partições futuras do histórico e desanexa as expiradas"""
+    from .services.particionamento_service import particionamento_service
+
+    if not particionamento_service.disponivel():
+        return {}
+
+    resultado = particionamento_service.manter()
+    if resultado:
+        logger.info(f"Manutenção de partições do histórico: {resultado}")
+    return resultado
+
+
+@shared_task
+def limpar_uploads_abandonados(horas=48):
+    """Cancela uploads resumíveis parados e remove os arquivos parciais"""
+    from .services.upload_service import upload_service
+
+    total = upload_service.limpar_abandonados(horas=horas)
+    if total:
+        logger.info(f"Removidos {total} uploads resumíveis abandonados")
+    return total
+
+
+@shared_task
+def processar_importacao_inquilinos(importacao_id):
+    """Processa em segundo plano uma importação de inquilinos enviada pela API"""
+    from .services.importacao_service import importacao_service
+
+    importacao = importacao_service.processar(importacao_id)
+    logger.info(
+        f"Importação {importacao_id}: {importacao.status}, "
+        f"{importacao.criados} criados, {importacao.com_erro} com erro"
+    )
+    return importacao.status
+
+
+@shared_task
+def despachar_assinaturas_relatorio():
+    """Envia as assinaturas de relatório vencidas para a fila de relatórios.
+
+    Agendada no beat a intervalos curtos (ex.: 5 minutos); fora da janela
+    RELATORIO_ASSINATURAS_INICIO..FIM não despacha nada.
+    """
+    from .services.assinatura_relatorio_service import assinatura_relatorio_service
+
+    reservadas = assinatura_relatorio_service.reservar_vencidas()
+    for assinatura_id in reservadas:
+        gerar_relatorio_assinatura.apply_async(
+            args=[assinatura_id], queue=assinatura_relatorio_service.fila
+        )
+
+    if reservadas:
+        logger.info(f"{len(reservadas)} assinaturas de relatório enviadas para geração")
+    return len(reservadas)
+
+
+@shared_task
+def gerar_relatorio_assinatura(assinatura_id):
+    """Gera e grava o arquivo de uma assinatura de relatório"""
+    from .services.assinatura_relatorio_service import assinatura_relatorio_service
 
-    return count
\ No newline at end of file
+    execucao = assinatura_relatorio_service.gerar(assinatura_id)
+    return str(execucao.pk)
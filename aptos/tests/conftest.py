@@ -99,6 +99,13 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """Cache vazio em cada teste (dados de relatórios, métricas, etc.)."""
+    from django.core.cache import cache
+    cache.clear()
+
+
 @pytest.fixture
 def sample_inquilinos(db):
     """Fixture que cria múltiplos inquilinos de exemplo."""
@@ -134,6 +141,12 @@ def pytest_configure(config):
             }
         }
         settings.SESSION_ENGINE = "django.contrib.sessions.backends.db"
+        # Segundo alias espelhando o banco de testes, para exercitar o
+        # roteamento à réplica; os testes que o usam ligam REPLICA_LEITURAS
+        settings.DATABASES.setdefault(
+            "replica", {**settings.DATABASES["default"], "TEST": {"MIRROR": "default"}}
+        )
+        settings.REPLICA_LEITURAS = False
     except Exception:
         # Caso settings ainda não estejam carregados
         pass
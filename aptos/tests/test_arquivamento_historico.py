@@ -0,0 +1,120 @@
+"""
+Testes para o arquivamento do histórico antigo.
+
+Cobre:
+- Arquivamento em lotes para NDJSON compactado e remoção do banco
+- Retomada a partir do checkpoint
+- Histórico de associações com o inquilino de cada registro
+- Consulta do histórico arquivado pela API
+"""
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import ArquivamentoHistorico, HistoricoAssociacao, HistoricoStatus
+from aptos.services.arquivamento_service import ArquivamentoHistoricoService
+from aptos.tests.factories import (
+    HistoricoStatusFactory,
+    InquilinoApartamentoFactory,
+    InquilinoPFFactory,
+)
+
+
+@pytest.fixture
+def service(tmp_path, settings):
+    settings.HISTORICO_ARQUIVO_DIR = tmp_path
+    return ArquivamentoHistoricoService(tamanho_lote=3, pausa_ms=0)
+
+
+def _envelhecer(queryset, dias):
+    queryset.update(timestamp=timezone.now() - timedelta(days=dias))
+
+
+@pytest.mark.django_db
+def test_arquiva_em_lotes_e_remove(service, tmp_path):
+    inquilino = InquilinoPFFactory.create()
+    antigos = HistoricoStatusFactory.create_batch(7, inquilino=inquilino)
+    recente = HistoricoStatusFactory.create(inquilino=inquilino)
+    _envelhecer(HistoricoStatus.objects.filter(pk__in=[h.pk for h in antigos]), 800)
+
+    checkpoint = service.arquivar('STATUS', dias=730)
+
+    assert checkpoint.status == 'CONCLUIDO'
+    assert checkpoint.arquivados == 7
+    assert list(HistoricoStatus.objects.values_list('pk', flat=True)) == [recente.pk]
+
+    arquivos = sorted(tmp_path.glob('historico_status/ano=*/mes=*/*.ndjson.gz'))
+    assert len(arquivos) == 3  # 7 registros em lotes de 3
+    with gzip.open(arquivos[0], 'rb') as conteudo:
+        registro = json.loads(conteudo.readline())
+    assert list(registro)[0] == 'inquilino_id'
+    assert registro['id'] == antigos[0].pk
+    assert registro['status_novo'] == 'INADIMPLENTE'
+
+
+@pytest.mark.django_db
+def test_retoma_do_checkpoint(service):
+    HistoricoStatusFactory.create_batch(7)
+    _envelhecer(HistoricoStatus.objects.all(), 800)
+
+    checkpoint = service.arquivar('STATUS', dias=730, max_lotes=1)
+    assert checkpoint.status == 'EM_ANDAMENTO'
+    assert checkpoint.arquivados == 3
+    assert HistoricoStatus.objects.count() == 4
+
+    # Nova execução continua o mesmo checkpoint
+    retomado = service.arquivar('STATUS', dias=730)
+    assert retomado.pk == checkpoint.pk
+    assert retomado.status == 'CONCLUIDO'
+    assert retomado.arquivados == 7
+    assert not HistoricoStatus.objects.exists()
+    assert service.arquivar('STATUS', dias=730) is None
+
+
+@pytest.mark.django_db
+def test_historico_associacao_e_consulta(service):
+    associacao = InquilinoApartamentoFactory.create()
+    outro = InquilinoApartamentoFactory.create()
+    for item in (associacao, outro):
+        HistoricoAssociacao.objects.create(associacao=item, acao='CRIADA', detalhes={'valor': '1500.00'})
+    _envelhecer(HistoricoAssociacao.objects.all(), 800)
+
+    resultado = service.arquivar_expirados(dias=730)
+
+    assert resultado == {'STATUS': 0, 'ASSOCIACAO': 2}
+    assert not HistoricoAssociacao.objects.exists()
+    registros = service.consultar('ASSOCIACAO', associacao.inquilino_id)
+    assert len(registros) == 1
+    assert registros[0]['associacao_id'] == associacao.pk
+    assert registros[0]['detalhes'] == {'valor': '1500.00'}
+
+    hoje = timezone.now().date()
+    assert service.consultar('ASSOCIACAO', associacao.inquilino_id, desde=hoje) == []
+
+
+@pytest.mark.django_db
+def test_endpoint_historico_arquivado(service):
+    historico = HistoricoStatusFactory.create()
+    _envelhecer(HistoricoStatus.objects.all(), 800)
+    service.arquivar('STATUS', dias=730)
+    assert ArquivamentoHistorico.objects.filter(status='CONCLUIDO').exists()
+
+    client = APIClient()
+    client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+    url = '/api/v1/status/historico_arquivado/'
+
+    response = client.get(url, {'inquilino_id': historico.inquilino_id})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data['total'] == 1
+    assert data['resultados'][0]['id'] == historico.pk
+
+    assert client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get(url, {'inquilino_id': historico.inquilino_id, 'desde': '31/12/2020'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,153 @@
+"""
+Testes para as assinaturas de relatório pré-gerado.
+
+Cobre:
+- Agenda cron (faixas, passos, dia do mês x dia da semana)
+- Despacho das vencidas só na janela fora de pico, sem reserva duplicada
+- Geração do arquivo e pedido interativo igual servido pelo pré-gerado
+- Template SQL pelo management command e API de assinaturas
+"""
+from datetime import datetime, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import AssinaturaRelatorio, RelatorioTemplate
+from aptos.services.assinatura_relatorio_service import AgendaCron, assinatura_relatorio_service
+from aptos.tests.factories import AptosFactory
+
+# Domingo, 18/10/2026
+DOMINGO = timezone.make_aware(datetime(2026, 10, 18, 12, 0))
+
+
+@pytest.fixture
+def client(admin_user, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    client = APIClient()
+    client.force_authenticate(user=admin_user)
+    return client
+
+
+def _assinatura(admin_user, tipo='OCUPACAO', query_sql=None, **kwargs):
+    template = RelatorioTemplate.objects.create(
+        nome='Ocupação semanal', tipo=tipo, descricao='', query_sql=query_sql
+    )
+    return AssinaturaRelatorio.objects.create(
+        template=template, usuario=admin_user, agenda='0 5 * * 1', **kwargs
+    )
+
+
+@pytest.mark.parametrize('agenda, esperado', [
+    ('0 5 * * 1', datetime(2026, 10, 19, 5, 0)),
+    ('*/20 13-14 * * *', datetime(2026, 10, 18, 13, 0)),
+    ('30 2 1 * 1', datetime(2026, 10, 19, 2, 30)),
+    ('0 12 * * 0', datetime(2026, 10, 25, 12, 0)),
+    ('0 0 29 2 *', datetime(2028, 2, 29, 0, 0)),
+])
+def test_agenda_cron(agenda, esperado):
+    assert AgendaCron(agenda).proxima(DOMINGO) == timezone.make_aware(esperado)
+
+
+@pytest.mark.parametrize('agenda', ['', '0 5 * *', '60 * * * *', '0 5 * * 8', '*/0 * * * *', 'a b c d e'])
+def test_agenda_cron_invalida(agenda):
+    with pytest.raises(ValueError):
+        AgendaCron(agenda)
+
+
+def test_despacho_na_janela_fora_de_pico(admin_user, settings):
+    settings.RELATORIO_ASSINATURAS_INICIO = 22
+    settings.RELATORIO_ASSINATURAS_FIM = 6
+    vencida = _assinatura(admin_user, proxima_execucao=DOMINGO - timedelta(days=1))
+    futura = _assinatura(admin_user, proxima_execucao=DOMINGO + timedelta(days=1))
+    nova = _assinatura(admin_user)
+
+    # Meio-dia: fora da janela
+    assert assinatura_relatorio_service.reservar_vencidas(DOMINGO) == []
+
+    madrugada = DOMINGO.replace(hour=23)
+    assert assinatura_relatorio_service.reservar_vencidas(madrugada) == [vencida.pk]
+    assert assinatura_relatorio_service.reservar_vencidas(madrugada) == []
+
+    segunda = timezone.make_aware(datetime(2026, 10, 19, 5, 0))
+    for assinatura in (vencida, nova):
+        assinatura.refresh_from_db()
+        assert assinatura.proxima_execucao == segunda
+    futura.refresh_from_db()
+    assert futura.proxima_execucao == DOMINGO + timedelta(days=1)
+
+
+def test_pedido_igual_usa_pre_gerado(admin_user, client):
+    AptosFactory.create_batch(2)
+    assinatura = _assinatura(admin_user, formato='PDF')
+
+    execucao = assinatura_relatorio_service.gerar(assinatura.pk)
+    assert execucao.status == 'CONCLUIDO'
+    assert execucao.assinatura == assinatura and execucao.chave
+    assinatura.refresh_from_db()
+    assert assinatura.ultima_execucao == execucao
+
+    response = client.get('/api/v1/relatorios/ocupacao/', {'formato': 'pdf'})
+    assert response.status_code == status.HTTP_200_OK
+    assert response['X-Relatorio-Gerado-Em'] == execucao.concluido_em.isoformat()
+    assert b''.join(response.streaming_content) == execucao.arquivo_gerado.open('rb').read()
+    assert 'ocupacao.pdf' in response['Content-Disposition']
+
+    # Outros filtros ou formato: gerado na hora
+    for params in ({'formato': 'excel'}, {'formato': 'pdf', 'data_inicio': '2026-01-01'}):
+        response = client.get('/api/v1/relatorios/ocupacao/', params)
+        assert response.status_code == status.HTTP_200_OK
+        assert 'X-Relatorio-Gerado-Em' not in response
+
+    # Pré-gerado vencido não é usado
+    execucao.concluido_em = timezone.now() - timedelta(hours=25)
+    execucao.save(update_fields=['concluido_em'])
+    response = client.get('/api/v1/relatorios/ocupacao/', {'formato': 'pdf'})
+    assert 'X-Relatorio-Gerado-Em' not in response
+
+
+def test_template_sql_pelo_comando(admin_user, client):
+    AptosFactory.create(unit_number='101')
+    assinatura = _assinatura(
+        admin_user, query_sql='SELECT unit_number FROM aptos_aptos', formato='EXCEL'
+    )
+
+    saida = StringIO()
+    call_command('gerar_assinaturas_relatorio', assinatura=assinatura.pk, stdout=saida)
+    assert '1 relatórios gerados' in saida.getvalue()
+
+    response = client.post(
+        '/api/v1/relatorios/executar_template/',
+        {'template': assinatura.template_id, 'formato': 'excel'},
+        format='json',
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert 'X-Relatorio-Gerado-Em' in response
+    assert f'relatorio_{assinatura.template_id}.xlsx' in response['Content-Disposition']
+
+
+def test_api_de_assinaturas(admin_user, client):
+    template = RelatorioTemplate.objects.create(nome='Inadimplentes', tipo='INADIMPLENTES', descricao='')
+    url = '/api/v1/assinaturas-relatorio/'
+
+    for dados in (
+        {'template': template.pk, 'agenda': '0 5 * *'},
+        {'template': template.pk, 'agenda': '0 5 * * 1', 'parametros': {'data_inicio': '2026-01-01'}},
+    ):
+        assert client.post(url, dados, format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post(
+        url, {'template': template.pk, 'agenda': '0 5 * * 1', 'formato': 'EXCEL'}, format='json'
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assinatura = AssinaturaRelatorio.objects.get(pk=response.json()['id'])
+    assert assinatura.usuario == admin_user
+    assert assinatura.proxima_execucao == AgendaCron('0 5 * * 1').proxima()
+
+    response = client.patch(f'{url}{assinatura.pk}/', {'agenda': '0 3 * * *'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assinatura.refresh_from_db()
+    assert timezone.localtime(assinatura.proxima_execucao).hour == 3
@@ -0,0 +1,132 @@
+"""
+Testes para a validação em lote de CPF/CNPJ com NumPy.
+
+Cobre:
+- Paridade com validar_cpf/validar_cnpj (válidos, inválidos, repetidos, formatados)
+- Inferência de tipo em listas mistas
+- Endpoint /api/validar-documentos-lote/ com verificação de existência
+"""
+import random
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.batch_validators import validar_cnpjs, validar_cpfs, validar_documentos
+from aptos.tests.factories import InquilinoPFFactory, gerar_cnpj_valido, gerar_cpf_valido
+from aptos.utils import formatar_cnpj, formatar_cpf
+from aptos.validators import validar_cnpj, validar_cpf
+
+URL = '/api/validar-documentos-lote/'
+
+
+def _resultado_escalar(validador, documento):
+    try:
+        validador(documento)
+        return True, None
+    except ValidationError as e:
+        return False, e.messages[0]
+
+
+def _amostra(gerador, formatador, tamanho):
+    rng = random.Random(1234)
+    documentos = []
+    for _ in range(200):
+        documento = gerador()
+        documentos.append(documento)
+        documentos.append(formatador(documento))
+        # Altera um dígito qualquer
+        posicao = rng.randrange(tamanho)
+        digito = str((int(documento[posicao]) + rng.randint(1, 9)) % 10)
+        documentos.append(documento[:posicao] + digito + documento[posicao + 1:])
+    documentos += [str(d) * tamanho for d in range(10)]
+    documentos += ['', None, '123', '1' * (tamanho + 1), 'abc']
+    return documentos
+
+
+@pytest.mark.parametrize('validador, lote, gerador, formatador, tamanho', [
+    (validar_cpf, validar_cpfs, gerar_cpf_valido, formatar_cpf, 11),
+    (validar_cnpj, validar_cnpjs, gerar_cnpj_valido, formatar_cnpj, 14),
+])
+def test_paridade_com_validadores_escalares(validador, lote, gerador, formatador, tamanho):
+    documentos = _amostra(gerador, formatador, tamanho)
+    resultado = lote(documentos)
+
+    for documento, valido, erro in zip(documentos, resultado.validos.tolist(), resultado.erros):
+        esperado_valido, esperado_erro = _resultado_escalar(validador, documento)
+        assert valido == esperado_valido, documento
+        assert erro == esperado_erro, documento
+
+
+def test_validar_documentos_infere_tipo():
+    cpf, cnpj = gerar_cpf_valido(), gerar_cnpj_valido()
+    resultado, tipos = validar_documentos([formatar_cnpj(cnpj), cpf, '123', '12345678900'])
+
+    assert tipos == ['CNPJ', 'CPF', None, 'CPF']
+    assert resultado.validos.tolist() == [True, True, False, False]
+    assert resultado.documentos[0] == cnpj
+    assert resultado.erros[2] == 'Documento deve ter 11 (CPF) ou 14 (CNPJ) dígitos.'
+    assert resultado.erros[3] == 'CPF inválido.'
+
+
+@pytest.mark.django_db
+class TestValidarDocumentosLoteEndpoint:
+
+    def _client(self, superuser=True):
+        if superuser:
+            user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        else:
+            user = User.objects.create_user('comum', 'comum@example.com', 'pass')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test_valida_e_verifica_existencia(self):
+        existente = InquilinoPFFactory.create()
+        novo = gerar_cpf_valido()
+        client = self._client()
+
+        response = client.post(URL, {
+            'documentos': [formatar_cpf(existente.cpf), novo, '111.111.111-11'],
+            'verificar_existencia': True,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert (data['total'], data['validos'], data['invalidos']) == (3, 2, 1)
+        primeiro, segundo, terceiro = data['resultados']
+        assert primeiro['exists'] is True
+        assert primeiro['documento_limpo'] == existente.cpf
+        assert segundo['exists'] is False
+        assert segundo['formatted'] == formatar_cpf(novo)
+        assert terceiro == {
+            'documento': '111.111.111-11', 'tipo': 'CPF', 'valid': False, 'error': 'CPF inválido.'
+        }
+
+    def test_payload_invalido(self):
+        client = self._client()
+        response = client.post(URL, {'documentos': 'abc'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post(URL, {'documentos': [], 'tipo': 'RG'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # tipo não textual retorna 400, não 500
+        for tipo in (1, ['CPF'], {'tipo': 'CPF'}):
+            response = client.post(URL, {'documentos': [], 'tipo': tipo}, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST, tipo
+
+    def test_requer_administrador(self):
+        client = self._client(superuser=False)
+        response = client.post(URL, {'documentos': [gerar_cpf_valido()]}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_rota_v1(self):
+        client = self._client()
+        response = client.post(
+            '/api/v1/validar-documentos-lote/', {'documentos': [gerar_cnpj_valido()]}, format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['resultados'][0]['tipo'] == 'CNPJ'
@@ -0,0 +1,102 @@
+"""
+Testes para campos esparsos (?fields=) e expansão (?expand=).
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.tests.factories import (
+    AptosFactory,
+    InquilinoApartamentoFactory,
+    InquilinoPFFactory,
+)
+
+
+@pytest.fixture
+def admin_client(db):
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+def test_aptos_fields_retorna_apenas_campos_pedidos():
+    AptosFactory.create_batch(3)
+    client = APIClient()
+
+    with CaptureQueriesContext(connection) as ctx:
+        r = client.get('/api/v1/aptos/', {'fields': 'id,unit_number,rental_price'})
+    assert r.status_code == status.HTTP_200_OK
+
+    item = r.json()['results'][0]
+    assert set(item) == {'id', 'unit_number', 'rental_price'}
+
+    # Sem fotos/construtora pedidas: nenhum JOIN nem prefetch
+    consultas = [q['sql'] for q in ctx.captured_queries]
+    assert len(consultas) == 2  # COUNT + página
+    assert 'aptos_foto' not in ' '.join(consultas)
+    assert '"description"' not in consultas[-1]
+
+
+@pytest.mark.django_db
+def test_aptos_sem_fields_mantem_resposta_completa():
+    AptosFactory.create()
+    r = APIClient().get('/api/v1/aptos/')
+    item = r.json()['results'][0]
+    assert {'building_name', 'photo_count', 'main_photo', 'has_video'} <= set(item)
+
+
+@pytest.mark.django_db
+def test_inquilinos_fields_evita_metodos_caros(admin_client, django_assert_num_queries):
+    assoc = InquilinoApartamentoFactory.create()
+    InquilinoPFFactory.create_batch(2)
+    url = f'/api/v1/inquilinos/{assoc.inquilino_id}/'
+
+    with django_assert_num_queries(1):
+        r = admin_client.get(url, {'fields': 'id,nome_exibicao'})
+    assert set(r.json()) == {'id', 'nome_exibicao'}
+
+    r = admin_client.get(url)
+    ativos = r.json()['apartamentos_ativos']
+    assert [a['id'] for a in ativos] == [assoc.apartamento_id]
+
+
+@pytest.mark.django_db
+def test_inquilinos_lista_apartamentos_count_anotado(admin_client, django_assert_num_queries):
+    InquilinoApartamentoFactory.create_batch(3)
+    # COUNT + página com a contagem anotada, sem query por linha
+    with django_assert_num_queries(2):
+        r = admin_client.get('/api/v1/inquilinos/', {'fields': 'id,apartamentos_count'})
+    assert all(item['apartamentos_count'] == 1 for item in r.json()['results'])
+
+
+@pytest.mark.django_db
+def test_associacao_expand_inquilino_e_apartamento(admin_client):
+    assoc = InquilinoApartamentoFactory.create()
+    url = f'/api/v1/associacoes/{assoc.id}/'
+
+    r = admin_client.get(url)
+    assert r.json()['inquilino'] == assoc.inquilino_id
+
+    r = admin_client.get(url, {'expand': 'inquilino,apartamento', 'fields': 'id'})
+    dados = r.json()
+    assert set(dados) == {'id', 'inquilino', 'apartamento'}
+    assert dados['inquilino']['id'] == assoc.inquilino_id
+    assert dados['apartamento']['unit_number'] == assoc.apartamento.unit_number
+
+
+@pytest.mark.django_db
+def test_fields_ignorado_em_escrita(admin_client):
+    inquilino = InquilinoPFFactory.create()
+    apto = AptosFactory.create()
+    r = admin_client.post(
+        '/api/v1/associacoes/?fields=id',
+        {'inquilino': inquilino.id, 'apartamento': apto.id, 'data_inicio': '2024-01-01'},
+        format='json',
+    )
+    assert r.status_code == status.HTTP_201_CREATED, r.content
+    assert 'inquilino_nome' in r.json()
@@ -0,0 +1,120 @@
+"""
+Testes para o roteamento de leituras analíticas à réplica.
+
+Cobre:
+- ReplicaRouter: réplica só dentro de leitura_replica() e com o alias configurado
+- Cookie de leitura das próprias escritas (ReplicaStickinessMiddleware)
+- Relatórios lidos pelo alias `replica` (espelho do banco de testes)
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from aptos.db_router import (
+    ReplicaRouter,
+    alias_leitura,
+    leitura_primaria,
+    leitura_replica,
+    na_replica,
+)
+from aptos.middleware import ReplicaStickinessMiddleware
+from aptos.models import Aptos, RelatorioTemplate
+from aptos.tests.factories import AptosFactory
+
+
+@pytest.fixture
+def replica_ligada(settings):
+    settings.REPLICA_LEITURAS = True
+
+
+def test_router_so_le_da_replica_quando_pedido(replica_ligada):
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Aptos) == 'default'
+    with leitura_replica():
+        assert router.db_for_read(Aptos) == 'replica'
+        assert router.db_for_write(Aptos) == 'default'
+        with leitura_primaria():
+            assert router.db_for_read(Aptos) == 'default'
+        assert na_replica(alias_leitura)() == 'replica'
+    assert alias_leitura() == 'default'
+
+    assert router.allow_migrate('default', 'aptos')
+    assert not router.allow_migrate('replica', 'aptos')
+
+
+def test_router_sem_replica(settings):
+    settings.REPLICA_LEITURAS = False
+    with leitura_replica():
+        assert alias_leitura() == 'default'
+
+    settings.REPLICA_LEITURAS = True
+    settings.DATABASES = {'default': settings.DATABASES['default']}
+    with leitura_replica():
+        assert alias_leitura() == 'default'
+
+
+def test_cookie_apos_escrita(replica_ligada, settings):
+    settings.REPLICA_STICKY_SECONDS = 30
+    factory = RequestFactory()
+    lidos = []
+
+    def view(request):
+        with leitura_replica():
+            lidos.append(alias_leitura())
+        return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+    middleware = ReplicaStickinessMiddleware(view)
+
+    response = middleware(factory.get('/api/v1/relatorios/ocupacao/'))
+    assert ReplicaStickinessMiddleware.COOKIE not in response.cookies
+
+    response = middleware(factory.post('/api/v1/inquilinos/'))
+    cookie = response.cookies[ReplicaStickinessMiddleware.COOKIE]
+    assert cookie['max-age'] == 30
+
+    request = factory.get('/api/v1/relatorios/ocupacao/')
+    request.COOKIES[ReplicaStickinessMiddleware.COOKIE] = cookie.value
+    middleware(request)
+
+    assert lidos == ['replica', 'replica', 'default']
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_relatorios_leem_da_replica(replica_ligada):
+    usuario = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+    client = APIClient()
+    client.force_authenticate(user=usuario)
+    AptosFactory.create(rental_price=1200)
+    template = RelatorioTemplate.objects.create(
+        nome='Aptos', tipo='OCUPACAO', descricao='',
+        query_sql='SELECT unit_number FROM aptos_aptos',
+    )
+
+    with CaptureQueriesContext(connections['replica']) as replica:
+        response = client.get('/api/v1/relatorios/ocupacao/')
+    assert response.status_code == 200
+    assert response.json()['dados_mensais'][-1]['total_apartamentos'] == 1
+    assert any('aptos_aptos' in q['sql'] for q in replica.captured_queries)
+
+    # SQL de template também roda na réplica; o registro da execução, no primário
+    with CaptureQueriesContext(connections['replica']) as replica, \
+            CaptureQueriesContext(connections['default']) as primario:
+        response = client.post(
+            '/api/v1/relatorios/executar_template/', {'template': template.id}, format='json'
+        )
+    assert response.status_code == 200
+    assert any('FROM aptos_aptos' in q['sql'] for q in replica.captured_queries)
+    assert not any('FROM aptos_aptos' in q['sql'] for q in primario.captured_queries)
+    assert any('aptos_relatorioexecucao' in q['sql'] for q in primario.captured_queries)
+
+    # Depois da escrita (POST) o cliente lê do primário
+    assert ReplicaStickinessMiddleware.COOKIE in response.cookies
+    with CaptureQueriesContext(connections['replica']) as replica:
+        response = client.get('/api/v1/relatorios/ocupacao/')
+    assert response.status_code == 200
+    assert not replica.captured_queries
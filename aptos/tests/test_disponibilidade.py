@@ -0,0 +1,107 @@
+"""
+Testes para a busca de disponibilidade por período.
+
+Cobre:
+- Filtro disponivel_entre (anti-join) com associações ativas e finalizadas
+- Calendário de períodos ocupados e livres de um apartamento
+- Validação das datas
+"""
+from datetime import date
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import InquilinoApartamento
+from aptos.tests.factories import AptosFactory, InquilinoPFFactory
+
+URL = '/api/v1/aptos/'
+
+
+def _associar(apartamento, inicio, fim=None, ativo=True):
+    return InquilinoApartamento.objects.create(
+        inquilino=InquilinoPFFactory.create(),
+        apartamento=apartamento,
+        data_inicio=inicio,
+        data_fim=fim,
+        ativo=ativo,
+    )
+
+
+@pytest.fixture
+def apartamentos(db):
+    livre = AptosFactory.create()
+    ocupado_sem_fim = AptosFactory.create()
+    ocupado_ate_dezembro = AptosFactory.create()
+    historico = AptosFactory.create()
+
+    _associar(ocupado_sem_fim, date(2025, 1, 1))
+    _associar(ocupado_ate_dezembro, date(2025, 6, 1), date(2026, 12, 15))
+    # Locação antiga finalizada e associação inativa sem data fim (não ocupa)
+    _associar(historico, date(2020, 1, 1), date(2021, 1, 1), ativo=False)
+    _associar(historico, date(2026, 11, 1), ativo=False)
+    return livre, ocupado_sem_fim, ocupado_ate_dezembro, historico
+
+
+def _ids(response):
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    return {item['id'] for item in data.get('results', data)}
+
+
+def test_filtro_disponivel_entre(apartamentos):
+    livre, ocupado_sem_fim, ocupado_ate_dezembro, historico = apartamentos
+    client = APIClient()
+
+    ids = _ids(client.get(URL, {'disponivel_entre': '2026-11-01,2027-04-30'}))
+    assert ids == {livre.id, historico.id}
+
+    ids = _ids(client.get(URL, {'disponivel_entre': '2027-01-01,2027-04-30'}))
+    assert ids == {livre.id, ocupado_ate_dezembro.id, historico.id}
+
+    ids = _ids(client.get(URL, {'disponivel_entre': '2020-06-01,2020-06-30'}))
+    assert historico.id not in ids
+
+
+def test_filtro_disponivel_entre_invalido(apartamentos):
+    client = APIClient()
+    assert client.get(URL, {'disponivel_entre': '2027-01-01'}).status_code == 400
+    assert client.get(URL, {'disponivel_entre': '2027-05-01,2027-01-01'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_calendario_mescla_periodos():
+    apartamento = AptosFactory.create()
+    _associar(apartamento, date(2024, 1, 1), date(2024, 3, 31), ativo=False)
+    _associar(apartamento, date(2024, 4, 1), date(2024, 6, 30), ativo=False)
+    _associar(apartamento, date(2024, 9, 1), date(2024, 12, 31), ativo=False)
+
+    response = APIClient().get(
+        f'{URL}{apartamento.id}/disponibilidade/', {'inicio': '2024-02-01', 'fim': '2025-01-31'}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data['disponivel'] is False
+    assert data['ocupado'] == [
+        {'inicio': '2024-02-01', 'fim': '2024-06-30'},
+        {'inicio': '2024-09-01', 'fim': '2024-12-31'},
+    ]
+    assert data['livre'] == [
+        {'inicio': '2024-07-01', 'fim': '2024-08-31'},
+        {'inicio': '2025-01-01', 'fim': '2025-01-31'},
+    ]
+
+
+@pytest.mark.django_db
+def test_calendario_sem_ocupacao(django_assert_max_num_queries):
+    apartamento = AptosFactory.create()
+
+    with django_assert_max_num_queries(2):
+        response = APIClient().get(
+            f'{URL}{apartamento.id}/disponibilidade/', {'inicio': '2030-01-01', 'fim': '2030-12-31'}
+        )
+
+    data = response.json()
+    assert data['disponivel'] is True
+    assert data['livre'] == [{'inicio': '2030-01-01', 'fim': '2030-12-31'}]
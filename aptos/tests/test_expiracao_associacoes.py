@@ -0,0 +1,88 @@
+"""
+Testes para a expiração em lote de associações encerradas.
+
+Cobre:
+- Finalização das associações vencidas com histórico FINALIZADA
+- Disponibilidade recalculada só para os apartamentos afetados
+- Número de queries independente da quantidade de associações
+- Management command (dry-run e execução)
+"""
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from aptos.models import Aptos, HistoricoAssociacao, InquilinoApartamento
+from aptos.tests.factories import InquilinoApartamentoFactory
+
+ONTEM = date.today() - timedelta(days=1)
+
+
+def _vencidas(quantidade):
+    return InquilinoApartamentoFactory.create_batch(
+        quantidade, data_inicio=ONTEM - timedelta(days=90), data_fim=ONTEM
+    )
+
+
+@pytest.mark.django_db
+def test_expira_associacoes_vencidas():
+    vencida, = _vencidas(1)
+    vigente = InquilinoApartamentoFactory.create(data_fim=date.today())
+    assert not Aptos.objects.get(pk=vencida.apartamento_id).is_available
+
+    resultado = InquilinoApartamento.objects.expirar_encerradas()
+
+    assert resultado['expiradas'] == 1
+    assert resultado['associacoes'] == [vencida.pk]
+    assert resultado['apartamentos_liberados'] == 1
+    assert not InquilinoApartamento.objects.get(pk=vencida.pk).ativo
+    assert InquilinoApartamento.objects.get(pk=vigente.pk).ativo
+    assert Aptos.objects.get(pk=vencida.apartamento_id).is_available
+    assert not Aptos.objects.get(pk=vigente.apartamento_id).is_available
+
+    historico = HistoricoAssociacao.objects.get(associacao=vencida)
+    assert historico.acao == 'FINALIZADA'
+    assert historico.detalhes == {'data_fim': str(ONTEM), 'automatica': True}
+
+    # Nova execução não encontra nada
+    assert InquilinoApartamento.objects.expirar_encerradas()['expiradas'] == 0
+
+
+@pytest.mark.django_db
+def test_queries_independentes_do_volume():
+    def executar(quantidade):
+        _vencidas(quantidade)
+        with CaptureQueriesContext(connection) as contexto:
+            resultado = InquilinoApartamento.objects.expirar_encerradas()
+        assert resultado['expiradas'] == quantidade
+        return len(contexto.captured_queries)
+
+    assert executar(2) == executar(15)
+
+
+@pytest.mark.django_db
+def test_sincronizar_disponibilidade_corrige_desvio():
+    associacao = InquilinoApartamentoFactory.create()
+    Aptos.objects.filter(pk=associacao.apartamento_id).update(is_available=True)
+
+    assert InquilinoApartamento.objects.sincronizar_disponibilidade() == 1
+    assert not Aptos.objects.get(pk=associacao.apartamento_id).is_available
+    assert InquilinoApartamento.objects.sincronizar_disponibilidade() == 0
+
+
+@pytest.mark.django_db
+def test_command_dry_run_e_execucao():
+    vencida, = _vencidas(1)
+
+    saida = StringIO()
+    call_command('expirar_associacoes', '--dry-run', stdout=saida)
+    assert '[DRY-RUN] 1 associações expiradas' in saida.getvalue()
+    assert InquilinoApartamento.objects.get(pk=vencida.pk).ativo
+
+    saida = StringIO()
+    call_command('expirar_associacoes', stdout=saida)
+    assert '1 apartamentos com disponibilidade corrigida' in saida.getvalue()
+    assert not InquilinoApartamento.objects.get(pk=vencida.pk).ativo
@@ -0,0 +1,177 @@
+"""
+Testes para o índice de existência de CPF/CNPJ.
+
+Cobre:
+- Ausências respondidas sem consulta ao banco quando o índice está completo
+- Manutenção no save/delete de Inquilino e na importação em lote
+- Reconstrução concorrente com cadastros ainda não commitados
+- Índice incompleto ou indisponível recorre ao banco
+- Endpoint de validação em tempo real
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from aptos.services import indice_documentos_service
+from aptos.services.indice_documentos_service import CHAVE, SENTINELA, indice_documentos
+from aptos.tests.factories import InquilinoPFFactory, InquilinoPJFactory, gerar_cpf_valido
+from aptos.utils import formatar_cpf
+
+
+class RedisEmMemoria:
+    """Subconjunto dos comandos de SET do Redis usados pelo índice"""
+
+    def __init__(self):
+        self.dados = {}
+
+    def sadd(self, chave, *membros):
+        self.dados.setdefault(chave, set()).update(membros)
+
+    def srem(self, chave, *membros):
+        self.dados.get(chave, set()).difference_update(membros)
+
+    def sismember(self, chave, membro):
+        return membro in self.dados.get(chave, set())
+
+    def exists(self, chave):
+        return int(chave in self.dados)
+
+    def delete(self, chave):
+        self.dados.pop(chave, None)
+
+    def rename(self, origem, destino):
+        self.dados[destino] = self.dados.pop(origem)
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.comandos = []
+
+    def __getattr__(self, nome):
+        def enfileirar(*args):
+            self.comandos.append((nome, args))
+        return enfileirar
+
+    def execute(self):
+        return [getattr(self.cliente, nome)(*args) for nome, args in self.comandos]
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    cliente = RedisEmMemoria()
+    monkeypatch.setattr(indice_documentos, '_cliente', cliente)
+    return cliente
+
+
+@pytest.mark.django_db
+def test_ausencia_responde_sem_banco(redis, django_assert_num_queries):
+    existente = InquilinoPFFactory.create()
+    indice_documentos.reconstruir()
+
+    with django_assert_num_queries(0):
+        assert indice_documentos.consultar('cpf', gerar_cpf_valido()) is None
+
+    with django_assert_num_queries(1):
+        resumo = indice_documentos.consultar('cpf', existente.cpf)
+    assert resumo == {'id': existente.id, 'nome': existente.nome_completo, 'status': existente.status}
+
+    with django_assert_num_queries(1):
+        assert indice_documentos.consultar('cpf', existente.cpf, excluir_id=existente.id) is None
+
+
+@pytest.mark.django_db
+def test_indice_incompleto_consulta_banco(redis, django_assert_num_queries):
+    InquilinoPFFactory.create()
+    # Sem reconstrução não há sentinela: ausência não é garantida
+    assert SENTINELA not in redis.dados.get(CHAVE, set())
+    with django_assert_num_queries(1):
+        assert indice_documentos.consultar('cpf', gerar_cpf_valido()) is None
+
+
+@pytest.mark.django_db
+def test_mantido_no_save_e_delete(redis, django_capture_on_commit_callbacks):
+    indice_documentos.reconstruir()
+    inquilino = InquilinoPJFactory.create()
+    assert indice_documentos.pode_existir('cnpj', inquilino.cnpj)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        inquilino.delete()
+    assert not indice_documentos.pode_existir('cnpj', inquilino.cnpj)
+
+
+@pytest.mark.django_db
+def test_reconstrucao_inclui_cadastro_concorrente(redis, monkeypatch):
+    inquilino = InquilinoPFFactory.build()
+
+    # Cadastro feito enquanto o banco é percorrido
+    valores = indice_documentos_service.Inquilino.objects.values_list
+
+    def values_list(*args, **kwargs):
+        inquilino.save()
+        return valores(*args, **kwargs)
+
+    monkeypatch.setattr(indice_documentos_service.Inquilino.objects, 'values_list', values_list)
+    indice_documentos.reconstruir()
+
+    assert indice_documentos.pode_existir('cpf', inquilino.cpf)
+    assert SENTINELA in redis.dados[CHAVE]
+
+
+@pytest.mark.django_db
+def test_reconstrucao_nao_perde_cadastro_commitado_depois(
+    redis, monkeypatch, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        # SADD antes da chave de reconstrução existir; a leitura do banco
+        # feita pela reconstrução ainda não vê a linha (commit pendente)
+        inquilino = InquilinoPFFactory.create()
+        valores = indice_documentos_service.Inquilino.objects.values_list
+
+        def values_list(*args, **kwargs):
+            return valores(*args, **kwargs).exclude(pk=inquilino.pk)
+
+        monkeypatch.setattr(indice_documentos_service.Inquilino.objects, 'values_list', values_list)
+        indice_documentos.reconstruir()
+        assert not indice_documentos.pode_existir('cpf', inquilino.cpf)
+
+    # Registrado de novo após o commit
+    assert indice_documentos.pode_existir('cpf', inquilino.cpf)
+
+
+@pytest.mark.django_db
+def test_falha_no_redis_recorre_ao_banco(redis, monkeypatch):
+    indice_documentos.reconstruir()
+
+    def falhar(*args, **kwargs):
+        raise ConnectionError('redis fora do ar')
+
+    monkeypatch.setattr(redis, 'pipeline', falhar)
+    assert indice_documentos.pode_existir('cpf', gerar_cpf_valido())
+
+
+@pytest.mark.django_db
+def test_endpoint_validar_documento(redis, django_assert_num_queries):
+    existente = InquilinoPFFactory.create()
+    indice_documentos.reconstruir()
+    client = APIClient()
+
+    with django_assert_num_queries(0):
+        response = client.post(
+            '/api/validar-documento/', {'documento': gerar_cpf_valido(), 'tipo': 'CPF'}, format='json'
+        )
+    assert response.json()['exists'] is False
+
+    response = client.post(
+        '/api/validar-documento/',
+        {'documento': formatar_cpf(existente.cpf), 'tipo': 'CPF'},
+        format='json',
+    )
+    data = response.json()
+    assert data['exists'] is True
+    assert data['existing_inquilino']['id'] == existente.id
+
+    response = client.post('/api/validar-cpf/', {'cpf': existente.cpf}, format='json')
+    assert response.json()['exists'] is True
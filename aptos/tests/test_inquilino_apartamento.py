@@ -316,3 +316,55 @@ class TestInquilinoApartamentoModel(TestCase):
         self.assertIsNotNone(associacao.created_at)
         self.assertIsNotNone(associacao.updated_at)
         self.assertEqual(associacao.created_at.date(), date.today())
+
+    def test_sobreposicao_com_associacao_sem_fim(self):
+        """Teste validação: período intercepta associação ativa sem data fim."""
+        InquilinoApartamento.objects.create(
+            inquilino=self.inquilino,
+            apartamento=self.apartamento,
+            data_inicio=date.today() - timedelta(days=60),
+        )
+
+        with self.assertRaises(ValidationError) as context:
+            InquilinoApartamento(
+                inquilino=InquilinoPFFactory.create(),
+                apartamento=self.apartamento,
+                data_inicio=date.today() - timedelta(days=30),
+                data_fim=date.today() - timedelta(days=10),
+                ativo=False
+            ).full_clean()
+
+        self.assertIn('Conflito com associação ativa', str(context.exception))
+
+    def test_violacao_no_banco_vira_validation_error(self):
+        """Teste: violação da associação ativa única vira ValidationError no save."""
+        InquilinoApartamento.objects.create(
+            inquilino=self.inquilino,
+            apartamento=self.apartamento,
+            data_inicio=date.today() - timedelta(days=90),
+            data_fim=date.today() - timedelta(days=60),
+            ativo=True
+        )
+
+        # Período não sobrepõe, mas o banco só aceita uma associação ativa
+        with self.assertRaises(ValidationError) as context:
+            InquilinoApartamento.objects.create(
+                inquilino=InquilinoPFFactory.create(),
+                apartamento=self.apartamento,
+                data_inicio=date.today(),
+                ativo=True
+            )
+
+        self.assertIn('já possui associação ativa', str(context.exception))
+
+    def test_save_sem_varredura_em_python(self):
+        """Teste: criação usa uma query de sobreposição e um UPDATE condicional."""
+        inquilino = InquilinoPFFactory.create()
+        # sobreposição + savepoint + INSERT + release + UPDATE do apartamento
+        with self.assertNumQueries(5):
+            InquilinoApartamento.objects.create(
+                inquilino=inquilino,
+                apartamento=self.apartamento,
+                data_inicio=date.today(),
+            )
+        self.assertFalse(self.apartamento.is_available)
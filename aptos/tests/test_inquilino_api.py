@@ -237,6 +237,49 @@ class TestInquilinoAPI(TestCase):
             inquilino2.id
         )
 
+    def test_listagem_com_numero_constante_de_queries(self):
+        """Campos derivados da listagem vêm da própria query (O(1) queries)."""
+        for _ in range(3):
+            InquilinoApartamentoFactory.create()
+        InquilinoPJFactory.create_batch(2)
+
+        # COUNT da paginação + página com campos anotados
+        with self.assertNumQueries(2):
+            pequena = self.client.get('/api/v1/inquilinos/')
+
+        for _ in range(10):
+            InquilinoApartamentoFactory.create()
+        with self.assertNumQueries(2):
+            grande = self.client.get('/api/v1/inquilinos/?apartamento=1')
+
+        self.assertEqual(pequena.status_code, status.HTTP_200_OK)
+        self.assertEqual(grande.status_code, status.HTTP_200_OK)
+
+    def test_listagem_campos_anotados_equivalem_ao_python(self):
+        """Anotações SQL produzem o mesmo valor que o cálculo em Python."""
+        from aptos.serializers import InquilinoListSerializer
+
+        associacao = InquilinoApartamentoFactory.create()
+        outro_apto = AptosFactory.create(unit_number='999')
+        InquilinoApartamentoFactory.create(
+            inquilino=associacao.inquilino, apartamento=outro_apto
+        )
+        InquilinoPJFactory.create()
+
+        response = self.client.get('/api/v1/inquilinos/')
+        por_id = {item['id']: item for item in response.data['results']}
+
+        for inquilino in Inquilino.objects.all():
+            esperado = InquilinoListSerializer(inquilino).data
+            self.assertEqual(por_id[inquilino.id], esperado)
+
+        item = por_id[associacao.inquilino_id]
+        self.assertEqual(item['apartamentos_count'], 2)
+        self.assertEqual(
+            item['unidades_ativas'],
+            sorted([associacao.apartamento.unit_number, '999']),
+        )
+
 
 @pytest.mark.django_db
 class TestInquilinoApartamentoAPI(TestCase):
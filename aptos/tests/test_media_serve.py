@@ -0,0 +1,103 @@
+"""
+Testes para o serviço de mídia (app.media_serve).
+
+Cobre:
+- Respostas completas com ETag/Last-Modified
+- GET condicional (If-None-Match)
+- Range simples, sufixo, múltiplos intervalos e 416
+- If-Range com validador divergente
+- Modo X-Accel-Redirect
+"""
+import pytest
+from django.test import RequestFactory
+
+from app.media_serve import parse_range_header, serve_media
+
+CONTEUDO = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.MEDIA_ACCEL_REDIRECT_PREFIX = None
+    pasta = tmp_path / 'aptos' / 'aptos_videos'
+    pasta.mkdir(parents=True)
+    (pasta / 'tour.mp4').write_bytes(CONTEUDO)
+    return 'aptos/aptos_videos/tour.mp4'
+
+
+def _get(path, **headers):
+    request = RequestFactory().get(f'/media/{path}', headers=headers)
+    return serve_media(request, path)
+
+
+def _body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_resposta_completa_com_validadores(media_file):
+    response = _get(media_file)
+    assert response.status_code == 200
+    assert response['Content-Length'] == str(len(CONTEUDO))
+    assert response['ETag'].startswith('"')
+    assert response['Accept-Ranges'] == 'bytes'
+    assert _body(response) == CONTEUDO
+
+
+def test_if_none_match_retorna_304(media_file):
+    etag = _get(media_file)['ETag']
+    response = _get(media_file, if_none_match=etag)
+    assert response.status_code == 304
+
+
+def test_range_simples_nao_le_alem_do_intervalo(media_file):
+    response = _get(media_file, range='bytes=100-199')
+    assert response.status_code == 206
+    assert response['Content-Range'] == f'bytes 100-199/{len(CONTEUDO)}'
+    assert response['Content-Length'] == '100'
+    assert _body(response) == CONTEUDO[100:200]
+
+
+def test_range_sufixo_e_aberto(media_file):
+    response = _get(media_file, range='bytes=-10')
+    assert _body(response) == CONTEUDO[-10:]
+
+    response = _get(media_file, range='bytes=10000-')
+    assert response['Content-Range'] == f'bytes 10000-10239/{len(CONTEUDO)}'
+    assert _body(response) == CONTEUDO[10000:]
+
+
+def test_range_multiplo_retorna_multipart(media_file):
+    response = _get(media_file, range='bytes=0-9, 20-29')
+    assert response.status_code == 206
+    assert response['Content-Type'].startswith('multipart/byteranges; boundary=')
+    body = _body(response)
+    assert len(body) == int(response['Content-Length'])
+    assert CONTEUDO[0:10] in body and CONTEUDO[20:30] in body
+    assert b'Content-Range: bytes 20-29/10240' in body
+
+
+def test_range_insatisfazivel_retorna_416(media_file):
+    response = _get(media_file, range='bytes=20000-20010')
+    assert response.status_code == 416
+    assert response['Content-Range'] == f'bytes */{len(CONTEUDO)}'
+
+
+def test_if_range_divergente_ignora_range(media_file):
+    response = _get(media_file, range='bytes=0-9', if_range='"outro-etag"')
+    assert response.status_code == 200
+    assert _body(response) == CONTEUDO
+
+
+def test_modo_x_accel_redirect(media_file, settings):
+    settings.MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+    response = _get(media_file, range='bytes=0-9')
+    assert response.status_code == 200
+    assert response['X-Accel-Redirect'] == f'/protected-media/{media_file}'
+    assert response.content == b''
+
+
+def test_parse_range_header_invalido():
+    assert parse_range_header('items=0-1', 100) is None
+    assert parse_range_header('bytes=5-1', 100) is None
+    assert parse_range_header('bytes=200-', 100) == []
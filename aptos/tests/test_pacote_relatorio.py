@@ -0,0 +1,88 @@
+"""
+Testes para o pacote de relatórios (formato=bundle).
+
+Cobre:
+- ZIP com JSON, PDF e Excel do mesmo conjunto de dados
+- Dados em cache reaproveitados pelo download avulso seguinte
+- Formatos renderizados no pool de processos e falhas dentro do pacote
+"""
+import io
+import json
+import zipfile
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import InquilinoApartamento
+from aptos.services import pacote_relatorio_service as modulo_pacote
+from aptos.tests.factories import AptosFactory, InquilinoPFFactory
+
+URL = '/api/v1/relatorios/inquilinos_ativos/'
+
+
+@pytest.fixture
+def client(admin_user):
+    client = APIClient()
+    client.force_authenticate(user=admin_user)
+    for inquilino in InquilinoPFFactory.create_batch(3, status='ATIVO'):
+        InquilinoApartamento.objects.create(
+            inquilino=inquilino, apartamento=AptosFactory.create(), data_inicio=date(2024, 1, 1)
+        )
+    return client
+
+
+def _zip(response):
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'application/zip'
+    return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+
+def test_bundle_com_os_tres_formatos(client):
+    pacote = _zip(client.get(URL, {'formato': 'bundle'}))
+
+    assert sorted(pacote.namelist()) == [
+        'inquilinos_ativos.json', 'inquilinos_ativos.pdf', 'inquilinos_ativos.xlsx'
+    ]
+    dados = json.loads(pacote.read('inquilinos_ativos.json'))
+    assert dados['total'] == 3
+    assert pacote.read('inquilinos_ativos.pdf').startswith(b'%PDF')
+    assert pacote.read('inquilinos_ativos.xlsx').startswith(b'PK')
+
+    # Download avulso em seguida: mesmos dados, sem recalcular
+    with CaptureQueriesContext(connection) as contexto:
+        response = client.get(URL)
+    assert response.json() == dados
+    assert not any('aptos_inquilino' in q['sql'] for q in contexto.captured_queries)
+
+
+def test_bundle_formatos_escolhidos(client):
+    pacote = _zip(client.get(URL, {'formato': 'bundle', 'formatos': 'pdf,json'}))
+    assert sorted(pacote.namelist()) == ['inquilinos_ativos.json', 'inquilinos_ativos.pdf']
+
+    response = client.get(URL, {'formato': 'bundle', 'formatos': 'csv'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_bundle_no_pool_de_processos(client, settings):
+    settings.RELATORIO_PDF_PROCESSOS = 2
+    pacote = _zip(client.get('/api/v1/relatorios/inadimplentes/', {'formato': 'bundle'}))
+
+    assert pacote.read('inadimplentes.pdf').startswith(b'%PDF')
+    assert pacote.read('inadimplentes.xlsx').startswith(b'PK')
+
+
+def test_falha_de_um_formato_vai_no_pacote(client, settings, monkeypatch):
+    settings.RELATORIO_PDF_PROCESSOS = 1
+
+    def renderizar(dados, tipo, formato):
+        raise RuntimeError('sem memória')
+
+    monkeypatch.setattr(modulo_pacote, 'renderizar_formato', renderizar)
+    pacote = _zip(client.get(URL, {'formato': 'bundle', 'formatos': 'json,pdf'}))
+
+    assert sorted(pacote.namelist()) == ['inquilinos_ativos.json', 'inquilinos_ativos.pdf.erro.txt']
+    assert 'sem memória' in pacote.read('inquilinos_ativos.pdf.erro.txt').decode()
@@ -0,0 +1,77 @@
+"""
+Testes para o particionamento mensal do histórico.
+
+A conversão e a manutenção dependem do PostgreSQL; fora dele são cobertos
+os limites das partições e o comportamento em outros bancos. No PostgreSQL,
+a criação de partição com linhas do mês já na partição DEFAULT.
+"""
+from datetime import date, datetime
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils import timezone
+
+from aptos.models import HistoricoStatus
+from aptos.services.particionamento_service import (
+    ParticionamentoError,
+    meses_entre,
+    nome_particao,
+    particionamento_service,
+    sql_criar_particao,
+)
+from aptos.tests.factories import HistoricoStatusFactory
+
+
+def test_meses_entre_atravessa_o_ano():
+    assert list(meses_entre(date(2024, 11, 15), date(2025, 2, 1))) == [
+        date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1),
+    ]
+
+
+def test_sql_criar_particao():
+    sql = sql_criar_particao('aptos_historicostatus', date(2024, 12, 1))
+
+    assert nome_particao('aptos_historicostatus', date(2024, 12, 1)) == 'aptos_historicostatus_p202412'
+    assert 'aptos_historicostatus_p202412' in sql
+    assert "FROM ('2024-12-01') TO ('2025-01-01')" in sql
+
+
+def test_mes_da_particao_ignora_padrao():
+    tabela = 'aptos_historicostatus'
+    assert particionamento_service._mes_da_particao(tabela, f'{tabela}_p202403') == date(2024, 3, 1)
+    assert particionamento_service._mes_da_particao(tabela, f'{tabela}_padrao') is None
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor == 'postgresql', reason='comportamento fora do PostgreSQL')
+def test_indisponivel_fora_do_postgresql():
+    assert not particionamento_service.esta_particionada('STATUS')
+    with pytest.raises(ParticionamentoError):
+        particionamento_service.converter('STATUS')
+    with pytest.raises(CommandError):
+        call_command('particionar_historico')
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason='requer PostgreSQL')
+def test_criar_particao_com_linhas_na_padrao():
+    tabela = HistoricoStatus._meta.db_table
+    assert particionamento_service.converter('STATUS', meses_futuros=0)
+
+    # Mês sem partição: o registro cai na DEFAULT
+    futuro = particionamento_service._mes_futuro(timezone.now().date(), 2)
+    historico = HistoricoStatusFactory.create()
+    HistoricoStatus.objects.filter(pk=historico.pk).update(
+        timestamp=timezone.make_aware(datetime(futuro.year, futuro.month, 15))
+    )
+
+    criadas = particionamento_service.criar_particoes('STATUS', meses_futuros=2)
+    assert nome_particao(tabela, futuro) in criadas
+    assert f'{tabela}_padrao' in particionamento_service.particoes('STATUS')
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM {nome_particao(tabela, futuro)}')
+        assert cursor.fetchall() == [(historico.pk,)]
+        cursor.execute(f'SELECT COUNT(*) FROM {tabela}_padrao')
+        assert cursor.fetchone() == (0,)
@@ -0,0 +1,98 @@
+"""
+Testes para o motor de exportação PDF.
+
+Cobre:
+- Divisão em partes de páginas inteiras e junção na ordem original
+- Renderização das partes no pool de processos
+- Limite de renderizações simultâneas (vagas) e resposta 503 na API
+"""
+import io
+
+import pytest
+from pypdf import PdfReader
+from rest_framework import status
+
+from aptos.services.pdf_service import PDFService, RelatorioPDFOcupado, vaga_renderizacao
+
+CABECALHO = ['Nome', 'Documento']
+
+
+def _linhas(n):
+    return [[f'Inquilino {i:05d}', f'{i:011d}'] for i in range(n)]
+
+
+def _paginas(buffer):
+    return [pagina.extract_text() for pagina in PdfReader(io.BytesIO(buffer.getvalue())).pages]
+
+
+def _renderizar(servico, linhas):
+    return servico.renderizar(
+        'Relatório - Teste', CABECALHO, linhas, info='Gerado em: hoje<br/>', resumo='Total: 1<br/>'
+    )
+
+
+def test_partes_de_paginas_inteiras(tmp_path, caplog):
+    linhas = _linhas(600)
+    unica = _paginas(_renderizar(PDFService(linhas_por_parte=10_000, diretorio_vagas=tmp_path), linhas))
+    servico = PDFService(linhas_por_parte=100, processos=1, diretorio_vagas=tmp_path)
+
+    with caplog.at_level('INFO', logger='aptos.services.pdf_service'):
+        paginas = _paginas(_renderizar(servico, linhas))
+    assert 'partes' in caplog.text
+
+    # Mesmas páginas com as mesmas linhas: nenhuma página pela metade na emenda
+    assert len(paginas) == len(unica)
+    assert [p.count('Inquilino') for p in paginas] == [p.count('Inquilino') for p in unica]
+    assert 'Relatório - Teste' in paginas[0]
+    assert 'Resumo' in paginas[-1] and 'Resumo' not in paginas[0]
+    assert all('Documento' in p for p in paginas)
+    texto = ''.join(paginas)
+    assert texto.index('Inquilino 00000') < texto.index('Inquilino 00300') < texto.index('Inquilino 00599')
+
+
+def test_partes_no_pool_de_processos(tmp_path):
+    linhas = _linhas(400)
+    servico = PDFService(linhas_por_parte=50, processos=2, diretorio_vagas=tmp_path)
+
+    paginas = _paginas(_renderizar(servico, linhas))
+
+    assert sum(p.count('Inquilino') for p in paginas) == 400
+    assert 'Inquilino 00399' in paginas[-1]
+
+
+def test_sem_vaga_livre(tmp_path):
+    servico = PDFService(max_concorrentes=1, espera_segundos=0, diretorio_vagas=tmp_path)
+    with vaga_renderizacao(str(tmp_path), 1, 0):
+        with pytest.raises(RelatorioPDFOcupado):
+            _renderizar(servico, _linhas(5))
+    # Vaga liberada ao sair do bloco
+    assert _renderizar(servico, _linhas(5)).getvalue().startswith(b'%PDF')
+
+
+def test_vaga_unica_por_renderizacao(tmp_path):
+    # Uma vaga basta para todas as partes renderizadas em paralelo
+    servico = PDFService(
+        linhas_por_parte=50, processos=2, max_concorrentes=1, espera_segundos=0,
+        diretorio_vagas=tmp_path,
+    )
+    paginas = _paginas(_renderizar(servico, _linhas(400)))
+    assert sum(p.count('Inquilino') for p in paginas) == 400
+
+
+def test_api_responde_503_sem_vaga(admin_user, settings, tmp_path):
+    from rest_framework.test import APIClient
+
+    settings.RELATORIO_PDF_VAGAS_DIR = tmp_path
+    settings.RELATORIO_PDF_MAX_CONCORRENTES = 1
+    settings.RELATORIO_PDF_ESPERA_SEGUNDOS = 0
+    client = APIClient()
+    client.force_authenticate(user=admin_user)
+
+    with vaga_renderizacao(str(tmp_path), 1, 0):
+        response = client.get('/api/v1/relatorios/ocupacao/', {'formato': 'pdf'})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response['Retry-After']
+
+    response = client.get('/api/v1/relatorios/ocupacao/', {'formato': 'pdf'})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content.startswith(b'%PDF')
@@ -0,0 +1,108 @@
+"""
+Testes para o rent roll e a projeção de receita.
+
+Cobre:
+- Aluguel proporcional aos dias ocupados em cada mês
+- Perda por vacância em relação ao rental_price
+- Projeção com associações sem data fim e com término futuro
+- Endpoint /relatorios/receita/
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import InquilinoApartamento
+from aptos.services.receita_service import calcular_receita, receita_service
+from aptos.tests.factories import AptosFactory, InquilinoPFFactory
+
+URL = '/api/v1/relatorios/receita/'
+
+
+def _associar(apartamento, inicio, fim=None, valor=None, ativo=True):
+    return InquilinoApartamento.objects.create(
+        inquilino=InquilinoPFFactory.create(),
+        apartamento=apartamento,
+        data_inicio=inicio,
+        data_fim=fim,
+        valor_aluguel=valor,
+        ativo=ativo,
+    )
+
+
+def test_calcular_receita_proporcional_aos_dias():
+    tabela = calcular_receita(
+        inicios=np.array(['2024-01-16', '2024-02-01'], dtype='datetime64[D]'),
+        fins=np.array(['2024-02-14', 'NaT'], dtype='datetime64[D]'),
+        valores=np.array([900.0, 600.0]),
+        precos_ocupados=np.array([1000.0, 500.0]),
+        precos_apartamentos=np.array([1000.0, 500.0, 800.0]),
+        inicio=date(2024, 1, 1),
+        fim=date(2024, 3, 31),
+    )
+
+    janeiro, fevereiro, marco = tabela.to_dict('records')
+    assert janeiro['receita'] == pytest.approx(900 * 16 / 31)
+    assert fevereiro['receita'] == pytest.approx(900 * 14 / 29 + 600)
+    assert marco['receita'] == pytest.approx(600)
+
+    assert janeiro['potencial'] == 2300
+    assert janeiro['perda_vacancia'] == pytest.approx(2300 - 1000 * 16 / 31)
+    assert marco['perda_vacancia'] == pytest.approx(1800)
+    assert marco['unidades_ocupadas'] == pytest.approx(1)
+    assert marco['taxa_ocupacao'] == pytest.approx(100 / 3)
+
+
+def test_calcular_receita_sem_associacoes():
+    vazio = np.array([], dtype='datetime64[D]')
+    tabela = calcular_receita(
+        vazio, vazio, np.array([]), np.array([]), np.array([700.0]),
+        date(2024, 1, 1), date(2024, 2, 29),
+    )
+    assert list(tabela['receita']) == [0, 0]
+    assert list(tabela['perda_vacancia']) == [700, 700]
+
+
+@pytest.mark.django_db
+def test_relatorio_receita_com_projecao():
+    apto_a = AptosFactory.create(rental_price=1000)
+    apto_b = AptosFactory.create(rental_price=2000)
+    # Sem valor_aluguel: usa o rental_price
+    _associar(apto_a, date(2024, 1, 1))
+    _associar(apto_b, date(2024, 1, 1), date(2024, 6, 30), valor=1800)
+    # Desativada sem data fim: não conta
+    _associar(apto_b, date(2024, 7, 1), ativo=False)
+
+    dados = receita_service.gerar_relatorio_receita(
+        data_inicio=date(2024, 5, 10), data_fim=date(2024, 7, 5),
+        meses_projecao=2, hoje=date(2024, 5, 20),
+    )
+
+    assert [linha['mes'] for linha in dados['dados']] == ['05/2024', '06/2024', '07/2024']
+    assert [linha['receita'] for linha in dados['dados']] == [2800, 2800, 1000]
+    assert [linha['perda_vacancia'] for linha in dados['dados']] == [0, 0, 2000]
+    assert [linha['mes'] for linha in dados['projecao']] == ['06/2024', '07/2024']
+    assert dados['totais'] == {
+        'receita': 6600, 'perda_vacancia': 2000, 'receita_projetada': 3800,
+    }
+
+
+@pytest.mark.django_db
+def test_endpoint_receita():
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    _associar(AptosFactory.create(rental_price=1500), date(2024, 1, 1), valor=1200)
+
+    response = client.get(URL, {'data_inicio': '2024-01-01', 'data_fim': '2024-03-31'})
+    assert response.status_code == status.HTTP_200_OK
+    assert [linha['receita'] for linha in response.json()['dados']] == [1200, 1200, 1200]
+    assert len(response.json()['projecao']) == 12
+
+    assert client.get(URL, {'meses_projecao': '500'}).status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get(URL, {'data_inicio': '2024-13-01'}).status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get(URL, {'data_inicio': '2024-03-01', 'data_fim': '2024-01-01'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
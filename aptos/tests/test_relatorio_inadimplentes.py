@@ -0,0 +1,81 @@
+"""
+Testes para o relatório de inadimplentes.
+
+Cobre:
+- Última entrada em INADIMPLENTE como data de inadimplência
+- Soma dos aluguéis ativos e faixas de atraso calculadas no banco
+- Número fixo de queries e exportação PDF/Excel
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from aptos.models import HistoricoStatus, InquilinoApartamento
+from aptos.services.relatorio_service import relatorio_service
+from aptos.tests.factories import AptosFactory, HistoricoStatusFactory, InquilinoPFFactory
+
+
+def _inadimplente(*dias_atras, aluguel=None):
+    inquilino = InquilinoPFFactory.create(status='INADIMPLENTE')
+    HistoricoStatus.objects.filter(inquilino=inquilino).delete()
+    for dias in dias_atras:
+        historico = HistoricoStatusFactory.create(inquilino=inquilino)
+        HistoricoStatus.objects.filter(pk=historico.pk).update(
+            timestamp=timezone.now() - timedelta(days=dias)
+        )
+    for valor in aluguel or []:
+        InquilinoApartamento.objects.create(
+            inquilino=inquilino, apartamento=AptosFactory.create(),
+            data_inicio=date(2024, 1, 1), valor_aluguel=valor,
+        )
+    return inquilino
+
+
+@pytest.mark.django_db
+def test_faixas_e_valores():
+    # Reincidente: vale a entrada mais recente em INADIMPLENTE
+    recente = _inadimplente(200, 10, aluguel=[Decimal('1000.00'), Decimal('500.50')])
+    medio = _inadimplente(45, aluguel=[Decimal('800.00')])
+    antigo = _inadimplente(120)
+    sem_historico = _inadimplente()
+    InquilinoPFFactory.create(status='ATIVO')
+
+    dados = relatorio_service.gerar_relatorio_inadimplentes()
+    linhas = {linha['id']: linha for linha in dados['dados']}
+
+    assert linhas[recente.id]['dias_inadimplente'] == 10
+    assert linhas[recente.id]['faixa_atraso'] == '0-30'
+    assert linhas[recente.id]['valor_total'] == 1500.5
+    assert len(linhas[recente.id]['apartamentos']) == 2
+    assert linhas[medio.id]['faixa_atraso'] == '31-60'
+    assert linhas[antigo.id]['faixa_atraso'] == '90+'
+    assert linhas[antigo.id]['valor_total'] == 0
+    assert linhas[sem_historico.id]['faixa_atraso'] == 'sem_historico'
+    assert linhas[sem_historico.id]['data_inadimplencia'] == 'N/A'
+
+    assert dados['faixas_atraso'] == [
+        {'faixa': '0-30', 'inquilinos': 1, 'valor_total': 1500.5},
+        {'faixa': '31-60', 'inquilinos': 1, 'valor_total': 800.0},
+        {'faixa': '90+', 'inquilinos': 1, 'valor_total': 0.0},
+        {'faixa': 'sem_historico', 'inquilinos': 1, 'valor_total': 0.0},
+    ]
+    assert dados['resumo']['total_inadimplentes'] == 4
+    assert dados['resumo']['valor_total_risco'] == 2300.5
+
+
+@pytest.mark.django_db
+def test_duas_queries_e_exportacao():
+    for dias in (5, 65, 95):
+        _inadimplente(dias, aluguel=[Decimal('1200.00')])
+
+    with CaptureQueriesContext(connection) as contexto:
+        dados = relatorio_service.gerar_relatorio_inadimplentes()
+    assert len(contexto.captured_queries) == 2
+    assert [faixa['faixa'] for faixa in dados['faixas_atraso']] == ['0-30', '61-90', '90+']
+
+    assert relatorio_service.exportar_para_pdf(dados, 'INADIMPLENTES').getvalue().startswith(b'%PDF')
+    assert relatorio_service.exportar_para_excel(dados, 'INADIMPLENTES').getvalue().startswith(b'PK')
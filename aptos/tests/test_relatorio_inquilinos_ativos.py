@@ -0,0 +1,64 @@
+"""
+Testes para o relatório de inquilinos ativos.
+
+Cobre:
+- Linhas montadas a partir de values() com os apartamentos ativos agregados
+- Uma única query independente do número de inquilinos
+"""
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from aptos.models import InquilinoApartamento
+from aptos.services.relatorio_service import relatorio_service
+from aptos.tests.factories import (
+    AptosFactory,
+    BuilderFactory,
+    InquilinoPFFactory,
+    InquilinoPJFactory,
+)
+
+
+@pytest.mark.django_db
+def test_linhas_com_apartamentos_ativos():
+    predio = BuilderFactory.create(name='Edifício Sol')
+    pf = InquilinoPFFactory.create(status='ATIVO', nome_completo='Ana Souza')
+    pj = InquilinoPJFactory.create(status='ATIVO', razao_social='ACME Ltda')
+    InquilinoPFFactory.create(status='INATIVO')
+
+    for unidade, ativo in (('101', True), ('102', True), ('103', False)):
+        InquilinoApartamento.objects.create(
+            inquilino=pf,
+            apartamento=AptosFactory.create(unit_number=unidade, building_name=predio),
+            data_inicio=date(2024, 1, 1),
+            data_fim=None if ativo else date(2024, 6, 30),
+            ativo=ativo,
+        )
+
+    dados = relatorio_service.gerar_relatorio_inquilinos_ativos()
+    linhas = {linha['id']: linha for linha in dados['dados']}
+
+    assert dados['total'] == 2
+    assert linhas[pf.id]['nome'] == 'Ana Souza'
+    assert linhas[pf.id]['tipo'] == 'Pessoa Física'
+    assert linhas[pf.id]['documento'] == pf.cpf
+    assert linhas[pf.id]['apartamentos'] == '101 (Edifício Sol), 102 (Edifício Sol)'
+    assert linhas[pj.id]['nome'] == 'ACME Ltda'
+    assert linhas[pj.id]['apartamentos'] == 'Nenhum'
+
+
+@pytest.mark.django_db
+def test_uma_query_independente_do_volume():
+    def consultas(quantidade):
+        for inquilino in InquilinoPFFactory.create_batch(quantidade, status='ATIVO'):
+            InquilinoApartamento.objects.create(
+                inquilino=inquilino, apartamento=AptosFactory.create(), data_inicio=date(2024, 1, 1)
+            )
+        with CaptureQueriesContext(connection) as contexto:
+            linhas = list(relatorio_service.iterar_inquilinos_ativos())
+        assert all(linha['apartamentos'] != 'Nenhum' for linha in linhas)
+        return len(contexto.captured_queries)
+
+    assert consultas(2) == consultas(10) == 1
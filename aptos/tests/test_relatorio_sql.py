@@ -0,0 +1,176 @@
+"""
+Testes para a execução de RelatorioTemplate.query_sql.
+
+Cobre:
+- Validação do SQL (uma única consulta SELECT) e dos parâmetros nomeados
+- Execução em transação somente leitura e com tempo limite, inclusive
+  dentro de uma transação externa
+- Registro da execução e cache por template + parâmetros + versão dos dados
+- Endpoint executar_template em JSON e Excel
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import Aptos, RelatorioTemplate
+from aptos.services.relatorio_sql_service import (
+    RelatorioSQLError,
+    RelatorioSQLService,
+    nova_versao_dados,
+    validar_sql,
+)
+from aptos.tests.factories import AptosFactory
+
+URL = '/api/v1/relatorios/executar_template/'
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def usuario(db):
+    return User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+
+def _template(sql, **kwargs):
+    return RelatorioTemplate.objects.create(
+        nome='Aptos por preço', tipo='OCUPACAO', descricao='', query_sql=sql, **kwargs
+    )
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT 1 AS um",
+    "  -- comentário; ainda comentário\n WITH t AS (SELECT 1) SELECT * FROM t;",
+    "SELECT ';' AS texto, 'DELETE' AS outro",
+])
+def test_validar_sql_aceita_consultas(sql):
+    validar_sql(sql)
+
+
+@pytest.mark.parametrize('sql', [
+    "",
+    "DELETE FROM aptos_aptos",
+    "SELECT 1; DROP TABLE aptos_aptos",
+    "/* SELECT */ UPDATE aptos_aptos SET rental_price = 0",
+])
+def test_validar_sql_rejeita(sql):
+    with pytest.raises(RelatorioSQLError):
+        validar_sql(sql)
+
+
+def test_parametros_padrao_obrigatorios_e_desconhecidos():
+    template = _template(
+        "SELECT id FROM aptos_aptos WHERE rental_price >= %(minimo)s AND rental_price <= %(maximo)s",
+        parametros_padrao={'minimo': 0},
+    )
+    servico = RelatorioSQLService()
+
+    assert servico.preparar_parametros(template, {'maximo': 10}) == {'minimo': 0, 'maximo': 10}
+    with pytest.raises(RelatorioSQLError, match='maximo'):
+        servico.preparar_parametros(template)
+    with pytest.raises(RelatorioSQLError, match='extra'):
+        servico.preparar_parametros(template, {'maximo': 10, 'extra': 1})
+    with pytest.raises(RelatorioSQLError, match='valores simples'):
+        servico.preparar_parametros(template, {'maximo': [1, 2]})
+
+
+def test_execucao_registrada_e_em_cache(usuario):
+    for preco in (500, 1500, 2500):
+        AptosFactory.create(rental_price=preco)
+    template = _template(
+        "SELECT unit_number, rental_price FROM aptos_aptos "
+        "WHERE rental_price >= %(minimo)s ORDER BY rental_price"
+    )
+    servico = RelatorioSQLService()
+
+    execucao, colunas, linhas = servico.executar(template, usuario, {'minimo': 1000})
+    assert colunas == ['unit_number', 'rental_price']
+    assert [linha[1] for linha in linhas] == [1500, 2500]
+    execucao.refresh_from_db()
+    assert execucao.status == 'CONCLUIDO'
+    assert execucao.total_registros == 2
+    assert execucao.duracao_segundos() is not None
+
+    # Segunda execução vem do cache: nenhuma consulta ao aptos_aptos
+    with CaptureQueriesContext(connection) as contexto:
+        _, _, linhas = servico.executar(template, usuario, {'minimo': 1000})
+        assert len(list(linhas)) == 2
+    assert not any('aptos_aptos' in q['sql'] for q in contexto.captured_queries)
+
+    # Nova versão dos dados invalida o cache
+    AptosFactory.create(rental_price=3000)
+    nova_versao_dados()
+    _, _, linhas = servico.executar(template, usuario, {'minimo': 1000})
+    assert len(list(linhas)) == 3
+
+
+def test_transacao_somente_leitura(usuario):
+    AptosFactory.create()
+    # Passa na validação (começa com WITH), mas não pode escrever
+    template = _template("WITH t AS (SELECT 1) DELETE FROM aptos_aptos")
+
+    with pytest.raises(RelatorioSQLError):
+        RelatorioSQLService().executar(template, usuario)
+
+    assert Aptos.objects.count() == 1
+    execucao = template.execucoes.get()
+    assert execucao.status == 'ERRO'
+    # A conexão volta a aceitar escritas depois
+    AptosFactory.create()
+
+
+def test_execucao_dentro_de_transacao(usuario):
+    AptosFactory.create(unit_number='101')
+    template = _template("SELECT unit_number FROM aptos_aptos")
+
+    with transaction.atomic():
+        execucao, _, linhas = RelatorioSQLService().executar(template, usuario)
+        assert list(linhas) == [('101',)]
+        # READ ONLY e tempo limite não vazam para a transação externa
+        AptosFactory.create(unit_number='102')
+        execucao.refresh_from_db()
+        assert execucao.status == 'CONCLUIDO'
+    assert Aptos.objects.count() == 2
+
+
+def test_tempo_limite(usuario):
+    template = _template(
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT max(x) FROM c"
+    )
+    with pytest.raises(RelatorioSQLError):
+        RelatorioSQLService(timeout_ms=50).executar(template, usuario)
+    assert template.execucoes.get().status == 'ERRO'
+
+
+def test_endpoint_executar_template(usuario):
+    client = APIClient()
+    client.force_authenticate(user=usuario)
+    AptosFactory.create(unit_number='701', rental_price=1800)
+    template = _template(
+        "SELECT unit_number, rental_price FROM aptos_aptos WHERE rental_price > %(minimo)s",
+        parametros_padrao={'minimo': 0},
+    )
+
+    response = client.get('/api/v1/relatorios/templates/')
+    assert [t['id'] for t in response.json()] == [template.id]
+
+    response = client.post(URL, {'template': template.id}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['dados'] == [{'unit_number': '701', 'rental_price': 1800.0}]
+
+    response = client.post(URL, {'template': template.id, 'formato': 'excel'}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content.startswith(b'PK')
+
+    response = client.post(
+        URL, {'template': template.id, 'parametros': {'outro': 1}}, format='json'
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.post(URL, {'template': 999999}, format='json')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,66 @@
+"""
+Testes para o renderer/parser JSON baseados em orjson.
+"""
+import io
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from aptos.parsers import ORJSONParser
+from aptos.renderers import ORJSONRenderer
+
+
+def _render(data, **kwargs):
+    return ORJSONRenderer().render(data, **kwargs)
+
+
+def test_render_compativel_com_json_renderer():
+    execucao = uuid.uuid4()
+    data = {
+        'valor_aluguel': Decimal('1500.50'),
+        'timestamp': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        'data_inicio': date(2024, 5, 1),
+        'id': execucao,
+        'duracao': timedelta(hours=1),
+        'rotulo': gettext_lazy('Ativo'),
+        'por_mes': {1: 10, 2: 20},
+    }
+    assert json.loads(_render(data)) == json.loads(JSONRenderer().render(data))
+
+
+def test_render_datetime_utc_com_z():
+    data = {'t': datetime(2024, 1, 1, tzinfo=timezone.utc)}
+    assert _render(data) == b'{"t":"2024-01-01T00:00:00Z"}'
+
+
+def test_render_escapa_separadores_de_linha_unicode():
+    assert _render({'texto': 'a\u2028b\u2029c'}) == b'{"texto":"a\\u2028b\\u2029c"}'
+
+
+def test_render_none_e_indentacao():
+    assert _render(None) == b''
+    saida = _render({'a': 1}, accepted_media_type='application/json; indent=4')
+    assert saida == b'{\n  "a": 1\n}'
+
+
+def test_parser_json_valido_e_invalido():
+    parser = ORJSONParser()
+    assert parser.parse(io.BytesIO('{"nome": "José"}'.encode())) == {'nome': 'José'}
+
+    with pytest.raises(ParseError):
+        parser.parse(io.BytesIO(b'{"nome": '))
+
+
+@pytest.mark.django_db
+def test_api_usa_orjson_por_padrao():
+    from rest_framework.test import APIClient
+
+    r = APIClient().get('/api/v1/aptos/')
+    assert r.status_code == 200
+    assert r.accepted_renderer.__class__ is ORJSONRenderer
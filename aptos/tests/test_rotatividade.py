@@ -0,0 +1,125 @@
+"""
+Testes para os relatórios de rotatividade e histórico de locações.
+
+Cobre:
+- Entradas e saídas por mês e edifício
+- Mediana de permanência e de dias para relocar (LAG por apartamento)
+- Histórico paginado por apartamento e por inquilino
+- Exportação PDF/Excel pelos endpoints
+"""
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import InquilinoApartamento
+from aptos.services.relatorio_service import relatorio_service
+from aptos.tests.factories import AptosFactory, BuilderFactory, InquilinoPFFactory
+
+URL = '/api/v1/relatorios/'
+
+
+def _associar(apartamento, inicio, fim=None, inquilino=None):
+    return InquilinoApartamento.objects.create(
+        inquilino=inquilino or InquilinoPFFactory.create(),
+        apartamento=apartamento,
+        data_inicio=inicio,
+        data_fim=fim,
+        ativo=fim is None,
+    )
+
+
+@pytest.fixture
+def locacoes(db):
+    apto_a = AptosFactory.create(building_name=BuilderFactory.create(name='Edifício A'))
+    apto_b = AptosFactory.create(building_name=BuilderFactory.create(name='Edifício B'))
+    inquilino = InquilinoPFFactory.create()
+
+    _associar(apto_a, date(2024, 1, 10), date(2024, 3, 31), inquilino=inquilino)
+    _associar(apto_a, date(2024, 4, 15))
+    _associar(apto_b, date(2023, 6, 1), date(2024, 2, 29))
+    _associar(apto_b, date(2024, 3, 10), inquilino=inquilino)
+    return apto_a, apto_b, inquilino
+
+
+@pytest.fixture
+def admin_client(db):
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def test_rotatividade(locacoes):
+    dados = relatorio_service.gerar_relatorio_rotatividade(
+        data_inicio=date(2024, 1, 1), data_fim=date(2024, 6, 30)
+    )
+
+    assert dados['dados'] == [
+        {'mes': '01/2024', 'edificio': 'Edifício A', 'entradas': 1, 'saidas': 0},
+        {'mes': '02/2024', 'edificio': 'Edifício B', 'entradas': 0, 'saidas': 1},
+        {'mes': '03/2024', 'edificio': 'Edifício A', 'entradas': 0, 'saidas': 1},
+        {'mes': '03/2024', 'edificio': 'Edifício B', 'entradas': 1, 'saidas': 0},
+        {'mes': '04/2024', 'edificio': 'Edifício A', 'entradas': 1, 'saidas': 0},
+    ]
+    assert dados['resumo'] == {
+        'total_entradas': 3,
+        'total_saidas': 2,
+        'mediana_permanencia_dias': 177.0,
+        'mediana_dias_para_relocar': 12.5,
+        'relocacoes': 2,
+    }
+    edificio_a, edificio_b = dados['por_edificio']
+    assert edificio_a['mediana_permanencia_dias'] == 81
+    assert edificio_a['mediana_dias_para_relocar'] == 15
+    assert edificio_b['mediana_permanencia_dias'] == 273
+    assert edificio_b['mediana_dias_para_relocar'] == 10
+
+
+def test_historico_locacoes_por_apartamento_e_inquilino(locacoes):
+    apto_a, apto_b, inquilino = locacoes
+
+    dados = relatorio_service.gerar_relatorio_historico_locacoes(apartamento_id=apto_b.id)
+    assert [linha['data_inicio'] for linha in dados['dados']] == ['01/06/2023', '10/03/2024']
+    assert [linha['dias_vago_antes'] for linha in dados['dados']] == [None, 10]
+    assert dados['dados'][1]['vigente'] is True
+
+    dados = relatorio_service.gerar_relatorio_historico_locacoes(inquilino_id=inquilino.id)
+    assert [linha['apartamento_id'] for linha in dados['dados']] == [apto_a.id, apto_b.id]
+
+    # Vacância calculada sobre todas as locações do apartamento, não só as filtradas
+    assert [linha['dias_vago_antes'] for linha in dados['dados']] == [None, 10]
+    dados = relatorio_service.gerar_relatorio_historico_locacoes(data_inicio=date(2024, 3, 1))
+    vagos = {linha['data_inicio']: linha['dias_vago_antes'] for linha in dados['dados']}
+    assert vagos == {'10/01/2024': None, '15/04/2024': 15, '10/03/2024': 10}
+
+    pagina = relatorio_service.gerar_relatorio_historico_locacoes(pagina=2, tamanho_pagina=3)
+    assert pagina['total'] == 4
+    assert pagina['total_paginas'] == 2
+    assert len(pagina['dados']) == 1
+
+
+def test_endpoints_e_exportacao(admin_client, locacoes):
+    parametros = {'data_inicio': '2024-01-01', 'data_fim': '2024-06-30'}
+
+    response = admin_client.get(f'{URL}rotatividade/', parametros)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['resumo']['total_entradas'] == 3
+
+    response = admin_client.get(f'{URL}historico_locacoes/', {'page_size': 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['total_paginas'] == 2
+
+    for relatorio in ('rotatividade', 'historico_locacoes'):
+        response = admin_client.get(f'{URL}{relatorio}/', {**parametros, 'formato': 'pdf'})
+        assert response['Content-Type'] == 'application/pdf'
+        assert response.content.startswith(b'%PDF')
+
+        response = admin_client.get(f'{URL}{relatorio}/', {**parametros, 'formato': 'excel'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content.startswith(b'PK')
+
+    response = admin_client.get(f'{URL}historico_locacoes/', {'page_size': 0})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,115 @@
+"""
+Testes para a alteração de status em lote.
+
+Cobre:
+- Transições válidas e rejeitadas em uma única chamada
+- Histórico com IP, user agent e categoria
+- Número de queries constante (lock, bulk_create e UPDATE ... CASE)
+- Bloqueio finalizando associações ativas
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import HistoricoStatus, Inquilino, InquilinoApartamento, StatusInquilino
+from aptos.tests.factories import InquilinoApartamentoFactory, InquilinoPFFactory
+
+URL = '/api/v1/status/alterar_status_lote/'
+
+
+@pytest.fixture
+def admin_client(db):
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+def test_transition_many_queries_constantes():
+    def executar(quantidade):
+        inquilinos = InquilinoPFFactory.create_batch(quantidade, status='ATIVO')
+        with CaptureQueriesContext(connection) as contexto:
+            resultado = StatusInquilino.objects.transition_many(
+                {i.id: 'INADIMPLENTE' for i in inquilinos}, motivo='Cobrança'
+            )
+        assert len(resultado['alterados']) == quantidade
+        return len(contexto.captured_queries)
+
+    # lock + histórico + notificação + UPDATE, independente do tamanho do lote
+    assert executar(2) == executar(20)
+    assert set(Inquilino.objects.values_list('status', flat=True)) == {'INADIMPLENTE'}
+    assert HistoricoStatus.objects.filter(status_novo='INADIMPLENTE').count() == 22
+
+
+@pytest.mark.django_db
+def test_endpoint_transicoes_mistas(admin_client):
+    ativo = InquilinoPFFactory.create(status='ATIVO')
+    inadimplente = InquilinoPFFactory.create(status='INADIMPLENTE')
+    inativo = InquilinoPFFactory.create(status='INATIVO')
+
+    response = admin_client.post(URL, {
+        'transicoes': [
+            {'inquilino_id': ativo.id, 'status': 'INADIMPLENTE'},
+            {'inquilino_id': inadimplente.id, 'status': 'ATIVO'},
+            {'inquilino_id': inativo.id, 'status': 'BLOQUEADO'},  # inválida
+            {'inquilino_id': 999999, 'status': 'ATIVO'},
+        ],
+        'motivo': 'Rodada de cobrança',
+        'categoria': 'INADIMPLENCIA',
+    }, format='json', HTTP_USER_AGENT='pytest', REMOTE_ADDR='10.0.0.1')
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data['total_alterados'] == 2
+    assert {r['inquilino_id'] for r in data['rejeitados']} == {inativo.id, 999999}
+
+    ativo.refresh_from_db()
+    inadimplente.refresh_from_db()
+    inativo.refresh_from_db()
+    assert (ativo.status, inadimplente.status, inativo.status) == ('INADIMPLENTE', 'ATIVO', 'INATIVO')
+
+    historico = HistoricoStatus.objects.get(inquilino=ativo)
+    assert historico.categoria_motivo == 'INADIMPLENCIA'
+    assert historico.ip_address == '10.0.0.1'
+    assert historico.user_agent == 'pytest'
+    assert not HistoricoStatus.objects.filter(inquilino=inativo).exists()
+
+
+@pytest.mark.django_db
+def test_bloqueio_em_lote_finaliza_associacoes(admin_client):
+    associacao = InquilinoApartamentoFactory.create(inquilino__status='ATIVO', ativo=True)
+
+    response = admin_client.post(URL, {
+        'inquilino_ids': [associacao.inquilino_id],
+        'status': 'BLOQUEADO',
+    }, format='json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not InquilinoApartamento.objects.get(pk=associacao.pk).ativo
+
+
+@pytest.mark.django_db
+def test_payload_invalido(admin_client):
+    inquilino = InquilinoPFFactory.create()
+
+    assert admin_client.post(URL, {}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+    response = admin_client.post(URL, {'inquilino_ids': [inquilino.id], 'status': 'X'}, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = admin_client.post(
+        URL, {'inquilino_ids': [inquilino.id], 'status': 'ATIVO', 'categoria': 'X'}, format='json'
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # Tipos não hasheáveis retornam 400, não 500
+    for dados in (
+        {'transicoes': [{'inquilino_id': inquilino.id, 'status': ['X']}]},
+        {'inquilino_ids': [inquilino.id], 'status': {}},
+        {'inquilino_ids': [inquilino.id], 'status': 'ATIVO', 'categoria': ['MANUAL']},
+        {'transicoes': {'inquilino_id': inquilino.id}},
+    ):
+        response = admin_client.post(URL, dados, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, dados
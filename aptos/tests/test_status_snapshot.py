@@ -0,0 +1,114 @@
+"""
+Testes para os snapshots de distribuição de status.
+
+Cobre:
+- Snapshot de um período encerrado recomposto a partir do estado atual
+- Relatório de status = último snapshot diário + mudanças posteriores
+- Tendência semanal em uma consulta e validação de `semanas`
+- Management command snapshot_status
+"""
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from aptos.models import HistoricoStatus, Inquilino, SnapshotStatus
+from aptos.services.status_snapshot_service import (
+    DIARIO,
+    SEMANAL,
+    _inicio_do_dia,
+    status_snapshot_service,
+)
+from aptos.tests.factories import HistoricoStatusFactory, InquilinoPFFactory
+
+HOJE = timezone.localdate()
+ONTEM = HOJE - timedelta(days=1)
+
+
+def _mudanca(inquilino, novo, quando, categoria='MANUAL'):
+    historico = HistoricoStatusFactory.create(
+        inquilino=inquilino, status_anterior=inquilino.status, status_novo=novo,
+        categoria_motivo=categoria,
+    )
+    HistoricoStatus.objects.filter(pk=historico.pk).update(timestamp=quando)
+    Inquilino.objects.filter(pk=inquilino.pk).update(status=novo)
+
+
+@pytest.fixture
+def inquilinos():
+    """Três inquilinos antigos: um ficou inadimplente ontem e outro foi bloqueado hoje"""
+    antigos = InquilinoPFFactory.create_batch(3)
+    Inquilino.objects.update(created_at=timezone.now() - timedelta(days=20))
+    _mudanca(antigos[0], 'INADIMPLENTE', _inicio_do_dia(ONTEM) + timedelta(hours=12), 'INADIMPLENCIA')
+    _mudanca(antigos[1], 'BLOQUEADO', timezone.now())
+    # Criado hoje e já alterado: entra só pelo status atual
+    novo = InquilinoPFFactory.create()
+    _mudanca(novo, 'INATIVO', timezone.now())
+    return antigos + [novo]
+
+
+def _totais(periodicidade, data):
+    return dict(
+        SnapshotStatus.objects.filter(periodicidade=periodicidade, data_referencia=data)
+        .values_list('status', 'total')
+    )
+
+
+def test_snapshot_de_periodo_encerrado(inquilinos):
+    snapshots = status_snapshot_service.capturar(DIARIO)
+
+    # Estado ao fim de ontem, apesar das mudanças de hoje
+    assert _totais(DIARIO, ONTEM) == {'ATIVO': 2, 'INADIMPLENTE': 1, 'INATIVO': 0, 'BLOQUEADO': 0}
+    inadimplente = next(s for s in snapshots if s.status == 'INADIMPLENTE')
+    assert inadimplente.entradas == 1
+    assert inadimplente.motivos == {'INADIMPLENCIA': 1}
+
+    # Regravar o mesmo período atualiza as linhas
+    status_snapshot_service.capturar(DIARIO, ONTEM)
+    assert SnapshotStatus.objects.count() == len(Inquilino.STATUS_CHOICES)
+
+    with pytest.raises(ValueError):
+        status_snapshot_service.capturar(DIARIO, HOJE)
+
+
+def test_relatorio_status_parte_do_snapshot(inquilinos, api_client):
+    ao_vivo = api_client.get('/api/v1/status/relatorio_status/').json()
+    assert ao_vivo['snapshot'] is None
+
+    status_snapshot_service.capturar(DIARIO)
+    response = api_client.get('/api/v1/status/relatorio_status/')
+    assert response.status_code == 200
+    dados = response.json()
+    assert dados['snapshot'] == ONTEM.isoformat()
+    assert {k: v for k, v in dados.items() if k != 'snapshot'} == {
+        k: v for k, v in ao_vivo.items() if k != 'snapshot'
+    }
+    assert dados['total_inquilinos'] == 4
+    assert {'categoria_motivo': 'INADIMPLENCIA', 'count': 1} in dados['top_motivos']
+
+    # A distribuição vem do snapshot, somada às mudanças posteriores a ele
+    SnapshotStatus.objects.filter(data_referencia=ONTEM, status='ATIVO').update(total=10)
+    dados = api_client.get('/api/v1/status/relatorio_status/').json()
+    assert dados['ativos'] == 9
+    assert dados['total_inquilinos'] == 12
+
+
+def test_tendencia_semanal(inquilinos, api_client, django_assert_num_queries):
+    saida = StringIO()
+    call_command('snapshot_status', periodicidade=SEMANAL, periodos=2, stdout=saida)
+    assert 'Snapshots gravados' in saida.getvalue()
+
+    with django_assert_num_queries(1):
+        tendencia = status_snapshot_service.tendencia(4)
+    ultima = status_snapshot_service.ultimo_periodo(SEMANAL)
+    assert [s['semana'] for s in tendencia] == [ultima - timedelta(weeks=1), ultima]
+    assert all(s['total_inquilinos'] == 3 for s in tendencia)
+
+    response = api_client.get('/api/v1/status/tendencia_status/', {'semanas': 4})
+    assert response.status_code == 200
+    assert response.json()['resultados'][-1]['distribuicao']['BLOQUEADO'] == 0
+
+    response = api_client.get('/api/v1/status/tendencia_status/', {'semanas': 0})
+    assert response.status_code == 400
@@ -0,0 +1,176 @@
+"""
+Testes para upload resumível (estilo tus).
+
+Cobre:
+- Criação de sessão e consulta de offset
+- Envio em partes com checksum
+- Conflito de offset e checksum divergente
+- Parte concorrente recusada com 409 enquanto outra é recebida
+- Finalização anexando vídeo do apartamento e documento do inquilino
+"""
+import base64
+import hashlib
+import io
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from aptos.models import DocumentoInquilino, UploadResumivel
+from aptos.services.upload_service import OffsetConflito, upload_service
+from aptos.tests.factories import AptosFactory, InquilinoPFFactory
+
+CONTEUDO = b'0123456789' * 1000
+
+
+@pytest.fixture
+def client(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.RESUMABLE_UPLOAD_DIR = str(tmp_path / 'resumable')
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+    api = APIClient()
+    api.force_authenticate(user=user)
+    return api
+
+
+def _checksum(parte):
+    return 'sha256 ' + base64.b64encode(hashlib.sha256(parte).digest()).decode()
+
+
+def _patch(client, upload_id, offset, parte, checksum=None):
+    headers = {'HTTP_UPLOAD_OFFSET': str(offset)}
+    if checksum:
+        headers['HTTP_UPLOAD_CHECKSUM'] = checksum
+    return client.generic(
+        'PATCH', f'/api/v1/uploads/{upload_id}/', parte,
+        content_type='application/offset+octet-stream', **headers
+    )
+
+
+def _criar(client, **dados):
+    r = client.post('/api/v1/uploads/', dados, format='json')
+    assert r.status_code == status.HTTP_201_CREATED, r.content
+    assert r['Upload-Offset'] == '0'
+    return r.json()['id']
+
+
+def test_upload_em_partes_anexa_video_do_apartamento(client):
+    apto = AptosFactory.create()
+    upload_id = _criar(
+        client, destino='APTO_VIDEO', objeto_id=apto.id,
+        nome_arquivo='tour.mp4', tamanho_total=len(CONTEUDO),
+    )
+
+    r = _patch(client, upload_id, 0, CONTEUDO[:4000], _checksum(CONTEUDO[:4000]))
+    assert r.status_code == status.HTTP_204_NO_CONTENT
+    assert r['Upload-Offset'] == '4000'
+
+    # Retomada: o cliente consulta o offset antes de continuar
+    r = client.head(f'/api/v1/uploads/{upload_id}/')
+    assert r['Upload-Offset'] == '4000'
+
+    r = _patch(client, upload_id, 4000, CONTEUDO[4000:], _checksum(CONTEUDO[4000:]))
+    assert r['Upload-Offset'] == str(len(CONTEUDO))
+
+    r = client.post(f'/api/v1/uploads/{upload_id}/finalizar/')
+    assert r.status_code == status.HTTP_200_OK, r.content
+
+    apto.refresh_from_db()
+    assert apto.video.name.startswith('aptos/aptos_videos/tour')
+    with apto.video.open('rb') as f:
+        assert f.read() == CONTEUDO
+    assert UploadResumivel.objects.get(pk=upload_id).status == 'CONCLUIDO'
+
+
+def test_offset_divergente_retorna_409(client):
+    apto = AptosFactory.create()
+    upload_id = _criar(
+        client, destino='APTO_VIDEO', objeto_id=apto.id,
+        nome_arquivo='tour.mp4', tamanho_total=len(CONTEUDO),
+    )
+    r = _patch(client, upload_id, 10, CONTEUDO[:10])
+    assert r.status_code == status.HTTP_409_CONFLICT
+
+
+def test_checksum_divergente_descarta_parte(client):
+    apto = AptosFactory.create()
+    upload_id = _criar(
+        client, destino='APTO_VIDEO', objeto_id=apto.id,
+        nome_arquivo='tour.mp4', tamanho_total=len(CONTEUDO),
+    )
+    r = _patch(client, upload_id, 0, CONTEUDO[:100], _checksum(b'outro conteudo'))
+    assert r.status_code == 460
+    assert UploadResumivel.objects.get(pk=upload_id).offset == 0
+
+
+def test_parte_concorrente_retorna_409_sem_esperar(client):
+    apto = AptosFactory.create()
+    upload_id = _criar(
+        client, destino='APTO_VIDEO', objeto_id=apto.id,
+        nome_arquivo='tour.mp4', tamanho_total=len(CONTEUDO),
+    )
+
+    class StreamLento(io.BytesIO):
+        concorrente = None
+
+        def read(self, tamanho=-1):
+            # Durante a cópia a parte está reservada: outro PATCH é recusado
+            if self.concorrente is None:
+                with pytest.raises(OffsetConflito) as erro:
+                    upload_service.anexar_parte(upload_id, 0, io.BytesIO(b'x'), 1)
+                self.concorrente = erro.value
+            return super().read(tamanho)
+
+    stream = StreamLento(CONTEUDO[:4000])
+    upload = upload_service.anexar_parte(upload_id, 0, stream, 4000)
+    assert 'sendo recebida' in str(stream.concorrente)
+    assert upload.offset == 4000
+    assert upload.recebendo_desde is None
+
+    # Reserva abandonada expira e não bloqueia a retomada
+    UploadResumivel.objects.filter(pk=upload_id).update(
+        recebendo_desde=timezone.now() - timedelta(hours=1)
+    )
+    r = _patch(client, upload_id, 4000, CONTEUDO[4000:5000])
+    assert r.status_code == status.HTTP_204_NO_CONTENT
+    assert r['Upload-Offset'] == '5000'
+
+
+def test_finalizar_incompleto_falha(client):
+    apto = AptosFactory.create()
+    upload_id = _criar(
+        client, destino='APTO_VIDEO', objeto_id=apto.id,
+        nome_arquivo='tour.mp4', tamanho_total=len(CONTEUDO),
+    )
+    _patch(client, upload_id, 0, CONTEUDO[:10])
+    r = client.post(f'/api/v1/uploads/{upload_id}/finalizar/')
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_upload_documento_do_inquilino(client):
+    inquilino = InquilinoPFFactory.create()
+    upload_id = _criar(
+        client, destino='DOCUMENTO_INQUILINO', objeto_id=inquilino.id,
+        tipo_documento='RG', nome_arquivo='rg.pdf', tamanho_total=len(CONTEUDO),
+    )
+    _patch(client, upload_id, 0, CONTEUDO)
+
+    r = client.post(f'/api/v1/uploads/{upload_id}/finalizar/')
+    assert r.status_code == status.HTTP_200_OK, r.content
+
+    documento = DocumentoInquilino.objects.get(pk=r.json()['documento_id'])
+    assert documento.inquilino == inquilino
+    assert documento.tamanho == len(CONTEUDO)
+    assert documento.mime_type == 'application/pdf'
+
+
+def test_documento_exige_tipo(client):
+    inquilino = InquilinoPFFactory.create()
+    r = client.post('/api/v1/uploads/', {
+        'destino': 'DOCUMENTO_INQUILINO', 'objeto_id': inquilino.id,
+        'nome_arquivo': 'rg.pdf', 'tamanho_total': 10,
+    }, format='json')
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
@@ -59,6 +59,65 @@ def test_builders_list_and_apartments():
     assert len(r.json()) >= 1
 
 
+@pytest.mark.django_db
+def test_builders_agregados_de_apartamentos(django_assert_max_num_queries):
+    builder = BuilderFactory.create()
+    AptosFactory.create(building_name=builder, rental_price=1000, is_available=True)
+    AptosFactory.create(building_name=builder, rental_price=2000, is_available=True)
+    AptosFactory.create(building_name=builder, rental_price=3000, is_available=False)
+    BuilderFactory.create()
+
+    client = APIClient()
+    # COUNT da paginação + lista agregada + prefetch de fotos
+    with django_assert_max_num_queries(3):
+        r = client.get(reverse("builders-list"))
+    assert r.status_code == status.HTTP_200_OK
+
+    dados = {b["id"]: b for b in r.json()["results"]}[builder.id]
+    assert dados["apartment_count"] == 3
+    assert dados["available_count"] == 2
+    assert dados["min_rental_price"] == 1000
+    assert dados["max_rental_price"] == 3000
+    assert dados["avg_rental_price"] == 2000
+
+    r = client.get(reverse("builders-detail", kwargs={"pk": builder.id}))
+    assert r.json()["apartment_count"] == 3
+
+
+@pytest.mark.django_db
+def test_builders_apartments_por_cursor():
+    builder = BuilderFactory.create()
+    for i in range(5):
+        AptosFactory.create(building_name=builder, unit_number=f"10{i}")
+
+    client = APIClient()
+    url = reverse("builders-apartments", kwargs={"pk": builder.id})
+    r = client.get(url, {"cursor": "", "page_size": 2})
+    assert r.status_code == status.HTTP_200_OK
+    pagina = r.json()
+    assert [a["unit_number"] for a in pagina["results"]] == ["100", "101"]
+
+    r = client.get(pagina["next"])
+    assert [a["unit_number"] for a in r.json()["results"]] == ["102", "103"]
+
+
+@pytest.mark.django_db
+def test_builders_apartments_lista_sem_paginacao():
+    builder = BuilderFactory.create()
+    for i in range(3):
+        AptosFactory.create(building_name=builder, unit_number=f"20{i}")
+
+    client = APIClient()
+    url = reverse("builders-apartments", kwargs={"pk": builder.id})
+    r = client.get(url)
+    assert r.status_code == status.HTTP_200_OK
+    assert [a["unit_number"] for a in r.json()] == ["200", "201", "202"]
+
+    r = client.get(url, {"page": 1, "page_size": 2})
+    assert r.json()["count"] == 3
+    assert [a["unit_number"] for a in r.json()["results"]] == ["200", "201"]
+
+
 @pytest.mark.django_db
 def test_inquilinos_estatisticas_requires_admin():
     user = User.objects.create_superuser("admin", "admin@example.com", "pass")
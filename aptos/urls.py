@@ -11,6 +11,11 @@ urlpatterns = [
     path("api/validar-documento/", views.validar_documento, name="validar_documento"),
     path("api/validar-cpf/", views.validar_cpf_endpoint, name="validar_cpf"),
     path("api/validar-cnpj/", views.validar_cnpj_endpoint, name="validar_cnpj"),
+    path(
+        "api/validar-documentos-lote/",
+        views.validar_documentos_lote,
+        name="validar_documentos_lote",
+    ),
     path("api/documentos-teste/", views.documentos_teste, name="documentos_teste"),
 
     # APIs de upload e gestão de documentos
@@ -4,10 +4,11 @@ from datetime import date, datetime
 from django.contrib.auth import authenticate, login, logout
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, models
-from django.db.models import Q
-from django.http import HttpResponse, JsonResponse
+from django.db.models import Avg, Count, Max, Min, Q
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.middleware.csrf import get_token
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
@@ -17,19 +18,27 @@ from drf_spectacular.utils import (
     inline_serializer,
 )
 from rest_framework import filters, serializers, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
 from rest_framework.authentication import SessionAuthentication
 from django.conf import settings
 from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from aptos.models import (
+    AssinaturaRelatorio,
     Aptos,
     Builders,
     DocumentoInquilino,
     HistoricoAssociacao,
     HistoricoStatus,
+    ImportacaoInquilinos,
     Inquilino,
     InquilinoApartamento,
     Locador,
@@ -42,6 +51,7 @@ from aptos.models import (
 from aptos.serializers import (
     AptosListSerializer,
     AptosSerializer,
+    AssinaturaRelatorioSerializer,
     AssociacaoListSerializer,
     AssociacaoSerializer,
     BuilderFotoSerializer,
@@ -49,12 +59,26 @@ from aptos.serializers import (
     FotoSerializer,
     HistoricoAssociacaoSerializer,
     HistoricoStatusSerializer,
+    ImportacaoInquilinosSerializer,
     InquilinoListSerializer,
     InquilinoSerializer,
     LocadorSerializer,
+    UploadResumivelSerializer,
+)
+from aptos.pagination import PaginacaoCursorApartamentos, PaginacaoPadrao
+from aptos.services.importacao_service import (
+    EXTENSOES_SUPORTADAS,
+    ImportacaoError,
+    agendar_importacao_inquilinos,
+    importacao_service,
 )
+from aptos.services.upload_service import UploadError, upload_service
+from aptos.services.indice_documentos_service import indice_documentos
+from aptos.services.status_snapshot_service import status_snapshot_service
+from aptos import batch_validators
 from aptos.utils import formatar_cnpj, formatar_cpf, limpar_documento
 from aptos.validators import validar_cnpj, validar_cpf
+from aptos.db_router import na_replica
 from aptos.decorators import cache_api_response
 
 
@@ -68,6 +92,21 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
         return  # ignora verificação CSRF
 
 
+class CamposDinamicosViewMixin:
+    """Repassa ?fields=/?expand= ao queryset via serializer.otimizar_queryset.
+
+    O serializer escolhido para a ação define quais select_related,
+    prefetch_related, anotações e only() são necessários; campos não
+    pedidos não custam SQL nem processamento.
+    """
+
+    def otimizar_queryset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "otimizar_queryset"):
+            return serializer_class.otimizar_queryset(queryset, self.request)
+        return queryset
+
+
 def lista_aptos(request):
     aptos = Aptos.objects.select_related("building_name").prefetch_related("fotos")
     return render(request, "aptos/aptos_lista.html", {"aptos": aptos})
@@ -165,17 +204,59 @@ def current_user(request):
 # API ViewSets
 
 
+def _parse_periodo(inicio, fim):
+    """Converte datas AAAA-MM-DD em (inicio, fim), validando a ordem"""
+    from django.utils.dateparse import parse_date
+
+    try:
+        inicio, fim = parse_date(inicio or ""), parse_date(fim or "")
+    except ValueError:
+        inicio = fim = None
+    if inicio is None or fim is None:
+        raise DRFValidationError("Datas devem estar no formato AAAA-MM-DD")
+    if inicio > fim:
+        raise DRFValidationError("Data inicial deve ser anterior à data final")
+    return inicio, fim
+
+
+class DisponibilidadeFilter(filters.BaseFilterBackend):
+    """Filtra apartamentos livres em todo o período ?disponivel_entre=inicio,fim.
+
+    Anti-join (NOT EXISTS) contra as associações que ocupam o período,
+    apoiado pelo índice (apartamento, data_inicio, data_fim).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        periodo = request.query_params.get("disponivel_entre")
+        if not periodo:
+            return queryset
+
+        inicio, _, fim = periodo.partition(",")
+        inicio, fim = _parse_periodo(inicio.strip(), fim.strip())
+        ocupacoes = InquilinoApartamento.objects.ocupando_periodo(inicio, fim).filter(
+            apartamento=models.OuterRef("pk")
+        )
+        return queryset.filter(~models.Exists(ocupacoes))
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="Lista todos os apartamentos",
         description="Retorna lista paginada de apartamentos com filtros disponíveis",
+        parameters=[
+            OpenApiParameter(
+                name="disponivel_entre",
+                type=str,
+                description="Apenas unidades livres em todo o período (AAAA-MM-DD,AAAA-MM-DD)",
+            ),
+        ],
     ),
     retrieve=extend_schema(
         summary="Detalhes do apartamento",
         description="Retorna detalhes completos de um apartamento específico incluindo fotos",
     ),
 )
-class AptosViewSet(viewsets.ReadOnlyModelViewSet):
+class AptosViewSet(CamposDinamicosViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para apartamentos com filtros, busca e paginação.
 
@@ -188,16 +269,21 @@ class AptosViewSet(viewsets.ReadOnlyModelViewSet):
     - has_air_conditioning: filtrar por ar condicionado
     - rental_price_min: preço mínimo de aluguel
     - rental_price_max: preço máximo de aluguel
+    - disponivel_entre: livres em todo o período (ex.: 2026-11-01,2027-04-30)
 
     Busca:
     - Busca em unit_number, description, building_name__name
 
     Ordenação:
     - rental_price, number_of_bedrooms, created_at
+
+    Campos:
+    - fields: lista de campos a retornar (ex.: ?fields=id,unit_number)
     """
 
     filter_backends = [
         DjangoFilterBackend,
+        DisponibilidadeFilter,
         filters.SearchFilter,
         filters.OrderingFilter,
     ]
@@ -224,17 +310,15 @@ class AptosViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         """
-        Otimiza queries com select_related e prefetch_related
+        select_related/prefetch_related conforme os campos pedidos
         """
-        return Aptos.objects.select_related("building_name").prefetch_related(
-            "fotos", "building_name__builder_fotos"
-        )
+        return self.otimizar_queryset(Aptos.objects.all())
 
     def get_serializer_class(self):
         """
         Usa serializer otimizado para listagem e completo para detalhes
         """
-        if self.action == "list":
+        if self.action in ("list", "available"):
             return AptosListSerializer
         return AptosSerializer
 
@@ -251,11 +335,49 @@ class AptosViewSet(viewsets.ReadOnlyModelViewSet):
         )
         return Response(serializer.data)
 
+    @extend_schema(
+        summary="Calendário de disponibilidade",
+        description=(
+            "Períodos ocupados e livres do apartamento entre `inicio` e `fim` "
+            "(padrão: hoje até um ano à frente)."
+        ),
+        parameters=[
+            OpenApiParameter(name="inicio", type=date, required=False),
+            OpenApiParameter(name="fim", type=date, required=False),
+        ],
+    )
+    @action(detail=True, methods=["get"])
+    def disponibilidade(self, request, pk=None):
+        """Calendário de disponibilidade de um apartamento"""
+        from datetime import timedelta
+
+        apartamento = get_object_or_404(Aptos.objects.only("pk"), pk=pk)
+        hoje = date.today()
+        inicio, fim = _parse_periodo(
+            request.query_params.get("inicio") or hoje.isoformat(),
+            request.query_params.get("fim") or (hoje + timedelta(days=365)).isoformat(),
+        )
+
+        ocupados, livres = InquilinoApartamento.objects.calendario_apartamento(
+            apartamento.pk, inicio, fim
+        )
+        return Response(
+            {
+                "apartamento_id": apartamento.pk,
+                "inicio": inicio,
+                "fim": fim,
+                "disponivel": not ocupados,
+                "ocupado": [{"inicio": i, "fim": f} for i, f in ocupados],
+                "livre": [{"inicio": i, "fim": f} for i, f in livres],
+            }
+        )
+
     @extend_schema(
         summary="Estatísticas de apartamentos",
         description="Retorna estatísticas gerais dos apartamentos",
     )
     @action(detail=False, methods=["get"])
+    @na_replica
     def stats(self, request):
         """Endpoint para estatísticas dos apartamentos"""
         queryset = self.get_queryset()
@@ -313,25 +435,68 @@ class BuildersViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         """
-        Otimiza queries com prefetch_related para fotos
+        Prefetch das fotos e agregados dos apartamentos calculados na
+        mesma query (um único JOIN com GROUP BY)
         """
-        return Builders.objects.prefetch_related("builder_fotos", "aptos_building_name")
+        return Builders.objects.prefetch_related("builder_fotos").annotate(
+            apartment_count=Count("aptos_building_name"),
+            available_count=Count(
+                "aptos_building_name",
+                filter=Q(aptos_building_name__is_available=True),
+            ),
+            min_rental_price=Min("aptos_building_name__rental_price"),
+            max_rental_price=Max("aptos_building_name__rental_price"),
+            avg_rental_price=Avg("aptos_building_name__rental_price"),
+        )
 
     @extend_schema(
         summary="Apartamentos da construtora",
-        description="Retorna todos os apartamentos de uma construtora específica",
+        description=(
+            "Retorna os apartamentos de uma construtora. Sem parâmetros de "
+            "paginação, retorna a lista completa; use ?page=N/?page_size= para "
+            "paginação por página ou ?cursor= para paginação por cursor "
+            "(ordenada por unidade)."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="cursor",
+                description="Cursor retornado em next/previous",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="page_size",
+                description="Itens por página (máx. 100)",
+                required=False,
+                type=int,
+            ),
+        ],
     )
     @action(detail=True, methods=["get"])
     def apartments(self, request, pk=None):
         """Endpoint para listar apartamentos de uma construtora específica"""
-        builder = self.get_object()
-        apartments = builder.aptos_building_name.select_related(
-            "building_name"
-        ).prefetch_related("fotos")
-        serializer = AptosListSerializer(
-            apartments, many=True, context={"request": request}
+        # Apenas confirma a existência; os agregados não são necessários aqui
+        builder = get_object_or_404(Builders.objects.only("pk"), pk=pk)
+        apartments = (
+            Aptos.objects.filter(building_name=builder)
+            .select_related("building_name")
+            .prefetch_related("fotos")
+            .order_by("unit_number", "id")
         )
-        return Response(serializer.data)
+
+        params = request.query_params
+        if "cursor" in params:
+            paginator = PaginacaoCursorApartamentos()
+        elif "page" in params or "page_size" in params:
+            paginator = PaginacaoPadrao()
+        else:
+            # Lista simples: formato esperado pelo frontend (getBuilderApartments)
+            serializer = AptosListSerializer(apartments, many=True, context={"request": request})
+            return Response(serializer.data)
+
+        page = paginator.paginate_queryset(apartments, request, view=self)
+        serializer = AptosListSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 # Sistema de filtros customizado para Inquilinos
@@ -420,7 +585,7 @@ class InquilinoFilter(filters.BaseFilterBackend):
         summary="Excluir inquilino", description="Remove um inquilino do sistema"
     ),
 )
-class InquilinoViewSet(viewsets.ModelViewSet):
+class InquilinoViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet completo para gestão de inquilinos.
 
@@ -430,9 +595,10 @@ class InquilinoViewSet(viewsets.ModelViewSet):
     - Paginação automática
     - Validação integrada de CPF/CNPJ
     - Endpoints especiais para alteração de status e estatísticas
+    - Campos esparsos via ?fields=
     """
 
-    queryset = Inquilino.objects.get_list_optimized()
+    queryset = Inquilino.objects.all()
     # Desabilita verificação de CSRF para chamadas via SessionAuthentication (necessário para frontend dev em outra origem)
     class CsrfExemptSessionAuthentication(SessionAuthentication):
         def enforce_csrf(self, request):
@@ -444,6 +610,9 @@ class InquilinoViewSet(viewsets.ModelViewSet):
     ordering_fields = ["created_at", "nome_completo", "razao_social", "status"]
     ordering = ["-created_at"]
 
+    def get_queryset(self):
+        return self.otimizar_queryset(super().get_queryset())
+
     def get_serializer_class(self):
         if self.action == "list":
             return InquilinoListSerializer
@@ -528,6 +697,7 @@ class InquilinoViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=["get"])
     @cache_api_response(timeout=600, key_prefix='inquilinos_stats')
+    @na_replica
     def estatisticas(self, request):
         """Endpoint para estatísticas gerais com cache de 10 minutos"""
         # Usar métodos otimizados do manager
@@ -573,6 +743,92 @@ class InquilinoViewSet(viewsets.ModelViewSet):
         serializer = InquilinoApartamentoSerializer(associacoes, many=True)
         return Response(serializer.data)
 
+    @extend_schema(
+        summary="Importar inquilinos em lote",
+        description=(
+            "Importa inquilinos de uma planilha CSV ou XLSX (campo 'arquivo'). "
+            "A primeira linha deve conter os nomes das colunas do cadastro "
+            "(tipo, email, nome_completo, cpf, razao_social, cnpj...). "
+            "Linhas válidas são inseridas em lote; as inválidas voltam no "
+            "relatório de erros com o número da linha. Arquivos grandes, ou "
+            "com background=true, são processados em segundo plano e a "
+            "situação fica em importacoes/{id}/."
+        ),
+        request=inline_serializer(
+            name="ImportarInquilinosRequest",
+            fields={
+                "arquivo": serializers.FileField(),
+                "background": serializers.BooleanField(required=False),
+            },
+        ),
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def importar(self, request):
+        """Importação em lote de inquilinos a partir de planilha"""
+        arquivo = request.FILES.get("arquivo")
+        if not arquivo:
+            return Response(
+                {"error": "Envie a planilha no campo 'arquivo'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not arquivo.name.lower().endswith(EXTENSOES_SUPORTADAS):
+            return Response(
+                {"error": "Formato não suportado. Use CSV ou XLSX."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        usuario = request.user if request.user.is_authenticated else None
+        background = str(request.data.get("background", "")).lower() in ("1", "true")
+        if background or arquivo.size > settings.INQUILINOS_IMPORTACAO_LIMITE_SINCRONO:
+            importacao = ImportacaoInquilinos.objects.create(
+                arquivo=arquivo, nome_arquivo=arquivo.name, usuario=usuario
+            )
+            agendar_importacao_inquilinos(importacao.id)
+            return Response(
+                ImportacaoInquilinosSerializer(importacao).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        try:
+            resultado = importacao_service.importar(arquivo, arquivo.name)
+        except ImportacaoError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        importacao = ImportacaoInquilinos.objects.create(
+            nome_arquivo=arquivo.name,
+            usuario=usuario,
+            status="CONCLUIDO",
+            concluido_em=timezone.now(),
+            **resultado,
+        )
+        return Response(
+            ImportacaoInquilinosSerializer(importacao).data,
+            status=status.HTTP_201_CREATED if resultado["criados"] else status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        summary="Situação de importação",
+        description="Retorna a situação e o relatório de erros de uma importação",
+        responses=ImportacaoInquilinosSerializer,
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"importacoes/(?P<importacao_id>[0-9a-f-]+)",
+    )
+    def importacao(self, request, importacao_id=None):
+        """Consulta de uma importação (síncrona ou em segundo plano)"""
+        importacao = get_object_or_404(ImportacaoInquilinos, pk=importacao_id)
+        return Response(ImportacaoInquilinosSerializer(importacao).data)
+
+
+LIMITE_TRANSICOES_LOTE = 1000
+MAX_SEMANAS_TENDENCIA = 104
+
 
 class StatusViewSet(viewsets.ModelViewSet):
     """ViewSet para gestão de status de inquilinos"""
@@ -599,28 +855,23 @@ class StatusViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            # Executar transição
+            # Executar transição (histórico já com os metadados da requisição)
+            status_anterior = inquilino.status
             StatusInquilino.objects.transition_to(
                 inquilino=inquilino,
                 novo_status=novo_status,
                 motivo=motivo,
                 usuario=request.user if request.user.is_authenticated else None,
+                categoria_motivo=categoria,
+                ip_address=self._get_client_ip(request),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
             )
 
-            # Registrar metadados da requisição
-            historico = HistoricoStatus.objects.filter(inquilino=inquilino).first()
-
-            if historico:
-                historico.ip_address = self._get_client_ip(request)
-                historico.user_agent = request.META.get("HTTP_USER_AGENT", "")
-                historico.categoria_motivo = categoria
-                historico.save()
-
             return Response(
                 {
                     "success": True,
                     "message": f"Status alterado para {novo_status}",
-                    "status_anterior": inquilino.status,
+                    "status_anterior": status_anterior,
                     "status_novo": novo_status,
                 }
             )
@@ -632,6 +883,93 @@ class StatusViewSet(viewsets.ModelViewSet):
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        summary="Alteração de status em lote",
+        description=(
+            "Aplica transições de status a vários inquilinos em uma única transação. "
+            "Aceita `inquilino_ids` com um `status` comum ou `transicoes` com o status "
+            "de cada inquilino. Transições inválidas são devolvidas em `rejeitados`."
+        ),
+        request=inline_serializer(
+            name="AlterarStatusLoteRequest",
+            fields={
+                "inquilino_ids": serializers.ListField(child=serializers.IntegerField(), required=False),
+                "status": serializers.CharField(required=False),
+                "transicoes": serializers.ListField(child=serializers.DictField(), required=False),
+                "motivo": serializers.CharField(required=False),
+                "categoria": serializers.CharField(required=False),
+            },
+        ),
+    )
+    @action(detail=False, methods=["post"])
+    def alterar_status_lote(self, request):
+        """Altera o status de vários inquilinos de uma vez"""
+        motivo = request.data.get("motivo", "")
+        categoria = request.data.get("categoria", "MANUAL")
+
+        try:
+            if "transicoes" in request.data:
+                transicoes = {
+                    int(item["inquilino_id"]): item["status"]
+                    for item in request.data["transicoes"]
+                }
+            else:
+                novo_status = request.data.get("status")
+                transicoes = {
+                    int(inquilino_id): novo_status
+                    for inquilino_id in request.data.get("inquilino_ids") or []
+                }
+            # Status e categoria precisam ser hasheáveis para as validações abaixo
+            if not all(isinstance(s, str) for s in [categoria, *transicoes.values()]):
+                raise TypeError
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {"error": "Informe inquilino_ids e status ou transicoes com inquilino_id e status"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not transicoes:
+            return Response(
+                {"error": "Nenhum inquilino informado"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(transicoes) > LIMITE_TRANSICOES_LOTE:
+            return Response(
+                {"error": f"Máximo de {LIMITE_TRANSICOES_LOTE} inquilinos por chamada"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        status_validos = dict(Inquilino.STATUS_CHOICES)
+        novos_status = set(transicoes.values())
+        if not novos_status <= status_validos.keys():
+            return Response({"error": "Status inválido"}, status=status.HTTP_400_BAD_REQUEST)
+        if categoria not in dict(HistoricoStatus.MOTIVO_CHOICES):
+            return Response({"error": "Categoria inválida"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Permissão depende apenas do status de destino
+        if not all(self._can_change_status(request.user, None, s) for s in novos_status):
+            return Response(
+                {"error": "Sem permissão para alterar este status"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        resultado = StatusInquilino.objects.transition_many(
+            transicoes,
+            motivo=motivo,
+            usuario=request.user if request.user.is_authenticated else None,
+            categoria_motivo=categoria,
+            ip_address=self._get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+        )
+
+        return Response(
+            {
+                "success": not resultado["rejeitados"],
+                "total_alterados": len(resultado["alterados"]),
+                "total_rejeitados": len(resultado["rejeitados"]),
+                **resultado,
+            }
+        )
+
     @action(detail=False, methods=["get"], permission_classes=[AllowAny])
     def historico_inquilino(self, request):
         """Retorna histórico de status de um inquilino"""
@@ -650,51 +988,100 @@ class StatusViewSet(viewsets.ModelViewSet):
         serializer = HistoricoStatusSerializer(historico, many=True)
         return Response(serializer.data)
 
-    @action(detail=False, methods=["get"], permission_classes=[AllowAny])
-    def relatorio_status(self, request):
-        """Relatório de distribuição de status"""
-        from datetime import timedelta
+    @extend_schema(
+        summary="Histórico arquivado de um inquilino",
+        description=(
+            "Consulta o histórico já removido do banco pela política de retenção. "
+            "`modelo` escolhe entre histórico de status e de associações; "
+            "`desde`/`ate` (AAAA-MM-DD) limitam o período lido."
+        ),
+        parameters=[
+            OpenApiParameter(name="inquilino_id", required=True, type=int),
+            OpenApiParameter(
+                name="modelo", required=False, type=str, enum=["STATUS", "ASSOCIACAO"]
+            ),
+            OpenApiParameter(name="desde", required=False, type=date),
+            OpenApiParameter(name="ate", required=False, type=date),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    def historico_arquivado(self, request):
+        """Retorna o histórico arquivado de um inquilino"""
+        from django.utils.dateparse import parse_date
 
-        from django.db.models import Count
-        from django.utils import timezone
+        from aptos.services.arquivamento_service import MODELOS, arquivamento_service
 
-        # Distribuição atual
-        distribuicao = (
-            Inquilino.objects.values("status")
-            .annotate(count=Count("id"))
-            .order_by("status")
-        )
+        inquilino_id = request.query_params.get("inquilino_id")
+        modelo = request.query_params.get("modelo", "STATUS").upper()
 
-        # Mudanças no último mês
-        ultimo_mes = timezone.now() - timedelta(days=30)
-        mudancas_recentes = (
-            HistoricoStatus.objects.filter(timestamp__gte=ultimo_mes)
-            .values("status_novo")
-            .annotate(count=Count("id"))
-            .order_by("status_novo")
-        )
+        if not inquilino_id or not inquilino_id.isdigit():
+            return Response(
+                {"error": "inquilino_id é obrigatório"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if modelo not in MODELOS:
+            return Response(
+                {"error": "modelo deve ser STATUS ou ASSOCIACAO"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # Top motivos de mudança
-        top_motivos = (
-            HistoricoStatus.objects.filter(timestamp__gte=ultimo_mes)
-            .values("categoria_motivo")
-            .annotate(count=Count("id"))
-            .order_by("-count")[:5]
-        )
+        try:
+            desde, ate = (
+                parse_date(request.query_params.get(p) or "") for p in ("desde", "ate")
+            )
+            informadas = [request.query_params.get(p) for p in ("desde", "ate")]
+            if any(v and d is None for v, d in zip(informadas, (desde, ate))):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "Datas devem estar no formato AAAA-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        registros = arquivamento_service.consultar(modelo, inquilino_id, desde=desde, ate=ate)
         return Response(
             {
-                "distribuicao_atual": list(distribuicao),
-                "mudancas_ultimo_mes": list(mudancas_recentes),
-                "top_motivos": list(top_motivos),
-                "total_inquilinos": Inquilino.objects.count(),
-                "ativos": Inquilino.objects.filter(status="ATIVO").count(),
-                "inadimplentes": Inquilino.objects.filter(
-                    status="INADIMPLENTE"
-                ).count(),
+                "inquilino_id": int(inquilino_id),
+                "modelo": modelo,
+                "total": len(registros),
+                "resultados": registros,
             }
         )
 
+    @action(detail=False, methods=["get"], permission_classes=[AllowAny])
+    @na_replica
+    def relatorio_status(self, request):
+        """Relatório de distribuição de status (último snapshot diário + mudanças posteriores)"""
+        return Response(status_snapshot_service.relatorio_status())
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="semanas",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description=f"Semanas encerradas (padrão 12, máximo {MAX_SEMANAS_TENDENCIA})",
+            )
+        ]
+    )
+    @action(detail=False, methods=["get"], permission_classes=[AllowAny])
+    @na_replica
+    def tendencia_status(self, request):
+        """Distribuição de status por semana, a partir dos snapshots semanais"""
+        try:
+            semanas = int(request.query_params.get("semanas", 12))
+        except ValueError:
+            semanas = 0
+        if not 1 <= semanas <= MAX_SEMANAS_TENDENCIA:
+            return Response(
+                {"error": f"semanas deve ser um inteiro entre 1 e {MAX_SEMANAS_TENDENCIA}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {"semanas": semanas, "resultados": status_snapshot_service.tendencia(semanas)}
+        )
+
     @action(detail=False, methods=["post"])
     def aplicar_regras_automaticas(self, request):
         """Aplica regras automatizadas de status"""
@@ -814,32 +1201,19 @@ def validar_documento(request):
         except ValidationError as e:
             return JsonResponse({"valid": False, "error": str(e.message)})
 
-        # Verificar se documento já existe
-        queryset = Inquilino.objects.filter(**{campo_busca: documento_limpo})
-
-        # Excluir o próprio inquilino se estiver editando
-        if inquilino_id:
-            queryset = queryset.exclude(pk=inquilino_id)
-
-        exists = queryset.exists()
-        existing_inquilino = None
-
-        if exists:
-            existing_inquilino = queryset.first()
+        # Verificar se documento já existe (excluindo o próprio inquilino
+        # se estiver editando)
+        existing_inquilino = indice_documentos.consultar(
+            campo_busca, documento_limpo, excluir_id=inquilino_id
+        )
 
         return JsonResponse(
             {
                 "valid": True,
                 "formatted": formatado,
                 "documento_limpo": documento_limpo,
-                "exists": exists,
-                "existing_inquilino": {
-                    "id": existing_inquilino.id,
-                    "nome": existing_inquilino.nome_principal,
-                    "status": existing_inquilino.status,
-                }
-                if existing_inquilino
-                else None,
+                "exists": existing_inquilino is not None,
+                "existing_inquilino": existing_inquilino,
                 "message": "Documento válido",
             }
         )
@@ -886,11 +1260,10 @@ def validar_cpf_endpoint(request):
             cpf_formatado = formatar_cpf(cpf_limpo)
 
             # Verificar unicidade
-            queryset = Inquilino.objects.filter(cpf=cpf_limpo)
-            if inquilino_id:
-                queryset = queryset.exclude(pk=inquilino_id)
-
-            exists = queryset.exists()
+            exists = (
+                indice_documentos.consultar("cpf", cpf_limpo, excluir_id=inquilino_id)
+                is not None
+            )
 
             return JsonResponse(
                 {
@@ -947,11 +1320,10 @@ def validar_cnpj_endpoint(request):
             cnpj_formatado = formatar_cnpj(cnpj_limpo)
 
             # Verificar unicidade
-            queryset = Inquilino.objects.filter(cnpj=cnpj_limpo)
-            if inquilino_id:
-                queryset = queryset.exclude(pk=inquilino_id)
-
-            exists = queryset.exists()
+            exists = (
+                indice_documentos.consultar("cnpj", cnpj_limpo, excluir_id=inquilino_id)
+                is not None
+            )
 
             return JsonResponse(
                 {
@@ -975,6 +1347,105 @@ def validar_cnpj_endpoint(request):
         )
 
 
+LIMITE_VALIDACAO_LOTE = 10000
+
+
+@extend_schema(
+    summary="Validação de CPF/CNPJ em lote",
+    description=(
+        "Valida até 10.000 documentos por chamada. Sem 'tipo', o tipo de cada "
+        "documento é inferido pela quantidade de dígitos. Com "
+        "verificar_existencia=true, informa quais já estão cadastrados."
+    ),
+    request=inline_serializer(
+        name="ValidarDocumentosLoteRequest",
+        fields={
+            "documentos": serializers.ListField(child=serializers.CharField(allow_blank=True)),
+            "tipo": serializers.ChoiceField(choices=["CPF", "CNPJ"], required=False),
+            "verificar_existencia": serializers.BooleanField(required=False),
+        },
+    ),
+)
+@api_view(["POST"])
+@authentication_classes([CsrfExemptSessionAuthentication])
+@permission_classes([IsAdminUser])
+def validar_documentos_lote(request):
+    """
+    Endpoint para validação de muitos CPFs/CNPJs de uma vez.
+
+    Body:
+    {
+        "documentos": ["123.456.789-09", "11.222.333/0001-81"],
+        "tipo": "CPF",                  // opcional
+        "verificar_existencia": true    // opcional
+    }
+    """
+    documentos = request.data.get("documentos")
+    tipo = request.data.get("tipo") or None
+    verificar_existencia = str(request.data.get("verificar_existencia", "")).lower() in ("1", "true")
+
+    if not isinstance(documentos, list):
+        return Response(
+            {"error": "documentos deve ser uma lista"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(documentos) > LIMITE_VALIDACAO_LOTE:
+        return Response(
+            {"error": f"Máximo de {LIMITE_VALIDACAO_LOTE} documentos por chamada"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if tipo is not None and not isinstance(tipo, str):
+        return Response(
+            {"error": "Tipo deve ser CPF ou CNPJ"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    tipo = tipo.upper() if tipo else None
+    if tipo not in (None, "CPF", "CNPJ"):
+        return Response(
+            {"error": "Tipo deve ser CPF ou CNPJ"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    resultado, tipos = batch_validators.validar_documentos(documentos, tipo=tipo)
+
+    existentes = {"CPF": set(), "CNPJ": set()}
+    if verificar_existencia:
+        # Uma query IN por tipo para todos os documentos válidos
+        for nome, campo in (("CPF", "cpf"), ("CNPJ", "cnpj")):
+            validos = {
+                limpo
+                for limpo, t, ok in zip(resultado.documentos, tipos, resultado.validos)
+                if ok and t == nome
+            }
+            if validos:
+                existentes[nome] = set(
+                    Inquilino.objects.filter(**{f"{campo}__in": validos}).values_list(
+                        campo, flat=True
+                    )
+                )
+
+    itens = []
+    for original, limpo, t, ok, erro in zip(
+        documentos, resultado.documentos, tipos, resultado.validos.tolist(), resultado.erros
+    ):
+        item = {"documento": original, "tipo": t, "valid": ok}
+        if ok:
+            item["documento_limpo"] = limpo
+            item["formatted"] = formatar_cpf(limpo) if t == "CPF" else formatar_cnpj(limpo)
+            if verificar_existencia:
+                item["exists"] = limpo in existentes[t]
+        else:
+            item["error"] = erro
+        itens.append(item)
+
+    total_validos = int(resultado.validos.sum())
+    return Response(
+        {
+            "total": len(itens),
+            "validos": total_validos,
+            "invalidos": len(itens) - total_validos,
+            "resultados": itens,
+        }
+    )
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def documentos_teste(request):
@@ -1124,10 +1595,118 @@ def listar_documentos_inquilino(request, inquilino_id):
         return JsonResponse({"success": False, "error": str(e)})
 
 
-class AssociacaoViewSet(viewsets.ModelViewSet):
-    queryset = InquilinoApartamento.objects.select_related(
-        "inquilino", "apartamento", "apartamento__building_name"
-    ).all()
+# ===== UPLOAD RESUMÍVEL (ESTILO TUS) =====
+
+
+class UploadResumivelViewSet(viewsets.ViewSet):
+    """
+    Upload em partes para vídeos e documentos grandes.
+
+    Fluxo:
+    - POST /uploads/ cria a sessão (destino, objeto_id, nome_arquivo, tamanho_total)
+    - HEAD/GET /uploads/{id}/ retorna o offset atual (cabeçalho Upload-Offset)
+    - PATCH /uploads/{id}/ anexa uma parte (Upload-Offset, Upload-Checksum opcional)
+    - POST /uploads/{id}/finalizar/ anexa o arquivo ao Aptos, Builders ou DocumentoInquilino
+    - DELETE /uploads/{id}/ cancela a sessão
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [CsrfExemptSessionAuthentication]
+
+    def _resposta(self, upload, status_code=status.HTTP_200_OK):
+        response = Response(UploadResumivelSerializer(upload).data, status=status_code)
+        response["Upload-Offset"] = str(upload.offset)
+        response["Upload-Length"] = str(upload.tamanho_total)
+        response["Tus-Resumable"] = "1.0.0"
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def _erro(self, exc):
+        return Response({"error": str(exc)}, status=exc.status_code)
+
+    def create(self, request):
+        serializer = UploadResumivelSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = upload_service.criar(
+                usuario=request.user if request.user.is_authenticated else None,
+                **serializer.validated_data,
+            )
+        except UploadError as e:
+            return self._erro(e)
+
+        response = self._resposta(upload, status.HTTP_201_CREATED)
+        response["Location"] = request.build_absolute_uri(f"{upload.pk}/")
+        return response
+
+    def retrieve(self, request, pk=None):
+        try:
+            return self._resposta(upload_service.obter(pk))
+        except UploadError as e:
+            return self._erro(e)
+
+    def partial_update(self, request, pk=None):
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            tamanho = int(request.headers.get("Content-Length", ""))
+        except ValueError:
+            return Response(
+                {"error": "Cabeçalhos Upload-Offset e Content-Length são obrigatórios"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            # Lê direto do stream WSGI: o corpo nunca é carregado em request.body
+            upload = upload_service.anexar_parte(
+                pk,
+                offset=offset,
+                stream=request._request,
+                tamanho=tamanho,
+                checksum=request.headers.get("Upload-Checksum"),
+            )
+        except UploadError as e:
+            return self._erro(e)
+
+        response = self._resposta(upload)
+        response.status_code = status.HTTP_204_NO_CONTENT
+        response.data = None
+        return response
+
+    def destroy(self, request, pk=None):
+        try:
+            upload_service.cancelar(pk)
+        except UploadError as e:
+            return self._erro(e)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"])
+    def finalizar(self, request, pk=None):
+        """Finaliza o upload e anexa o arquivo ao objeto de destino"""
+        try:
+            upload, objeto = upload_service.finalizar(
+                pk, usuario=request.user if request.user.is_authenticated else None
+            )
+        except UploadError as e:
+            return self._erro(e)
+
+        arquivo = objeto.arquivo if upload.destino == "DOCUMENTO_INQUILINO" else objeto.video
+        dados = UploadResumivelSerializer(upload).data
+        dados["arquivo"] = arquivo.name
+        if upload.destino == "DOCUMENTO_INQUILINO":
+            dados["documento_id"] = objeto.id
+            dados["versao"] = objeto.versao
+        return Response(dados)
+
+
+class AssociacaoViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
+    """
+    CRUD de associações inquilino-apartamento.
+
+    Campos esparsos via ?fields= e expansão de inquilino/apartamento
+    via ?expand=inquilino,apartamento (detalhe).
+    """
+
+    queryset = InquilinoApartamento.objects.all()
     permission_classes = [IsAdminUser]
     authentication_classes = [CsrfExemptSessionAuthentication]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -1135,6 +1714,9 @@ class AssociacaoViewSet(viewsets.ModelViewSet):
     ordering_fields = ["data_inicio", "data_fim", "created_at"]
     ordering = ["-data_inicio"]
 
+    def get_queryset(self):
+        return self.otimizar_queryset(super().get_queryset())
+
     def get_serializer_class(self):
         if self.action == "list":
             return AssociacaoListSerializer
@@ -1144,6 +1726,9 @@ class AssociacaoViewSet(viewsets.ModelViewSet):
         user = self.request.user if self.request.user.is_authenticated else None
         try:
             associacao = serializer.save(created_by=user)
+        except ValidationError as e:
+            # Sobreposição de períodos detectada no modelo ou pelo banco
+            raise DRFValidationError(e.messages)
         except IntegrityError:
             raise DRFValidationError(
                 "Apartamento indisponível. Já existe uma associação ativa para este imóvel."
@@ -1176,7 +1761,10 @@ class AssociacaoViewSet(viewsets.ModelViewSet):
         }
 
         user = self.request.user if self.request.user.is_authenticated else None
-        associacao = serializer.save(updated_by=user)
+        try:
+            associacao = serializer.save(updated_by=user)
+        except ValidationError as e:
+            raise DRFValidationError(e.messages)
 
         # Registrar no histórico
         HistoricoAssociacao.objects.create(
@@ -1230,6 +1818,7 @@ class AssociacaoViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    @na_replica
     def relatorio_ocupacao(self, request):
         """Relatório de ocupação de apartamentos"""
         from datetime import timedelta
@@ -1287,14 +1876,143 @@ class AssociacaoViewSet(viewsets.ModelViewSet):
 
 from datetime import timedelta
 
+from aptos.services.assinatura_relatorio_service import (
+    EXTENSOES,
+    assinatura_relatorio_service,
+    chave_relatorio,
+    chave_template,
+)
+from aptos.services.receita_service import receita_service
+from aptos.services.pacote_relatorio_service import FORMATOS_PACOTE, pacote_relatorio_service
+from aptos.services.pdf_service import RelatorioPDFOcupado
+from aptos.services.relatorio_sql_service import RelatorioSQLError, relatorio_sql_service
 from aptos.services.relatorio_service import relatorio_service
 
 
+MAX_MESES_PROJECAO = 120
+MAX_TAMANHO_PAGINA_HISTORICO = 1000
+
+CONTENT_TYPE_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CONTENT_TYPES_RELATORIO = {
+    "pdf": "application/pdf",
+    "excel": CONTENT_TYPE_EXCEL,
+    "json": "application/json",
+}
+
+
+def _datas_relatorio(request):
+    """Lê data_inicio/data_fim (YYYY-MM-DD); retorna (datas, resposta de erro)"""
+    datas = {}
+    for campo in ("data_inicio", "data_fim"):
+        valor = request.query_params.get(campo)
+        if not valor:
+            continue
+        try:
+            datas[campo] = datetime.strptime(valor, "%Y-%m-%d").date()
+        except ValueError:
+            return None, Response(
+                {"error": f"Formato de {campo} inválido. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    if "data_inicio" in datas and "data_fim" in datas and datas["data_inicio"] > datas["data_fim"]:
+        return None, Response(
+            {"error": "data_inicio deve ser anterior ou igual a data_fim"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return datas, None
+
+
+def _exportar_relatorio(dados, tipo, formato, nome_arquivo):
+    """Resposta PDF/Excel do relatório, ou None para JSON"""
+    if formato == "pdf":
+        buffer = relatorio_service.exportar_para_pdf(dados, tipo)
+        response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
+        response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}.pdf"'
+        return response
+
+    if formato == "excel":
+        buffer = relatorio_service.exportar_para_excel(dados, tipo)
+        response = HttpResponse(buffer.getvalue(), content_type=CONTENT_TYPE_EXCEL)
+        response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}.xlsx"'
+        return response
+
+    return None
+
+
+def _resposta_pre_gerada(chave, nome_arquivo, formato):
+    """Arquivo gerado por uma assinatura para o mesmo relatório, ou None"""
+    pre_gerado = assinatura_relatorio_service.abrir_pre_gerado(chave)
+    if pre_gerado is None:
+        return None
+
+    execucao, arquivo = pre_gerado
+    response = FileResponse(arquivo, content_type=CONTENT_TYPES_RELATORIO[formato])
+    if formato != "json":
+        response["Content-Disposition"] = (
+            f'attachment; filename="{nome_arquivo}.{EXTENSOES[formato.upper()]}"'
+        )
+    response["X-Relatorio-Gerado-Em"] = execucao.concluido_em.isoformat()
+    return response
+
+
+def _responder_relatorio(request, tipo, nome_arquivo, gerar, **filtros):
+    """Relatório em JSON, PDF, Excel ou pacote ZIP com vários formatos (bundle).
+
+    Um arquivo pré-gerado por assinatura com os mesmos filtros e formato é
+    servido direto. Senão, os dados vêm do cache de relatórios quando o
+    mesmo relatório acabou de ser gerado; `gerar(**filtros)` só roda quando
+    não estão lá.
+    """
+    formato = request.query_params.get("formato", "json").lower()
+    if formato == "bundle":
+        formatos = [
+            f.strip().lower()
+            for f in request.query_params.get("formatos", ",".join(FORMATOS_PACOTE)).split(",")
+            if f.strip()
+        ]
+        if not formatos or not set(formatos) <= set(FORMATOS_PACOTE):
+            return Response(
+                {"error": f"formatos deve conter apenas {', '.join(FORMATOS_PACOTE)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+    elif formato in CONTENT_TYPES_RELATORIO:
+        pre_gerado = _resposta_pre_gerada(
+            chave_relatorio(tipo, filtros, formato), nome_arquivo, formato
+        )
+        if pre_gerado is not None:
+            return pre_gerado
+
+    dados = pacote_relatorio_service.obter_dados(tipo, filtros, gerar)
+
+    if formato == "bundle":
+        response = StreamingHttpResponse(
+            pacote_relatorio_service.gerar_zip(
+                dados, tipo, nome_arquivo, tuple(dict.fromkeys(formatos))
+            ),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}.zip"'
+        return response
+
+    return _exportar_relatorio(dados, tipo, formato, nome_arquivo) or Response(dados)
+
+
 class RelatorioViewSet(viewsets.ViewSet):
     """ViewSet para geração de relatórios e analytics"""
 
     permission_classes = [IsAdminUser]
 
+    def handle_exception(self, exc):
+        # Vagas de renderização de PDF do nó esgotadas: o cliente tenta de novo
+        if isinstance(exc, RelatorioPDFOcupado):
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "30"},
+            )
+        return super().handle_exception(exc)
+
     @extend_schema(
         summary="Relatório de Inquilinos Ativos",
         description="Gera relatório completo de inquilinos ativos com opções de exportação",
@@ -1306,16 +2024,21 @@ class RelatorioViewSet(viewsets.ViewSet):
                 name="data_fim", type=str, description="Data fim (YYYY-MM-DD)"
             ),
             OpenApiParameter(
-                name="formato", type=str, description="Formato: json, pdf, excel"
+                name="formato", type=str, description="Formato: json, pdf, excel, bundle (ZIP)"
+            ),
+            OpenApiParameter(
+                name="formatos",
+                type=str,
+                description="Formatos do bundle, separados por vírgula (padrão json,pdf,excel)",
             ),
         ],
     )
     @action(detail=False, methods=["get"])
+    @na_replica
     def inquilinos_ativos(self, request):
         """Relatório de inquilinos ativos"""
         data_inicio = request.query_params.get("data_inicio")
         data_fim = request.query_params.get("data_fim")
-        formato = request.query_params.get("formato", "json").lower()
 
         if data_inicio:
             try:
@@ -1335,31 +2058,15 @@ class RelatorioViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        dados = relatorio_service.gerar_relatorio_inquilinos_ativos(
-            data_inicio=data_inicio, data_fim=data_fim
+        return _responder_relatorio(
+            request,
+            "INQUILINOS_ATIVOS",
+            "inquilinos_ativos",
+            relatorio_service.gerar_relatorio_inquilinos_ativos,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
         )
 
-        if formato == "pdf":
-            buffer = relatorio_service.exportar_para_pdf(dados, "INQUILINOS_ATIVOS")
-            response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
-            response["Content-Disposition"] = (
-                'attachment; filename="inquilinos_ativos.pdf"'
-            )
-            return response
-
-        elif formato == "excel":
-            buffer = relatorio_service.exportar_para_excel(dados, "INQUILINOS_ATIVOS")
-            response = HttpResponse(
-                buffer.getvalue(),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            response["Content-Disposition"] = (
-                'attachment; filename="inquilinos_ativos.xlsx"'
-            )
-            return response
-
-        return Response(dados)
-
     @extend_schema(
         summary="Relatório de Ocupação",
         description="Gera relatório de ocupação de apartamentos por período",
@@ -1371,16 +2078,21 @@ class RelatorioViewSet(viewsets.ViewSet):
                 name="data_fim", type=str, description="Data fim (YYYY-MM-DD)"
             ),
             OpenApiParameter(
-                name="formato", type=str, description="Formato: json, pdf, excel"
+                name="formato", type=str, description="Formato: json, pdf, excel, bundle (ZIP)"
+            ),
+            OpenApiParameter(
+                name="formatos",
+                type=str,
+                description="Formatos do bundle, separados por vírgula (padrão json,pdf,excel)",
             ),
         ],
     )
     @action(detail=False, methods=["get"])
+    @na_replica
     def ocupacao(self, request):
         """Relatório de ocupação"""
         data_inicio = request.query_params.get("data_inicio")
         data_fim = request.query_params.get("data_fim")
-        formato = request.query_params.get("formato", "json").lower()
 
         if data_inicio:
             try:
@@ -1400,67 +2112,298 @@ class RelatorioViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        dados = relatorio_service.gerar_relatorio_ocupacao(
-            data_inicio=data_inicio, data_fim=data_fim
+        return _responder_relatorio(
+            request,
+            "OCUPACAO",
+            "ocupacao",
+            relatorio_service.gerar_relatorio_ocupacao,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
         )
 
-        if formato == "pdf":
-            buffer = relatorio_service.exportar_para_pdf(dados, "OCUPACAO")
-            response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
-            response["Content-Disposition"] = 'attachment; filename="ocupacao.pdf"'
-            return response
-
-        elif formato == "excel":
-            buffer = relatorio_service.exportar_para_excel(dados, "OCUPACAO")
-            response = HttpResponse(
-                buffer.getvalue(),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            response["Content-Disposition"] = 'attachment; filename="ocupacao.xlsx"'
-            return response
-
-        return Response(dados)
-
     @extend_schema(
         summary="Relatório de Inadimplentes",
         description="Gera relatório de inquilinos inadimplentes",
         parameters=[
             OpenApiParameter(
-                name="formato", type=str, description="Formato: json, pdf, excel"
+                name="formato", type=str, description="Formato: json, pdf, excel, bundle (ZIP)"
+            ),
+            OpenApiParameter(
+                name="formatos",
+                type=str,
+                description="Formatos do bundle, separados por vírgula (padrão json,pdf,excel)",
             ),
         ],
     )
     @action(detail=False, methods=["get"])
+    @na_replica
     def inadimplentes(self, request):
         """Relatório de inadimplentes"""
-        formato = request.query_params.get("formato", "json").lower()
+        return _responder_relatorio(
+            request,
+            "INADIMPLENTES",
+            "inadimplentes",
+            relatorio_service.gerar_relatorio_inadimplentes,
+        )
+
+    @extend_schema(
+        summary="Relatório de Rotatividade",
+        description=(
+            "Entradas e saídas por mês e edifício, mediana de permanência e "
+            "mediana de dias para relocar um apartamento"
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="data_inicio", type=str, description="Data início (YYYY-MM-DD)"
+            ),
+            OpenApiParameter(
+                name="data_fim", type=str, description="Data fim (YYYY-MM-DD)"
+            ),
+            OpenApiParameter(
+                name="formato", type=str, description="Formato: json, pdf, excel, bundle (ZIP)"
+            ),
+            OpenApiParameter(
+                name="formatos",
+                type=str,
+                description="Formatos do bundle, separados por vírgula (padrão json,pdf,excel)",
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    @na_replica
+    def rotatividade(self, request):
+        """Relatório de rotatividade"""
+        datas, erro = _datas_relatorio(request)
+        if erro:
+            return erro
+
+        return _responder_relatorio(
+            request,
+            "ROTATIVIDADE",
+            "rotatividade",
+            relatorio_service.gerar_relatorio_rotatividade,
+            **datas,
+        )
 
-        dados = relatorio_service.gerar_relatorio_inadimplentes()
+    @extend_schema(
+        summary="Histórico de Locações",
+        description=(
+            "Linha do tempo das locações por apartamento (ou por inquilino), com "
+            "os dias vagos antes de cada locação. JSON paginado; PDF e Excel "
+            "trazem o histórico completo dos filtros"
+        ),
+        parameters=[
+            OpenApiParameter(name="apartamento", type=int, description="ID do apartamento"),
+            OpenApiParameter(name="inquilino", type=int, description="ID do inquilino"),
+            OpenApiParameter(
+                name="data_inicio", type=str, description="Data início (YYYY-MM-DD)"
+            ),
+            OpenApiParameter(
+                name="data_fim", type=str, description="Data fim (YYYY-MM-DD)"
+            ),
+            OpenApiParameter(name="page", type=int, description="Página (JSON)"),
+            OpenApiParameter(
+                name="page_size",
+                type=int,
+                description=f"Itens por página (máximo {MAX_TAMANHO_PAGINA_HISTORICO})",
+            ),
+            OpenApiParameter(
+                name="formato", type=str, description="Formato: json, pdf, excel, bundle (ZIP)"
+            ),
+            OpenApiParameter(
+                name="formatos",
+                type=str,
+                description="Formatos do bundle, separados por vírgula (padrão json,pdf,excel)",
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    @na_replica
+    def historico_locacoes(self, request):
+        """Relatório de histórico de locações"""
+        datas, erro = _datas_relatorio(request)
+        if erro:
+            return erro
+        formato = request.query_params.get("formato", "json").lower()
 
-        if formato == "pdf":
-            buffer = relatorio_service.exportar_para_pdf(dados, "INADIMPLENTES")
-            response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
-            response["Content-Disposition"] = 'attachment; filename="inadimplentes.pdf"'
-            return response
+        filtros = dict(datas)
+        try:
+            for campo, filtro in (("apartamento", "apartamento_id"), ("inquilino", "inquilino_id")):
+                if request.query_params.get(campo):
+                    filtros[filtro] = int(request.query_params[campo])
+            pagina = int(request.query_params.get("page", 1))
+            tamanho_pagina = int(request.query_params.get("page_size", 100))
+        except ValueError:
+            return Response(
+                {"error": "apartamento, inquilino, page e page_size devem ser inteiros"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if pagina < 1 or not 1 <= tamanho_pagina <= MAX_TAMANHO_PAGINA_HISTORICO:
+            return Response(
+                {"error": f"page deve ser >= 1 e page_size entre 1 e {MAX_TAMANHO_PAGINA_HISTORICO}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        elif formato == "excel":
-            buffer = relatorio_service.exportar_para_excel(dados, "INADIMPLENTES")
-            response = HttpResponse(
-                buffer.getvalue(),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        if formato in ("pdf", "excel", "bundle"):
+            # Arquivos trazem o histórico completo dos filtros
+            return _responder_relatorio(
+                request,
+                "HISTORICO_LOCACOES",
+                "historico_locacoes",
+                relatorio_service.gerar_relatorio_historico_locacoes,
+                **filtros,
             )
-            response["Content-Disposition"] = (
-                'attachment; filename="inadimplentes.xlsx"'
+
+        dados = relatorio_service.gerar_relatorio_historico_locacoes(
+            pagina=pagina, tamanho_pagina=tamanho_pagina, **filtros
+        )
+        return Response(dados)
+
+    @extend_schema(
+        summary="Receita e Vacância",
+        description=(
+            "Rent roll mês a mês (aluguel proporcional aos dias ocupados), "
+            "perda por vacância em relação ao preço de tabela dos apartamentos "
+            "e projeção de receita dos próximos meses"
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="data_inicio", type=str, description="Data início (YYYY-MM-DD)"
+            ),
+            OpenApiParameter(
+                name="data_fim", type=str, description="Data fim (YYYY-MM-DD)"
+            ),
+            OpenApiParameter(
+                name="meses_projecao",
+                type=int,
+                description=f"Meses projetados após o atual (padrão 12, máximo {MAX_MESES_PROJECAO})",
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    @na_replica
+    def receita(self, request):
+        """Rent roll, perda por vacância e receita projetada"""
+        datas, erro = _datas_relatorio(request)
+        if erro:
+            return erro
+
+        try:
+            meses_projecao = int(request.query_params.get("meses_projecao", 12))
+        except ValueError:
+            meses_projecao = -1
+        if not 0 <= meses_projecao <= MAX_MESES_PROJECAO:
+            return Response(
+                {"error": f"meses_projecao deve ser um inteiro entre 0 e {MAX_MESES_PROJECAO}"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            return response
 
+        dados = receita_service.gerar_relatorio_receita(
+            meses_projecao=meses_projecao, **datas
+        )
         return Response(dados)
 
+    @extend_schema(
+        summary="Templates de relatório SQL",
+        description="Lista os templates ativos com SQL e seus parâmetros padrão",
+    )
+    @action(detail=False, methods=["get"])
+    def templates(self, request):
+        """Templates de relatório executáveis"""
+        templates = RelatorioTemplate.objects.filter(ativo=True).exclude(
+            Q(query_sql__isnull=True) | Q(query_sql="")
+        ).order_by("nome")
+        return Response(
+            [
+                {
+                    "id": template.id,
+                    "nome": template.nome,
+                    "tipo": template.tipo,
+                    "descricao": template.descricao,
+                    "parametros_padrao": template.parametros_padrao,
+                }
+                for template in templates
+            ]
+        )
+
+    @extend_schema(
+        summary="Executar template de relatório SQL",
+        description=(
+            "Executa o query_sql do template em transação somente leitura, com "
+            "tempo limite e parâmetros nomeados; registra a execução"
+        ),
+        request=inline_serializer(
+            name="ExecutarTemplateRequest",
+            fields={
+                "template": serializers.IntegerField(),
+                "parametros": serializers.DictField(required=False),
+                "formato": serializers.ChoiceField(
+                    choices=["json", "pdf", "excel"], required=False
+                ),
+            },
+        ),
+    )
+    @action(detail=False, methods=["post"])
+    @na_replica
+    def executar_template(self, request):
+        """Executa um RelatorioTemplate com SQL"""
+        formato = str(request.data.get("formato", "json")).lower()
+        parametros = request.data.get("parametros") or {}
+        if formato not in ("json", "pdf", "excel") or not isinstance(parametros, dict):
+            return Response(
+                {"error": "formato deve ser json, pdf ou excel e parametros um objeto"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        template_id = request.data.get("template")
+        if not str(template_id).isdigit():
+            return Response(
+                {"error": "template deve ser o id de um template"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        template = get_object_or_404(RelatorioTemplate, pk=template_id, ativo=True)
+
+        try:
+            if formato in ("pdf", "excel"):
+                valores = relatorio_sql_service.preparar_parametros(template, parametros)
+                pre_gerado = _resposta_pre_gerada(
+                    chave_template(template, valores, formato), f"relatorio_{template.id}", formato
+                )
+                if pre_gerado is not None:
+                    return pre_gerado
+
+            execucao, colunas, linhas = relatorio_sql_service.executar(
+                template, request.user, parametros, formato=formato
+            )
+            if formato == "pdf":
+                buffer = relatorio_service.exportar_tabela_pdf(template.nome, colunas, linhas)
+                response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
+                response["Content-Disposition"] = f'attachment; filename="relatorio_{template.id}.pdf"'
+                return response
+            if formato == "excel":
+                buffer = relatorio_service.exportar_tabela_excel(template.nome, colunas, linhas)
+                response = HttpResponse(buffer.getvalue(), content_type=CONTENT_TYPE_EXCEL)
+                response["Content-Disposition"] = f'attachment; filename="relatorio_{template.id}.xlsx"'
+                return response
+            dados = [dict(zip(colunas, linha)) for linha in linhas]
+        except RelatorioSQLError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "execucao": str(execucao.id),
+                "template": template.nome,
+                "colunas": colunas,
+                "dados": dados,
+                "total": len(dados),
+            }
+        )
+
     @extend_schema(
         summary="Métricas para Dashboard",
         description="Retorna métricas consolidadas para dashboard",
     )
     @action(detail=False, methods=["get"])
+    @na_replica
     def metricas_dashboard(self, request):
         """Métricas para dashboard"""
         # Métricas básicas
@@ -1524,3 +2467,23 @@ class RelatorioViewSet(viewsets.ViewSet):
                 "tendencia_ocupacao": list(reversed(tendencia)),
             }
         )
+
+
+class AssinaturaRelatorioViewSet(viewsets.ModelViewSet):
+    """Assinaturas de relatórios pré-gerados fora do horário de pico"""
+
+    queryset = AssinaturaRelatorio.objects.select_related("template").order_by("proxima_execucao")
+    serializer_class = AssinaturaRelatorioSerializer
+    permission_classes = [IsAdminUser]
+
+    def perform_create(self, serializer):
+        serializer.save(
+            usuario=self.request.user,
+            proxima_execucao=assinatura_relatorio_service.proxima_execucao(
+                serializer.validated_data["agenda"]
+            ),
+        )
+
+    def perform_update(self, serializer):
+        agenda = serializer.validated_data.get("agenda", serializer.instance.agenda)
+        serializer.save(proxima_execucao=assinatura_relatorio_service.proxima_execucao(agenda))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark da validação de CPF/CNPJ: funções escalares x kernel NumPy.
+
+Gera N documentos sintéticos (metade válidos, metade com dígito
+verificador alterado; um terço formatado) e compara
+validators.validar_cpf/validar_cnpj em laço com
+batch_validators.validar_cpfs/validar_cnpjs.
+
+Uso:
+    python scripts/bench_batch_validators.py --n 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.conf.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.exceptions import ValidationError  # noqa: E402
+
+from aptos import batch_validators  # noqa: E402
+from aptos.utils import formatar_cnpj, formatar_cpf  # noqa: E402
+from aptos.validators import validar_cnpj, validar_cpf  # noqa: E402
+
+
+def gerar(n, tamanho, pesos1, pesos2, formatador, seed=42):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 10, size=(n, tamanho - 2))
+    dv1 = batch_validators._digito_verificador(base, pesos1)
+    dv2 = batch_validators._digito_verificador(np.column_stack([base, dv1]), pesos2)
+    matriz = np.column_stack([base, dv1, dv2])
+    # Metade com o último dígito alterado
+    matriz[1::2, -1] = (matriz[1::2, -1] + 1) % 10
+
+    texto = (matriz.astype(np.uint8) + ord('0')).tobytes().decode('ascii')
+    documentos = [texto[i:i + tamanho] for i in range(0, n * tamanho, tamanho)]
+    for i in range(0, n, 3):
+        documentos[i] = formatador(documentos[i])
+    return documentos
+
+
+def escalar(documentos, validador):
+    validos = 0
+    for documento in documentos:
+        try:
+            validador(documento)
+            validos += 1
+        except ValidationError:
+            pass
+    return validos
+
+
+def medir(nome, documentos, validador, funcao_lote):
+    inicio = time.perf_counter()
+    validos_escalar = escalar(documentos, validador)
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultado = funcao_lote(documentos)
+    t_lote = time.perf_counter() - inicio
+
+    assert int(resultado.validos.sum()) == validos_escalar, 'resultados divergentes'
+    n = len(documentos)
+    print(
+        f"{nome}: {n} documentos, {validos_escalar} válidos\n"
+        f"  escalar: {t_escalar:7.2f}s ({n / t_escalar:12,.0f} docs/s)\n"
+        f"  NumPy:   {t_lote:7.2f}s ({n / t_lote:12,.0f} docs/s) -> {t_escalar / t_lote:.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cpfs = gerar(
+        args.n, 11, batch_validators.PESOS_CPF_DV1, batch_validators.PESOS_CPF_DV2, formatar_cpf
+    )
+    medir('CPF', cpfs, validar_cpf, batch_validators.validar_cpfs)
+
+    cnpjs = gerar(
+        args.n, 14, batch_validators.PESOS_CNPJ_DV1, batch_validators.PESOS_CNPJ_DV2, formatar_cnpj
+    )
+    medir('CNPJ', cnpjs, validar_cnpj, batch_validators.validar_cnpjs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Benchmark de renderização JSON: JSONRenderer (stdlib) x ORJSONRenderer.
+
+Mede tempo de render e pico de alocação (tracemalloc) para:
+- uma página de 1.000 linhas do InquilinoListSerializer
+- um payload "cru" com Decimal/datetime/UUID, como os de métricas e
+  relatórios que montam dicts sem passar por serializers
+
+Não acessa o banco: os inquilinos são instâncias em memória.
+
+Uso:
+    python scripts/bench_json_renderer.py --rows 1000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.conf.development')
+django.setup()
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from aptos.models import Inquilino
+from aptos.renderers import ORJSONRenderer
+from aptos.serializers import InquilinoListSerializer
+
+
+def pagina_inquilinos(rows):
+    agora = timezone.now()
+    inquilinos = []
+    for i in range(rows):
+        inquilino = Inquilino(
+            id=i + 1,
+            tipo='PF' if i % 3 else 'PJ',
+            nome_completo=f'Inquilino de Teste {i}',
+            razao_social=f'Empresa {i} Ltda',
+            cpf=f'{i:011d}',
+            cnpj=f'{i:014d}',
+            email=f'inquilino{i}@example.com',
+            telefone='11999990000',
+            status='ATIVO',
+            created_at=agora - timedelta(days=i),
+        )
+        inquilino.total_apartamentos = i % 3
+        inquilinos.append(inquilino)
+
+    results = InquilinoListSerializer(inquilinos, many=True).data
+    return {'count': rows, 'next': None, 'previous': None, 'results': results}
+
+
+def payload_cru(rows):
+    agora = timezone.now()
+    return {
+        'id': uuid.uuid4(),
+        'gerado_em': agora,
+        'linhas': [
+            {
+                'associacao_id': i,
+                'valor_aluguel': Decimal('1500.00') + i,
+                'data_inicio': date(2024, 1, 1) + timedelta(days=i % 365),
+                'timestamp': agora - timedelta(minutes=i),
+                'execucao': uuid.uuid4(),
+            }
+            for i in range(rows)
+        ],
+    }
+
+
+def medir(renderer, data, repeat):
+    renderer.render(data)  # aquecimento
+
+    inicio = time.perf_counter()
+    for _ in range(repeat):
+        saida = renderer.render(data)
+    duracao = (time.perf_counter() - inicio) / repeat
+
+    tracemalloc.start()
+    renderer.render(data)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracao, pico, len(saida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    cenarios = [
+        (f'InquilinoListSerializer ({args.rows} linhas)', pagina_inquilinos(args.rows)),
+        (f'Payload cru Decimal/datetime/UUID ({args.rows} linhas)', payload_cru(args.rows)),
+    ]
+    renderers = [('stdlib', JSONRenderer()), ('orjson', ORJSONRenderer())]
+
+    for titulo, data in cenarios:
+        print(f'\n{titulo}')
+        base = None
+        for nome, renderer in renderers:
+            duracao, pico, tamanho = medir(renderer, data, args.repeat)
+            base = base or duracao
+            print(
+                f'  {nome:>7}: {duracao * 1000:8.3f} ms/render '
+                f'({base / duracao:5.1f}x) | pico alocado {pico / 1024:8.1f} KB '
+                f'| {tamanho / 1024:7.1f} KB de saída'
+            )
+
+
+if __name__ == '__main__':
+    main()
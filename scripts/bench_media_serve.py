@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Benchmark do serve_media: RSS do worker e throughput com vídeos concorrentes.
+
+Compara a implementação antiga (Range lido inteiro para memória com
+f.read(length)) com a atual (FileResponse sobre RangeFile, em blocos).
+Cada modo roda em um subprocesso próprio para que o pico de RSS
+(ru_maxrss) seja medido de forma independente.
+
+Uso:
+    python scripts/bench_media_serve.py --size-mb 200 --clients 8
+    python scripts/bench_media_serve.py --mode atual --clients 16
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.conf.development')
+
+
+def _legacy_range_response(full_path, range_header, content_type='video/mp4'):
+    """Reprodução fiel do caminho de Range anterior (tudo em memória)."""
+    from django.http import HttpResponse
+
+    file_size = os.path.getsize(full_path)
+    range_value = range_header.strip().split('=')[1]
+    start_str, end_str = (range_value.split('-') + [None])[:2]
+    start = int(start_str) if start_str else 0
+    end = int(end_str) if end_str else file_size - 1
+    length = end - start + 1
+    with open(full_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(length)
+    return HttpResponse(data, status=206, content_type=content_type)
+
+
+def _consume(response):
+    if response.streaming:
+        total = 0
+        for chunk in response.streaming_content:
+            total += len(chunk)
+        response.close()
+        return total
+    return len(response.content)
+
+
+def run_mode(mode, media_root, rel_path, clients, rounds):
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.MEDIA_ROOT = media_root
+    settings.MEDIA_ACCEL_REDIRECT_PREFIX = None
+
+    from django.test import RequestFactory
+    from app.media_serve import serve_media
+
+    factory = RequestFactory()
+    full_path = os.path.join(media_root, rel_path)
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def stream(_):
+        request = factory.get(f'/media/{rel_path}', HTTP_RANGE='bytes=0-')
+        if mode == 'legado':
+            response = _legacy_range_response(full_path, 'bytes=0-')
+        else:
+            response = serve_media(request, rel_path)
+        return _consume(response)
+
+    inicio = time.perf_counter()
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(rounds):
+            total_bytes += sum(pool.map(stream, range(clients)))
+    duracao = time.perf_counter() - inicio
+
+    rss_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    mb = total_bytes / (1024 * 1024)
+    print(
+        f"{mode:>7}: {mb:9.1f} MB em {duracao:6.2f}s "
+        f"({mb / duracao:8.1f} MB/s) | RSS pico {rss_pico / 1024:8.1f} MB "
+        f"(+{(rss_pico - rss_inicial) / 1024:.1f} MB)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--mode', choices=['legado', 'atual', 'ambos'], default='ambos')
+    parser.add_argument('--media-root', help=argparse.SUPPRESS)
+    parser.add_argument('--rel-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode != 'ambos':
+        run_mode(args.mode, args.media_root, args.rel_path, args.clients, args.rounds)
+        return
+
+    with tempfile.TemporaryDirectory() as media_root:
+        rel_path = 'aptos/aptos_videos/bench.mp4'
+        full_path = os.path.join(media_root, rel_path)
+        os.makedirs(os.path.dirname(full_path))
+        bloco = os.urandom(1024 * 1024)
+        with open(full_path, 'wb') as f:
+            for _ in range(args.size_mb):
+                f.write(bloco)
+
+        print(
+            f"Arquivo de {args.size_mb} MB, {args.clients} clientes concorrentes, "
+            f"{args.rounds} rodadas, Range: bytes=0-"
+        )
+        for mode in ('legado', 'atual'):
+            subprocess.run(
+                [
+                    sys.executable, __file__, '--mode', mode,
+                    '--media-root', media_root, '--rel-path', rel_path,
+                    '--clients', str(args.clients), '--rounds', str(args.rounds),
+                ],
+                check=True,
+            )
+
+
+if __name__ == '__main__':
+    main()
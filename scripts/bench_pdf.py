@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Benchmark da exportação PDF: Table único x LongTable em partes (sequencial e em paralelo).
+
+Gera linhas sintéticas no formato do relatório de inquilinos ativos e
+mede, para cada tamanho, a implementação anterior (um Table com todas as
+linhas, larguras e alturas calculadas pelo ReportLab), o pdf_service com
+as partes renderizadas em sequência (--processos 1) e em paralelo. O
+pool é aquecido antes da medição (o primeiro uso paga o spawn dos
+processos).
+
+Uso:
+    python scripts/bench_pdf.py --linhas 1000 10000 50000 --processos 4
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.conf.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from pypdf import PdfReader  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle  # noqa: E402
+
+from aptos.services.pdf_service import ESTILOS, PDFService  # noqa: E402
+
+CABECALHO = ['Nome', 'Tipo', 'Documento', 'Email', 'Apartamentos']
+
+
+def gerar_linhas(n):
+    return [
+        [f'Inquilino {i}'[:30], 'Pessoa Física', f'{i:011d}', f'inquilino{i}@example.com'[:25],
+         f'{i % 500} (Edifício {i % 7})'[:20]]
+        for i in range(n)
+    ]
+
+
+def pdf_anterior(linhas):
+    """Implementação anterior: um único Table com todas as linhas"""
+    buffer = io.BytesIO()
+    table = Table([CABECALHO] + linhas, repeatRows=1)
+    table.setStyle(TableStyle(ESTILOS['relatorio']['comandos']))
+    SimpleDocTemplate(buffer, pagesize=A4).build([table])
+    return buffer.getvalue()
+
+
+def medir(nome, funcao, linhas):
+    inicio = time.perf_counter()
+    conteudo = funcao(linhas)
+    tempo = time.perf_counter() - inicio
+    paginas = len(PdfReader(io.BytesIO(conteudo)).pages)
+    print(f"  {nome:10s} {tempo:8.2f}s  {paginas:5d} páginas  {len(conteudo) / 1024 / 1024:6.1f} MiB")
+    return tempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--linhas-por-parte', type=int, default=2000)
+    parser.add_argument('--sem-anterior', action='store_true',
+                        help='não mede o Table único (lento acima de 10k linhas)')
+    args = parser.parse_args()
+
+    vagas = tempfile.mkdtemp(prefix='bench-pdf-')
+    opcoes = dict(linhas_por_parte=args.linhas_por_parte, diretorio_vagas=vagas,
+                  max_concorrentes=args.processos)
+    sequencial = PDFService(processos=1, **opcoes)
+    paralelo = PDFService(processos=args.processos, **opcoes)
+
+    def renderizador(servico):
+        return lambda linhas: servico.renderizar(
+            'Relatório - Inquilinos Ativos', CABECALHO, linhas, info='Gerado em: hoje<br/>'
+        ).getvalue()
+
+    # Aquece o pool (spawn dos processos) fora da medição
+    renderizador(paralelo)(gerar_linhas(args.linhas_por_parte * args.processos * 2))
+
+    print(f"{os.cpu_count()} CPUs, {args.processos} processos, {args.linhas_por_parte} linhas por parte")
+    for n in args.linhas:
+        linhas = gerar_linhas(n)
+        print(f"{n} linhas")
+        tempo_sequencial = medir('partes', renderizador(sequencial), linhas)
+        tempo_paralelo = medir('paralelo', renderizador(paralelo), linhas)
+        if not args.sem_anterior:
+            tempo_anterior = medir('anterior', pdf_anterior, linhas)
+            print(f"  ganho: {tempo_anterior / tempo_sequencial:.1f}x (partes), "
+                  f"{tempo_anterior / tempo_paralelo:.1f}x (paralelo)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark do cálculo de rent roll (receita_service.calcular_receita).
+
+Gera N associações sintéticas distribuídas em A anos (20% sem data
+fim) sobre M apartamentos e mede o cálculo mês a mês do período
+inteiro, incluindo a conversão das linhas (como vêm do values_list)
+para arrays NumPy.
+
+Uso:
+    python scripts/bench_receita.py --n 100000 --anos 10
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.conf.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from aptos.services.receita_service import calcular_receita  # noqa: E402
+
+
+def gerar_linhas(n, anos, apartamentos, seed=42):
+    rng = np.random.default_rng(seed)
+    inicio = date(2015, 1, 1)
+    dias = anos * 365
+    inicios = rng.integers(0, dias, size=n)
+    duracoes = rng.integers(30, 3 * 365, size=n)
+    sem_fim = rng.random(n) < 0.2
+    valores = rng.integers(800, 5000, size=n)
+    precos = rng.integers(800, 5000, size=apartamentos).astype(float)
+    apartamento = rng.integers(0, apartamentos, size=n)
+
+    linhas = [
+        (
+            inicio + timedelta(days=int(i)),
+            None if s else inicio + timedelta(days=int(i + d)),
+            float(v),
+            precos[a],
+        )
+        for i, d, s, v, a in zip(inicios, duracoes, sem_fim, valores, apartamento)
+    ]
+    return linhas, precos, inicio, inicio + timedelta(days=dias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=100_000)
+    parser.add_argument('--anos', type=int, default=10)
+    parser.add_argument('--apartamentos', type=int, default=20_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    linhas, precos, inicio, fim = gerar_linhas(args.n, args.anos, args.apartamentos)
+
+    tempos = []
+    for _ in range(args.repeticoes):
+        t0 = time.perf_counter()
+        inicios, fins, valores, ocupados = zip(*linhas)
+        tabela = calcular_receita(
+            np.array(inicios, dtype='datetime64[D]'),
+            np.array(fins, dtype='datetime64[D]'),
+            np.array(valores, dtype=np.float64),
+            np.array(ocupados, dtype=np.float64),
+            precos,
+            inicio,
+            fim,
+        )
+        tempos.append(time.perf_counter() - t0)
+
+    print(
+        f"{args.n} associações, {len(tabela)} meses, {args.apartamentos} apartamentos\n"
+        f"  melhor: {min(tempos) * 1000:8.1f} ms   mediana: {np.median(tempos) * 1000:8.1f} ms\n"
+        f"  receita total: {tabela['receita'].sum():,.2f}"
+    )
+
+
+if __name__ == '__main__':
+    main()
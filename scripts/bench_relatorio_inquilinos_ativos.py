@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Benchmark do relatório de inquilinos ativos: laço com prefetch x projeção values().
+
+Cria um banco de teste descartável (esquema gerado dos modelos, sem
+migrações, como na suíte de testes) com N inquilinos ativos (a maioria
+com uma associação ativa e parte com duas) e compara a implementação
+anterior (modelos + filter() por inquilino) com
+RelatorioService.iterar_inquilinos_ativos, medindo número de queries,
+tempo e pico de memória (tracemalloc).
+
+Uso:
+    python scripts/bench_relatorio_inquilinos_ativos.py --n 50000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.conf.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.apps import apps  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import DatabaseError, connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from aptos.models import Aptos, Builders, Inquilino, InquilinoApartamento  # noqa: E402
+from aptos.services.relatorio_service import relatorio_service  # noqa: E402
+
+
+def popular(n):
+    predio = Builders.objects.create(
+        name='Edifício Benchmark', street='Rua A', neighborhood='Centro',
+        city='São Paulo', state='SP', zip_code='01000-000', country='Brasil',
+    )
+    Inquilino.objects.bulk_create(
+        [
+            Inquilino(
+                tipo='PF', nome_completo=f'Inquilino {i}', cpf=f'{i:011d}',
+                email=f'inquilino{i}@example.com', telefone='11999990000', status='ATIVO',
+            )
+            for i in range(n)
+        ],
+        batch_size=5000,
+    )
+    Aptos.objects.bulk_create(
+        [
+            Aptos(
+                unit_number=str(i), building_name=predio, description='', rental_price=1500,
+                number_of_bedrooms=2, number_of_bathrooms=1, square_footage=60,
+            )
+            for i in range(n + n // 5)
+        ],
+        batch_size=5000,
+    )
+    inquilinos = list(Inquilino.objects.order_by('id').values_list('id', flat=True))
+    apartamentos = list(Aptos.objects.order_by('id').values_list('id', flat=True))
+    inicio = date.today() - timedelta(days=365)
+
+    associacoes = [
+        InquilinoApartamento(
+            inquilino_id=inquilino_id, apartamento_id=apartamentos[i], data_inicio=inicio
+        )
+        for i, inquilino_id in enumerate(inquilinos)
+        if i % 10
+    ]
+    # Um em cada cinco inquilinos com um segundo apartamento
+    associacoes += [
+        InquilinoApartamento(
+            inquilino_id=inquilino_id, apartamento_id=apartamentos[n + i // 5], data_inicio=inicio
+        )
+        for i, inquilino_id in enumerate(inquilinos)
+        if i % 5 == 0
+    ]
+    InquilinoApartamento.objects.bulk_create(associacoes, batch_size=5000)
+
+
+def relatorio_anterior():
+    """Implementação anterior: prefetch ignorado pelo filter() em cada inquilino"""
+    inquilinos = Inquilino.objects.filter(status='ATIVO').select_related().prefetch_related(
+        'associacoes_apartamento__apartamento__building_name'
+    )
+    dados = []
+    for inquilino in inquilinos:
+        associacoes_ativas = inquilino.associacoes_apartamento.filter(ativo=True)
+        apartamentos = ', '.join([
+            f"{assoc.apartamento.unit_number} ({assoc.apartamento.building_name.name})"
+            for assoc in associacoes_ativas
+        ])
+        dados.append({
+            'id': inquilino.id,
+            'tipo': inquilino.get_tipo_display(),
+            'nome': inquilino.nome_completo or inquilino.razao_social,
+            'documento': inquilino.cpf or inquilino.cnpj,
+            'email': inquilino.email,
+            'telefone': inquilino.telefone,
+            'apartamentos': apartamentos or 'Nenhum',
+            'data_cadastro': inquilino.created_at.strftime('%d/%m/%Y'),
+        })
+    return len(dados)
+
+
+def relatorio_projecao():
+    total = 0
+    for _ in relatorio_service.iterar_inquilinos_ativos():
+        total += 1
+    return total
+
+
+def medir(nome, funcao):
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as contexto:
+        inicio = time.perf_counter()
+        linhas = funcao()
+        tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{nome:10s} {linhas:7d} linhas  {len(contexto.captured_queries):7d} queries  "
+        f"{tempo:7.2f}s  pico {pico / 1024 / 1024:8.1f} MiB"
+    )
+    return tempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=50_000)
+    parser.add_argument('--sem-anterior', action='store_true',
+                        help='mede só a projeção (a versão anterior faz N+1 queries)')
+    args = parser.parse_args()
+
+    settings.MIGRATION_MODULES = {app.label: None for app in apps.get_app_configs()}
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        popular(args.n)
+        tempo_projecao = medir('projeção', relatorio_projecao)
+        if not args.sem_anterior:
+            try:
+                tempo_anterior = medir('anterior', relatorio_anterior)
+            except DatabaseError as erro:
+                # SQLite recusa o IN do prefetch com dezenas de milhares de ids
+                tracemalloc.stop()
+                print(f"anterior   falhou: {erro}")
+            else:
+                print(f"ganho: {tempo_anterior / tempo_projecao:.1f}x")
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -183,7 +183,7 @@ def test_optimized_managers():
 
         if queries > 3:
             print_warning(f"Query count is higher than expected: {queries} queries")
-            print_info("Expected: 1-3 queries with select_related/prefetch_related")
+            print_info("Expected: 1 query with SQL-side annotations")
         else:
             print_success(f"Query optimization working well: only {queries} queries")
 
@@ -211,7 +211,9 @@ def test_query_optimization():
         # Test with optimization
         @count_queries
         def query_with_optimization():
-            inquilinos = list(Inquilino.objects.get_list_optimized()[:5])
+            inquilinos = list(
+                Inquilino.objects.get_list_optimized().prefetch_related('associacoes_apartamento')[:5]
+            )
             for inq in inquilinos:
                 _ = list(inq.associacoes_apartamento.all())
             return inquilinos